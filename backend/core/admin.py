@@ -1,6 +1,9 @@
 # core/admin.py
 from django.contrib import admin
+from django.utils import timezone
 
+from . import phones
+from .pagination import ApproximateCountPaginator
 from .models import (
     Restaurant,
     DeliveryZone,
@@ -15,9 +18,24 @@ from .models import (
     Order,
     OrderItem,
     Event,
+    ArchivedOrder,
+    OutboxMessage,
+    Job,
 )
 
 
+class LargeTableAdmin(admin.ModelAdmin):
+    """
+    Changelists de tablas grandes: conteo aproximado en Postgres
+    (core/pagination.py), sin el segundo COUNT del total sin filtrar y
+    sin conteos por faceta.
+    """
+    paginator = ApproximateCountPaginator
+    show_full_result_count = False
+    show_facets = admin.ShowFacets.NEVER
+
+
+
 @admin.register(Restaurant)
 class RestaurantAdmin(admin.ModelAdmin):
     list_display = ("name", "slug", "is_active", "max_daily_orders")
@@ -33,10 +51,20 @@ class DeliveryZoneAdmin(admin.ModelAdmin):
 
 
 @admin.register(Customer)
-class CustomerAdmin(admin.ModelAdmin):
-    list_display = ("name", "phone", "email", "is_active")
+class CustomerAdmin(LargeTableAdmin):
+    list_display = ("name", "phone", "email", "is_active", "orders_count", "lifetime_value_cop", "last_order_at")
     search_fields = ("name", "phone", "email")
     list_filter = ("is_active",)
+    readonly_fields = ("phone_e164", "orders_count", "lifetime_value_cop", "last_order_at")
+
+    def get_search_results(self, request, queryset, search_term):
+        # Un número ("+57 315…", "315 12") va por prefijo sobre phone_e164 (índice),
+        # no por ILIKE sobre nombre, teléfono y correo.
+        if search_term and not any(c.isalpha() or c == "@" for c in search_term):
+            prefix = phones.normalize_prefix(search_term)
+            if prefix:
+                return queryset.filter(phone_e164__startswith=prefix), False
+        return super().get_search_results(request, queryset, search_term)
 
 
 @admin.register(DeliveryAddress)
@@ -89,7 +117,7 @@ class OrderItemInline(admin.TabularInline):
 
 
 @admin.register(Order)
-class OrderAdmin(admin.ModelAdmin):
+class OrderAdmin(LargeTableAdmin):
     list_display = (
         "order_number",
         "restaurant",
@@ -100,6 +128,7 @@ class OrderAdmin(admin.ModelAdmin):
         "created_at",
     )
     list_filter = ("restaurant", "status", "channel", "created_at")
+    list_select_related = ("restaurant", "customer")
     search_fields = ("order_number", "customer__name", "customer__phone")
     inlines = [OrderItemInline]
     readonly_fields = (
@@ -124,7 +153,47 @@ class DeliveryAdmin(admin.ModelAdmin):
 
 
 @admin.register(Event)
-class EventAdmin(admin.ModelAdmin):
+class EventAdmin(LargeTableAdmin):
     list_display = ("name", "order", "customer", "at")
+    list_select_related = ("order__restaurant", "customer")
     list_filter = ("name", "at")
     search_fields = ("name", "order__order_number", "customer__phone")
+
+
+@admin.register(ArchivedOrder)
+class ArchivedOrderAdmin(LargeTableAdmin):
+    list_display = ("order_number", "restaurant", "status", "total_cop", "created_at", "archived_at")
+    list_filter = ("restaurant", "status")
+    search_fields = ("order_number",)
+    readonly_fields = [f.name for f in ArchivedOrder._meta.fields]
+
+
+@admin.register(OutboxMessage)
+class OutboxMessageAdmin(LargeTableAdmin):
+    list_display = ("id", "topic", "status", "attempts", "created_at", "available_at", "sent_at")
+    list_filter = ("status", "topic")
+    readonly_fields = [f.name for f in OutboxMessage._meta.fields]
+    actions = ["requeue"]
+
+    @admin.action(description="Reintentar ahora")
+    def requeue(self, request, queryset):
+        updated = queryset.exclude(status=OutboxMessage.STATUS_SENT).update(
+            status=OutboxMessage.STATUS_PENDING, attempts=0, available_at=timezone.now()
+        )
+        self.message_user(request, f"{updated} mensajes reencolados.")
+
+
+@admin.register(Job)
+class JobAdmin(LargeTableAdmin):
+    list_display = ("id", "name", "status", "attempts", "run_at", "started_at", "finished_at", "worker")
+    list_filter = ("status", "name")
+    search_fields = ("key",)
+    readonly_fields = [f.name for f in Job._meta.fields]
+    actions = ["requeue"]
+
+    @admin.action(description="Reintentar ahora")
+    def requeue(self, request, queryset):
+        updated = queryset.filter(status=Job.STATUS_FAILED).update(
+            status=Job.STATUS_QUEUED, attempts=0, run_at=timezone.now(), finished_at=None
+        )
+        self.message_user(request, f"{updated} trabajos reencolados.")
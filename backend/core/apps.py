@@ -8,3 +8,7 @@ class CoreConfig(AppConfig):
     def ready(self):
         # Importa las señales para que se registren
         import core.signals  # noqa
+        # Instrumenta cada conexión nueva para las métricas por petición
+        import core.request_metrics  # noqa
+        # Registra los trabajos en segundo plano (core/jobs.py)
+        import core.tasks  # noqa
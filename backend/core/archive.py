@@ -0,0 +1,101 @@
+# core/archive.py
+"""
+Archivado en frío de pedidos terminados.
+
+Los pedidos COMPLETED o CANCELLED creados hace más de N días se copian a
+ArchivedOrder (un JSON por pedido con sus líneas, entrega y eventos) y se
+borran de las tablas calientes en la misma transacción, por lotes. Así
+core_order, core_orderitem y sus índices quedan con el histórico reciente.
+
+No hay señales de borrado sobre Order: SalesRollup y MenuItemSalesCounter
+conservan lo ya contado, y sus reconstrucciones leen también el archivo.
+"""
+from datetime import timedelta
+
+from django.db import transaction
+from django.utils import timezone
+
+from .models import ArchivedOrder, Delivery, Event, Order, OrderItem
+
+ARCHIVABLE_STATUSES = (Order.STATUS_COMPLETED, Order.STATUS_CANCELLED)
+
+ORDER_FIELDS = [f.attname for f in Order._meta.concrete_fields]
+ITEM_FIELDS = [f.attname for f in OrderItem._meta.concrete_fields if f.attname != "order_id"]
+DELIVERY_FIELDS = [f.attname for f in Delivery._meta.concrete_fields if f.attname != "order_id"]
+EVENT_FIELDS = [f.attname for f in Event._meta.concrete_fields if f.attname != "order_id"]
+
+
+def archivable_orders(older_than_days, now=None):
+    cutoff = (now or timezone.now()) - timedelta(days=older_than_days)
+    return Order.objects.filter(status__in=ARCHIVABLE_STATUSES, created_at__lt=cutoff)
+
+
+def _build_archives(order_ids):
+    orders = list(Order.objects.filter(id__in=order_ids).values(*ORDER_FIELDS))
+    items, deliveries, events = {}, {}, {}
+    for row in OrderItem.objects.filter(order_id__in=order_ids).values("order_id", *ITEM_FIELDS):
+        items.setdefault(row.pop("order_id"), []).append(row)
+    for row in Delivery.objects.filter(order_id__in=order_ids).values("order_id", *DELIVERY_FIELDS):
+        deliveries[row.pop("order_id")] = row
+    for row in Event.objects.filter(order_id__in=order_ids).values("order_id", *EVENT_FIELDS):
+        events.setdefault(row.pop("order_id"), []).append(row)
+
+    return [
+        ArchivedOrder(
+            order_id=order["id"],
+            order_number=order["order_number"],
+            restaurant_id=order["restaurant_id"],
+            customer_id=order["customer_id"],
+            status=order["status"],
+            total_cop=order["total_cop"],
+            created_at=order["created_at"],
+            payload={
+                "order": order,
+                "items": items.get(order["id"], []),
+                "delivery": deliveries.get(order["id"]),
+                "events": events.get(order["id"], []),
+            },
+        )
+        for order in orders
+    ]
+
+
+def archive_orders(older_than_days, batch_size=500, limit=None, now=None):
+    """
+    Archiva por lotes de `batch_size` pedidos (cada lote en su transacción).
+    Devuelve el número de pedidos archivados.
+    """
+    if older_than_days < 1:
+        raise ValueError("older_than_days debe ser al menos 1.")
+
+    candidates = archivable_orders(older_than_days, now=now).order_by("id")
+    archived = 0
+    last_id = 0
+    while limit is None or archived < limit:
+        size = batch_size if limit is None else min(batch_size, limit - archived)
+        with transaction.atomic():
+            order_ids = list(
+                candidates.filter(id__gt=last_id)
+                .select_for_update(skip_locked=True)
+                .values_list("id", flat=True)[:size]
+            )
+            if not order_ids:
+                break
+            ArchivedOrder.objects.bulk_create(_build_archives(order_ids))
+            Event.objects.filter(order_id__in=order_ids).delete()
+            Order.objects.filter(id__in=order_ids).delete()  # CASCADE: líneas y entrega
+        archived += len(order_ids)
+        last_id = order_ids[-1]
+    return archived
+
+
+def archived_representation(archived):
+    """Forma de respuesta de un pedido archivado, cercana a OrderSerializer."""
+    payload = archived.payload
+    return {
+        **payload["order"],
+        "items": payload["items"],
+        "delivery": payload["delivery"],
+        "archived": True,
+        "archived_at": archived.archived_at,
+    }
@@ -0,0 +1,59 @@
+# core/async_cache.py
+"""
+Caché por defecto desde código async (core/async_views.py, middleware en
+modo async) sin pasar por un hilo.
+
+Con RedisCache se habla con el mismo servidor mediante redis.asyncio y
+con las mismas claves que `cache` (make_and_validate_key), así que un
+`cache.delete()` síncrono (señales) invalida también lo escrito aquí.
+Con otro backend (LocMem en tests y dev) se usa `cache.aget`/`aset` de
+Django, que delega en un hilo.
+
+Los valores son bytes o enteros: RedisCache guarda los enteros sin
+serializar, por lo que `cache.get` los lee igual desde código síncrono.
+"""
+import asyncio
+import re
+import weakref
+
+import redis.asyncio as aioredis
+from django.conf import settings
+from django.core.cache import DEFAULT_CACHE_ALIAS, caches
+from django.core.cache.backends.redis import RedisCache
+
+# Un cliente por event loop: las conexiones de redis.asyncio no se comparten entre loops.
+_clients = weakref.WeakKeyDictionary()
+
+
+def _backend():
+    return caches[DEFAULT_CACHE_ALIAS]
+
+
+def _client():
+    loop = asyncio.get_running_loop()
+    client = _clients.get(loop)
+    if client is None:
+        location = settings.CACHES[DEFAULT_CACHE_ALIAS]["LOCATION"]
+        if isinstance(location, str):
+            location = re.split("[;,]", location)
+        timeout = getattr(settings, "REDIS_SOCKET_TIMEOUT", 0.5)
+        # El primer servidor es el de escritura (igual que RedisCache).
+        client = _clients[loop] = aioredis.Redis.from_url(
+            location[0], socket_timeout=timeout, socket_connect_timeout=timeout
+        )
+    return client
+
+
+async def aget(key):
+    backend = _backend()
+    if not isinstance(backend, RedisCache):
+        return await backend.aget(key)
+    return await _client().get(backend.make_and_validate_key(key))
+
+
+async def aset(key, value, timeout):
+    backend = _backend()
+    if not isinstance(backend, RedisCache):
+        await backend.aset(key, value, timeout=timeout)
+        return
+    await _client().set(backend.make_and_validate_key(key), value, ex=max(int(timeout), 1))
@@ -0,0 +1,82 @@
+# core/async_views.py
+"""
+Vistas async de las lecturas más calientes, servidas junto a los
+viewsets DRF (que son síncronos y bajo ASGI ocupan un hilo por petición):
+
+- /api/async/restaurants/<id>/menu/   snapshot público del menú (core/menu_snapshot.py)
+- /api/async/orders/<id>/status/      estado de un pedido
+- /api/async/auth/me/                 equivalente a /api/auth/me/
+
+Usan el ORM async y core/async_cache.py. La autenticación es la del
+token de dispositivo (DeviceTokenAuthentication.aauthenticate) con las
+mismas respuestas de error que DRF.
+"""
+from django.http import HttpResponse, JsonResponse
+from django.views.decorators.http import require_GET
+from rest_framework.exceptions import AuthenticationFailed, NotAuthenticated
+
+from . import menu_snapshot
+from .authentication import DeviceTokenAuthentication
+from .models import Order
+from .serializers import AuthUserSerializer
+
+ORDER_STATUS_FIELDS = (
+    "id",
+    "order_number",
+    "status",
+    "eta_ready_at",
+    "updated_at",
+    "customer_id",
+    "delivery__status",
+)
+
+
+async def _authenticate(request):
+    """(user, None) o (None, respuesta de error) con los mismos códigos que DRF."""
+    try:
+        result = await DeviceTokenAuthentication().aauthenticate(request)
+    except AuthenticationFailed as exc:
+        return None, JsonResponse({"detail": str(exc.detail)}, status=403)
+    if result is None:
+        return None, JsonResponse({"detail": str(NotAuthenticated.default_detail)}, status=403)
+    return result[0], None
+
+
+def _not_found(detail):
+    return JsonResponse({"detail": detail}, status=404)
+
+
+@require_GET
+async def menu_view(request, restaurant_id):
+    body = await menu_snapshot.aget_json(restaurant_id)
+    if body is None:
+        return _not_found("Restaurante no encontrado.")
+    return HttpResponse(body, content_type="application/json")
+
+
+@require_GET
+async def order_status_view(request, order_id):
+    user, error = await _authenticate(request)
+    if error:
+        return error
+
+    order = await Order.objects.filter(pk=order_id).values(*ORDER_STATUS_FIELDS).afirst()
+    if order is not None and not user.is_staff:
+        customer = getattr(user, "customer_profile", None)
+        if customer is None or order["customer_id"] != customer.id:
+            order = None  # Como el viewset: pedidos ajenos no existen.
+    if order is None:
+        return _not_found("Pedido no encontrado.")
+
+    order.pop("customer_id")
+    order["delivery_status"] = order.pop("delivery__status")
+    return JsonResponse(order)
+
+
+@require_GET
+async def auth_me_view(request):
+    user, error = await _authenticate(request)
+    if error:
+        return error
+    # customer_profile viene en el select_related de aauthenticate: sin consultas.
+    return JsonResponse({"user": AuthUserSerializer(user).data})
@@ -8,7 +8,7 @@ from .models import UserSessionToken
 class DeviceTokenAuthentication(BaseAuthentication):
     keyword = b"token"
 
-    def authenticate(self, request):
+    def get_token_key(self, request):
         auth = get_authorization_header(request).split()
         if not auth:
             return None
@@ -22,6 +22,12 @@ class DeviceTokenAuthentication(BaseAuthentication):
         token_key = auth[1].decode("utf-8", errors="ignore").strip()
         if not token_key:
             raise AuthenticationFailed("Token invalido.")
+        return token_key
+
+    def authenticate(self, request):
+        token_key = self.get_token_key(request)
+        if token_key is None:
+            return None
 
         try:
             session = UserSessionToken.objects.select_related("user").get(
@@ -37,3 +43,27 @@ class DeviceTokenAuthentication(BaseAuthentication):
         session.last_used_at = timezone.now()
         session.save(update_fields=["last_used_at"])
         return (session.user, session)
+
+    async def aauthenticate(self, request):
+        """
+        Igual que authenticate() con el ORM async, para las vistas de
+        core/async_views.py. Trae también el perfil de cliente del usuario
+        (user.customer_profile) para no consultarlo después.
+        """
+        token_key = self.get_token_key(request)
+        if token_key is None:
+            return None
+
+        try:
+            session = await UserSessionToken.objects.select_related(
+                "user", "user__customer_profile"
+            ).aget(key=token_key, is_active=True)
+        except UserSessionToken.DoesNotExist as exc:
+            raise AuthenticationFailed("Token invalido o expirado.") from exc
+
+        if not session.user.is_active:
+            raise AuthenticationFailed("Cuenta inactiva.")
+
+        session.last_used_at = timezone.now()
+        await UserSessionToken.objects.filter(pk=session.pk).aupdate(last_used_at=session.last_used_at)
+        return (session.user, session)
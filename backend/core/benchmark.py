@@ -0,0 +1,471 @@
+# core/benchmark.py
+"""
+Benchmark de carga de los flujos principales de la API.
+
+Se siembran datos (restaurante, menú, staff, clientes con token y pedidos
+históricos) y cada escenario lanza `requests` peticiones con `concurrency`
+clientes concurrentes contra:
+
+- la app ASGI en proceso (`noah_food.asgi.application`, sin red), o
+- un servidor uvicorn local (ver el comando `benchmark_api --uvicorn`).
+
+El resultado es un dict JSON-serializable con throughput y latencias
+p50/p95/p99 por escenario, pensado para guardarse y compararse entre
+commits (`compare`). Para peticiones por segundo por worker, uvicorn
+con `--workers 1`; con `accept_encoding` los bytes por respuesta son los
+comprimidos (core/compression.py). Los escenarios de lectura van antes que los de
+escritura para que los tamaños de los listados sean reproducibles.
+"""
+import asyncio
+import itertools
+import json
+import math
+import platform
+import subprocess
+import sys
+import time
+from collections import Counter
+from dataclasses import dataclass
+
+import django
+from asgiref.sync import async_to_sync
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.utils import timezone
+
+from .models import (
+    Customer,
+    DeliveryAddress,
+    MenuCategory,
+    MenuItem,
+    Order,
+    Restaurant,
+    UserSessionToken,
+)
+from .serializers import OrderCreateSerializer
+
+PASSWORD = "bench-pass-1234"
+KITCHEN_FLOW = (Order.STATUS_IN_PROGRESS, Order.STATUS_READY, Order.STATUS_COMPLETED)
+
+
+# --------- DATOS --------- #
+
+@dataclass
+class Fixtures:
+    restaurant_id: int
+    menu_item_ids: list
+    staff_token: str
+    customers: list  # [(username, token, customer_id)]
+    kitchen_order_ids: list
+    customer_orders: list  # [(token, order_id)] de los pedidos históricos
+
+
+def _token(user):
+    return UserSessionToken.objects.create(user=user, device_name="benchmark").key
+
+
+def _create_order(restaurant, customer_id, menu_item_ids, lines):
+    serializer = OrderCreateSerializer(data={
+        "restaurant": restaurant.id,
+        "customer": customer_id,
+        "items": [{"menu_item_id": item_id, "quantity": 1} for item_id in menu_item_ids[:lines]],
+    })
+    serializer.is_valid(raise_exception=True)
+    return serializer.save()
+
+
+def seed(customers=20, orders=200, menu_items=30, kitchen_orders=0):
+    """
+    Crea los datos del benchmark. Los pedidos históricos quedan en su
+    mayoría COMPLETED (alimentan el resumen de ventas); `kitchen_orders`
+    pedidos quedan PENDING para el escenario de cocina.
+    """
+    User = get_user_model()
+    restaurant = Restaurant.objects.create(name="Bench", slug=f"bench-{time.time_ns()}")
+    categories = [
+        MenuCategory.objects.create(restaurant=restaurant, name=name, sort_order=i)
+        for i, name in enumerate(("Corrientes", "Especiales", "Bebidas"))
+    ]
+    items = MenuItem.objects.bulk_create(
+        MenuItem(
+            restaurant=restaurant,
+            category=categories[i % len(categories)],
+            name=f"Plato {i}",
+            price_cop=8000 + 500 * (i % 10),
+            cost_cop=3000,
+            is_active=True,
+        )
+        for i in range(max(menu_items, 20))
+    )
+    menu_item_ids = [item.id for item in items]
+
+    staff = User.objects.create_user(
+        username=f"bench_staff_{restaurant.id}", password=PASSWORD, is_staff=True
+    )
+    customer_rows = []
+    for i in range(customers):
+        user = User.objects.create_user(username=f"bench_{restaurant.id}_{i}", password=PASSWORD)
+        customer = Customer.objects.create(
+            user=user, name=f"Cliente {i}", phone=f"39{restaurant.id:03d}{i:05d}"
+        )
+        DeliveryAddress.objects.create(customer=customer, label="Casa", address_line=f"Calle {i}")
+        customer_rows.append((user.username, _token(user), customer.id))
+
+    customer_orders = []
+    for n in range(orders):
+        _, token, customer_id = customer_rows[n % len(customer_rows)]
+        order = _create_order(restaurant, customer_id, menu_item_ids[n % 7:], 1 + n % 4)
+        order.status = Order.STATUS_CANCELLED if n % 10 == 0 else Order.STATUS_COMPLETED
+        order.save()
+        customer_orders.append((token, order.id))
+
+    kitchen = [
+        _create_order(restaurant, customer_rows[n % len(customer_rows)][2], menu_item_ids, 2).id
+        for n in range(kitchen_orders)
+    ]
+    return Fixtures(restaurant.id, menu_item_ids, _token(staff), customer_rows, kitchen, customer_orders)
+
+
+# --------- ESCENARIOS --------- #
+
+@dataclass
+class Request:
+    method: str
+    path: str
+    token: str = None
+    body: dict = None
+
+
+def _order_create(lines):
+    def build(fx, i):
+        _, token, _ = fx.customers[i % len(fx.customers)]
+        start = i % (len(fx.menu_item_ids) - lines + 1)
+        items = [{"menu_item_id": item_id, "quantity": 1} for item_id in fx.menu_item_ids[start:start + lines]]
+        return Request("POST", "/api/orders/", token, {"restaurant": fx.restaurant_id, "items": items})
+    return build
+
+
+def _kitchen(fx, i):
+    # Cada pedido pasa por IN_PROGRESS -> READY -> COMPLETED en 3 peticiones.
+    order_id = fx.kitchen_order_ids[(i // len(KITCHEN_FLOW)) % len(fx.kitchen_order_ids)]
+    status = KITCHEN_FLOW[i % len(KITCHEN_FLOW)]
+    return Request("PATCH", f"/api/orders/{order_id}/", fx.staff_token, {"status": status})
+
+
+def _customer_order(path):
+    def build(fx, i):
+        token, order_id = fx.customer_orders[i % len(fx.customer_orders)]
+        return Request("GET", path.format(order_id), token)
+    return build
+
+
+# Los pares x / x_async miden la misma lectura en el viewset DRF y en la
+# vista async (core/async_views.py).
+SCENARIOS = {
+    "menu": lambda fx, i: Request("GET", "/api/menu-items/"),
+    "menu_async": lambda fx, i: Request("GET", f"/api/async/restaurants/{fx.restaurant_id}/menu/"),
+    "orders_staff": lambda fx, i: Request(
+        "GET", f"/api/orders/?restaurant_id={fx.restaurant_id}&status=COMPLETED", fx.staff_token
+    ),
+    "orders_customer": lambda fx, i: Request(
+        "GET", "/api/orders/", fx.customers[i % len(fx.customers)][1]
+    ),
+    "me_orders": lambda fx, i: Request("GET", "/api/me/orders/", fx.customers[i % len(fx.customers)][1]),
+    "order_detail": _customer_order("/api/orders/{}/"),
+    "order_status_async": _customer_order("/api/async/orders/{}/status/"),
+    "me": lambda fx, i: Request("GET", "/api/auth/me/", fx.customers[i % len(fx.customers)][1]),
+    "me_async": lambda fx, i: Request("GET", "/api/async/auth/me/", fx.customers[i % len(fx.customers)][1]),
+    "healthz": lambda fx, i: Request("GET", "/healthz/"),
+    "readyz": lambda fx, i: Request("GET", "/readyz/"),
+    "sales_summary": lambda fx, i: Request(
+        "GET", f"/api/kpi/sales-summary/?restaurant_id={fx.restaurant_id}", fx.staff_token
+    ),
+    "login": lambda fx, i: Request(
+        "POST",
+        "/api/auth/login/",
+        body={"username": fx.customers[i % len(fx.customers)][0], "password": PASSWORD},
+    ),
+    "order_create_1": _order_create(1),
+    "order_create_5": _order_create(5),
+    "order_create_20": _order_create(20),
+    "kitchen": _kitchen,
+}
+
+
+# --------- TRANSPORTES --------- #
+
+def _encode(request, host, accept_encoding=None):
+    body = json.dumps(request.body).encode() if request.body is not None else b""
+    headers = [(b"host", host.encode()), (b"accept", b"application/json")]
+    if accept_encoding:
+        headers.append((b"accept-encoding", accept_encoding.encode()))
+    if body:
+        headers.append((b"content-type", b"application/json"))
+    if request.token:
+        headers.append((b"authorization", f"Token {request.token}".encode()))
+    return headers, body
+
+
+class ASGITransport:
+    """Llama a la app ASGI directamente: mide Django/DRF/ORM sin red ni servidor."""
+
+    def __init__(self, app, host="localhost", accept_encoding=None):
+        self.app = app
+        self.host = host
+        self.accept_encoding = accept_encoding
+
+    def connect(self):
+        return self
+
+    async def close(self):
+        pass
+
+    async def send(self, request):
+        headers, body = _encode(request, self.host, self.accept_encoding)
+        path, _, query = request.path.partition("?")
+        scope = {
+            "type": "http",
+            "asgi": {"version": "3.0"},
+            "http_version": "1.1",
+            "method": request.method,
+            "scheme": "http",
+            "path": path,
+            "raw_path": path.encode(),
+            "query_string": query.encode(),
+            "root_path": "",
+            "headers": headers + [(b"content-length", str(len(body)).encode())],
+            "client": ("127.0.0.1", 50000),
+            "server": (self.host, 80),
+        }
+        received = False
+        response = {"status": 0, "bytes": 0}
+
+        async def receive():
+            nonlocal received
+            if not received:
+                received = True
+                return {"type": "http.request", "body": body, "more_body": False}
+            # El cliente nunca se desconecta; Django cancela esta espera al responder.
+            await asyncio.Future()
+
+        async def send(message):
+            if message["type"] == "http.response.start":
+                response["status"] = message["status"]
+            elif message["type"] == "http.response.body":
+                response["bytes"] += len(message.get("body", b""))
+
+        await self.app(scope, receive, send)
+        return response["status"], response["bytes"]
+
+
+class HTTPTransport:
+    """Cliente HTTP/1.1 mínimo con keep-alive: una conexión por cliente concurrente."""
+
+    def __init__(self, host, port, accept_encoding=None):
+        self.host = host
+        self.port = port
+        self.accept_encoding = accept_encoding
+
+    def connect(self):
+        return _HTTPConnection(self.host, self.port, self.accept_encoding)
+
+
+class _HTTPConnection:
+    def __init__(self, host, port, accept_encoding=None):
+        self.host = host
+        self.port = port
+        self.accept_encoding = accept_encoding
+        self.reader = self.writer = None
+
+    async def close(self):
+        if self.writer is not None:
+            self.writer.close()
+            self.reader = self.writer = None
+
+    async def send(self, request):
+        if self.writer is None:
+            self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+        headers, body = _encode(request, self.host, self.accept_encoding)
+        head = [f"{request.method} {request.path} HTTP/1.1", f"content-length: {len(body)}"]
+        head += [f"{name.decode()}: {value.decode()}" for name, value in headers]
+        self.writer.write(("\r\n".join(head) + "\r\n\r\n").encode("latin-1") + body)
+        await self.writer.drain()
+
+        status = int((await self.reader.readline()).split()[1])
+        length, chunked, close = 0, False, False
+        while True:
+            line = await self.reader.readline()
+            if line in (b"\r\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            name, value = name.strip().lower(), value.strip().lower()
+            if name == "content-length":
+                length = int(value)
+            elif name == "transfer-encoding":
+                chunked = "chunked" in value
+            elif name == "connection":
+                close = value == "close"
+
+        size = 0
+        if chunked:
+            while True:
+                chunk = int((await self.reader.readline()).split(b";")[0], 16)
+                await self.reader.readexactly(chunk + 2)
+                size += chunk
+                if chunk == 0:
+                    break
+        else:
+            size = len(await self.reader.readexactly(length))
+        if close:
+            await self.close()
+        return status, size
+
+
+def start_uvicorn(port, workers=1, env=None):
+    """Arranca `uvicorn noah_food.asgi:application` y espera a /readyz/ (warm-up terminado)."""
+    process = subprocess.Popen(
+        [
+            sys.executable, "-m", "uvicorn", "noah_food.asgi:application",
+            "--host", "127.0.0.1", "--port", str(port), "--workers", str(workers),
+            "--no-access-log", "--log-level", "warning",
+        ],
+        env=env,
+    )
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"uvicorn terminó al arrancar (código {process.returncode}).")
+        try:
+            status, _ = async_to_sync(_probe)(port)
+            if status == 200:
+                return process
+        except OSError:
+            pass
+        time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError("uvicorn no estuvo listo (/readyz/) en 30 s.")
+
+
+async def _probe(port):
+    conn = _HTTPConnection("127.0.0.1", port)
+    try:
+        return await conn.send(Request("GET", "/readyz/"))
+    finally:
+        await conn.close()
+
+
+# --------- EJECUCIÓN --------- #
+
+def percentile(sorted_values, q):
+    """Percentil por rango más cercano sobre valores ya ordenados."""
+    if not sorted_values:
+        return None
+    rank = max(math.ceil(q / 100 * len(sorted_values)), 1)
+    return sorted_values[rank - 1]
+
+
+async def _run_scenario(transport, build, fixtures, requests, concurrency, warmup):
+    sequence = itertools.count()
+    latencies = []
+    statuses = Counter()
+    total_bytes = 0
+
+    async def client(measure, limit):
+        nonlocal total_bytes
+        conn = transport.connect()
+        try:
+            while (i := next(sequence)) < limit:
+                request = build(fixtures, i)
+                started = time.perf_counter()
+                status, size = await conn.send(request)
+                if measure:
+                    latencies.append(time.perf_counter() - started)
+                    statuses[status] += 1
+                    total_bytes += size
+        finally:
+            await conn.close()
+
+    await client(False, warmup)
+    sequence = itertools.count(warmup)
+    started = time.perf_counter()
+    await asyncio.gather(*(client(True, warmup + requests) for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    ms = lambda value: round(value * 1000, 2) if value is not None else None  # noqa: E731
+    errors = sum(count for status, count in statuses.items() if not 200 <= status < 300)
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "status_counts": {str(status): count for status, count in sorted(statuses.items())},
+        "seconds": round(elapsed, 3),
+        "throughput_rps": round(len(latencies) / elapsed, 1) if elapsed else None,
+        "latency_ms": {
+            "mean": ms(sum(latencies) / len(latencies)) if latencies else None,
+            "p50": ms(percentile(latencies, 50)),
+            "p95": ms(percentile(latencies, 95)),
+            "p99": ms(percentile(latencies, 99)),
+            "max": ms(latencies[-1] if latencies else None),
+        },
+        "bytes_per_response": round(total_bytes / len(latencies)) if latencies else 0,
+    }
+
+
+def kitchen_orders_needed(requests, warmup):
+    """Pedidos PENDING que necesita el escenario de cocina (3 peticiones por pedido)."""
+    return max(math.ceil((requests + warmup) / len(KITCHEN_FLOW)), 1)
+
+
+def run(transport, fixtures, scenarios, requests=200, concurrency=(10,), warmup=10, target=""):
+    """
+    Ejecuta los escenarios (en el orden de SCENARIOS) para cada nivel de
+    concurrencia. Se llama desde código síncrono: las vistas síncronas se
+    ejecutan en este mismo hilo (misma conexión a la base de datos).
+    """
+    results = {}
+    for name in (name for name in SCENARIOS if name in scenarios):
+        results[name] = {}
+        for level in concurrency:
+            results[name][str(level)] = async_to_sync(_run_scenario)(
+                transport, SCENARIOS[name], fixtures, requests, level, warmup
+            )
+    return {"meta": environment(target, requests, concurrency, warmup), "scenarios": results}
+
+
+def environment(target, requests, concurrency, warmup):
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, timeout=5
+        ).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        commit = None
+    return {
+        "commit": commit,
+        "at": timezone.now().isoformat(),
+        "target": target,
+        "database": connection.vendor,
+        "python": platform.python_version(),
+        "django": django.get_version(),
+        "requests": requests,
+        "concurrency": list(concurrency),
+        "warmup": warmup,
+    }
+
+
+def compare(baseline, current):
+    """Filas (escenario, concurrencia, métrica, antes, ahora, % cambio) comunes a ambos resultados."""
+    rows = []
+    for name, levels in current["scenarios"].items():
+        for level, result in levels.items():
+            before = baseline.get("scenarios", {}).get(name, {}).get(level)
+            if before is None:
+                continue
+            pairs = [("throughput_rps", before["throughput_rps"], result["throughput_rps"])]
+            pairs += [
+                (key, before["latency_ms"][key], result["latency_ms"][key])
+                for key in ("p50", "p95", "p99")
+            ]
+            for metric, old, new in pairs:
+                change = round((new - old) / old * 100, 1) if old and new is not None else None
+                rows.append((name, level, metric, old, new, change))
+    return rows
@@ -0,0 +1,207 @@
+# core/bestsellers.py
+"""
+Top-k de platos más vendidos a partir de MenuItemSalesCounter.
+
+Cuando un pedido entra (o sale) de COMPLETED se suman (o restan) sus líneas
+a los contadores del día, la semana y el total con un único
+INSERT ... ON CONFLICT DO UPDATE (soportado por Postgres y SQLite). Las
+líneas que se crean, editan o borran (OrderItem.save/delete) en un pedido
+ya COMPLETED aplican su delta con `apply_line`. Los cambios masivos
+(QuerySet.update/delete) no pasan por aquí: tras ellos, `rebuild_counters`.
+El borrado en cascada al archivar no resta: los archivados siguen contando.
+"""
+from collections import defaultdict
+from datetime import timedelta
+from itertools import chain
+
+from django.db import connection, transaction
+from django.db.models import Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .models import ArchivedOrder, MenuCategory, MenuItem, MenuItemSalesCounter, Order, OrderItem
+
+DEFAULT_TOP = 5
+MAX_TOP = 50
+
+_UPSERT_CHUNK = 100
+
+
+def period_starts(day):
+    """(periodo, period_start) de los tres contadores que toca un día local."""
+    return (
+        (MenuItemSalesCounter.PERIOD_DAY, day),
+        (MenuItemSalesCounter.PERIOD_WEEK, day - timedelta(days=day.weekday())),
+        (MenuItemSalesCounter.PERIOD_ALL, MenuItemSalesCounter.ALL_TIME_START),
+    )
+
+
+def _upsert(rows):
+    """
+    rows: tuplas (restaurant_id, menu_item_id, category_id, period,
+    period_start, quantity, revenue_cop) a sumar sobre los contadores.
+    """
+    table = connection.ops.quote_name(MenuItemSalesCounter._meta.db_table)
+    adapt_date = connection.ops.adapt_datefield_value
+    with connection.cursor() as cursor:
+        for i in range(0, len(rows), _UPSERT_CHUNK):
+            chunk = rows[i:i + _UPSERT_CHUNK]
+            values = ", ".join(["(%s, %s, %s, %s, %s, %s, %s)"] * len(chunk))
+            params = []
+            for restaurant_id, menu_item_id, category_id, period, start, quantity, revenue in chunk:
+                params.extend([restaurant_id, menu_item_id, category_id, period, adapt_date(start), quantity, revenue])
+            cursor.execute(
+                f"INSERT INTO {table} "
+                "(restaurant_id, menu_item_id, category_id, period, period_start, quantity, revenue_cop) "
+                f"VALUES {values} "
+                "ON CONFLICT (menu_item_id, period, period_start) DO UPDATE SET "
+                f"quantity = {table}.quantity + EXCLUDED.quantity, "
+                f"revenue_cop = {table}.revenue_cop + EXCLUDED.revenue_cop, "
+                "category_id = EXCLUDED.category_id",
+                params,
+            )
+
+
+def _apply_lines(order, lines, sign):
+    day = timezone.localtime(order.created_at).date()
+    rows = [
+        (order.restaurant_id, menu_item_id, category_id, period, start, sign * quantity, sign * line_total)
+        for menu_item_id, category_id, quantity, line_total in lines
+        for period, start in period_starts(day)
+    ]
+    if rows:
+        _upsert(rows)
+
+
+def apply_order(order, sign):
+    """Suma (sign=1) o resta (sign=-1) las líneas del pedido a los contadores."""
+    lines = OrderItem.objects.filter(order_id=order.pk).values_list(
+        "menu_item_id", "menu_item__category_id", "quantity", "line_total_cop"
+    )
+    _apply_lines(order, lines, sign)
+
+
+def apply_line(order, menu_item_id, quantity, line_total, sign=1):
+    """Suma (o resta) una sola línea de un pedido COMPLETED."""
+    category_id = MenuItem.objects.filter(pk=menu_item_id).values_list("category_id", flat=True).first()
+    _apply_lines(order, [(menu_item_id, category_id, quantity, line_total)], sign)
+
+
+def _archived_daily(restaurant_id=None):
+    """Mismas filas que la agregación diaria, leídas del JSON de ArchivedOrder."""
+    archived = ArchivedOrder.objects.filter(status=Order.STATUS_COMPLETED)
+    if restaurant_id is not None:
+        archived = archived.filter(restaurant_id=restaurant_id)
+    categories = dict(MenuItem.objects.values_list("id", "category_id"))
+    rows = archived.values_list("restaurant_id", "created_at", "payload").iterator(chunk_size=500)
+    for restaurant, created_at, payload in rows:
+        day = timezone.localtime(created_at).date()
+        for item in payload["items"]:
+            if item["menu_item_id"] not in categories:
+                continue  # Plato borrado: sus contadores ya no existen.
+            yield {
+                "order__restaurant_id": restaurant,
+                "menu_item_id": item["menu_item_id"],
+                "menu_item__category_id": categories[item["menu_item_id"]],
+                "day": day,
+                "quantity": item["quantity"],
+                "revenue": item["line_total_cop"],
+            }
+
+
+def rebuild_counters(restaurant_id=None):
+    """Reconstruye los contadores desde las líneas de pedidos COMPLETED (y archivados)."""
+    items = OrderItem.objects.filter(order__status=Order.STATUS_COMPLETED)
+    counters = MenuItemSalesCounter.objects.all()
+    if restaurant_id is not None:
+        items = items.filter(order__restaurant_id=restaurant_id)
+        counters = counters.filter(restaurant_id=restaurant_id)
+
+    daily = (
+        items.annotate(day=TruncDate("order__created_at", tzinfo=timezone.get_default_timezone()))
+        .values("order__restaurant_id", "menu_item_id", "menu_item__category_id", "day")
+        .annotate(quantity=Sum("quantity"), revenue=Sum("line_total_cop"))
+        .order_by()
+    )
+
+    totals = defaultdict(lambda: [0, 0])
+    for row in chain(daily.iterator(), _archived_daily(restaurant_id)):
+        for period, start in period_starts(row["day"]):
+            key = (
+                row["order__restaurant_id"],
+                row["menu_item_id"],
+                row["menu_item__category_id"],
+                period,
+                start,
+            )
+            totals[key][0] += row["quantity"] or 0
+            totals[key][1] += row["revenue"] or 0
+
+    with transaction.atomic():
+        counters.delete()
+        MenuItemSalesCounter.objects.bulk_create(
+            [
+                MenuItemSalesCounter(
+                    restaurant_id=restaurant,
+                    menu_item_id=menu_item,
+                    category_id=category,
+                    period=period,
+                    period_start=start,
+                    quantity=quantity,
+                    revenue_cop=revenue,
+                )
+                for (restaurant, menu_item, category, period, start), (quantity, revenue) in totals.items()
+            ],
+            batch_size=1000,
+        )
+    return len(totals)
+
+
+def _top_rows(qs, top):
+    return [
+        {
+            "menu_item_id": row["menu_item_id"],
+            "name": row["menu_item__name"],
+            "category_id": row["category_id"],
+            "total_qty": row["quantity"],
+            "total_revenue": row["revenue_cop"],
+        }
+        for row in qs.order_by("-quantity", "menu_item_id").values(
+            "menu_item_id", "menu_item__name", "category_id", "quantity", "revenue_cop"
+        )[:top]
+    ]
+
+
+def top_items(period=MenuItemSalesCounter.PERIOD_ALL, day=None, restaurant_id=None,
+              category_id=None, top=DEFAULT_TOP):
+    """
+    Top-`top` platos por cantidad para el periodo que contiene `day`
+    (hoy por defecto). Lee directamente del índice (periodo, cantidad).
+    """
+    day = day or timezone.localdate()
+    start = dict(period_starts(day))[period]
+    qs = MenuItemSalesCounter.objects.filter(period=period, period_start=start, quantity__gt=0)
+    if restaurant_id is not None:
+        qs = qs.filter(restaurant_id=restaurant_id)
+    if category_id is not None:
+        qs = qs.filter(category_id=category_id)
+    return _top_rows(qs, top)
+
+
+def top_items_by_category(restaurant_id, period=MenuItemSalesCounter.PERIOD_ALL, day=None, top=DEFAULT_TOP):
+    """Top-`top` por cada categoría activa del restaurante (una lectura indexada por categoría)."""
+    categories = MenuCategory.objects.filter(restaurant_id=restaurant_id, is_active=True)
+    return [
+        {
+            "category_id": category.id,
+            "category_name": category.name,
+            "top_items": top_items(
+                period=period,
+                day=day,
+                restaurant_id=restaurant_id,
+                category_id=category.id,
+                top=top,
+            ),
+        }
+        for category in categories
+    ]
@@ -0,0 +1,161 @@
+# core/compression.py
+"""
+Compresión negociada de respuestas: brotli si el cliente lo acepta y el
+paquete `brotli` está instalado, si no gzip.
+
+- Solo tipos comprimibles (COMPRESSIBLE_TYPES y text/*) y cuerpos de al
+  menos COMPRESSION_MIN_BYTES; por debajo la cabecera y la CPU no
+  compensan.
+- Respeta los q-values de Accept-Encoding (q=0 excluye) y, a igualdad,
+  prefiere brotli. Con gzip se añade el relleno aleatorio de Django
+  contra BREACH.
+- Las respuestas en streaming (exportaciones CSV) se comprimen al vuelo
+  con un único compresor, sin Content-Length.
+"""
+import zlib
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+from django.utils.text import compress_string
+
+try:
+    import brotli
+except ImportError:  # Dependencia opcional: solo gzip.
+    brotli = None
+
+COMPRESSIBLE_TYPES = {
+    "application/json",
+    "application/javascript",
+    "application/xml",
+    "application/msgpack",
+    "application/x-msgpack",
+    "image/svg+xml",
+}
+
+# Relleno aleatorio del nombre de fichero gzip (igual que GZipMiddleware).
+GZIP_MAX_RANDOM_BYTES = 100
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+def available_encodings():
+    return ("br", "gzip") if brotli is not None else ("gzip",)
+
+
+def choose_encoding(accept_encoding):
+    """Codificación a usar según Accept-Encoding, o None."""
+    accepted = {}
+    for part in accept_encoding.split(","):
+        coding, _, params = part.strip().partition(";")
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        accepted[coding] = q
+
+    best, best_q = None, 0.0
+    for coding in available_encodings():
+        q = accepted.get(coding, accepted.get("*", 0.0))
+        if q > best_q:
+            best, best_q = coding, q
+    return best
+
+
+def compress(body, encoding):
+    if encoding == "br":
+        return brotli.compress(body, quality=_setting("BROTLI_QUALITY", 5))
+    return compress_string(body, max_random_bytes=GZIP_MAX_RANDOM_BYTES)
+
+
+def _stream_compressor(encoding):
+    """(compress(chunk), finish()) para comprimir un stream con un solo compresor."""
+    if encoding == "br":
+        compressor = brotli.Compressor(quality=_setting("BROTLI_QUALITY", 5))
+        return compressor.process, compressor.finish
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    return compressor.compress, compressor.flush
+
+
+def _compress_stream(chunks, encoding):
+    process, finish = _stream_compressor(encoding)
+    for chunk in chunks:
+        data = process(chunk)
+        if data:
+            yield data
+    yield finish()
+
+
+async def _acompress_stream(chunks, encoding):
+    process, finish = _stream_compressor(encoding)
+    async for chunk in chunks:
+        data = process(chunk)
+        if data:
+            yield data
+    yield finish()
+
+
+def is_compressible(response):
+    content_type = response.get("Content-Type", "").split(";")[0].strip().lower()
+    return content_type.startswith("text/") or content_type in COMPRESSIBLE_TYPES
+
+
+def compress_response(request, response):
+    if response.has_header("Content-Encoding") or not is_compressible(response):
+        return response
+    if response.status_code < 200 or response.status_code in (204, 304):
+        return response
+    if not response.streaming and len(response.content) < _setting("COMPRESSION_MIN_BYTES", 1024):
+        return response
+
+    patch_vary_headers(response, ("Accept-Encoding",))
+    encoding = choose_encoding(request.META.get("HTTP_ACCEPT_ENCODING", ""))
+    if encoding is None:
+        return response
+
+    if response.streaming:
+        if response.is_async:
+            response.streaming_content = _acompress_stream(response.streaming_content, encoding)
+        else:
+            response.streaming_content = _compress_stream(response.streaming_content, encoding)
+        del response.headers["Content-Length"]
+    else:
+        compressed = compress(response.content, encoding)
+        if len(compressed) >= len(response.content):
+            return response
+        response.content = compressed
+        response.headers["Content-Length"] = str(len(compressed))
+
+    # ETag fuerte -> débil (RFC 9110 8.8.1), como GZipMiddleware.
+    etag = response.get("ETag")
+    if etag and etag.startswith('"'):
+        response.headers["ETag"] = "W/" + etag
+    response.headers["Content-Encoding"] = encoding
+    return response
+
+
+class CompressionMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        return compress_response(request, self.get_response(request))
+
+    async def __acall__(self, request):
+        return compress_response(request, await self.get_response(request))
@@ -0,0 +1,125 @@
+# core/customer_lookup.py
+"""
+Búsqueda de clientes por teléfono para pedidos por teléfono y WhatsApp.
+
+- `lookup`: número completo, igualdad sobre Customer.phone_e164. Incluye
+  clientes inactivos: el número sigue registrado (Customer.phone es único)
+  y el operador debe verlo en vez de intentar crear otro cliente.
+- `typeahead`: prefijo normalizado con `startswith`, que en Postgres el
+  índice con varchar_pattern_ops resuelve como un rango. Solo activos:
+  sirve para elegir a quién se le toma el pedido.
+
+Cada resultado trae `is_active` para que la interfaz distinga ambos casos.
+
+Cada resultado trae la dirección por defecto y el último pedido como
+subconsultas JSON correlacionadas: una sola consulta por búsqueda.
+"""
+from datetime import timezone as dt_timezone
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import OuterRef, Subquery
+from django.db.models.functions import JSONObject
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from . import phones
+from .models import Customer, DeliveryAddress, Order
+
+DEFAULT_LIMIT = 10
+MAX_LIMIT = 25
+
+RESULT_FIELDS = (
+    "id", "name", "phone", "phone_e164", "email", "is_active",
+    "orders_count", "lifetime_value_cop", "last_order_at",
+)
+
+
+def backfill(batch_size=2000, only_missing=True):
+    """Rellena phone_e164 en lotes por id; devuelve las filas que cambiaron."""
+    customers = Customer.objects.order_by("pk")
+    if only_missing:
+        customers = customers.filter(phone_e164="")
+    updated, last_pk = 0, 0
+    while True:
+        batch = list(customers.filter(pk__gt=last_pk).only("pk", "phone", "phone_e164")[:batch_size])
+        if not batch:
+            return updated
+        last_pk = batch[-1].pk
+        changed = []
+        for customer in batch:
+            value = phones.normalize(customer.phone)
+            if value != customer.phone_e164:
+                customer.phone_e164 = value
+                changed.append(customer)
+        with transaction.atomic():
+            Customer.objects.bulk_update(changed, ["phone_e164"], batch_size=batch_size)
+        updated += len(changed)
+
+
+def _with_context(queryset):
+    # Sin dirección marcada por defecto se usa la primera.
+    address = DeliveryAddress.objects.filter(customer_id=OuterRef("pk")).order_by("-is_default", "id")
+    last_order = Order.objects.filter(customer_id=OuterRef("pk")).order_by("-created_at", "-id")
+    return queryset.annotate(
+        default_address=Subquery(
+            address.values(
+                data=JSONObject(
+                    id="id",
+                    label="label",
+                    address_line="address_line",
+                    neighborhood="neighborhood",
+                    city="city",
+                    notes="notes",
+                    lat="lat",
+                    lng="lng",
+                )
+            )[:1]
+        ),
+        last_order=Subquery(
+            last_order.values(
+                data=JSONObject(
+                    id="id",
+                    order_number="order_number",
+                    status="status",
+                    channel="channel",
+                    total_cop="total_cop",
+                    created_at="created_at",
+                )
+            )[:1]
+        ),
+    ).values(*RESULT_FIELDS, "default_address", "last_order")
+
+
+def _present(row):
+    """Mismo formato que los serializers: lat/lng como texto y fechas con zona."""
+    address = row["default_address"]
+    if address:
+        for key in ("lat", "lng"):
+            if address[key] is not None:
+                address[key] = f"{Decimal(str(address[key])):.6f}"
+    order = row["last_order"]
+    if order:
+        # Postgres lo devuelve en ISO con zona; SQLite como texto UTC sin zona.
+        created_at = parse_datetime(order["created_at"])
+        if timezone.is_naive(created_at):
+            created_at = created_at.replace(tzinfo=dt_timezone.utc)
+        order["created_at"] = created_at
+    return row
+
+
+def lookup(raw):
+    """Clientes, activos o no, con exactamente ese número normalizado (más de uno si hay duplicados)."""
+    value = phones.normalize(raw)
+    if not value:
+        return []
+    return [_present(row) for row in _with_context(Customer.objects.filter(phone_e164=value).order_by("id"))]
+
+
+def typeahead(raw, limit=DEFAULT_LIMIT):
+    """Clientes activos cuyo número normalizado empieza por el prefijo, en orden de número."""
+    prefix = phones.normalize_prefix(raw)
+    if not prefix:
+        return []
+    queryset = Customer.objects.filter(phone_e164__startswith=prefix, is_active=True).order_by("phone_e164")
+    return [_present(row) for row in _with_context(queryset)[:limit]]
@@ -0,0 +1,114 @@
+# core/customer_stats.py
+"""
+Estadísticas desnormalizadas de Customer: orders_count, lifetime_value_cop
+y last_order_at (perfil y orden del CRM sin agregar sobre core_order).
+
+orders_count y lifetime_value_cop cuentan solo pedidos COMPLETED, con la
+misma regla que SalesRollup; last_order_at es la fecha del último pedido
+realizado, en cualquier estado. Las señales de Order aplican el delta de
+cada transición con un único UPDATE por cliente. Archivar no las toca;
+`rebuild_customer_stats` las recalcula desde core_order y ArchivedOrder.
+"""
+from django.db import connection, transaction
+from django.db.models import Count, Max, Q, Sum
+
+from .models import ArchivedOrder, Customer, Order
+from .rollups import sales_contribution, saved_value
+
+STATS_FIELDS = ("orders_count", "lifetime_value_cop", "last_order_at")
+
+
+def apply_delta(customer_id, orders_delta, value_delta, last_order_at=None):
+    """
+    Un único UPDATE en SQL directo: corre en cada save de Order y el
+    compilador del ORM costaría más que la propia consulta.
+    """
+    if customer_id is None:
+        return
+    sets, params = [], []
+    if orders_delta or value_delta:
+        sets += ["orders_count = orders_count + %s", "lifetime_value_cop = lifetime_value_cop + %s"]
+        params += [orders_delta, value_delta]
+    if last_order_at is not None:
+        at = connection.ops.adapt_datetimefield_value(last_order_at)
+        sets.append(
+            "last_order_at = CASE WHEN last_order_at IS NULL OR last_order_at < %s "
+            "THEN %s ELSE last_order_at END"
+        )
+        params += [at, at]
+    if not sets:
+        return
+    table = connection.ops.quote_name(Customer._meta.db_table)
+    with connection.cursor() as cursor:
+        cursor.execute(f"UPDATE {table} SET {', '.join(sets)} WHERE id = %s", [*params, customer_id])
+
+
+def apply_order_change(previous, order, update_fields=None):
+    """
+    Aplica a las estadísticas del cliente el cambio entre `previous`
+    (estado en DB antes del save, o None si el pedido es nuevo) y `order`.
+    """
+    new_orders, new_value = sales_contribution(
+        saved_value(order, previous, "status", update_fields),
+        saved_value(order, previous, "total_cop", update_fields),
+    )
+    customer_id = order.customer_id
+    if previous is not None and update_fields is not None and "customer" not in update_fields:
+        customer_id = previous.customer_id
+
+    if previous is None:
+        apply_delta(customer_id, new_orders, new_value, last_order_at=order.created_at)
+        return
+
+    old_orders, old_value = sales_contribution(previous.status, previous.total_cop)
+    if previous.customer_id == customer_id:
+        apply_delta(customer_id, new_orders - old_orders, new_value - old_value)
+        return
+
+    # Pedido reasignado: el last_order_at del cliente anterior no se recalcula.
+    apply_delta(previous.customer_id, -old_orders, -old_value)
+    apply_delta(customer_id, new_orders, new_value, last_order_at=order.created_at)
+
+
+def rebuild(customer_id=None):
+    """Recalcula las estadísticas desde los pedidos (incluidos los archivados)."""
+    sources = [Order.objects.all(), ArchivedOrder.objects.all()]
+    customers = Customer.objects.all()
+    if customer_id is not None:
+        sources = [qs.filter(customer_id=customer_id) for qs in sources]
+        customers = customers.filter(pk=customer_id)
+
+    completed = Q(status=Order.STATUS_COMPLETED)
+    totals = {}
+    for orders in sources:
+        rows = (
+            orders.filter(customer_id__isnull=False)
+            .values("customer_id")
+            .annotate(
+                orders_count=Count("id", filter=completed),
+                lifetime_value_cop=Sum("total_cop", filter=completed),
+                last_order_at=Max("created_at"),
+            )
+            .order_by()
+        )
+        for row in rows.iterator():
+            count, value, last = totals.get(row["customer_id"], (0, 0, None))
+            if last is None or row["last_order_at"] > last:
+                last = row["last_order_at"]
+            totals[row["customer_id"]] = (
+                count + row["orders_count"],
+                value + (row["lifetime_value_cop"] or 0),
+                last,
+            )
+
+    with transaction.atomic():
+        customers.update(orders_count=0, lifetime_value_cop=0, last_order_at=None)
+        Customer.objects.bulk_update(
+            [
+                Customer(pk=pk, orders_count=count, lifetime_value_cop=value, last_order_at=last)
+                for pk, (count, value, last) in totals.items()
+            ],
+            STATS_FIELDS,
+            batch_size=1000,
+        )
+    return len(totals)
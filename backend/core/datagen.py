@@ -0,0 +1,554 @@
+# core/datagen.py
+"""
+Generador de datos sintéticos a escala de producción.
+
+Todo sale de un generador numpy sembrado con `seed`, así que los mismos
+parámetros producen los mismos datos:
+
+- restaurantes, categorías, menú, conductores y cupones (pocos: ORM);
+- clientes con una o dos direcciones;
+- pedidos con líneas, entregas y eventos de funnel, por bloques de
+  `chunk_size` pedidos en orden cronológico.
+
+La demanda sigue una curva diaria (almuerzo y cena), un peso por día de la
+semana y una tendencia de crecimiento. Los pedidos con más de 2 h de
+antigüedad quedan COMPLETED o CANCELLED; los de las últimas 2 h del rango
+están en curso.
+
+Las filas se escriben con COPY en PostgreSQL y con executemany en otros
+motores, con los ids asignados aquí. No se usa bulk_create porque
+sobrescribe created_at (auto_now_add) con la hora de carga. Como no se
+disparan señales, los rollups, contadores y estadísticas de clientes se
+reconstruyen al final.
+"""
+import itertools
+from dataclasses import dataclass
+from datetime import datetime, time, timedelta
+
+import numpy as np
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from . import bestsellers, customer_stats, partitions, phones
+from .models import (
+    Coupon,
+    Customer,
+    Delivery,
+    DeliveryAddress,
+    Driver,
+    Event,
+    MenuCategory,
+    MenuItem,
+    Order,
+    OrderItem,
+    Restaurant,
+)
+from .rollups import rebuild_sales_rollups
+
+# Peso de cada hora local (0-23): almuerzo fuerte, cena media.
+HOURLY_CURVE = np.array([
+    0.2, 0.1, 0.05, 0.05, 0.05, 0.1, 0.3, 0.8, 1.2, 1.0, 1.2, 3.0,
+    6.5, 7.0, 4.0, 1.5, 1.2, 1.8, 3.5, 5.0, 4.5, 2.5, 1.0, 0.5,
+])
+# Lunes a domingo.
+WEEKDAY_CURVE = np.array([0.9, 0.9, 0.95, 1.0, 1.2, 1.35, 1.1])
+
+CHANNELS = [Order.CHANNEL_WEB, Order.CHANNEL_WHATSAPP, Order.CHANNEL_PHONE, Order.CHANNEL_WALKIN]
+CHANNEL_MIX = [0.35, 0.35, 0.1, 0.2]
+
+IN_FLIGHT_STATUSES = [
+    Order.STATUS_PENDING,
+    Order.STATUS_IN_PROGRESS,
+    Order.STATUS_READY,
+    Order.STATUS_COMPLETED,
+    Order.STATUS_CANCELLED,
+]
+IN_FLIGHT_MIX = [0.15, 0.25, 0.2, 0.35, 0.05]
+CANCEL_RATE = 0.07
+IN_FLIGHT_WINDOW = 2 * 3600
+
+CATEGORIES = ["Corrientes", "Especiales", "Sopas", "Bebidas", "Postres", "Adicionales"]
+
+_US = 1_000_000
+
+
+@dataclass
+class Scale:
+    restaurants: int = 3
+    menu_items: int = 40  # por restaurante
+    drivers: int = 8  # por restaurante
+    coupons: int = 5  # por restaurante
+    customers: int = 20_000
+    orders: int = 100_000
+    days: int = 365
+    growth: float = 0.5  # la demanda del último día es (1 + growth) veces la del primero
+    abandoned_ratio: float = 1.5  # sesiones web sin compra por pedido web
+    events: bool = True
+
+
+# --------- ESCRITURA --------- #
+
+class TableWriter:
+    """
+    Inserta columnas (arrays numpy, listas o escalares) en la tabla del
+    modelo. Las columnas no indicadas toman el default del campo.
+    Fechas: arrays datetime64[us] en UTC (NaT = NULL).
+    """
+
+    def __init__(self, model):
+        self.model = model
+        self.fields = {f.attname: f for f in model._meta.concrete_fields}
+        self.use_copy = connection.vendor == "postgresql"
+
+    def _default(self, field):
+        if field.has_default():
+            return field.get_default()
+        if field.null:
+            return None
+        if field.blank:
+            return ""
+        raise ValueError(f"{self.model.__name__}.{field.name} es obligatorio.")
+
+    def _adapt(self, value, size):
+        if isinstance(value, np.ndarray):
+            if np.issubdtype(value.dtype, np.datetime64):
+                value = value.astype("datetime64[us]")
+                if self.use_copy:
+                    return value.tolist()  # datetime naive en UTC (la sesión de Django usa UTC)
+                text = np.char.replace(np.datetime_as_string(value, unit="us"), "T", " ")
+                return [None if t == "NaT" else t for t in text.tolist()]
+            return value.tolist()
+        if isinstance(value, list):
+            return value
+        return itertools.repeat(value, size)
+
+    def write(self, columns, size):
+        if size == 0:
+            return
+        names = list(columns) + [name for name in self.fields if name not in columns]
+        values = [self._adapt(columns.get(name, None), size) if name in columns
+                  else itertools.repeat(self._default(self.fields[name]), size)
+                  for name in names]
+        db_columns = [connection.ops.quote_name(self.fields[name].column) for name in names]
+        table = connection.ops.quote_name(self.model._meta.db_table)
+        rows = zip(*values)
+
+        with connection.cursor() as cursor:
+            if self.use_copy:
+                with cursor.copy(f"COPY {table} ({', '.join(db_columns)}) FROM STDIN") as copy:
+                    for row in rows:
+                        copy.write_row(row)
+            else:
+                placeholders = ", ".join(["%s"] * len(names))
+                cursor.executemany(
+                    f"INSERT INTO {table} ({', '.join(db_columns)}) VALUES ({placeholders})",
+                    list(rows),
+                )
+
+
+def _next_id(model):
+    return (model.objects.aggregate(top=Max("id"))["top"] or 0) + 1
+
+
+def _reset_sequences(models):
+    with connection.cursor() as cursor:
+        for sql in connection.ops.sequence_reset_sql(no_style(), models):
+            cursor.execute(sql)
+
+
+def _to_datetime64(seconds):
+    """Segundos epoch (float) -> datetime64[us]; NaN -> NaT."""
+    us = np.where(np.isnan(seconds), 0, seconds * _US).astype("int64")
+    out = us.astype("datetime64[us]")
+    out[np.isnan(seconds)] = np.datetime64("NaT")
+    return out
+
+
+# --------- ENTIDADES BASE --------- #
+
+@dataclass
+class Catalog:
+    restaurant_ids: np.ndarray
+    restaurant_weights: np.ndarray
+    delivery_fee: np.ndarray  # por posición de restaurante
+    default_prep: np.ndarray
+    items_by_restaurant: list  # [(ids, precios, prep, popularidad)]
+    drivers_by_restaurant: list
+    coupons_by_restaurant: list  # [(ids, tipo_percent, valor)]
+    customer_ids: np.ndarray
+    customer_weights: np.ndarray
+    address_ids: np.ndarray  # dirección principal por cliente
+
+
+def _build_catalog(rng, scale, started):
+    restaurants = []
+    for r in range(scale.restaurants):
+        restaurant = Restaurant.objects.create(
+            name=f"Noah Demo {r + 1}",
+            slug=f"noah-demo-{_next_id(Restaurant)}",
+            delivery_fee_base_cop=int(rng.integers(2, 6)) * 1000,
+            default_prep_minutes=int(rng.integers(12, 25)),
+        )
+        restaurants.append(restaurant)
+
+    items_by_restaurant, drivers_by_restaurant, coupons_by_restaurant = [], [], []
+    for restaurant in restaurants:
+        categories = MenuCategory.objects.bulk_create(
+            MenuCategory(restaurant=restaurant, name=name, sort_order=i)
+            for i, name in enumerate(CATEGORIES)
+        )
+        prices = (rng.integers(6, 36, scale.menu_items) * 500).astype("int64")
+        prep = np.where(rng.random(scale.menu_items) < 0.5, 0, rng.integers(5, 30, scale.menu_items))
+        items = MenuItem.objects.bulk_create(
+            MenuItem(
+                restaurant=restaurant,
+                category=categories[i % len(categories)],
+                name=f"Plato {i + 1}",
+                price_cop=int(prices[i]),
+                cost_cop=int(prices[i] * rng.uniform(0.3, 0.55)),
+                average_prep_minutes=int(prep[i]),
+            )
+            for i in range(scale.menu_items)
+        )
+        popularity = 1.0 / np.arange(1, scale.menu_items + 1) ** 0.9  # Zipf
+        rng.shuffle(popularity)
+        items_by_restaurant.append((
+            np.array([item.id for item in items]),
+            prices,
+            np.where(prep == 0, restaurant.default_prep_minutes, prep),
+            popularity / popularity.sum(),
+        ))
+
+        drivers = Driver.objects.bulk_create(
+            Driver(restaurant=restaurant, name=f"Conductor {i + 1}", phone=f"31{restaurant.id:04d}{i:04d}")
+            for i in range(scale.drivers)
+        )
+        drivers_by_restaurant.append(np.array([driver.id for driver in drivers]))
+
+        percent = rng.random(scale.coupons) < 0.6
+        values = np.where(percent, rng.choice([10, 15, 20], scale.coupons), rng.integers(2, 8, scale.coupons) * 1000)
+        coupons = Coupon.objects.bulk_create(
+            Coupon(
+                restaurant=restaurant,
+                code=f"DEMO{restaurant.id}X{i + 1}",
+                discount_type=Coupon.PERCENT if percent[i] else Coupon.FIXED,
+                percent_off=int(values[i]) if percent[i] else 0,
+                amount_off_cop=0 if percent[i] else int(values[i]),
+            )
+            for i in range(scale.coupons)
+        )
+        coupons_by_restaurant.append((np.array([c.id for c in coupons]), percent, values))
+
+    customer_ids, address_ids = _write_customers(rng, scale, started)
+    weights = rng.lognormal(0, 1.2, len(customer_ids))  # unos pocos clientes muy recurrentes
+    restaurant_weights = rng.uniform(0.5, 1.5, len(restaurants))
+    return Catalog(
+        restaurant_ids=np.array([r.id for r in restaurants]),
+        restaurant_weights=restaurant_weights / restaurant_weights.sum(),
+        delivery_fee=np.array([r.delivery_fee_base_cop for r in restaurants]),
+        default_prep=np.array([r.default_prep_minutes for r in restaurants]),
+        items_by_restaurant=items_by_restaurant,
+        drivers_by_restaurant=drivers_by_restaurant,
+        coupons_by_restaurant=coupons_by_restaurant,
+        customer_ids=customer_ids,
+        customer_weights=weights / weights.sum(),
+        address_ids=address_ids,
+    )
+
+
+def _write_customers(rng, scale, started):
+    n = scale.customers
+    first_id = _next_id(Customer)
+    ids = np.arange(first_id, first_id + n)
+    created = _to_datetime64(started - rng.uniform(0, 90 * 86400, n))
+    with transaction.atomic():
+        TableWriter(Customer).write({
+            "id": ids,
+            "name": [f"Cliente {i}" for i in ids.tolist()],
+            "phone": [f"3{i:09d}" for i in ids.tolist()],
+            "phone_e164": [phones.normalize(f"3{i:09d}") for i in ids.tolist()],
+            "created_at": created,
+            "updated_at": created,
+        }, n)
+
+        # Todos con dirección principal; ~30 % con una segunda.
+        second = rng.random(n) < 0.3
+        owners = np.concatenate([ids, ids[second]])
+        m = len(owners)
+        first_address = _next_id(DeliveryAddress)
+        address_ids = np.arange(first_address, first_address + m)
+        TableWriter(DeliveryAddress).write({
+            "id": address_ids,
+            "customer_id": owners,
+            "label": ["Casa"] * n + ["Trabajo"] * (m - n),
+            "address_line": [f"Calle {x % 80 + 1} # {x % 40 + 1}-{x % 90 + 10}" for x in owners.tolist()],
+            "is_default": np.arange(m) < n,
+            "created_at": np.concatenate([created, created[second]]),
+            "updated_at": np.concatenate([created, created[second]]),
+        }, m)
+    return ids, address_ids[:n]
+
+
+# --------- DEMANDA --------- #
+
+def _hour_slots(scale, end_date):
+    """(inicio UTC en segundos de cada hora local del rango, peso de cada hora)."""
+    tz = timezone.get_default_timezone()
+    days = [end_date - timedelta(days=scale.days - d) for d in range(scale.days)]
+    day_starts = np.array([
+        timezone.make_aware(datetime.combine(day, time.min), tz).timestamp() for day in days
+    ])
+    starts = (day_starts[:, None] + np.arange(24)[None, :] * 3600).ravel()
+    trend = 1 + scale.growth * np.linspace(0, 1, scale.days)
+    weekday = WEEKDAY_CURVE[[day.weekday() for day in days]]
+    weights = ((trend * weekday)[:, None] * HOURLY_CURVE[None, :]).ravel()
+    return starts, weights / weights.sum()
+
+
+# --------- PEDIDOS --------- #
+
+def _generate_chunk(rng, catalog, scale, slot_starts, slot_of, ids, range_end):
+    n = len(ids)
+    created = np.sort(slot_starts[slot_of] + rng.uniform(0, 3600, n))
+    rest_pos = rng.choice(len(catalog.restaurant_ids), n, p=catalog.restaurant_weights)
+    channel = rng.choice(len(CHANNELS), n, p=CHANNEL_MIX)
+    walkin = channel == CHANNELS.index(Order.CHANNEL_WALKIN)
+    customer_pos = rng.choice(len(catalog.customer_ids), n, p=catalog.customer_weights)
+    has_customer = ~walkin | (rng.random(n) < 0.4)
+    has_address = has_customer & ~walkin
+
+    # Líneas: 1 + Poisson, platos según popularidad del restaurante, sin repetir plato.
+    n_lines = 1 + np.minimum(rng.poisson(1.3, n), 7)
+    line_order = np.repeat(np.arange(n), n_lines)
+    line_item = np.empty(len(line_order), dtype="int64")
+    line_price = np.empty(len(line_order), dtype="int64")
+    line_prep = np.empty(len(line_order), dtype="int64")
+    line_rest = rest_pos[line_order]
+    for r, (item_ids, prices, prep, popularity) in enumerate(catalog.items_by_restaurant):
+        mask = line_rest == r
+        picked = rng.choice(len(item_ids), mask.sum(), p=popularity)
+        line_item[mask], line_price[mask], line_prep[mask] = item_ids[picked], prices[picked], prep[picked]
+    _, keep = np.unique(line_order * (line_item.max() + 1) + line_item, return_index=True)
+    line_order, line_item, line_price, line_prep = (
+        line_order[keep], line_item[keep], line_price[keep], line_prep[keep]
+    )
+    quantity = 1 + rng.binomial(2, 0.15, len(line_order))
+    line_total = line_price * quantity
+
+    subtotal = np.bincount(line_order, weights=line_total, minlength=n).astype("int64")
+    prep_minutes = np.zeros(n, dtype="int64")
+    np.maximum.at(prep_minutes, line_order, line_prep)
+
+    # Cupones (~4 %), mismo cálculo que Order.save().
+    coupon_id = np.full(n, -1)
+    discount = np.zeros(n, dtype="int64")
+    with_coupon = rng.random(n) < 0.04
+    for r, (coupon_ids, percent, values) in enumerate(catalog.coupons_by_restaurant):
+        mask = with_coupon & (rest_pos == r)
+        if not mask.any() or not len(coupon_ids):
+            continue
+        picked = rng.integers(0, len(coupon_ids), mask.sum())
+        coupon_id[mask] = coupon_ids[picked]
+        discount[mask] = np.where(
+            percent[picked], subtotal[mask] * values[picked] // 100, np.minimum(values[picked], subtotal[mask])
+        )
+    delivery_fee = np.where(has_address, catalog.delivery_fee[rest_pos], 0)
+    total = np.maximum(subtotal + delivery_fee - discount, 0)
+
+    # Estados y marcas de tiempo.
+    status = np.where(rng.random(n) < CANCEL_RATE, Order.STATUS_CANCELLED, Order.STATUS_COMPLETED).astype(object)
+    recent = created > range_end - IN_FLIGHT_WINDOW
+    status[recent] = rng.choice(IN_FLIGHT_STATUSES, recent.sum(), p=IN_FLIGHT_MIX)
+    progressed = np.isin(status, [Order.STATUS_IN_PROGRESS, Order.STATUS_READY, Order.STATUS_COMPLETED])
+    ready = np.isin(status, [Order.STATUS_READY, Order.STATUS_COMPLETED])
+    done = status == Order.STATUS_COMPLETED
+    cancelled = status == Order.STATUS_CANCELLED
+
+    nan = np.full(n, np.nan)
+    in_progress_at = np.where(progressed, created + rng.uniform(60, 360, n), nan)
+    ready_at = np.where(ready, in_progress_at + prep_minutes * 60 * rng.uniform(0.8, 1.4, n), nan)
+    completed_at = np.where(
+        done, ready_at + np.where(has_address, rng.uniform(900, 2400, n), rng.uniform(60, 300, n)), nan
+    )
+    cancelled_at = np.where(cancelled, created + rng.uniform(120, 1200, n), nan)
+    updated = np.fmax.reduce([created, in_progress_at, ready_at, completed_at, cancelled_at])
+
+    customer_id = np.where(has_customer, catalog.customer_ids[customer_pos], -1)
+    day = np.datetime_as_string(_to_datetime64(created), unit="D")
+    orders = {
+        "id": ids,
+        "restaurant_id": catalog.restaurant_ids[rest_pos],
+        "customer_id": [None if c < 0 else c for c in customer_id.tolist()],
+        "delivery_address_id": [
+            a if keep else None
+            for a, keep in zip(catalog.address_ids[customer_pos].tolist(), has_address.tolist())
+        ],
+        "order_number": [f"NF-{d.replace('-', '')}-{i:06X}" for d, i in zip(day.tolist(), ids.tolist())],
+        "channel": [CHANNELS[c] for c in channel.tolist()],
+        "status": status.tolist(),
+        "coupon_id": [None if c < 0 else c for c in coupon_id.tolist()],
+        "subtotal_cop": subtotal,
+        "discount_cop": discount,
+        "delivery_fee_cop": delivery_fee,
+        "total_cop": total,
+        "estimated_prep_minutes": prep_minutes,
+        "eta_ready_at": _to_datetime64(created + prep_minutes * 60),
+        "pending_at": _to_datetime64(created),
+        "in_progress_at": _to_datetime64(in_progress_at),
+        "ready_at": _to_datetime64(ready_at),
+        "completed_at": _to_datetime64(completed_at),
+        "cancelled_at": _to_datetime64(cancelled_at),
+        "created_at": _to_datetime64(created),
+        "updated_at": _to_datetime64(updated),
+    }
+    items = {
+        "order_id": ids[line_order],
+        "menu_item_id": line_item,
+        "quantity": quantity,
+        "unit_price_cop": line_price,
+        "line_total_cop": line_total,
+        "created_at": _to_datetime64(created[line_order]),
+        "updated_at": _to_datetime64(created[line_order]),
+    }
+
+    # Entregas de los pedidos a domicilio ya listos o completados.
+    with_delivery = np.flatnonzero(has_address & ready)
+    driver_id = np.empty(len(with_delivery), dtype="int64")
+    for r, driver_ids in enumerate(catalog.drivers_by_restaurant):
+        mask = rest_pos[with_delivery] == r
+        driver_id[mask] = driver_ids[rng.integers(0, len(driver_ids), mask.sum())] if len(driver_ids) else -1
+    delivered = done[with_delivery]
+    deliveries = {
+        "order_id": ids[with_delivery],
+        "driver_id": [None if d < 0 else d for d in driver_id.tolist()],
+        "status": np.where(delivered, Delivery.STATUS_DELIVERED, Delivery.STATUS_ASSIGNED).tolist(),
+        "distance_km": [f"{km:.2f}" for km in rng.uniform(0.5, 8, len(with_delivery)).tolist()],
+        "started_at": _to_datetime64(ready_at[with_delivery]),
+        "delivered_at": _to_datetime64(completed_at[with_delivery]),
+        "created_at": _to_datetime64(ready_at[with_delivery]),
+        "updated_at": _to_datetime64(updated[with_delivery]),
+    }
+
+    events = _funnel_events(rng, scale, ids, created, channel, customer_id) if scale.events else None
+    return orders, items, deliveries, events, len(line_order)
+
+
+def _funnel_events(rng, scale, ids, created, channel, customer_id):
+    """menu_view -> add_to_cart -> checkout antes de cada pedido web, sesiones abandonadas y order_created."""
+    web = np.flatnonzero(channel == CHANNELS.index(Order.CHANNEL_WEB))
+    names, at, customers, orders = [], [], [], []
+
+    def add(name, when, who, order):
+        names.extend([name] * len(when))
+        at.append(when)
+        customers.append(who)
+        orders.append(order)
+
+    none = lambda size: np.full(size, -1)  # noqa: E731
+    checkout_at = created[web] - rng.uniform(30, 120, len(web))
+    cart_at = checkout_at - rng.uniform(60, 300, len(web))
+    add("menu_view", cart_at - rng.uniform(30, 900, len(web)), customer_id[web], none(len(web)))
+    add("add_to_cart", cart_at, customer_id[web], none(len(web)))
+    add("checkout", checkout_at, customer_id[web], none(len(web)))
+    add("order_created", created, customer_id, ids)
+
+    sessions = rng.poisson(scale.abandoned_ratio * len(web)) if len(web) else 0
+    if sessions:
+        start = rng.choice(created, sessions) + rng.uniform(-3600, 3600, sessions)
+        who = np.where(rng.random(sessions) < 0.3, -1, rng.choice(customer_id[customer_id >= 0], sessions)) \
+            if (customer_id >= 0).any() else none(sessions)
+        add("menu_view", start, who, none(sessions))
+        carted = rng.random(sessions) < 0.4
+        cart = start[carted] + rng.uniform(30, 600, carted.sum())
+        add("add_to_cart", cart, who[carted], none(carted.sum()))
+        checked = rng.random(carted.sum()) < 0.3
+        add("checkout", cart[checked] + rng.uniform(30, 300, checked.sum()), who[carted][checked],
+            none(checked.sum()))
+
+    at = np.concatenate(at)
+    order = np.argsort(at, kind="stable")
+    customers = np.concatenate(customers)[order]
+    order_ids = np.concatenate(orders)[order]
+    return {
+        "name": [names[i] for i in order.tolist()],
+        "customer_id": [None if c < 0 else c for c in customers.tolist()],
+        "order_id": [None if o < 0 else o for o in order_ids.tolist()],
+        "at": _to_datetime64(at[order]),
+        "created_at": _to_datetime64(at[order]),
+        "updated_at": _to_datetime64(at[order]),
+    }
+
+
+def _ensure_event_partitions(start_date, end_date):
+    if not partitions.is_partitioned(connection):
+        return
+    existing = set(partitions.list_partitions(connection))
+    month = partitions.month_start(start_date)
+    while month <= end_date:
+        if month not in existing:
+            partitions.create_partition(month, connection)
+        month = partitions.add_months(month, 1)
+
+
+def generate(scale, seed=0, end_date=None, chunk_size=50_000, rebuild=True, progress=None):
+    """
+    Genera el conjunto de datos. El rango son los `scale.days` días locales
+    anteriores a `end_date` (por defecto hoy). `progress(tabla, filas)` se
+    llama tras cada bloque. Devuelve el número de filas por tabla.
+    """
+    end_date = end_date or timezone.localdate()
+    start_date = end_date - timedelta(days=scale.days)
+    range_end = timezone.make_aware(
+        datetime.combine(end_date, time.min), timezone.get_default_timezone()
+    ).timestamp()
+    rng = np.random.default_rng([seed, 0])
+    counts = {"orders": 0, "order_items": 0, "deliveries": 0, "events": 0}
+
+    with transaction.atomic():
+        catalog = _build_catalog(rng, scale, range_end - scale.days * 86400)
+    counts["customers"] = len(catalog.customer_ids)
+    if scale.events:
+        _ensure_event_partitions(start_date, end_date)
+
+    slot_starts, slot_weights = _hour_slots(scale, end_date)
+    per_slot = np.cumsum(rng.multinomial(scale.orders, slot_weights))
+    writers = {model: TableWriter(model) for model in (Order, OrderItem, Delivery, Event)}
+    next_ids = {model: _next_id(model) for model in writers}
+
+    for chunk, first in enumerate(range(0, scale.orders, chunk_size)):
+        chunk_rng = np.random.default_rng([seed, 1, chunk])
+        index = np.arange(first, min(first + chunk_size, scale.orders))
+        slot_of = np.searchsorted(per_slot, index, side="right")
+        ids = next_ids[Order] + index
+        orders, items, deliveries, events, lines = _generate_chunk(
+            chunk_rng, catalog, scale, slot_starts, slot_of, ids, range_end
+        )
+        with transaction.atomic():
+            writers[Order].write(orders, len(ids))
+            for model, columns in ((OrderItem, items), (Delivery, deliveries), (Event, events)):
+                if columns is None:
+                    continue
+                size = len(columns["created_at"])
+                columns["id"] = np.arange(next_ids[model], next_ids[model] + size)
+                writers[model].write(columns, size)
+                next_ids[model] += size
+        counts["orders"] += len(ids)
+        counts["order_items"] += lines
+        counts["deliveries"] += len(deliveries["order_id"])
+        counts["events"] += len(events["name"]) if events else 0
+        if progress:
+            progress("orders", counts["orders"])
+
+    _reset_sequences([Customer, DeliveryAddress, Order, OrderItem, Delivery, Event])
+    if rebuild:
+        rebuild_sales_rollups()
+        bestsellers.rebuild_counters()
+        customer_stats.rebuild()
+    if connection.vendor == "postgresql":
+        with connection.cursor() as cursor:
+            for model in (Customer, DeliveryAddress, Order, OrderItem, Delivery, Event):
+                cursor.execute(f"ANALYZE {connection.ops.quote_name(model._meta.db_table)}")
+    return counts
+
@@ -0,0 +1,219 @@
+# core/db_router.py
+"""
+Enrutado de lecturas a réplicas (alias en REPLICA_DATABASES).
+
+- ReplicaRoutingMiddleware marca las peticiones GET/HEAD/OPTIONS como
+  aptas para réplica; `replica_reads()` hace lo mismo fuera de una
+  petición (exportaciones, comandos de analítica).
+- Toda escritura va al primario y, desde ese momento, el resto de lecturas
+  de la petición también. Tras una petición con escrituras, el mismo
+  cliente (token o cookie de sesión) lee del primario durante
+  REPLICA_STICKY_SECONDS (read-after-write entre peticiones).
+- Cada proceso comprueba el retraso de cada réplica como mucho cada
+  REPLICA_LAG_CHECK_INTERVAL segundos; si supera REPLICA_MAX_LAG_SECONDS
+  o no responde, se lee del primario.
+- Los modelos de autenticación se leen siempre del primario (un token
+  recién creado debe valer en la petición siguiente).
+"""
+import contextvars
+import hashlib
+import logging
+import random
+import time
+from contextlib import contextmanager
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DatabaseError, DEFAULT_DB_ALIAS, connections
+
+from . import async_cache
+
+logger = logging.getLogger(__name__)
+
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+
+PRIMARY_ONLY_MODELS = {
+    "core.UserSessionToken",
+    "authtoken.Token",
+    "sessions.Session",
+    "auth.User",
+}
+
+_replica_allowed = contextvars.ContextVar("db_replica_allowed", default=False)
+_wrote = contextvars.ContextVar("db_wrote", default=False)
+
+# alias -> (timestamp de la comprobación, sana)
+_replica_status = {}
+
+LAG_SQL = """
+SELECT CASE
+    WHEN NOT pg_is_in_recovery() OR pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+    ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+END
+"""
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+def replica_aliases():
+    return list(_setting("REPLICA_DATABASES", []))
+
+
+def replica_lag(alias):
+    """Segundos de retraso de la réplica (0 si está al día o no es PostgreSQL)."""
+    connection = connections[alias]
+    if connection.vendor != "postgresql":
+        return 0.0
+    with connection.cursor() as cursor:
+        cursor.execute(LAG_SQL)
+        return float(cursor.fetchone()[0])
+
+
+def replica_is_healthy(alias):
+    now = time.monotonic()
+    checked_at, healthy = _replica_status.get(alias, (None, False))
+    if checked_at is not None and now - checked_at < _setting("REPLICA_LAG_CHECK_INTERVAL", 5):
+        return healthy
+
+    try:
+        lag = replica_lag(alias)
+        healthy = lag <= _setting("REPLICA_MAX_LAG_SECONDS", 2)
+        if not healthy:
+            logger.warning("Réplica %s con %.1fs de retraso; se lee del primario", alias, lag)
+    except DatabaseError:
+        logger.warning("Réplica %s no disponible; se lee del primario", alias, exc_info=True)
+        healthy = False
+    _replica_status[alias] = (now, healthy)
+    return healthy
+
+
+def choose_replica():
+    healthy = [alias for alias in replica_aliases() if replica_is_healthy(alias)]
+    return random.choice(healthy) if healthy else None
+
+
+@contextmanager
+def replica_reads():
+    """Permite leer de réplica dentro del bloque (sujeto a las mismas reglas)."""
+    allowed = _replica_allowed.set(True)
+    wrote = _wrote.set(False)
+    try:
+        yield
+    finally:
+        _wrote.reset(wrote)
+        _replica_allowed.reset(allowed)
+
+
+class PrimaryReplicaRouter:
+    def db_for_read(self, model, **hints):
+        if not _replica_allowed.get() or _wrote.get():
+            return None
+        if model._meta.label in PRIMARY_ONLY_MODELS:
+            return None
+        if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return None
+        return choose_replica()
+
+    def db_for_write(self, model, **hints):
+        if model._meta.label not in PRIMARY_ONLY_MODELS:
+            _wrote.set(True)
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Primario y réplicas tienen los mismos datos.
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Las réplicas reciben el esquema por replicación.
+        return db not in replica_aliases()
+
+
+# --------- MIDDLEWARE --------- #
+
+def _client_key(request):
+    credential = request.META.get("HTTP_AUTHORIZATION") or request.COOKIES.get(
+        settings.SESSION_COOKIE_NAME
+    )
+    if not credential:
+        return None
+    return "db:sticky:" + hashlib.sha1(credential.encode("utf-8")).hexdigest()[:20]
+
+
+class ReplicaRoutingMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        if not replica_aliases():
+            return self.get_response(request)
+
+        key = _client_key(request)
+        allowed = request.method in SAFE_METHODS and not self._is_sticky(key)
+        allowed_token = _replica_allowed.set(allowed)
+        wrote_token = _wrote.set(False)
+        try:
+            response = self.get_response(request)
+            if _wrote.get() and key:
+                self._mark_sticky(key)
+            return response
+        finally:
+            _wrote.reset(wrote_token)
+            _replica_allowed.reset(allowed_token)
+
+    async def __acall__(self, request):
+        # Mismo flujo; las escrituras del ORM async marcan _wrote en su hilo
+        # y asgiref devuelve el cambio de la ContextVar a este contexto.
+        if not replica_aliases():
+            return await self.get_response(request)
+
+        key = _client_key(request)
+        allowed = request.method in SAFE_METHODS and not await self._ais_sticky(key)
+        allowed_token = _replica_allowed.set(allowed)
+        wrote_token = _wrote.set(False)
+        try:
+            response = await self.get_response(request)
+            if _wrote.get() and key:
+                await self._amark_sticky(key)
+            return response
+        finally:
+            _wrote.reset(wrote_token)
+            _replica_allowed.reset(allowed_token)
+
+    def _is_sticky(self, key):
+        if key is None:
+            return False
+        try:
+            return cache.get(key) is not None
+        except Exception:  # Sin caché no sabemos si escribió: primario.
+            return True
+
+    async def _ais_sticky(self, key):
+        if key is None:
+            return False
+        try:
+            return await async_cache.aget(key) is not None
+        except Exception:
+            return True
+
+    def _mark_sticky(self, key):
+        try:
+            cache.set(key, 1, timeout=_setting("REPLICA_STICKY_SECONDS", 5))
+        except Exception:
+            logger.warning("No se pudo marcar la lectura sticky al primario", exc_info=True)
+
+    async def _amark_sticky(self, key):
+        try:
+            await async_cache.aset(key, 1, timeout=_setting("REPLICA_STICKY_SECONDS", 5))
+        except Exception:
+            logger.warning("No se pudo marcar la lectura sticky al primario", exc_info=True)
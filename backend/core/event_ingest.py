@@ -0,0 +1,374 @@
+# core/event_ingest.py
+"""
+Ingesta de eventos de funnel en lotes.
+
+El endpoint valida cada evento con chequeos baratos (sin serializers ni
+consultas), lo deja en un buffer (memoria del proceso o lista Redis) y
+responde de inmediato. Un flusher en segundo plano —hilo en proceso o el
+comando `flush_events`— vacía el buffer con Event.objects.bulk_create en
+lotes grandes. Si el buffer está lleno, los eventos sobrantes se descartan
+y se cuentan (backpressure).
+
+Si un lote falla por un error de conexión se devuelve al buffer y se
+reintenta. Cualquier otro error se atribuye a los datos: el lote se parte
+en mitades hasta aislar las filas que no entran, que se descartan
+(event_ingest_dead_total) para que una fila mala no bloquee la ingesta.
+"""
+import atexit
+import json
+import logging
+import re
+import threading
+import time
+from collections import deque
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.db import InterfaceError, OperationalError, close_old_connections, transaction
+from django.utils import timezone
+
+from . import metrics
+from .models import Customer, Event, Order
+
+logger = logging.getLogger(__name__)
+
+NAME_RE = re.compile(r"^[a-z0-9_.:\-]{1,100}$")
+MAX_META_BYTES = 2048
+MAX_PAST = timedelta(days=7)
+MAX_FUTURE = timedelta(minutes=5)
+
+REDIS_KEY = "events:buffer"
+
+ingested = metrics.counter(
+    "event_ingest_events_total",
+    "Eventos recibidos por el endpoint de ingesta, por resultado.",
+    ("result",),
+)
+flushed = metrics.counter(
+    "event_ingest_flushed_total",
+    "Eventos escritos en core_event por el flusher.",
+)
+dead = metrics.counter(
+    "event_ingest_dead_total",
+    "Eventos descartados por el flusher porque su insert falla siempre.",
+)
+flush_seconds = metrics.histogram(
+    "event_ingest_flush_seconds",
+    "Duración de cada bulk_create del flusher.",
+)
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+# --------- VALIDACIÓN --------- #
+
+def clean_event(raw, customer_id=None, allow_order=False, now=None, staff=False):
+    """
+    Normaliza un evento crudo del cliente a un dict compacto para el buffer.
+    Devuelve (evento, None) o (None, motivo del rechazo). El order_id de un
+    no-staff solo se conserva si el pedido es de `customer_id` (write_events).
+    """
+    if not isinstance(raw, dict):
+        return None, "El evento debe ser un objeto."
+
+    name = raw.get("name")
+    if not isinstance(name, str) or not NAME_RE.match(name):
+        return None, "name inválido."
+
+    now = now or timezone.now()
+    at = now
+    raw_at = raw.get("at")
+    if raw_at is not None:
+        if not isinstance(raw_at, str):
+            return None, "at inválido."
+        try:
+            at = datetime.fromisoformat(raw_at)
+        except ValueError:
+            return None, "at inválido."
+        if timezone.is_naive(at):
+            at = timezone.make_aware(at)
+        if not now - MAX_PAST <= at <= now + MAX_FUTURE:
+            return None, "at fuera de rango."
+
+    meta = raw.get("meta")
+    if meta is not None:
+        if not isinstance(meta, dict):
+            return None, "meta debe ser un objeto."
+        encoded = json.dumps(meta, separators=(",", ":"))
+        if len(encoded) > MAX_META_BYTES:
+            return None, "meta demasiado grande."
+        # jsonb de Postgres rechaza siempre el carácter NUL.
+        if "\\u0000" in encoded:
+            return None, "meta no puede contener caracteres NUL."
+
+    session_id = raw.get("session_id")
+    if session_id is not None:
+        if not isinstance(session_id, str) or len(session_id) > 64 or "\x00" in session_id:
+            return None, "session_id inválido."
+        meta = {**(meta or {}), "sid": session_id}
+
+    order_id = raw.get("order_id") if allow_order else None
+    if order_id is not None and (not isinstance(order_id, int) or isinstance(order_id, bool) or order_id <= 0):
+        return None, "order_id inválido."
+
+    event = {"n": name, "t": at.timestamp(), "m": meta, "o": order_id, "c": customer_id}
+    if order_id is not None and staff:
+        event["s"] = 1
+    return event, None
+
+
+# --------- BUFFERS --------- #
+
+class InMemoryEventBuffer:
+    """Buffer por proceso; se vacía con el hilo flusher del mismo proceso."""
+
+    def __init__(self, max_size):
+        self.max_size = max_size
+        self._items = deque()
+        self._lock = threading.Lock()
+
+    def push(self, events):
+        with self._lock:
+            room = max(self.max_size - len(self._items), 0)
+            accepted = events[:room]
+            self._items.extend(accepted)
+        return len(accepted)
+
+    def pop(self, count):
+        with self._lock:
+            n = min(count, len(self._items))
+            return [self._items.popleft() for _ in range(n)]
+
+    def requeue(self, events):
+        with self._lock:
+            self._items.extendleft(reversed(events))
+
+    def __len__(self):
+        return len(self._items)
+
+
+_PUSH_SCRIPT = """
+local room = tonumber(ARGV[1]) - redis.call('LLEN', KEYS[1])
+if room <= 0 then return 0 end
+local n = math.min(room, #ARGV - 1)
+for i = 2, n + 1 do redis.call('RPUSH', KEYS[1], ARGV[i]) end
+return n
+"""
+
+
+class RedisEventBuffer:
+    """Lista Redis compartida por todos los pods; la vacía `manage.py flush_events`."""
+
+    def __init__(self, max_size, key=REDIS_KEY):
+        from .redis_client import get_redis
+
+        self.max_size = max_size
+        self.key = key
+        self._redis = get_redis()
+        self._push = self._redis.register_script(_PUSH_SCRIPT)
+
+    def push(self, events):
+        payload = [json.dumps(e, separators=(",", ":")) for e in events]
+        return int(self._push(keys=[self.key], args=[self.max_size, *payload]))
+
+    def pop(self, count):
+        raw = self._redis.lpop(self.key, count) or []
+        return [json.loads(item) for item in raw]
+
+    def requeue(self, events):
+        if events:
+            self._redis.lpush(self.key, *[json.dumps(e, separators=(",", ":")) for e in reversed(events)])
+
+    def __len__(self):
+        return int(self._redis.llen(self.key))
+
+
+_buffer = None
+_buffer_lock = threading.Lock()
+
+
+def get_buffer():
+    global _buffer
+    if _buffer is None:
+        with _buffer_lock:
+            if _buffer is None:
+                max_size = _setting("EVENT_INGEST_MAX_BUFFER", 100_000)
+                if _setting("EVENT_INGEST_BACKEND", "memory") == "redis":
+                    _buffer = RedisEventBuffer(max_size)
+                else:
+                    _buffer = InMemoryEventBuffer(max_size)
+    return _buffer
+
+
+# --------- ESCRITURA --------- #
+
+def _order_id(event, owners):
+    # Staff puede referir cualquier pedido; el resto solo los de su cliente.
+    order_id = event.get("o")
+    if order_id not in owners:
+        return None
+    if event.get("s") or (event.get("c") and owners[order_id] == event["c"]):
+        return order_id
+    return None
+
+
+def write_events(events):
+    """Inserta los eventos con bulk_create descartando FKs que ya no existen o ajenas."""
+    order_ids = {e["o"] for e in events if e.get("o")}
+    customer_ids = {e["c"] for e in events if e.get("c")}
+    owners = {}
+    if order_ids:
+        owners = dict(Order.objects.filter(id__in=order_ids).values_list("id", "customer_id"))
+    if customer_ids:
+        customer_ids = set(Customer.objects.filter(id__in=customer_ids).values_list("id", flat=True))
+
+    objs = [
+        Event(
+            name=e["n"],
+            at=datetime.fromtimestamp(e["t"], tz=timezone.get_current_timezone()),
+            meta=e.get("m"),
+            order_id=_order_id(e, owners),
+            customer_id=e["c"] if e.get("c") in customer_ids else None,
+        )
+        for e in events
+    ]
+    Event.objects.bulk_create(objs, batch_size=_setting("EVENT_INGEST_FLUSH_SIZE", 2000))
+    return len(objs)
+
+
+TRANSIENT_ERRORS = (OperationalError, InterfaceError)
+
+
+def _write_or_bisect(buffer, batch):
+    """
+    Escribe el lote; si falla por los datos lo parte en mitades y descarta
+    las filas que no entran solas. Ante un error de conexión devuelve al
+    buffer lo que falta por escribir y relanza. Devuelve los eventos escritos.
+    """
+    pending = deque([batch])
+    written = 0
+    while pending:
+        chunk = pending.popleft()
+        try:
+            with transaction.atomic():
+                written += write_events(chunk)
+        except TRANSIENT_ERRORS:
+            buffer.requeue([event for part in (chunk, *pending) for event in part])
+            raise
+        except Exception:
+            if len(chunk) == 1:
+                dead.inc()
+                logger.warning("Evento descartado, su insert falla: %r", chunk[0], exc_info=True)
+                continue
+            middle = len(chunk) // 2
+            pending.extendleft((chunk[middle:], chunk[:middle]))
+    return written
+
+
+def flush(max_events=None):
+    """
+    Vacía el buffer en lotes de EVENT_INGEST_FLUSH_SIZE (ver _write_or_bisect).
+    Devuelve el número de eventos escritos.
+    """
+    buffer = get_buffer()
+    batch_size = _setting("EVENT_INGEST_FLUSH_SIZE", 2000)
+    written = 0
+    while max_events is None or written < max_events:
+        batch = buffer.pop(batch_size)
+        if not batch:
+            break
+        started = time.perf_counter()
+        try:
+            count = _write_or_bisect(buffer, batch)
+        finally:
+            flush_seconds.observe(time.perf_counter() - started)
+        written += count
+        flushed.inc(count)
+        if len(batch) < batch_size:
+            break
+    return written
+
+
+class EventFlusher(threading.Thread):
+    """Hilo que llama a flush() cada EVENT_INGEST_FLUSH_INTERVAL segundos."""
+
+    def __init__(self):
+        super().__init__(name="event-flusher", daemon=True)
+        self.wakeup = threading.Event()
+        self.stopping = threading.Event()
+
+    def run(self):
+        interval = _setting("EVENT_INGEST_FLUSH_INTERVAL", 1.0)
+        while not self.stopping.is_set():
+            self.wakeup.wait(interval)
+            self.wakeup.clear()
+            close_old_connections()
+            try:
+                flush()
+            except Exception:
+                logger.exception("Error escribiendo eventos; se reintenta en el próximo ciclo")
+                time.sleep(interval)
+
+    def stop(self):
+        self.stopping.set()
+        self.wakeup.set()
+
+
+_flusher = None
+
+
+def ensure_flusher():
+    global _flusher
+    if _flusher is not None or not _setting("EVENT_INGEST_INPROCESS_FLUSH", True):
+        return
+    with _buffer_lock:
+        if _flusher is None:
+            _flusher = EventFlusher()
+            _flusher.start()
+            atexit.register(_flush_at_exit)
+
+
+def _flush_at_exit():
+    try:
+        flush()
+    except Exception:
+        logger.exception("No se pudieron escribir los eventos pendientes al salir")
+
+
+def ingest(raw_events, customer_id=None, allow_order=False, staff=False):
+    """
+    Valida y encola. Devuelve (aceptados, descartados por buffer lleno,
+    lista de rechazos [(índice, motivo)]).
+    """
+    now = timezone.now()
+    events, rejected = [], []
+    for index, raw in enumerate(raw_events):
+        event, error = clean_event(
+            raw, customer_id=customer_id, allow_order=allow_order, now=now, staff=staff
+        )
+        if error:
+            rejected.append((index, error))
+        else:
+            events.append(event)
+
+    buffer = get_buffer()
+    accepted = buffer.push(events) if events else 0
+    dropped = len(events) - accepted
+
+    if accepted:
+        ingested.inc(accepted, result="accepted")
+        ensure_flusher()
+        # Con buffer en memoria despertamos al hilo apenas hay un lote completo.
+        if (
+            _flusher is not None
+            and isinstance(buffer, InMemoryEventBuffer)
+            and len(buffer) >= _setting("EVENT_INGEST_FLUSH_SIZE", 2000)
+        ):
+            _flusher.wakeup.set()
+    if dropped:
+        ingested.inc(dropped, result="dropped")
+    if rejected:
+        ingested.inc(len(rejected), result="rejected")
+    return accepted, dropped, rejected
@@ -0,0 +1,174 @@
+# core/exports.py
+"""
+Exportación de pedidos y eventos en CSV o NDJSON, en streaming.
+
+Las filas se leen con values_list(...).iterator(chunk_size=EXPORT_CHUNK_SIZE)
+(cursor del lado del servidor en PostgreSQL), se formatean y se agrupan en
+bloques de ~64 KB que se entregan uno a uno, opcionalmente comprimidos con
+gzip. La memoria usada no depende del tamaño de la exportación.
+
+Lo usan los endpoints /api/exports/... y el comando `export_data`.
+"""
+import csv
+import io
+import json
+import zlib
+from datetime import datetime, time, timedelta
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import router
+from django.utils import timezone
+
+from .models import Event, Order
+
+OUTPUT_CSV = "csv"
+OUTPUT_NDJSON = "ndjson"
+OUTPUTS = (OUTPUT_CSV, OUTPUT_NDJSON)
+
+CONTENT_TYPES = {
+    OUTPUT_CSV: "text/csv; charset=utf-8",
+    OUTPUT_NDJSON: "application/x-ndjson",
+}
+
+ORDER_FIELDS = (
+    "id",
+    "order_number",
+    "restaurant_id",
+    "restaurant__slug",
+    "customer_id",
+    "channel",
+    "status",
+    "subtotal_cop",
+    "discount_cop",
+    "delivery_fee_cop",
+    "total_cop",
+    "created_at",
+    "completed_at",
+    "cancelled_at",
+)
+
+EVENT_FIELDS = ("id", "name", "at", "customer_id", "order_id", "meta")
+
+# Tamaño aproximado de cada bloque entregado al cliente.
+BLOCK_BYTES = 64 * 1024
+
+
+def _local_range(start_date, end_date):
+    tz = timezone.get_default_timezone()
+    start = timezone.make_aware(datetime.combine(start_date, time.min), tz) if start_date else None
+    end = (
+        timezone.make_aware(datetime.combine(end_date + timedelta(days=1), time.min), tz)
+        if end_date else None
+    )
+    return start, end
+
+
+def orders_queryset(restaurant_id=None, start_date=None, end_date=None, status=None):
+    qs = Order.objects.order_by("created_at", "id")
+    if restaurant_id is not None:
+        qs = qs.filter(restaurant_id=restaurant_id)
+    if status:
+        qs = qs.filter(status=status)
+    start, end = _local_range(start_date, end_date)
+    if start:
+        qs = qs.filter(created_at__gte=start)
+    if end:
+        qs = qs.filter(created_at__lt=end)
+    return qs.values_list(*ORDER_FIELDS)
+
+
+def events_queryset(restaurant_id=None, start_date=None, end_date=None, name=None):
+    """Con restaurant_id solo salen los eventos ligados a pedidos de ese restaurante."""
+    qs = Event.objects.order_by("at", "id")
+    if restaurant_id is not None:
+        qs = qs.filter(order__restaurant_id=restaurant_id)
+    if name:
+        qs = qs.filter(name=name)
+    start, end = _local_range(start_date, end_date)
+    if start:
+        qs = qs.filter(at__gte=start)
+    if end:
+        qs = qs.filter(at__lt=end)
+    return qs.values_list(*EVENT_FIELDS)
+
+
+def _cell(value):
+    if isinstance(value, datetime):
+        return timezone.localtime(value).isoformat()
+    return value
+
+
+def _csv_lines(fields, rows):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(fields)
+    for row in rows:
+        writer.writerow(
+            json.dumps(v, separators=(",", ":")) if isinstance(v, (dict, list)) else _cell(v)
+            for v in row
+        )
+        if buffer.tell() >= BLOCK_BYTES:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+
+def _ndjson_lines(fields, rows):
+    block = []
+    size = 0
+    for row in rows:
+        line = json.dumps(
+            {field: _cell(value) for field, value in zip(fields, row)},
+            ensure_ascii=False,
+            separators=(",", ":"),
+        )
+        block.append(line)
+        size += len(line) + 1
+        if size >= BLOCK_BYTES:
+            yield "\n".join(block) + "\n"
+            block, size = [], 0
+    if block:
+        yield "\n".join(block) + "\n"
+
+
+def _gzip(blocks):
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)  # wbits=31: formato gzip
+    for block in blocks:
+        data = compressor.compress(block)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def stream(queryset, output=OUTPUT_CSV, gzip=False, chunk_size=None):
+    """Generador de bloques de bytes con el queryset (values_list) serializado."""
+    chunk_size = chunk_size or getattr(settings, "EXPORT_CHUNK_SIZE", 2000)
+    # El alias se fija ahora: el stream se consume fuera del middleware de réplicas.
+    queryset = queryset.using(router.db_for_read(queryset.model))
+    fields = queryset._fields
+    rows = queryset.iterator(chunk_size=chunk_size)
+    lines = _csv_lines(fields, rows) if output == OUTPUT_CSV else _ndjson_lines(fields, rows)
+    blocks = (line.encode("utf-8") for line in lines if line)
+    return _gzip(blocks) if gzip else blocks
+
+
+async def aiter_blocks(blocks):
+    """
+    Adaptador async para servir el stream bajo ASGI: Django consume entero
+    en memoria cualquier iterador síncrono de un StreamingHttpResponse.
+    Cada bloque se produce en el hilo de la conexión (thread_sensitive).
+    """
+    sentinel = object()
+    next_block = sync_to_async(next, thread_sensitive=True)
+    while True:
+        block = await next_block(blocks, sentinel)
+        if block is sentinel:
+            break
+        yield block
+
+
+def filename(kind, output, gzip=False):
+    stamp = timezone.localtime().strftime("%Y%m%d-%H%M")
+    return f"{kind}-{stamp}.{output}" + (".gz" if gzip else "")
@@ -0,0 +1,200 @@
+# core/funnel.py
+"""
+Funnels de conversión y cohortes semanales sobre Event, vectorizados con NumPy.
+
+Por cada paso se leen solo dos columnas (customer_id y `at` como epoch,
+calculado en la base de datos) con values_list(...).iterator() en lotes
+de FUNNEL_CHUNK_SIZE y se acumulan en arrays float64. Todo el cálculo
+posterior (primer evento por cliente, orden de los pasos, ventana de
+conversión, percentiles y cohortes) son sort/searchsorted/bincount sobre
+esos arrays: no hay bucles de Python por cliente.
+
+Un cliente convierte en el paso k si tiene un evento k posterior a su
+evento k-1 y dentro de la ventana contada desde su primer paso. Los
+eventos anónimos (sin customer) no entran en el funnel.
+"""
+from datetime import date, datetime, time, timedelta
+from itertools import islice
+
+import numpy as np
+from django.conf import settings
+from django.db.models import FloatField, Func
+from django.utils import timezone
+
+from .models import Event
+
+DEFAULT_STEPS = ("menu_view", "add_to_cart", "checkout", "order_created")
+MAX_STEPS = 8
+MAX_RANGE_DAYS = 366
+DEFAULT_WINDOW_HOURS = 24
+MAX_WINDOW_HOURS = 24 * 30
+
+# Límites superiores (segundos) del histograma de tiempo hasta convertir.
+TIME_BUCKETS = (60, 300, 900, 3600, 6 * 3600, 24 * 3600)
+
+_DAY = 86400
+_EPOCH_DATE = date(1970, 1, 1)
+# 1970-01-01 fue jueves: el lunes más cercano es el día 4 del epoch.
+_EPOCH_MONDAY = 4
+
+
+class Epoch(Func):
+    """Segundos desde 1970 (UTC) de una columna datetime, calculado en SQL."""
+
+    output_field = FloatField()
+    template = "CAST(EXTRACT(EPOCH FROM %(expressions)s) AS double precision)"
+
+    def as_sqlite(self, compiler, connection, **extra_context):
+        return self.as_sql(
+            compiler,
+            connection,
+            template="((julianday(%(expressions)s) - 2440587.5) * 86400.0)",
+            **extra_context,
+        )
+
+
+def _load_step(name, start, end, chunk_size):
+    """(customer_ids int64, epochs float64) de los eventos `name` en [start, end)."""
+    rows = (
+        Event.objects.filter(name=name, at__gte=start, at__lt=end, customer_id__isnull=False)
+        .annotate(ts=Epoch("at"))
+        .values_list("customer_id", "ts")
+        .iterator(chunk_size=chunk_size)
+    )
+    chunks = []
+    while True:
+        batch = list(islice(rows, chunk_size))
+        if not batch:
+            break
+        chunks.append(np.array(batch, dtype=np.float64))
+
+    if not chunks:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float64)
+    data = np.concatenate(chunks)
+    return data[:, 0].astype(np.int64), data[:, 1]
+
+
+def _first_per_actor(actors, times):
+    """Primer evento de cada cliente: (clientes ordenados, epoch del primero)."""
+    order = np.lexsort((times, actors))
+    actors, times = actors[order], times[order]
+    unique, first = np.unique(actors, return_index=True)
+    return unique, times[first]
+
+
+def _lookup(sorted_keys, keys):
+    """Posición de cada key en sorted_keys y máscara de las que existen."""
+    if not len(sorted_keys):
+        return np.zeros(len(keys), dtype=np.int64), np.zeros(len(keys), dtype=bool)
+    pos = np.searchsorted(sorted_keys, keys)
+    pos = np.minimum(pos, len(sorted_keys) - 1)
+    return pos, sorted_keys[pos] == keys
+
+
+def _percentiles(values, qs=(50, 90)):
+    if not len(values):
+        return {f"p{q}": None for q in qs}
+    return {f"p{q}": round(float(v), 1) for q, v in zip(qs, np.percentile(values, qs))}
+
+
+def _ratio(num, den):
+    return round(num / den, 4) if den else None
+
+
+def compute_funnel(steps, start_date, end_date, window_hours=DEFAULT_WINDOW_HOURS, chunk_size=None):
+    """
+    Funnel ordenado para los clientes cuyo primer paso cae entre start_date
+    y end_date (fechas locales, inclusivas). Devuelve conversión por paso,
+    tiempos entre pasos, distribución del tiempo total y cohortes semanales
+    (por semana local del primer paso).
+    """
+    chunk_size = chunk_size or getattr(settings, "FUNNEL_CHUNK_SIZE", 50_000)
+    tz = timezone.get_default_timezone()
+    start = timezone.make_aware(datetime.combine(start_date, time.min), tz)
+    end = timezone.make_aware(datetime.combine(end_date + timedelta(days=1), time.min), tz)
+    window = window_hours * 3600
+
+    actors, times = _load_step(steps[0], start, end, chunk_size)
+    scanned = len(actors)
+    entered, first_at = _first_per_actor(actors, times)
+
+    # Estado de los clientes que siguen vivos en el funnel, alineado por cliente.
+    alive, alive_at, deadline = entered, first_at, first_at + window
+    step_rows = [{"name": steps[0], "count": len(entered)}]
+    converted_by_step = [entered]
+
+    for name in steps[1:]:
+        actors, times = _load_step(name, start, end + timedelta(seconds=window), chunk_size)
+        scanned += len(actors)
+
+        pos, found = _lookup(alive, actors)
+        valid = found & (times >= alive_at[pos]) & (times <= deadline[pos])
+        next_alive, next_at = _first_per_actor(actors[valid], times[valid])
+
+        prev_pos = np.searchsorted(alive, next_alive)
+        step_rows.append({
+            "name": name,
+            "count": len(next_alive),
+            "time_from_previous": _percentiles(next_at - alive_at[prev_pos]),
+        })
+        alive, alive_at, deadline = next_alive, next_at, deadline[prev_pos]
+        converted_by_step.append(alive)
+
+    for index, row in enumerate(step_rows):
+        previous = step_rows[index - 1]["count"] if index else row["count"]
+        row["conversion_from_previous"] = _ratio(row["count"], previous)
+        row["conversion_from_start"] = _ratio(row["count"], step_rows[0]["count"])
+
+    # Tiempo total del primer al último paso para quienes completaron el funnel.
+    pos, _ = _lookup(entered, alive)
+    total_seconds = alive_at - first_at[pos] if len(alive) else np.empty(0)
+    counts, _ = np.histogram(total_seconds, bins=(0, *TIME_BUCKETS, np.inf))
+    time_to_convert = {
+        "count": len(total_seconds),
+        **_percentiles(total_seconds, (50, 75, 90)),
+        "histogram": [
+            {"le": le, "count": int(count)}
+            for le, count in zip((*TIME_BUCKETS, None), counts)
+        ],
+    }
+
+    return {
+        "steps": step_rows,
+        "window_hours": window_hours,
+        "time_to_convert": time_to_convert,
+        "cohorts": _weekly_cohorts(entered, first_at, converted_by_step, start),
+        "events_scanned": scanned,
+    }
+
+
+def _weekly_cohorts(entered, first_at, converted_by_step, start):
+    """Clientes por semana (lunes local) del primer paso y cuántos llegan a cada paso."""
+    if not len(entered):
+        return []
+
+    offset = timezone.localtime(start).utcoffset().total_seconds()
+    days = np.floor((first_at + offset) / _DAY).astype(np.int64)
+    weeks = (days - _EPOCH_MONDAY) // 7
+    base = int(weeks.min())
+    cohort = weeks - base
+    size = int(cohort.max()) + 1
+
+    per_step = []
+    for actors in converted_by_step:
+        pos, _ = _lookup(entered, actors)
+        per_step.append(np.bincount(cohort[pos], minlength=size))
+
+    rows = []
+    for index in range(size):
+        entered_count = int(per_step[0][index])
+        if not entered_count:
+            continue
+        week_start = _EPOCH_DATE + timedelta(days=(base + index) * 7 + _EPOCH_MONDAY)
+        completed = int(per_step[-1][index])
+        rows.append({
+            "week_start": week_start.isoformat(),
+            "entered": entered_count,
+            "steps": [int(counts[index]) for counts in per_step],
+            "conversion": _ratio(completed, entered_count),
+        })
+    return rows
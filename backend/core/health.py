@@ -0,0 +1,223 @@
+# core/health.py
+"""
+Estado de dependencias para el readiness probe.
+
+Un hilo por proceso (HealthMonitor) comprueba la base de datos, el Redis
+de la app y el Redis de Channels cada HEALTH_CHECK_INTERVAL segundos, con
+timeouts cortos del driver. `readyz` solo lee el último resultado en
+memoria: el probe de Kubernetes no abre conexiones ni espera a nadie. Si
+el estado es viejo (monitor atascado, p. ej. con el primario colgado),
+responde 503 "stale" sin comprobar nada; el monitor se recupera solo.
+
+La base de datos es crítica (sin ella el pod no está listo). Redis y
+Channels no: si caen, el pod sigue listo pero en estado "degraded"
+(la caché KPI, la ingesta y los websockets degradan por su cuenta).
+"""
+import logging
+import threading
+import time
+
+import redis
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections, connections, transaction
+from django.utils import timezone
+
+from . import warmup
+from .redis_client import get_redis
+
+logger = logging.getLogger(__name__)
+
+STATUS_OK = "ok"
+STATUS_DOWN = "down"
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+# --------- CHECKS --------- #
+
+def check_database():
+    connection = connections["default"]
+    with transaction.atomic(using="default"), connection.cursor() as cursor:
+        if connection.vendor == "postgresql":
+            # connect_timeout no cubre un primario que acepta y no responde.
+            timeout_ms = int(_setting("HEALTH_CHECK_TIMEOUT", 2) * 1000)
+            cursor.execute("SET LOCAL statement_timeout = %s", [timeout_ms])
+        cursor.execute("SELECT 1")
+
+
+def check_redis():
+    get_redis().ping()
+
+
+_channels_client = None
+
+
+def _channels_redis():
+    global _channels_client
+    if _channels_client is None:
+        config = settings.CHANNEL_LAYERS["default"].get("CONFIG", {})
+        host = (config.get("hosts") or [("localhost", 6379)])[0]
+        timeout = _setting("HEALTH_CHECK_TIMEOUT", 2)
+        options = {"socket_timeout": timeout, "socket_connect_timeout": timeout}
+        if isinstance(host, dict):
+            _channels_client = redis.Redis.from_url(host["address"], **options)
+        elif isinstance(host, (tuple, list)):
+            _channels_client = redis.Redis(host=host[0], port=host[1], **options)
+        else:
+            _channels_client = redis.Redis.from_url(host, **options)
+    return _channels_client
+
+
+def check_channel_layer():
+    backend = settings.CHANNEL_LAYERS["default"]["BACKEND"]
+    if "Redis" not in backend:
+        return  # InMemoryChannelLayer: nada que comprobar.
+    _channels_redis().ping()
+
+
+# (nombre, función, crítica)
+CHECKS = (
+    ("db", check_database, True),
+    ("redis", check_redis, False),
+    ("channels", check_channel_layer, False),
+)
+
+
+# --------- ESTADO --------- #
+
+_state = None
+_state_lock = threading.Lock()
+
+
+def run_checks(checks=None):
+    """Ejecuta todas las comprobaciones y publica el nuevo estado."""
+    global _state
+    results = {}
+    for name, check, critical in checks or CHECKS:
+        started = time.perf_counter()
+        try:
+            check()
+            status, error = STATUS_OK, None
+        except Exception as exc:
+            status, error = STATUS_DOWN, f"{type(exc).__name__}: {exc}"[:200]
+        results[name] = {
+            "status": status,
+            "critical": critical,
+            "latency_ms": round((time.perf_counter() - started) * 1000, 1),
+        }
+        if error:
+            results[name]["error"] = error
+
+    state = {"checked_at": timezone.now(), "monotonic": time.monotonic(), "checks": results}
+    with _state_lock:
+        previous, _state = _state, state
+    _log_transitions(previous, state)
+    return state
+
+
+def _log_transitions(previous, state):
+    for name, result in state["checks"].items():
+        before = previous and previous["checks"].get(name, {}).get("status")
+        if before != result["status"] and (before or result["status"] != STATUS_OK):
+            logger.warning("Dependencia %s: %s -> %s", name, before, result["status"])
+
+
+class HealthMonitor(threading.Thread):
+    def __init__(self):
+        super().__init__(name="health-monitor", daemon=True)
+        self.stopping = threading.Event()
+
+    def run(self):
+        interval = _setting("HEALTH_CHECK_INTERVAL", 5)
+        # La primera comprobación es inmediata: hasta tenerla readyz da 503.
+        while not self.stopping.is_set():
+            try:
+                # Conexión propia del hilo: descartamos la rota antes de probar.
+                close_old_connections()
+                run_checks()
+            except Exception:
+                logger.exception("Fallo inesperado en el monitor de salud")
+            self.stopping.wait(interval)
+        connections.close_all()
+
+    def stop(self):
+        self.stopping.set()
+
+
+_monitor = None
+
+
+def ensure_monitor():
+    global _monitor
+    if not _setting("HEALTH_MONITOR_THREAD", True):
+        return
+    with _state_lock:
+        if _monitor is None or not _monitor.is_alive():
+            _monitor = HealthMonitor()
+            _monitor.start()
+
+
+def readiness():
+    """
+    (payload, http_status) para /readyz/. Si aún no hay estado, o el
+    último tiene más de HEALTH_STALE_AFTER segundos (hilo caído o
+    atascado), 503 "stale". Sin monitor (HEALTH_MONITOR_THREAD=False,
+    tests) se comprueba en línea.
+    """
+    ensure_monitor()
+    state = _state
+    if _is_stale(state):
+        if _setting("HEALTH_MONITOR_THREAD", True):
+            return _stale_payload(state)
+        state = run_checks()
+    return _readiness_payload(state)
+
+
+async def areadiness():
+    """readiness() para la vista async: solo salta a un hilo si hay que comprobar en línea."""
+    ensure_monitor()
+    state = _state
+    if _is_stale(state):
+        if _setting("HEALTH_MONITOR_THREAD", True):
+            return _stale_payload(state)
+        state = await sync_to_async(run_checks)()
+    return _readiness_payload(state)
+
+
+def _is_stale(state):
+    stale_after = _setting("HEALTH_STALE_AFTER", 3 * _setting("HEALTH_CHECK_INTERVAL", 5))
+    return state is None or time.monotonic() - state["monotonic"] > stale_after
+
+
+def _stale_payload(state):
+    payload = {
+        "status": "stale",
+        "checked_at": state["checked_at"].isoformat() if state else None,
+        "age_seconds": round(time.monotonic() - state["monotonic"], 1) if state else None,
+        "checks": state["checks"] if state else {},
+    }
+    return payload, 503
+
+
+def _readiness_payload(state):
+    checks = state["checks"]
+    critical_down = any(c["critical"] and c["status"] != STATUS_OK for c in checks.values())
+    degraded = any(c["status"] != STATUS_OK for c in checks.values())
+    # El proceso no recibe tráfico hasta terminar el warm-up (core/warmup.py).
+    warming = warmup.is_warming()
+    if critical_down:
+        status = "not-ready"
+    elif warming:
+        status = "warming-up"
+    else:
+        status = "degraded" if degraded else "ready"
+    payload = {
+        "status": status,
+        "checked_at": state["checked_at"].isoformat(),
+        "age_seconds": round(time.monotonic() - state["monotonic"], 1),
+        "checks": checks,
+    }
+    return payload, 503 if critical_down or warming else 200
@@ -0,0 +1,296 @@
+# core/jobs.py
+"""
+Trabajos en segundo plano (rebuilds, purgas, archivado, informes).
+
+La cola es la tabla core_job: encolar dentro de una transacción solo
+publica el trabajo si la transacción confirma. Las tareas se registran
+con `@job` (core/tasks.py); `every=` las hace periódicas.
+
+`manage.py run_jobs --processes N --threads M` arranca N procesos con M
+hilos cada uno. Cada proceso reclama con SELECT ... FOR UPDATE SKIP
+LOCKED tantos trabajos como hilos libres tenga y, cada
+JOBS_SCHEDULE_INTERVAL segundos, programa los periódicos y recupera los
+RUNNING de workers caídos (`expires_at` vencido).
+
+Idempotencia: `enqueue(..., key=...)` no duplica una clave ya encolada.
+Los periódicos usan la clave `periodic:<nombre>:<inicio de la ventana>`,
+así que varios workers programando a la vez ejecutan una vez por ventana
+(ventanas alineadas a UTC).
+"""
+import logging
+import os
+import socket
+import time
+from concurrent import futures
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone as dt_timezone
+from typing import Callable, Optional
+
+from django.conf import settings
+from django.db import DatabaseError, close_old_connections, connections, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from . import metrics
+from .models import Job
+
+logger = logging.getLogger(__name__)
+
+MAX_ERROR_LENGTH = 2000
+STALE_ERROR = "Tiempo agotado: el worker no terminó (caído o colgado)."
+
+jobs_total = metrics.counter(
+    "jobs_total",
+    "Ejecuciones de trabajos en segundo plano, por nombre y resultado.",
+    ("name", "result"),
+)
+job_seconds = metrics.histogram(
+    "job_seconds",
+    "Duración de cada ejecución de un trabajo.",
+    ("name", "result"),
+    buckets=(0.1, 0.5, 1.0, 5.0, 15.0, 30.0, 60.0, 300.0, 900.0, 1800.0, 3600.0),
+)
+job_queue_lag = metrics.histogram(
+    "job_queue_lag_seconds",
+    "Segundos entre run_at y el inicio real de cada trabajo.",
+    ("name",),
+    buckets=(0.5, 1.0, 5.0, 15.0, 30.0, 60.0, 300.0, 900.0, 3600.0),
+)
+jobs_running = metrics.gauge(
+    "jobs_running",
+    "Trabajos ejecutándose en este proceso.",
+)
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+# --------- REGISTRO --------- #
+
+@dataclass(frozen=True)
+class JobSpec:
+    name: str
+    func: Callable
+    every: Optional[timedelta] = None
+    timeout: Optional[int] = None
+    max_attempts: int = 3
+
+    def lease_seconds(self):
+        return self.timeout or _setting("JOBS_DEFAULT_TIMEOUT", 3600)
+
+
+registry = {}
+
+
+def job(name=None, every=None, timeout=None, max_attempts=3):
+    """Registra la función como trabajo; `every` (timedelta) la hace periódica."""
+    def decorator(func):
+        spec = JobSpec(name or func.__name__, func, every, timeout, max_attempts)
+        registry[spec.name] = spec
+        return func
+    return decorator
+
+
+def get_spec(name):
+    try:
+        return registry[name]
+    except KeyError:
+        raise LookupError(f"Trabajo desconocido: {name}") from None
+
+
+# --------- ENCOLAR --------- #
+
+def enqueue(name, kwargs=None, key="", run_at=None, max_attempts=None):
+    """
+    Encola `name(**kwargs)` para `run_at` (ahora por defecto). Con `key`,
+    si ya existe un trabajo con esa clave se devuelve ese sin crear otro.
+    """
+    spec = get_spec(name)
+    defaults = {
+        "name": name,
+        "kwargs": kwargs or {},
+        "run_at": run_at or timezone.now(),
+        "max_attempts": max_attempts or spec.max_attempts,
+    }
+    if not key:
+        return Job.objects.create(**defaults)
+    return Job.objects.get_or_create(key=key, defaults=defaults)[0]
+
+
+def window_start(every, now):
+    period = every.total_seconds()
+    return datetime.fromtimestamp(now.timestamp() // period * period, tz=dt_timezone.utc)
+
+
+def schedule_periodic(now=None):
+    """Encola la ventana actual de cada periódico (un solo INSERT, idempotente)."""
+    now = now or timezone.now()
+    pending = []
+    for spec in registry.values():
+        if spec.every is None:
+            continue
+        start = window_start(spec.every, now)
+        pending.append(Job(
+            name=spec.name,
+            key=f"periodic:{spec.name}:{start:%Y%m%dT%H%M%S}",
+            run_at=start,
+            max_attempts=spec.max_attempts,
+        ))
+    Job.objects.bulk_create(pending, ignore_conflicts=True)
+
+
+def requeue_stale(now=None):
+    """RUNNING con el plazo vencido: a la cola de nuevo, o FAILED si no quedan intentos."""
+    now = now or timezone.now()
+    stale = Job.objects.filter(status=Job.STATUS_RUNNING, expires_at__lt=now)
+    failed = stale.filter(attempts__gte=F("max_attempts")).update(
+        status=Job.STATUS_FAILED, finished_at=now, expires_at=None, last_error=STALE_ERROR
+    )
+    requeued = stale.update(status=Job.STATUS_QUEUED, run_at=now, expires_at=None, last_error=STALE_ERROR)
+    if failed or requeued:
+        logger.warning("Trabajos vencidos: %s reencolados, %s fallidos", requeued, failed)
+    return requeued + failed
+
+
+# --------- EJECUCIÓN --------- #
+
+def worker_id():
+    return f"{socket.gethostname()}:{os.getpid()}"[:100]
+
+
+def claim(limit, worker=None):
+    """Marca RUNNING hasta `limit` trabajos vencidos y los devuelve."""
+    now = timezone.now()
+    with transaction.atomic():
+        claimed = list(
+            Job.objects.select_for_update(skip_locked=True)
+            .filter(status=Job.STATUS_QUEUED, run_at__lte=now)
+            .order_by("run_at", "id")[:limit]
+        )
+        for item in claimed:
+            spec = registry.get(item.name)
+            item.status = Job.STATUS_RUNNING
+            item.attempts += 1
+            item.started_at = now
+            item.expires_at = now + timedelta(seconds=spec.lease_seconds() if spec else 60)
+            item.worker = worker or worker_id()
+        Job.objects.bulk_update(claimed, ["status", "attempts", "started_at", "expires_at", "worker"])
+    return claimed
+
+
+def backoff(attempts):
+    base = _setting("JOBS_BACKOFF_BASE", 30)
+    return min(base * 2 ** (attempts - 1), _setting("JOBS_BACKOFF_MAX", 3600))
+
+
+def execute(item):
+    """Ejecuta un trabajo ya reclamado y guarda el resultado; devuelve "done", "retry" o "failed"."""
+    spec = registry.get(item.name)
+    job_queue_lag.observe(max((item.started_at - item.run_at).total_seconds(), 0), name=item.name)
+    jobs_running.inc()
+    started = time.monotonic()
+    try:
+        if spec is None:
+            raise LookupError(f"Trabajo desconocido: {item.name}")
+        result = spec.func(**item.kwargs)
+    except Exception as exc:
+        logger.exception("Trabajo %s #%s falló (intento %s)", item.name, item.pk, item.attempts)
+        error = f"{type(exc).__name__}: {exc}"[:MAX_ERROR_LENGTH]
+        if spec is not None and item.attempts < item.max_attempts:
+            outcome = "retry"
+            updates = {"status": Job.STATUS_QUEUED, "run_at": timezone.now() + timedelta(seconds=backoff(item.attempts))}
+        else:
+            outcome = "failed"
+            updates = {"status": Job.STATUS_FAILED, "finished_at": timezone.now()}
+        updates["last_error"] = error
+    else:
+        outcome = "done"
+        updates = {"status": Job.STATUS_DONE, "finished_at": timezone.now(), "result": result, "last_error": ""}
+    finally:
+        jobs_running.dec()
+    elapsed = time.monotonic() - started
+    # Si el plazo venció y otro worker lo reclamó (attempts cambió), no se pisa.
+    Job.objects.filter(pk=item.pk, status=Job.STATUS_RUNNING, attempts=item.attempts).update(
+        expires_at=None, **updates
+    )
+    jobs_total.inc(name=item.name, result=outcome)
+    job_seconds.observe(elapsed, name=item.name, result=outcome)
+    return outcome
+
+
+def run_pending(batch_size=None):
+    """Ejecuta en este hilo, por lotes, todos los trabajos vencidos (tests y `run_jobs --once`)."""
+    batch_size = batch_size or _setting("JOBS_THREADS", 4)
+    executed = 0
+    while True:
+        claimed = claim(batch_size)
+        if not claimed:
+            return executed
+        for item in claimed:
+            execute(item)
+        executed += len(claimed)
+
+
+def _execute_in_thread(item):
+    try:
+        execute(item)
+    finally:
+        # Las conexiones son por hilo: que los hilos del pool no las acumulen.
+        connections.close_all()
+
+
+class Worker:
+    """Bucle de un proceso: programa periódicos, reclama según hilos libres y ejecuta."""
+
+    def __init__(self, threads=None, interval=None, schedule=True):
+        self.threads = threads or _setting("JOBS_THREADS", 4)
+        self.interval = interval if interval is not None else _setting("JOBS_POLL_INTERVAL", 1.0)
+        self.schedule = schedule
+
+    def run(self, stop):
+        """`stop` es un threading.Event o multiprocessing.Event; al activarse se terminan los trabajos en curso."""
+        metrics.ensure_writer()
+        worker = worker_id()
+        schedule_every = _setting("JOBS_SCHEDULE_INTERVAL", 30)
+        next_tick = 0.0
+        running = set()
+        with futures.ThreadPoolExecutor(max_workers=self.threads, thread_name_prefix="job") as pool:
+            while not stop.is_set():
+                close_old_connections()
+                running = {future for future in running if not future.done()}
+                free = self.threads - len(running)
+                try:
+                    if self.schedule and time.monotonic() >= next_tick:
+                        schedule_periodic()
+                        requeue_stale()
+                        next_tick = time.monotonic() + schedule_every
+                    claimed = claim(free, worker) if free > 0 else []
+                except DatabaseError:
+                    # Un corte de la base de datos no tumba el worker: se reintenta.
+                    logger.exception("Worker de trabajos: error de base de datos, reintentando")
+                    connections.close_all()
+                    claimed = []
+                running.update(pool.submit(_execute_in_thread, item) for item in claimed)
+                if claimed:
+                    continue
+                if running:
+                    futures.wait(running, timeout=self.interval, return_when=futures.FIRST_COMPLETED)
+                else:
+                    stop.wait(self.interval)
+        connections.close_all()
+
+
+def purge(days=None, batch_size=5000):
+    """Borra en lotes los trabajos DONE terminados hace más de JOBS_RETENTION_DAYS días."""
+    days = _setting("JOBS_RETENTION_DAYS", 14) if days is None else days
+    cutoff = timezone.now() - timedelta(days=days)
+    deleted = 0
+    while True:
+        ids = list(
+            Job.objects.filter(status=Job.STATUS_DONE, finished_at__lt=cutoff)
+            .values_list("id", flat=True)[:batch_size]
+        )
+        if not ids:
+            return deleted
+        deleted += Job.objects.filter(id__in=ids).delete()[0]
@@ -0,0 +1,165 @@
+# core/kpi.py
+"""
+Cálculo de KPIs para el panel administrativo a partir de los rollups.
+"""
+from datetime import datetime, time, timedelta
+
+from django.db.models import Count, Sum
+from django.utils import timezone
+
+from . import bestsellers
+from .models import ArchivedOrder, Order, SalesRollup
+
+GRANULARITY_HOUR = "hour"
+GRANULARITY_DAY = "day"
+
+# Máximo de días por consulta según la granularidad.
+MAX_RANGE_DAYS = {
+    GRANULARITY_HOUR: 92,
+    GRANULARITY_DAY: 731,
+}
+
+
+def sales_summary(today, restaurant_id=None, top=bestsellers.DEFAULT_TOP):
+    """
+    Totales del panel (ver SalesSummaryView). Solo los pedidos COMPLETED
+    cuentan como venta efectiva; top_items sale de los contadores top-k.
+    El histórico (ventas y conteos) incluye los pedidos archivados.
+    """
+    base_qs = Order.objects.all()
+    archived_qs = ArchivedOrder.objects.all()
+    rollups_qs = SalesRollup.objects.all()
+    if restaurant_id is not None:
+        base_qs = base_qs.filter(restaurant_id=restaurant_id)
+        archived_qs = archived_qs.filter(restaurant_id=restaurant_id)
+        rollups_qs = rollups_qs.filter(restaurant_id=restaurant_id)
+
+    delivered_qs = base_qs.filter(status=Order.STATUS_COMPLETED)
+
+    # Los rollups no se tocan al archivar: ya cubren ventas calientes y archivadas.
+    total_revenue = rollups_qs.aggregate(total=Sum("revenue_cop"))["total"] or 0
+    today_revenue = delivered_qs.filter(
+        created_at__date=today
+    ).aggregate(
+        total=Sum("total_cop")
+    )["total"] or 0
+
+    status_counts = {}
+    for qs in (base_qs, archived_qs):
+        for row in qs.values("status").annotate(count=Count("id")).order_by():
+            status_counts[row["status"]] = status_counts.get(row["status"], 0) + row["count"]
+    orders_by_status = [
+        {"status": status, "count": count} for status, count in sorted(status_counts.items())
+    ]
+    total_orders = sum(status_counts.values())
+
+    top_items = bestsellers.top_items(restaurant_id=restaurant_id, top=top)
+
+    return {
+        "currency": "COP",
+        "restaurant_id": restaurant_id,
+        "total_orders": total_orders,
+        "total_revenue": total_revenue,
+        "today_revenue": today_revenue,
+        "orders_by_status": orders_by_status,
+        "top_items": top_items,
+    }
+
+
+def _local_midnight(day):
+    return timezone.make_aware(datetime.combine(day, time.min), timezone.get_default_timezone())
+
+
+def _avg_ticket(orders, revenue):
+    return round(revenue / orders) if orders else 0
+
+
+def _totals(orders, revenue):
+    return {
+        "orders": orders,
+        "revenue": revenue,
+        "avg_ticket": _avg_ticket(orders, revenue),
+    }
+
+
+def _pct_change(current, previous):
+    if not previous:
+        return None
+    return round((current - previous) * 100 / previous, 2)
+
+
+def _rollup_rows(restaurant_id, start_dt, end_dt):
+    qs = SalesRollup.objects.filter(bucket__gte=start_dt, bucket__lt=end_dt)
+    if restaurant_id is not None:
+        qs = qs.filter(restaurant_id=restaurant_id)
+    return qs.values_list("bucket", "orders_count", "revenue_cop")
+
+
+def _period_totals(restaurant_id, start_dt, end_dt):
+    agg = _rollup_rows(restaurant_id, start_dt, end_dt).aggregate(
+        orders=Sum("orders_count"),
+        revenue=Sum("revenue_cop"),
+    )
+    return agg["orders"] or 0, agg["revenue"] or 0
+
+
+def sales_timeseries(start_date, end_date, granularity=GRANULARITY_DAY, restaurant_id=None, compare=True):
+    """
+    Serie de ingresos, pedidos y ticket promedio por hora o día local
+    (ambas fechas incluidas), con buckets vacíos rellenados en cero y
+    comparación contra el periodo inmediatamente anterior de igual duración.
+    """
+    start_dt = _local_midnight(start_date)
+    end_dt = _local_midnight(end_date + timedelta(days=1))
+
+    buckets = {}
+    for bucket, orders, revenue in _rollup_rows(restaurant_id, start_dt, end_dt):
+        local = timezone.localtime(bucket)
+        key = local if granularity == GRANULARITY_HOUR else local.date()
+        acc = buckets.setdefault(key, [0, 0])
+        acc[0] += orders
+        acc[1] += revenue
+
+    series = []
+    total_orders = total_revenue = 0
+    if granularity == GRANULARITY_HOUR:
+        keys = (start_dt + timedelta(hours=i) for i in range(int((end_dt - start_dt).total_seconds() // 3600)))
+    else:
+        keys = (start_date + timedelta(days=i) for i in range((end_date - start_date).days + 1))
+
+    for key in keys:
+        orders, revenue = buckets.get(key, (0, 0))
+        total_orders += orders
+        total_revenue += revenue
+        series.append({"bucket": key.isoformat(), **_totals(orders, revenue)})
+
+    data = {
+        "currency": "COP",
+        "timezone": str(timezone.get_default_timezone()),
+        "granularity": granularity,
+        "restaurant_id": restaurant_id,
+        "start": start_date.isoformat(),
+        "end": end_date.isoformat(),
+        "series": series,
+        "totals": _totals(total_orders, total_revenue),
+    }
+
+    if compare:
+        length = end_date - start_date + timedelta(days=1)
+        prev_start = start_date - length
+        prev_end = start_date - timedelta(days=1)
+        prev_orders, prev_revenue = _period_totals(
+            restaurant_id, _local_midnight(prev_start), start_dt
+        )
+        previous = _totals(prev_orders, prev_revenue)
+        data["previous"] = {
+            "start": prev_start.isoformat(),
+            "end": prev_end.isoformat(),
+            "totals": previous,
+        }
+        data["change_pct"] = {
+            key: _pct_change(data["totals"][key], previous[key])
+            for key in ("orders", "revenue", "avg_ticket")
+        }
+
+    return data
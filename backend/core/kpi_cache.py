@@ -0,0 +1,183 @@
+# core/kpi_cache.py
+"""
+Caché de respuestas KPI con recálculo single-flight.
+
+- Cada entrada es fresca durante KPI_CACHE_TTL segundos; después se sirve
+  como "stale" hasta KPI_CACHE_STALE_SECONDS mientras un solo worker
+  (el que obtiene el lock con cache.add) la recalcula. El lock lleva un
+  token: solo su dueño lo borra, y después de publicar la entrada.
+- Si no hay entrada, el worker sin lock espera hasta KPI_CACHE_WAIT_SECONDS
+  a que el dueño del lock la publique antes de calcular por su cuenta.
+- invalidate(restaurant_id) sube la generación del restaurante y la global;
+  las entradas con otra generación se tratan como stale (no se borran, así
+  la invalidación no provoca una estampida).
+- Si la caché falla en cualquier paso se calcula sin ella (fail-open).
+"""
+import hashlib
+import json
+import logging
+import time
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+
+from . import metrics
+
+logger = logging.getLogger(__name__)
+
+ALL_RESTAURANTS = "all"
+
+cache_requests = metrics.counter(
+    "kpi_cache_requests_total",
+    "Lecturas de la caché KPI por resultado (hit, stale, miss, wait, error).",
+    ("endpoint", "result"),
+)
+recompute_seconds = metrics.histogram(
+    "kpi_cache_recompute_seconds",
+    "Duración del recálculo de una respuesta KPI.",
+    ("endpoint",),
+)
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+def _scope(restaurant_id):
+    return ALL_RESTAURANTS if restaurant_id is None else str(restaurant_id)
+
+
+def _generation_key(scope):
+    return f"kpi:gen:{scope}"
+
+
+def _entry_key(endpoint, scope, params):
+    digest = hashlib.sha1(
+        json.dumps(params, sort_keys=True, default=str).encode("utf-8")
+    ).hexdigest()[:16]
+    return f"kpi:v1:{endpoint}:{scope}:{digest}"
+
+
+# Borra el lock solo si sigue siendo nuestro (si expiró, otro worker lo tiene).
+_RELEASE_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+  return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+
+def _cache_call(method, *args, default=None, **kwargs):
+    """Llamada a la caché que no propaga errores (Redis caído = sin caché)."""
+    try:
+        return getattr(cache, method)(*args, **kwargs)
+    except Exception:
+        logger.warning("Caché KPI no disponible (%s)", method, exc_info=True)
+        return default
+
+
+def _new_token():
+    # Entero: RedisCache guarda los int sin pickle y el script los compara tal cual.
+    return uuid.uuid4().int >> 65
+
+
+def _release(lock_key, token):
+    try:
+        client = getattr(cache, "_cache", None)
+        if hasattr(client, "get_client"):
+            key = cache.make_and_validate_key(lock_key)
+            client.get_client(key, write=True).eval(_RELEASE_SCRIPT, 1, key, token)
+        elif cache.get(lock_key) == token:
+            cache.delete(lock_key)
+    except Exception:
+        logger.warning("No se pudo liberar el lock KPI %s", lock_key, exc_info=True)
+
+
+def _recompute(endpoint, entry_key, generation, compute, lock_key=None, token=None):
+    started = time.perf_counter()
+    try:
+        value = compute()
+    except Exception:
+        if lock_key:
+            _release(lock_key, token)
+        raise
+    finally:
+        recompute_seconds.observe(time.perf_counter() - started, endpoint=endpoint)
+
+    # Se publica antes de soltar el lock: quien lo tome después ya ve la entrada.
+    ttl = _setting("KPI_CACHE_TTL", 30)
+    stale = _setting("KPI_CACHE_STALE_SECONDS", 300)
+    entry = {"value": value, "fresh_until": time.time() + ttl, "generation": generation}
+    _cache_call("set", entry_key, entry, timeout=ttl + stale)
+    if lock_key:
+        _release(lock_key, token)
+    return value
+
+
+def get_or_compute(endpoint, restaurant_id, params, compute):
+    """
+    Devuelve la respuesta KPI cacheada para (endpoint, restaurante, params)
+    o la calcula con `compute()` respetando el single-flight.
+    """
+    scope = _scope(restaurant_id)
+    entry_key = _entry_key(endpoint, scope, params)
+    generation_key = _generation_key(scope)
+    lock_key = f"{entry_key}:lock"
+
+    found = _cache_call("get_many", [entry_key, generation_key])
+    if found is None:  # Redis caído: calculamos sin caché.
+        cache_requests.inc(endpoint=endpoint, result="error")
+        return compute()
+
+    generation = found.get(generation_key, 0)
+    entry = found.get(entry_key)
+    if entry and entry["generation"] == generation and entry["fresh_until"] > time.time():
+        cache_requests.inc(endpoint=endpoint, result="hit")
+        return entry["value"]
+
+    lock_timeout = _setting("KPI_CACHE_LOCK_SECONDS", 30)
+    token = _new_token()
+    locked = _cache_call("add", lock_key, token, timeout=lock_timeout)
+    if locked is None:
+        cache_requests.inc(endpoint=endpoint, result="error")
+        return compute()
+    if locked:
+        cache_requests.inc(endpoint=endpoint, result="miss")
+        return _recompute(endpoint, entry_key, generation, compute, lock_key=lock_key, token=token)
+
+    if entry:
+        # Otro worker ya está recalculando: servimos el valor anterior.
+        cache_requests.inc(endpoint=endpoint, result="stale")
+        return entry["value"]
+
+    deadline = time.monotonic() + _setting("KPI_CACHE_WAIT_SECONDS", 2)
+    while time.monotonic() < deadline:
+        time.sleep(0.05)
+        entry = _cache_call("get", entry_key, default=False)
+        if entry is False:
+            cache_requests.inc(endpoint=endpoint, result="error")
+            return compute()
+        if entry:
+            cache_requests.inc(endpoint=endpoint, result="wait")
+            return entry["value"]
+
+    cache_requests.inc(endpoint=endpoint, result="miss")
+    return _recompute(endpoint, entry_key, generation, compute)
+
+
+def _bump(key):
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, 1, timeout=None)
+
+
+def invalidate(restaurant_id=None):
+    """Marca como stale las entradas del restaurante y las globales."""
+    try:
+        if restaurant_id is not None:
+            _bump(_generation_key(_scope(restaurant_id)))
+        _bump(_generation_key(ALL_RESTAURANTS))
+    except Exception:
+        logger.warning("No se pudo invalidar la caché KPI", exc_info=True)
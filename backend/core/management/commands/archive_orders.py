@@ -0,0 +1,31 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from core.archive import archivable_orders, archive_orders
+
+
+class Command(BaseCommand):
+    help = (
+        "Mueve a ArchivedOrder los pedidos COMPLETED/CANCELLED más antiguos que "
+        "--older-than-days (con líneas, entrega y eventos) y los borra de las tablas calientes."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--older-than-days",
+            type=int,
+            default=settings.ORDER_ARCHIVE_AFTER_DAYS,
+        )
+        parser.add_argument("--batch-size", type=int, default=500)
+        parser.add_argument("--limit", type=int, default=None, help="Máximo de pedidos en esta ejecución.")
+        parser.add_argument("--dry-run", action="store_true")
+
+    def handle(self, *args, **options):
+        days = options["older_than_days"]
+        if options["dry_run"]:
+            pending = archivable_orders(days).count()
+            self.stdout.write(f"Pedidos archivables (> {days} días): {pending}")
+            return
+
+        archived = archive_orders(days, batch_size=options["batch_size"], limit=options["limit"])
+        self.stdout.write(self.style.SUCCESS(f"Pedidos archivados: {archived}"))
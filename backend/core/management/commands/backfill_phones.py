@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from core import customer_lookup
+
+
+class Command(BaseCommand):
+    help = (
+        "Rellena Customer.phone_e164 (teléfono normalizado a E.164) en lotes. "
+        "Por defecto solo las filas vacías; con --all recalcula todas."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=2000)
+        parser.add_argument("--all", action="store_true", help="Recalcula también las ya normalizadas.")
+
+    def handle(self, *args, **options):
+        if options["batch_size"] < 1:
+            raise CommandError("--batch-size debe ser >= 1.")
+        updated = customer_lookup.backfill(batch_size=options["batch_size"], only_missing=not options["all"])
+        self.stdout.write(self.style.SUCCESS(f"Teléfonos normalizados: {updated} clientes actualizados."))
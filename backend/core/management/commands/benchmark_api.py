@@ -0,0 +1,130 @@
+import json
+import os
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import override_settings
+
+from core import benchmark
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark de carga de la API (login, menú, pedidos, cocina, listados, KPI) "
+        "sobre una base de datos de pruebas sembrada. Resultado en JSON."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--scenarios", nargs="+", choices=list(benchmark.SCENARIOS), default=list(benchmark.SCENARIOS)
+        )
+        parser.add_argument("--requests", type=int, default=200, help="Peticiones medidas por escenario.")
+        parser.add_argument(
+            "--concurrency", type=int, nargs="+", default=[10], help="Uno o varios niveles de concurrencia."
+        )
+        parser.add_argument("--warmup", type=int, default=10)
+        parser.add_argument("--customers", type=int, default=50)
+        parser.add_argument("--orders", type=int, default=500, help="Pedidos históricos sembrados.")
+        parser.add_argument(
+            "--uvicorn", action="store_true",
+            help="Mide contra uvicorn local en vez de llamar a la app ASGI en proceso (solo PostgreSQL).",
+        )
+        parser.add_argument("--workers", type=int, default=2, help="Workers de uvicorn.")
+        parser.add_argument("--port", type=int, default=8765)
+        parser.add_argument(
+            "--accept-encoding", default=None,
+            help='Cabecera Accept-Encoding de las peticiones (p. ej. "br, gzip") para medir bytes comprimidos.',
+        )
+        parser.add_argument("--keepdb", action="store_true", help="Reutiliza la base de datos de pruebas.")
+        parser.add_argument("--output", default=None, help="Fichero JSON de salida (por defecto stdout).")
+        parser.add_argument("--compare", default=None, help="JSON de una ejecución anterior para comparar.")
+
+    def handle(self, *args, **options):
+        if options["requests"] < 1 or min(options["concurrency"]) < 1:
+            raise CommandError("--requests y --concurrency deben ser >= 1.")
+        baseline = None
+        if options["compare"]:
+            with open(options["compare"]) as fh:
+                baseline = json.load(fh)
+
+        # Nunca sobre los datos reales: base de datos de pruebas, como `manage.py test`.
+        old_name = connection.settings_dict["NAME"]
+        test_name = connection.creation.create_test_db(
+            verbosity=0, autoclobber=True, serialize=False, keepdb=options["keepdb"]
+        )
+        process = None
+        try:
+            # Sin hilo de warm-up: el benchmark hace su propio calentamiento.
+            # Sin throttling: login y pedidos salen todos de la misma IP y usuario.
+            with override_settings(REPLICA_DATABASES=[], WARMUP_ENABLED=False, THROTTLE_ENABLED=False):
+                fixtures = benchmark.seed(
+                    customers=options["customers"],
+                    orders=options["orders"],
+                    kitchen_orders=benchmark.kitchen_orders_needed(options["requests"], options["warmup"]),
+                )
+                if options["uvicorn"]:
+                    if connection.vendor == "sqlite":
+                        raise CommandError("--uvicorn necesita PostgreSQL (la base SQLite de pruebas vive en memoria).")
+                    connection.close()
+                    env = {
+                        **os.environ,
+                        "DJANGO_SETTINGS_MODULE": settings.SETTINGS_MODULE,
+                        "POSTGRES_DB": test_name,
+                        "POSTGRES_REPLICA_HOST": "",
+                        "THROTTLE_ENABLED": "0",
+                    }
+                    process = benchmark.start_uvicorn(options["port"], options["workers"], env=env)
+                    transport = benchmark.HTTPTransport(
+                        "127.0.0.1", options["port"], accept_encoding=options["accept_encoding"]
+                    )
+                    target = f"uvicorn x{options['workers']}"
+                else:
+                    from noah_food.asgi import application
+
+                    transport = benchmark.ASGITransport(
+                        application, accept_encoding=options["accept_encoding"]
+                    )
+                    target = "asgi-inprocess"
+
+                result = benchmark.run(
+                    transport,
+                    fixtures,
+                    options["scenarios"],
+                    requests=options["requests"],
+                    concurrency=options["concurrency"],
+                    warmup=options["warmup"],
+                    target=target,
+                )
+        finally:
+            if process is not None:
+                process.terminate()
+                process.wait(timeout=30)
+            connection.creation.destroy_test_db(old_name, verbosity=0, keepdb=options["keepdb"])
+
+        payload = json.dumps(result, indent=2)
+        if options["output"]:
+            with open(options["output"], "w") as fh:
+                fh.write(payload + "\n")
+        else:
+            self.stdout.write(payload)
+
+        self._summary(result, baseline)
+
+    def _summary(self, result, baseline):
+        # A stderr para no mezclarse con el JSON cuando va por stdout.
+        out = sys.stderr
+        for name, levels in result["scenarios"].items():
+            for level, data in levels.items():
+                latency = data["latency_ms"]
+                out.write(
+                    f"{name:<16} c={level:<4} {data['throughput_rps']:>8} rps  "
+                    f"p50={latency['p50']}ms p95={latency['p95']}ms p99={latency['p99']}ms "
+                    f"errores={data['errors']}\n"
+                )
+        if baseline:
+            out.write("\nComparación con la ejecución anterior:\n")
+            for name, level, metric, old, new, change in benchmark.compare(baseline, result):
+                sign = "" if change is None else f"{change:+.1f}%"
+                out.write(f"{name:<16} c={level:<4} {metric:<15} {old} -> {new} {sign}\n")
@@ -0,0 +1,64 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import override_settings
+
+from core import benchmark, payload_benchmark
+
+
+class Command(BaseCommand):
+    help = (
+        "Mide el tamaño en la red (sin comprimir, gzip, brotli) y el tiempo de render "
+        "y parseo (stdlib, orjson, msgpack) de las respuestas de pedidos y menú sobre datos sembrados."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--orders", type=int, default=100, help="Pedidos del listado medido.")
+        parser.add_argument("--menu-items", type=int, default=60)
+        parser.add_argument("--iterations", type=int, default=50)
+        parser.add_argument("--keepdb", action="store_true")
+        parser.add_argument("--output", default=None, help="Fichero JSON con los resultados.")
+
+    def handle(self, *args, **options):
+        if min(options["orders"], options["iterations"]) < 1:
+            raise CommandError("--orders y --iterations deben ser >= 1.")
+
+        old_name = connection.settings_dict["NAME"]
+        connection.creation.create_test_db(
+            verbosity=0, autoclobber=True, serialize=False, keepdb=options["keepdb"]
+        )
+        try:
+            with override_settings(REPLICA_DATABASES=[]):
+                fixtures = benchmark.seed(
+                    customers=20, orders=options["orders"], menu_items=options["menu_items"]
+                )
+                results = payload_benchmark.run(fixtures, options["orders"], options["iterations"])
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0, keepdb=options["keepdb"])
+
+        if options["output"]:
+            with open(options["output"], "w") as fh:
+                json.dump(results, fh, indent=2)
+                fh.write("\n")
+
+        for name, data in results.items():
+            sizes = data["bytes"]
+            line = f"{name:<16} {sizes['identity']:>9} B"
+            for encoding in ("gzip", "br"):
+                if encoding in sizes:
+                    ratio = sizes[encoding] / sizes["identity"]
+                    line += (
+                        f"  {encoding} {sizes[encoding]:>7} B ({ratio:.0%}, "
+                        f"{data['compress_us'][encoding]:.0f} µs)"
+                    )
+            renders = "  ".join(f"{backend} {us:.0f} µs" for backend, us in data["render_us"].items())
+            self.stdout.write(f"{line}  | render: {renders}")
+
+            packed = data["msgpack_bytes"]
+            line = f"{'  msgpack':<16} {packed['identity']:>9} B"
+            for encoding in ("gzip", "br"):
+                if encoding in packed:
+                    line += f"  {encoding} {packed[encoding]:>7} B"
+            parses = "  ".join(f"{fmt} {us:.0f} µs" for fmt, us in data["parse_us"].items())
+            self.stdout.write(f"{line}  | parse: {parses}")
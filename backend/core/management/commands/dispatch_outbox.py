@@ -0,0 +1,65 @@
+import logging
+import signal
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DatabaseError, close_old_connections, connections
+
+from core import metrics, outbox
+
+logger = logging.getLogger(__name__)
+
+PURGE_EVERY = 3600  # segundos
+
+
+class Command(BaseCommand):
+    help = (
+        "Entrega los mensajes del outbox transaccional (core/outbox.py) a los sinks "
+        "de OUTBOX_SINKS. Se pueden correr varios en paralelo (SKIP LOCKED)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=None, help="Por defecto OUTBOX_BATCH_SIZE.")
+        parser.add_argument("--interval", type=float, default=None, help="Segundos de espera sin trabajo.")
+        parser.add_argument("--once", action="store_true", help="Procesa un lote y termina.")
+
+    def handle(self, *args, **options):
+        if options["batch_size"] is not None and options["batch_size"] < 1:
+            raise CommandError("--batch-size debe ser >= 1.")
+        interval = options["interval"]
+        if interval is None:
+            interval = getattr(settings, "OUTBOX_POLL_INTERVAL", 1.0)
+
+        self._running = True
+        signal.signal(signal.SIGTERM, self._stop)
+        signal.signal(signal.SIGINT, self._stop)
+        metrics.ensure_writer()
+
+        last_purge = 0.0
+        while self._running:
+            close_old_connections()
+            try:
+                processed = outbox.dispatch(batch_size=options["batch_size"])
+                outbox.update_lag_gauge()
+                if processed:
+                    self.stdout.write(f"{processed} mensajes procesados.")
+                if options["once"]:
+                    break
+                if time.monotonic() - last_purge >= PURGE_EVERY:
+                    purged = outbox.purge()
+                    if purged:
+                        self.stdout.write(f"{purged} mensajes enviados purgados.")
+                    last_purge = time.monotonic()
+            except DatabaseError:
+                if options["once"]:
+                    raise
+                # Un failover o una conexión caída no tumba el dispatcher: se reintenta.
+                logger.exception("Dispatcher del outbox: error de base de datos, reintentando")
+                connections.close_all()
+                processed = 0
+            if not processed:
+                time.sleep(interval)
+
+    def _stop(self, *args):
+        self._running = False
@@ -0,0 +1,45 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from core import jobs
+
+
+class Command(BaseCommand):
+    help = "Encola un trabajo registrado en core/tasks.py para `run_jobs`."
+
+    def add_arguments(self, parser):
+        parser.add_argument("name", nargs="?", help="Nombre del trabajo.")
+        parser.add_argument("--kwargs", default="{}", help='Argumentos en JSON, p. ej. \'{"restaurant_id": 1}\'.')
+        parser.add_argument("--key", default="", help="Clave de idempotencia.")
+        parser.add_argument("--at", default=None, help="Fecha ISO 8601 de ejecución (por defecto ya).")
+        parser.add_argument("--list", action="store_true", help="Lista los trabajos registrados.")
+
+    def handle(self, *args, **options):
+        if options["list"] or not options["name"]:
+            for spec in sorted(jobs.registry.values(), key=lambda s: s.name):
+                every = f"cada {spec.every}" if spec.every else "bajo demanda"
+                self.stdout.write(f"{spec.name:28} {every}")
+            return
+
+        try:
+            kwargs = json.loads(options["kwargs"])
+        except ValueError as exc:
+            raise CommandError(f"--kwargs no es JSON válido: {exc}") from exc
+        if not isinstance(kwargs, dict):
+            raise CommandError("--kwargs debe ser un objeto JSON.")
+        run_at = None
+        if options["at"]:
+            run_at = parse_datetime(options["at"])
+            if run_at is None:
+                raise CommandError("--at debe tener formato ISO 8601.")
+            if timezone.is_naive(run_at):
+                run_at = timezone.make_aware(run_at)
+
+        try:
+            job = jobs.enqueue(options["name"], kwargs, key=options["key"], run_at=run_at)
+        except LookupError as exc:
+            raise CommandError(str(exc)) from exc
+        self.stdout.write(self.style.SUCCESS(f"Trabajo #{job.pk} {job.name} ({job.status}, run_at {job.run_at:%Y-%m-%d %H:%M:%S})."))
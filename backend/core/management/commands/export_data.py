@@ -0,0 +1,61 @@
+import sys
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core import exports
+from core.db_router import replica_reads
+
+
+def _parse_date(value, name):
+    if not value:
+        return None
+    try:
+        return date.fromisoformat(value)
+    except ValueError as exc:
+        raise CommandError(f"--{name} debe tener formato YYYY-MM-DD.") from exc
+
+
+class Command(BaseCommand):
+    help = "Exporta pedidos o eventos en CSV/NDJSON en streaming (memoria constante)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("kind", choices=["orders", "events"])
+        parser.add_argument("--output", choices=exports.OUTPUTS, default=exports.OUTPUT_CSV)
+        parser.add_argument("--gzip", action="store_true")
+        parser.add_argument("--restaurant-id", type=int, default=None)
+        parser.add_argument("--start", default=None, help="Fecha local YYYY-MM-DD (inclusiva).")
+        parser.add_argument("--end", default=None, help="Fecha local YYYY-MM-DD (inclusiva).")
+        parser.add_argument("--status", default=None, help="Solo pedidos: estado a exportar.")
+        parser.add_argument("--name", default=None, help="Solo eventos: nombre del evento.")
+        parser.add_argument("--file", default=None, help="Ruta de salida (por defecto stdout).")
+
+    def handle(self, *args, **options):
+        start = _parse_date(options["start"], "start")
+        end = _parse_date(options["end"], "end")
+
+        if options["kind"] == "orders":
+            queryset = exports.orders_queryset(
+                options["restaurant_id"], start, end, status=options["status"]
+            )
+        else:
+            queryset = exports.events_queryset(
+                options["restaurant_id"], start, end, name=options["name"]
+            )
+
+        with replica_reads():
+            blocks = exports.stream(queryset, output=options["output"], gzip=options["gzip"])
+        target = open(options["file"], "wb") if options["file"] else sys.stdout.buffer
+        try:
+            written = 0
+            for block in blocks:
+                target.write(block)
+                written += len(block)
+        finally:
+            if options["file"]:
+                target.close()
+            else:
+                target.flush()
+
+        if options["file"]:
+            self.stdout.write(self.style.SUCCESS(f"Exportados {written} bytes a {options['file']}."))
@@ -0,0 +1,44 @@
+import logging
+import signal
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections, connections
+
+from core import event_ingest
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = "Vacía el buffer de ingesta de eventos (Redis) hacia core_event en lotes."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--interval", type=float, default=1.0, help="Segundos entre ciclos.")
+        parser.add_argument("--once", action="store_true", help="Vacía una vez y termina.")
+
+    def handle(self, *args, **options):
+        self._running = True
+        signal.signal(signal.SIGTERM, self._stop)
+        signal.signal(signal.SIGINT, self._stop)
+
+        while self._running:
+            close_old_connections()
+            try:
+                written = event_ingest.flush()
+            except Exception:
+                if options["once"]:
+                    raise
+                # flush() ya devolvió el lote al buffer: se reintenta en el próximo ciclo.
+                logger.exception("Error escribiendo eventos; se reintenta en el próximo ciclo")
+                connections.close_all()
+                written = 0
+            if written:
+                self.stdout.write(f"{written} eventos escritos.")
+            if options["once"]:
+                break
+            if not written:
+                time.sleep(options["interval"])
+
+    def _stop(self, *args):
+        self._running = False
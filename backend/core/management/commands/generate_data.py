@@ -0,0 +1,80 @@
+import time
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core import datagen
+
+
+class Command(BaseCommand):
+    help = (
+        "Genera datos sintéticos realistas (restaurantes, menú, clientes, pedidos, "
+        "entregas, cupones y eventos) de forma determinista a partir de --seed."
+    )
+
+    def add_arguments(self, parser):
+        defaults = datagen.Scale()
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument("--restaurants", type=int, default=defaults.restaurants)
+        parser.add_argument("--menu-items", type=int, default=defaults.menu_items, help="Por restaurante.")
+        parser.add_argument("--drivers", type=int, default=defaults.drivers, help="Por restaurante.")
+        parser.add_argument("--coupons", type=int, default=defaults.coupons, help="Por restaurante.")
+        parser.add_argument("--customers", type=int, default=defaults.customers)
+        parser.add_argument("--orders", type=int, default=defaults.orders)
+        parser.add_argument("--days", type=int, default=defaults.days)
+        parser.add_argument(
+            "--end", default=None,
+            help="Fecha local YYYY-MM-DD en que termina el rango (exclusiva; por defecto hoy). "
+                 "Fíjala para reproducir exactamente el mismo conjunto.",
+        )
+        parser.add_argument("--growth", type=float, default=defaults.growth)
+        parser.add_argument("--abandoned-ratio", type=float, default=defaults.abandoned_ratio)
+        parser.add_argument("--no-events", action="store_true")
+        parser.add_argument("--chunk-size", type=int, default=50_000)
+        parser.add_argument(
+            "--no-rebuild", action="store_true",
+            help="No reconstruye rollups, contadores ni estadísticas de clientes al terminar.",
+        )
+
+    def handle(self, *args, **options):
+        end = None
+        if options["end"]:
+            try:
+                end = date.fromisoformat(options["end"])
+            except ValueError as exc:
+                raise CommandError("--end debe tener formato YYYY-MM-DD.") from exc
+        if min(options["restaurants"], options["menu_items"], options["customers"], options["days"]) < 1:
+            raise CommandError("--restaurants, --menu-items, --customers y --days deben ser >= 1.")
+        if options["chunk_size"] < 1 or options["orders"] < 0:
+            raise CommandError("--chunk-size debe ser >= 1 y --orders >= 0.")
+
+        scale = datagen.Scale(
+            restaurants=options["restaurants"],
+            menu_items=options["menu_items"],
+            drivers=options["drivers"],
+            coupons=options["coupons"],
+            customers=options["customers"],
+            orders=options["orders"],
+            days=options["days"],
+            growth=options["growth"],
+            abandoned_ratio=options["abandoned_ratio"],
+            events=not options["no_events"],
+        )
+        started = time.monotonic()
+
+        def progress(table, rows):
+            elapsed = time.monotonic() - started
+            self.stdout.write(f"  {rows}/{scale.orders} pedidos ({rows / max(elapsed, 1e-9):,.0f}/s)")
+
+        counts = datagen.generate(
+            scale,
+            seed=options["seed"],
+            end_date=end,
+            chunk_size=options["chunk_size"],
+            rebuild=not options["no_rebuild"],
+            progress=progress,
+        )
+        summary = ", ".join(f"{table}={rows}" for table, rows in counts.items())
+        self.stdout.write(
+            self.style.SUCCESS(f"Datos generados en {time.monotonic() - started:.1f}s: {summary}.")
+        )
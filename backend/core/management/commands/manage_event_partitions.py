@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand
+
+from core import partitions
+
+
+class Command(BaseCommand):
+    help = (
+        "Crea por adelantado las particiones mensuales de core_event y elimina "
+        "las que quedan fuera de la retención (DROP de partición, no DELETE)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--ahead", type=int, default=3, help="Meses a crear por adelantado.")
+        parser.add_argument(
+            "--retention-months",
+            type=int,
+            default=None,
+            help="Meses completos a conservar además del actual (sin valor no se borra nada).",
+        )
+        parser.add_argument("--dry-run", action="store_true")
+
+    def handle(self, *args, **options):
+        if not partitions.is_partitioned():
+            self.stdout.write("core_event no está particionada en este motor; solo se aplica retención.")
+        elif options["dry_run"]:
+            self.stdout.write(f"Particiones existentes: {len(partitions.list_partitions())}")
+        else:
+            for name in partitions.ensure_partitions(months_ahead=options["ahead"]):
+                self.stdout.write(f"Creada {name}")
+
+        if options["retention_months"] is not None:
+            dropped = partitions.drop_old_partitions(
+                options["retention_months"],
+                dry_run=options["dry_run"],
+            )
+            verb = "Se eliminarían" if options["dry_run"] else "Eliminadas"
+            self.stdout.write(self.style.SUCCESS(f"{verb}: {dropped}"))
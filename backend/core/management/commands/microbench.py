@@ -0,0 +1,62 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from core import microbench
+
+
+class Command(BaseCommand):
+    help = (
+        "Microbenchmarks de modelos (Order.save, OrderItem.save, señales, Coupon.is_usable) "
+        "sobre la base de datos de pruebas; falla si hay regresiones frente a la línea base."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--only", nargs="+", choices=list(microbench.BENCHMARKS), default=None)
+        parser.add_argument("--scale", type=float, default=1.0, help="Multiplica las iteraciones.")
+        parser.add_argument("--time-threshold", type=float, default=microbench.TIME_THRESHOLD)
+        parser.add_argument("--query-threshold", type=float, default=microbench.QUERY_THRESHOLD)
+        parser.add_argument("--alloc-threshold", type=float, default=microbench.ALLOC_THRESHOLD)
+        parser.add_argument(
+            "--update-baseline", action="store_true",
+            help=f"Guarda los resultados como línea base del motor actual en {microbench.BASELINE_PATH.name}.",
+        )
+        parser.add_argument("--keepdb", action="store_true")
+
+    def handle(self, *args, **options):
+        old_name = connection.settings_dict["NAME"]
+        connection.creation.create_test_db(
+            verbosity=0, autoclobber=True, serialize=False, keepdb=options["keepdb"]
+        )
+        try:
+            vendor = connection.vendor
+            calibration_us, results = microbench.run(options["only"], options["scale"])
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0, keepdb=options["keepdb"])
+
+        self.stdout.write(f"{vendor}: calibración {calibration_us:.0f} µs")
+        for r in results:
+            self.stdout.write(
+                f"{r.name:<26} {r.time_us:>10.2f} µs  {r.units:>9.5f} u  "
+                f"{r.queries:>5.1f} consultas  {r.alloc_kib:>8.2f} KiB"
+            )
+
+        if options["update_baseline"]:
+            microbench.save_baseline(calibration_us, results, vendor=vendor)
+            self.stdout.write(self.style.SUCCESS(f"Línea base de {vendor} actualizada."))
+            return
+
+        baseline = microbench.load_baseline().get(vendor)
+        if baseline is None:
+            self.stdout.write(self.style.WARNING(f"No hay línea base para {vendor}; usa --update-baseline."))
+            return
+        regressions = microbench.compare(
+            results,
+            baseline,
+            time_threshold=options["time_threshold"],
+            query_threshold=options["query_threshold"],
+            alloc_threshold=options["alloc_threshold"],
+        )
+        if regressions:
+            lines = [f"{name}: {metric} {before} -> {after}" for name, metric, before, after in regressions]
+            raise CommandError("Regresiones frente a la línea base:\n" + "\n".join(lines))
+        self.stdout.write(self.style.SUCCESS("Sin regresiones frente a la línea base."))
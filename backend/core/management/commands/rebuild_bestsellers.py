@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from core.bestsellers import rebuild_counters
+
+
+class Command(BaseCommand):
+    help = "Reconstruye los contadores de platos más vendidos (MenuItemSalesCounter)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--restaurant-id", type=int, default=None)
+
+    def handle(self, *args, **options):
+        written = rebuild_counters(restaurant_id=options["restaurant_id"])
+        self.stdout.write(self.style.SUCCESS(f"Contadores reconstruidos: {written}."))
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from core import customer_stats
+
+
+class Command(BaseCommand):
+    help = (
+        "Recalcula orders_count, lifetime_value_cop y last_order_at de los clientes "
+        "desde los pedidos (incluidos los archivados)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--customer-id", type=int, default=None)
+
+    def handle(self, *args, **options):
+        updated = customer_stats.rebuild(customer_id=options["customer_id"])
+        self.stdout.write(self.style.SUCCESS(f"Estadísticas recalculadas: {updated} clientes con pedidos."))
@@ -0,0 +1,33 @@
+from datetime import date, datetime, time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from core.rollups import rebuild_sales_rollups
+
+
+class Command(BaseCommand):
+    help = "Reconstruye los rollups horarios de ventas (SalesRollup) desde los pedidos."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--restaurant-id", type=int, default=None)
+        parser.add_argument(
+            "--since",
+            default=None,
+            help="Fecha local YYYY-MM-DD desde la que se reconstruye (por defecto todo).",
+        )
+
+    def handle(self, *args, **options):
+        since = None
+        if options["since"]:
+            try:
+                since_date = date.fromisoformat(options["since"])
+            except ValueError as exc:
+                raise CommandError("--since debe tener formato YYYY-MM-DD.") from exc
+            since = timezone.make_aware(datetime.combine(since_date, time.min))
+
+        written = rebuild_sales_rollups(
+            restaurant_id=options["restaurant_id"],
+            since=since,
+        )
+        self.stdout.write(self.style.SUCCESS(f"Rollups reconstruidos: {written} buckets."))
@@ -0,0 +1,90 @@
+import multiprocessing
+import signal
+import threading
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from core import jobs, metrics
+
+
+def _child(threads, interval, stop):
+    # Las señales las atiende el padre, que avisa a los hijos con `stop`.
+    signal.signal(signal.SIGTERM, signal.SIG_IGN)
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    jobs.Worker(threads=threads, interval=interval).run(stop)
+
+
+class Command(BaseCommand):
+    help = (
+        "Worker de trabajos en segundo plano (core/jobs.py): --processes procesos "
+        "con --threads hilos cada uno. Programa también los trabajos periódicos."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--processes", type=int, default=None, help="Por defecto JOBS_PROCESSES.")
+        parser.add_argument("--threads", type=int, default=None, help="Hilos por proceso; por defecto JOBS_THREADS.")
+        parser.add_argument("--interval", type=float, default=None, help="Segundos de espera sin trabajo.")
+        parser.add_argument("--metrics-port", type=int, default=None, help="Sirve /metrics; por defecto JOBS_METRICS_PORT (0 = no).")
+        parser.add_argument("--once", action="store_true", help="Programa, ejecuta todo lo vencido en este hilo y termina.")
+
+    def handle(self, *args, **options):
+        processes = options["processes"] or getattr(settings, "JOBS_PROCESSES", 1)
+        threads = options["threads"] or getattr(settings, "JOBS_THREADS", 4)
+        if processes < 1 or threads < 1:
+            raise CommandError("--processes y --threads deben ser >= 1.")
+
+        if options["once"]:
+            jobs.schedule_periodic()
+            jobs.requeue_stale()
+            done = jobs.run_pending(batch_size=threads)
+            self.stdout.write(f"{done} trabajos ejecutados.")
+            return
+
+        port = options["metrics_port"]
+        if port is None:
+            port = getattr(settings, "JOBS_METRICS_PORT", 0)
+
+        if processes == 1:
+            stop = threading.Event()
+            worker = jobs.Worker(threads=threads, interval=options["interval"])
+            runners = [threading.Thread(target=worker.run, args=(stop,), name="jobs")]
+        else:
+            # fork: los hijos no deben heredar conexiones abiertas del padre.
+            connections.close_all()
+            context = multiprocessing.get_context("fork")
+            stop = context.Event()
+            runners = [
+                context.Process(target=_child, args=(threads, options["interval"], stop), name=f"jobs-{i}")
+                for i in range(processes)
+            ]
+
+        # El handler solo marca; el bucle de abajo hace stop.set() (llamarlo
+        # desde el handler puede bloquearse con el lock interno del Event).
+        self._stopping = False
+        signal.signal(signal.SIGTERM, self._stop)
+        signal.signal(signal.SIGINT, self._stop)
+        for runner in runners:
+            runner.start()
+        if port:
+            metrics.serve(port)
+        self.stdout.write(f"Worker de trabajos: {processes} procesos, {threads} hilos cada uno.")
+
+        # Si un hijo muere se para todo y se sale con error: que reinicie el orquestador.
+        failed = False
+        while any(runner.is_alive() for runner in runners):
+            for runner in runners:
+                runner.join(timeout=0.5)
+                if self._stopping and not stop.is_set():
+                    self.stdout.write("Deteniendo: se terminan los trabajos en curso.")
+                    stop.set()
+                if getattr(runner, "exitcode", None) not in (None, 0) and not stop.is_set():
+                    self.stderr.write(f"{runner.name} terminó con código {runner.exitcode}; deteniendo.")
+                    failed = True
+                    stop.set()
+        if failed:
+            raise CommandError("Un proceso del worker terminó inesperadamente.")
+
+    def _stop(self, *args):
+        self._stopping = True
@@ -0,0 +1,60 @@
+from collections import defaultdict
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core import warmup
+
+
+class Command(BaseCommand):
+    help = (
+        "Ejecuta el warm-up de arranque (módulos, URLs, serializers, DB, cachés de menú, salud) "
+        "y muestra el tiempo de cada paso. Con --profile-startup mide un arranque en frío: "
+        "tiempo de importación por módulo y de cada fase."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--profile-startup", action="store_true")
+        parser.add_argument("--top", type=int, default=25, help="Módulos a listar con --profile-startup.")
+
+    def handle(self, *args, **options):
+        if options["profile_startup"]:
+            self._profile(options["top"])
+            return
+
+        steps = warmup.run()
+        for name, result in steps.items():
+            line = f"{name:<12} {result['seconds'] * 1000:>9.1f} ms"
+            if "error" in result:
+                line += f"  ERROR {result['error']}"
+            self.stdout.write(line)
+        total = sum(result["seconds"] for result in steps.values())
+        failed = [name for name, result in steps.items() if "error" in result]
+        if failed:
+            self.stdout.write(self.style.WARNING(f"Warm-up en {total:.2f}s con fallos en: {', '.join(failed)}."))
+        else:
+            self.stdout.write(self.style.SUCCESS(f"Warm-up en {total:.2f}s."))
+
+    def _profile(self, top):
+        try:
+            profile = warmup.profile_startup()
+        except RuntimeError as exc:
+            raise CommandError(f"El arranque de prueba falló: {exc}") from exc
+
+        imports = profile["imports"]
+        self.stdout.write("Fases de arranque:")
+        for name, seconds in profile["phases"]:
+            self.stdout.write(f"  {name:<22} {seconds * 1000:>9.1f} ms")
+
+        # Por paquete raíz: suma del tiempo propio de sus módulos.
+        packages = defaultdict(int)
+        for name, self_us, _, _ in imports:
+            packages[name.split(".")[0]] += self_us
+        total_us = sum(packages.values())
+        self.stdout.write(f"\nImportaciones: {len(imports)} módulos, {total_us / 1000:.1f} ms")
+        self.stdout.write("Por paquete (tiempo propio):")
+        for package, self_us in sorted(packages.items(), key=lambda item: -item[1])[:top]:
+            self.stdout.write(f"  {package:<32} {self_us / 1000:>9.1f} ms")
+
+        self.stdout.write("Módulos más lentos (acumulado, incluye sus importaciones):")
+        for name, self_us, cumulative_us, _ in sorted(imports, key=lambda row: -row[2])[:top]:
+            self.stdout.write(f"  {name:<48} {cumulative_us / 1000:>9.1f} ms  (propio {self_us / 1000:.1f})")
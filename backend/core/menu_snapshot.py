@@ -0,0 +1,110 @@
+# core/menu_snapshot.py
+"""
+Snapshot del menú público de un restaurante (categorías activas con sus
+platos activos), servido por la vista async de core/async_views.py.
+
+Se guarda en caché ya serializado a JSON durante MENU_SNAPSHOT_TTL
+segundos: un acierto no deserializa ni toca la base de datos. Los
+cambios de MenuItem, MenuCategory y Restaurant lo invalidan al confirmar
+la transacción (core/signals.py); el TTL acota lo que no pasa por
+señales (bulk_create, update()).
+"""
+import logging
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+
+from . import async_cache, metrics, renderers
+from .models import MenuCategory, MenuItem, Restaurant
+
+logger = logging.getLogger(__name__)
+
+ITEM_FIELDS = (
+    "id",
+    "category_id",
+    "name",
+    "description",
+    "price_cop",
+    "image_url",
+    "is_combination",
+    "average_prep_minutes",
+)
+
+snapshot_requests = metrics.counter(
+    "menu_snapshot_requests_total",
+    "Lecturas del snapshot de menú por resultado (hit, miss, error).",
+    ("result",),
+)
+
+
+def cache_key(restaurant_id):
+    return f"menu:v1:{restaurant_id}"
+
+
+def invalidate(restaurant_id):
+    try:
+        cache.delete(cache_key(restaurant_id))
+    except Exception:
+        logger.warning("No se pudo invalidar el snapshot de menú", exc_info=True)
+
+
+async def abuild(restaurant_id):
+    """Dict del snapshot o None si el restaurante no existe o está inactivo."""
+    restaurant = await (
+        Restaurant.objects.filter(pk=restaurant_id, is_active=True).values("id", "name", "slug").afirst()
+    )
+    if restaurant is None:
+        return None
+
+    categories = {
+        row["id"]: {**row, "items": []}
+        async for row in MenuCategory.objects.filter(restaurant_id=restaurant_id, is_active=True)
+        .order_by("sort_order", "name")
+        .values("id", "name", "description", "sort_order")
+    }
+    uncategorized = []
+    async for item in (
+        MenuItem.objects.filter(restaurant_id=restaurant_id, is_active=True)
+        .order_by("name", "id")
+        .values(*ITEM_FIELDS)
+    ):
+        category_id = item.pop("category_id")
+        if category_id is None:
+            uncategorized.append(item)
+        elif category_id in categories:
+            categories[category_id]["items"].append(item)
+        # Platos de categorías inactivas: no se muestran.
+
+    return {
+        "restaurant": restaurant,
+        "categories": [c for c in categories.values() if c["items"]],
+        "uncategorized": uncategorized,
+        "generated_at": timezone.now(),
+    }
+
+
+async def aget_json(restaurant_id):
+    """Snapshot como bytes JSON (de la caché si está); None si no hay menú."""
+    key = cache_key(restaurant_id)
+    try:
+        cached = await async_cache.aget(key)
+    except Exception:  # Redis caído: servimos desde la base de datos.
+        logger.warning("Caché del menú no disponible", exc_info=True)
+        snapshot_requests.inc(result="error")
+        cached = None
+    else:
+        if cached is not None:
+            snapshot_requests.inc(result="hit")
+            return cached
+        snapshot_requests.inc(result="miss")
+
+    snapshot = await abuild(restaurant_id)
+    if snapshot is None:
+        return None
+    body = renderers.dumps(snapshot)
+    try:
+        await async_cache.aset(key, body, timeout=getattr(settings, "MENU_SNAPSHOT_TTL", 60))
+    except Exception:
+        logger.warning("No se pudo guardar el snapshot de menú", exc_info=True)
+    return body
@@ -0,0 +1,337 @@
+# core/metrics.py
+"""
+Registro mínimo de métricas en proceso (contadores, gauges e histogramas
+con labels) y exposición en formato de texto de Prometheus.
+
+Cada métrica se registra una sola vez por nombre; llamar de nuevo a
+`counter()` / `histogram()` con el mismo nombre devuelve la existente.
+
+Con varios workers (gunicorn) cada proceso vuelca su estado a
+METRICS_DIR/<pid>.json cada METRICS_FLUSH_INTERVAL segundos y `collect()`
+suma los ficheros de todos: contadores e histogramas de todos los
+procesos (también los ya terminados, para que no retrocedan) y gauges
+solo de los procesos vivos. Sin METRICS_DIR solo se ve el proceso actual.
+"""
+import atexit
+import glob
+import json
+import logging
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_lock = threading.Lock()
+_registry = {}
+
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name, help_text, labelnames=()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+
+    def _key(self, labels):
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with _lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def samples(self):
+        with _lock:
+            return [
+                {"labels": dict(zip(self.labelnames, key)), "value": value}
+                for key, value in self._values.items()
+            ]
+
+    def export(self):
+        with _lock:
+            samples = [[list(key), value] for key, value in self._values.items()]
+        return {"type": self.kind, "help": self.help, "labelnames": list(self.labelnames), "samples": samples}
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+    def set(self, value, **labels):
+        key = self._key(labels)
+        with _lock:
+            self._values[key] = value
+
+
+class Histogram(Counter):
+    kind = "histogram"
+
+    def __init__(self, name, help_text, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help_text, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with _lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = {"buckets": [0] * len(self.buckets), "count": 0, "sum": 0.0}
+            for i, upper in enumerate(self.buckets):
+                if value <= upper:
+                    state["buckets"][i] += 1
+            state["count"] += 1
+            state["sum"] += value
+
+    def samples(self):
+        with _lock:
+            return [
+                {
+                    "labels": dict(zip(self.labelnames, key)),
+                    "value": {
+                        "buckets": dict(zip(self.buckets, state["buckets"])),
+                        "count": state["count"],
+                        "sum": state["sum"],
+                    },
+                }
+                for key, state in self._values.items()
+            ]
+
+    def export(self):
+        with _lock:
+            samples = [
+                [list(key), {**state, "buckets": list(state["buckets"])}]
+                for key, state in self._values.items()
+            ]
+        return {
+            "type": self.kind,
+            "help": self.help,
+            "labelnames": list(self.labelnames),
+            "buckets": list(self.buckets),
+            "samples": samples,
+        }
+
+
+def _register(cls, name, *args, **kwargs):
+    with _lock:
+        metric = _registry.get(name)
+        if metric is None:
+            metric = _registry[name] = cls(name, *args, **kwargs)
+    return metric
+
+
+def counter(name, help_text, labelnames=()):
+    return _register(Counter, name, help_text, labelnames)
+
+
+def gauge(name, help_text, labelnames=()):
+    return _register(Gauge, name, help_text, labelnames)
+
+
+def histogram(name, help_text, labelnames=(), buckets=DEFAULT_BUCKETS):
+    return _register(Histogram, name, help_text, labelnames, buckets=buckets)
+
+
+def snapshot(prefix=""):
+    """Estado actual de las métricas cuyo nombre empieza por `prefix`."""
+    with _lock:
+        metrics = [m for name, m in sorted(_registry.items()) if name.startswith(prefix)]
+    return {
+        metric.name: {"type": metric.kind, "help": metric.help, "samples": metric.samples()}
+        for metric in metrics
+    }
+
+
+# --------- MULTIPROCESO --------- #
+
+def export_state():
+    with _lock:
+        metrics = list(_registry.values())
+    return {metric.name: metric.export() for metric in metrics}
+
+
+def _metrics_dir():
+    return getattr(settings, "METRICS_DIR", "")
+
+
+def write_process_file():
+    """Vuelca el estado de este proceso a METRICS_DIR/<pid>.json (escritura atómica)."""
+    directory = _metrics_dir()
+    if not directory:
+        return
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f"{os.getpid()}.json")
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as fh:
+        json.dump(export_state(), fh, separators=(",", ":"))
+    os.replace(tmp_path, path)
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _process_states():
+    directory = _metrics_dir()
+    if not directory:
+        return [(os.getpid(), export_state())]
+
+    write_process_file()
+    states = []
+    for path in glob.glob(os.path.join(directory, "*.json")):
+        try:
+            pid = int(os.path.basename(path)[:-5])
+            with open(path, encoding="utf-8") as fh:
+                states.append((pid, json.load(fh)))
+        except (ValueError, OSError):
+            logger.warning("Fichero de métricas ilegible: %s", path, exc_info=True)
+    return states
+
+
+def _add(kind, current, value):
+    if current is None:
+        return value if kind != "histogram" else {**value, "buckets": list(value["buckets"])}
+    if kind != "histogram":
+        return current + value
+    current["buckets"] = [a + b for a, b in zip(current["buckets"], value["buckets"])]
+    current["count"] += value["count"]
+    current["sum"] += value["sum"]
+    return current
+
+
+def collect():
+    """Estado agregado de todos los procesos: {nombre: métrica con samples sumados}."""
+    merged = {}
+    for pid, state in _process_states():
+        alive = None
+        for name, metric in state.items():
+            if metric["type"] == "gauge":
+                if alive is None:
+                    alive = pid == os.getpid() or _pid_alive(pid)
+                if not alive:
+                    continue
+            target = merged.setdefault(name, {**metric, "samples": {}})
+            for labels, value in metric["samples"]:
+                key = tuple(labels)
+                target["samples"][key] = _add(metric["type"], target["samples"].get(key), value)
+    return merged
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names, values, extra=()):
+    pairs = [f'{n}="{_escape(v)}"' for n, v in (*zip(names, values), *extra)]
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def render_prometheus(merged=None):
+    """Texto en formato de exposición de Prometheus (versión 0.0.4)."""
+    merged = collect() if merged is None else merged
+    lines = []
+    for name in sorted(merged):
+        metric = merged[name]
+        lines.append(f"# HELP {name} {metric['help']}")
+        lines.append(f"# TYPE {name} {metric['type']}")
+        names = metric["labelnames"]
+        for values, value in sorted(metric["samples"].items()):
+            if metric["type"] != "histogram":
+                lines.append(f"{name}{_labels(names, values)} {_number(value)}")
+                continue
+            for upper, count in zip(metric["buckets"], value["buckets"]):
+                lines.append(f"{name}_bucket{_labels(names, values, [('le', _number(float(upper)))])} {count}")
+            lines.append(f"{name}_bucket{_labels(names, values, [('le', '+Inf')])} {value['count']}")
+            lines.append(f"{name}_sum{_labels(names, values)} {_number(float(value['sum']))}")
+            lines.append(f"{name}_count{_labels(names, values)} {value['count']}")
+    return "\n".join(lines) + "\n"
+
+
+class _FileWriter(threading.Thread):
+    def __init__(self, interval):
+        super().__init__(name="metrics-writer", daemon=True)
+        self.interval = interval
+
+    def run(self):
+        while True:
+            time.sleep(self.interval)
+            try:
+                write_process_file()
+            except OSError:
+                logger.warning("No se pudieron volcar las métricas", exc_info=True)
+
+
+_writer = None
+
+
+def ensure_writer():
+    """Arranca (una vez por proceso) el volcado periódico a METRICS_DIR."""
+    global _writer
+    if _writer is not None or not _metrics_dir():
+        return
+    with _lock:
+        if _writer is None:
+            _writer = _FileWriter(getattr(settings, "METRICS_FLUSH_INTERVAL", 5))
+            _writer.start()
+            atexit.register(write_process_file)
+
+
+# --------- SERVIDOR PARA WORKERS --------- #
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        path = self.path.split("?", 1)[0]
+        if path == "/healthz":
+            body, content_type = b"ok", "text/plain"
+        elif path == "/metrics":
+            token = getattr(settings, "METRICS_TOKEN", "")
+            if token and self.headers.get("Authorization") != f"Bearer {token}":
+                self.send_response(401)
+                self.end_headers()
+                return
+            body, content_type = render_prometheus().encode(), CONTENT_TYPE
+        else:
+            self.send_response(404)
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def serve(port, host="0.0.0.0"):
+    """
+    /metrics (y /healthz) en un hilo, para procesos sin Django HTTP como
+    `run_jobs`: agrega METRICS_DIR igual que la vista /metrics del backend.
+    """
+    server = ThreadingHTTPServer((host, port), _MetricsHandler)
+    threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+    return server
@@ -0,0 +1,266 @@
+# core/microbench.py
+"""
+Microbenchmarks de la capa de modelos (Order.save, OrderItem.save,
+señales de Order, Coupon.is_usable).
+
+Cada benchmark se mide aislado, dentro de una transacción que se revierte:
+- tiempo: mejor mediana por operación de ROUNDS rondas, también en
+  "unidades" relativas a una carga de calibración en Python puro medida en
+  la misma ejecución, para que la línea base sirva en máquinas de
+  distinta velocidad;
+- consultas SQL por operación (exactas, no dependen de la máquina);
+- memoria asignada por operación (pico de tracemalloc, KiB).
+
+Las líneas base se guardan por motor en BASELINE_PATH (ver el comando
+`microbench --update-baseline`) y `compare` lista las regresiones que
+superan los umbrales.
+"""
+import itertools
+import json
+import statistics
+import time
+import tracemalloc
+from dataclasses import asdict, dataclass
+from pathlib import Path
+
+from django.db import connection, transaction
+from django.db.models.signals import post_save, pre_save
+
+from .models import Coupon, Customer, MenuItem, Order, OrderItem, Restaurant
+from .testing import capture_queries
+
+BASELINE_PATH = Path(__file__).resolve().parent / "microbench_baseline.json"
+
+TIME_THRESHOLD = 0.4  # +40 % en unidades de calibración (el ruido ronda ±15 %)
+QUERY_THRESHOLD = 0  # ninguna consulta extra por operación
+ALLOC_THRESHOLD = 0.5  # +50 % de memoria asignada
+
+QUERY_ITERATIONS = 6  # par: varios benchmarks alternan dos estados
+ALLOC_ITERATIONS = 30
+WARMUP = 5
+ROUNDS = 5
+
+
+@dataclass
+class Result:
+    name: str
+    iterations: int
+    time_us: float
+    units: float
+    queries: float
+    alloc_kib: float
+
+
+@dataclass
+class Fixtures:
+    restaurant: Restaurant
+    customer: Customer
+    coupon: Coupon
+    order: Order
+    menu_items: list
+
+
+BENCHMARKS = {}
+
+
+def microbenchmark(name, iterations=200):
+    """Registra `setup(fixtures, ops) -> op`; `ops` es el total de llamadas que recibirá op."""
+    def register(setup):
+        BENCHMARKS[name] = (setup, iterations)
+        return setup
+    return register
+
+
+# --------- BENCHMARKS --------- #
+
+@microbenchmark("order_create")
+def _order_create(fx, ops):
+    """Alta de pedido: número de pedido, cálculo de total y señales de creación."""
+    def op():
+        Order.objects.create(restaurant=fx.restaurant, customer=fx.customer, subtotal_cop=25000)
+    return op
+
+
+@microbenchmark("order_create_with_coupon")
+def _order_create_with_coupon(fx, ops):
+    def op():
+        Order.objects.create(
+            restaurant=fx.restaurant, customer=fx.customer, coupon=fx.coupon, subtotal_cop=25000
+        )
+    return op
+
+
+@microbenchmark("order_status_change")
+def _order_status_change(fx, ops):
+    """Order.save con cambio de estado: pre_save lee el anterior, rollups y top-k aplican deltas."""
+    statuses = itertools.cycle([Order.STATUS_COMPLETED, Order.STATUS_IN_PROGRESS])
+
+    def op():
+        fx.order.status = next(statuses)
+        fx.order.save()
+    return op
+
+
+@microbenchmark("order_signals")
+def _order_signals(fx, ops):
+    """Solo los receivers de pre_save/post_save de Order, sin el UPDATE del pedido."""
+    statuses = itertools.cycle([Order.STATUS_COMPLETED, Order.STATUS_IN_PROGRESS])
+    order = fx.order
+
+    def op():
+        order.status = next(statuses)
+        pre_save.send(sender=Order, instance=order, raw=False, using=connection.alias, update_fields=None)
+        post_save.send(
+            sender=Order, instance=order, created=False, raw=False, using=connection.alias, update_fields=None
+        )
+    return op
+
+
+@microbenchmark("order_item_save")
+def _order_item_save(fx, ops):
+    """OrderItem.save: INSERT, agregado del subtotal y re-guardado del pedido."""
+    items = iter(_menu_items(fx, ops))
+
+    def op():
+        OrderItem.objects.create(order=fx.order, menu_item=next(items), quantity=2)
+    return op
+
+
+@microbenchmark("coupon_is_usable", iterations=20000)
+def _coupon_is_usable(fx, ops):
+    coupon = fx.coupon
+
+    def op():
+        return coupon.is_usable
+    return op
+
+
+def _menu_items(fx, count):
+    missing = count - len(fx.menu_items)
+    if missing > 0:
+        start = len(fx.menu_items)
+        fx.menu_items += MenuItem.objects.bulk_create(
+            MenuItem(restaurant=fx.restaurant, name=f"Micro {start + i}", price_cop=9000)
+            for i in range(missing)
+        )
+    return fx.menu_items[:count]
+
+
+def _fixtures():
+    restaurant = Restaurant.objects.create(name="Microbench", slug=f"microbench-{time.time_ns()}")
+    customer = Customer.objects.create(name="Microbench", phone=f"m{time.time_ns()}"[:30])
+    coupon = Coupon.objects.create(
+        restaurant=restaurant, code=f"MB{time.time_ns()}"[:50], discount_type=Coupon.PERCENT, percent_off=10
+    )
+    order = Order.objects.create(restaurant=restaurant, customer=customer, subtotal_cop=30000)
+    return Fixtures(restaurant, customer, coupon, order, [])
+
+
+# --------- MEDICIÓN --------- #
+
+def calibrate(repeats=7):
+    """Microsegundos de una carga fija en Python puro (mínimo de `repeats`)."""
+    def workload():
+        data = {i: str(i) for i in range(20000)}
+        return sorted(data.values(), key=len)
+
+    samples = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        workload()
+        samples.append(time.perf_counter() - started)
+    return min(samples) * 1e6
+
+
+def _measure(name, setup, iterations, calibration_us):
+    fx = _fixtures()
+    op = setup(fx, WARMUP + max(iterations // ROUNDS, 1) * ROUNDS + QUERY_ITERATIONS + ALLOC_ITERATIONS)
+    for _ in range(WARMUP):
+        op()
+
+    # Mejor mediana de ROUNDS rondas: descarta rondas con ruido de la máquina.
+    medians = []
+    per_round = max(iterations // ROUNDS, 1)
+    for _ in range(ROUNDS):
+        samples = []
+        for _ in range(per_round):
+            started = time.perf_counter_ns()
+            op()
+            samples.append(time.perf_counter_ns() - started)
+        medians.append(statistics.median(samples))
+    time_us = min(medians) / 1000
+
+    with capture_queries() as log:
+        for _ in range(QUERY_ITERATIONS):
+            op()
+
+    allocations = []
+    tracemalloc.start()
+    try:
+        for _ in range(ALLOC_ITERATIONS):
+            tracemalloc.reset_peak()
+            before = tracemalloc.get_traced_memory()[0]
+            op()
+            allocations.append(tracemalloc.get_traced_memory()[1] - before)
+    finally:
+        tracemalloc.stop()
+
+    return Result(
+        name=name,
+        iterations=iterations,
+        time_us=round(time_us, 2),
+        units=round(time_us / calibration_us, 7),
+        queries=len(log) / QUERY_ITERATIONS,
+        alloc_kib=round(statistics.median(allocations) / 1024, 2),
+    )
+
+
+def run(names=None, scale=1.0):
+    """Ejecuta los benchmarks (todos o `names`); no deja datos en la base de datos."""
+    calibration_us = calibrate()
+    results = []
+    for name, (setup, iterations) in BENCHMARKS.items():
+        if names and name not in names:
+            continue
+        with transaction.atomic():
+            results.append(_measure(name, setup, max(int(iterations * scale), 1), calibration_us))
+            transaction.set_rollback(True)
+    return calibration_us, results
+
+
+# --------- LÍNEAS BASE --------- #
+
+def load_baseline(path=BASELINE_PATH):
+    try:
+        with open(path) as fh:
+            return json.load(fh)
+    except FileNotFoundError:
+        return {}
+
+
+def save_baseline(calibration_us, results, path=BASELINE_PATH, vendor=None):
+    data = load_baseline(path)
+    data[vendor or connection.vendor] = {
+        "calibration_us": round(calibration_us, 2),
+        "results": {r.name: {k: v for k, v in asdict(r).items() if k != "name"} for r in results},
+    }
+    with open(path, "w") as fh:
+        json.dump(data, fh, indent=2, sort_keys=True)
+        fh.write("\n")
+
+
+def compare(results, baseline, time_threshold=TIME_THRESHOLD, query_threshold=QUERY_THRESHOLD,
+            alloc_threshold=ALLOC_THRESHOLD):
+    """Regresiones frente a la línea base del motor: [(benchmark, métrica, antes, ahora)]."""
+    regressions = []
+    for result in results:
+        before = baseline.get("results", {}).get(result.name)
+        if before is None:
+            continue
+        if result.queries > before["queries"] + query_threshold:
+            regressions.append((result.name, "queries", before["queries"], result.queries))
+        if result.units > before["units"] * (1 + time_threshold):
+            regressions.append((result.name, "units", before["units"], result.units))
+        if result.alloc_kib > max(before["alloc_kib"], 1) * (1 + alloc_threshold):
+            regressions.append((result.name, "alloc_kib", before["alloc_kib"], result.alloc_kib))
+    return regressions
@@ -0,0 +1,57 @@
+# Generated by Django 6.0 on 2026-03-01 00:00
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncHour
+from django.utils import timezone
+
+
+def backfill_sales_rollups(apps, schema_editor):
+    Order = apps.get_model("core", "Order")
+    SalesRollup = apps.get_model("core", "SalesRollup")
+
+    rows = (
+        Order.objects.filter(status="COMPLETED")
+        .annotate(hour=TruncHour("created_at", tzinfo=timezone.get_default_timezone()))
+        .values("restaurant_id", "hour")
+        .annotate(orders_count=Count("id"), revenue_cop=Sum("total_cop"))
+        .order_by()
+    )
+    SalesRollup.objects.bulk_create(
+        [
+            SalesRollup(
+                restaurant_id=row["restaurant_id"],
+                bucket=row["hour"],
+                orders_count=row["orders_count"],
+                revenue_cop=row["revenue_cop"] or 0,
+            )
+            for row in rows.iterator()
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0002_usersessiontoken"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="SalesRollup",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("bucket", models.DateTimeField(help_text="Inicio de la hora local del bucket.")),
+                ("orders_count", models.IntegerField(default=0)),
+                ("revenue_cop", models.BigIntegerField(default=0)),
+                ("restaurant", models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name="sales_rollups", to="core.restaurant")),
+            ],
+            options={
+                "indexes": [models.Index(fields=["bucket"], name="core_salesr_bucket_932dca_idx")],
+                "unique_together": {("restaurant", "bucket")},
+            },
+        ),
+        migrations.RunPython(backfill_sales_rollups, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,80 @@
+# Generated by Django 6.0 on 2026-03-01 00:00
+
+import datetime
+from collections import defaultdict
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+
+def backfill_sales_counters(apps, schema_editor):
+    OrderItem = apps.get_model("core", "OrderItem")
+    MenuItemSalesCounter = apps.get_model("core", "MenuItemSalesCounter")
+
+    daily = (
+        OrderItem.objects.filter(order__status="COMPLETED")
+        .annotate(day=TruncDate("order__created_at", tzinfo=timezone.get_default_timezone()))
+        .values("order__restaurant_id", "menu_item_id", "menu_item__category_id", "day")
+        .annotate(quantity=Sum("quantity"), revenue=Sum("line_total_cop"))
+        .order_by()
+    )
+
+    totals = defaultdict(lambda: [0, 0])
+    for row in daily.iterator():
+        day = row["day"]
+        periods = (
+            ("day", day),
+            ("week", day - datetime.timedelta(days=day.weekday())),
+            ("all", datetime.date(1970, 1, 1)),
+        )
+        for period, start in periods:
+            key = (row["order__restaurant_id"], row["menu_item_id"], row["menu_item__category_id"], period, start)
+            totals[key][0] += row["quantity"] or 0
+            totals[key][1] += row["revenue"] or 0
+
+    MenuItemSalesCounter.objects.bulk_create(
+        [
+            MenuItemSalesCounter(
+                restaurant_id=restaurant,
+                menu_item_id=menu_item,
+                category_id=category,
+                period=period,
+                period_start=start,
+                quantity=quantity,
+                revenue_cop=revenue,
+            )
+            for (restaurant, menu_item, category, period, start), (quantity, revenue) in totals.items()
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0003_salesrollup"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="MenuItemSalesCounter",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("period", models.CharField(choices=[("day", "Día"), ("week", "Semana"), ("all", "Total")], max_length=5)),
+                ("period_start", models.DateField()),
+                ("quantity", models.IntegerField(default=0)),
+                ("revenue_cop", models.BigIntegerField(default=0)),
+                ("category", models.ForeignKey(blank=True, help_text="Copia de menu_item.category para el desglose por categoría.", null=True, on_delete=django.db.models.deletion.SET_NULL, related_name="sales_counters", to="core.menucategory")),
+                ("menu_item", models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name="sales_counters", to="core.menuitem")),
+                ("restaurant", models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name="sales_counters", to="core.restaurant")),
+            ],
+            options={
+                "indexes": [models.Index(fields=["period", "period_start", "-quantity"], name="core_menuit_period_678d69_idx"), models.Index(fields=["restaurant", "period", "period_start", "-quantity"], name="core_menuit_restaur_4c27cc_idx"), models.Index(fields=["restaurant", "category", "period", "period_start", "-quantity"], name="core_menuit_restaur_448d1a_idx")],
+                "unique_together": {("menu_item", "period", "period_start")},
+            },
+        ),
+        migrations.RunPython(backfill_sales_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,133 @@
+# Generated by Django 6.0 on 2026-03-01 00:00
+
+from datetime import date, datetime, time
+
+from django.db import migrations
+from django.utils import timezone
+
+# Particiones creadas por adelantado al migrar (luego las mantiene
+# `manage.py manage_event_partitions`).
+MONTHS_AHEAD = 3
+
+CREATE_PARTITIONED = [
+    "ALTER TABLE core_event RENAME TO core_event_unpartitioned",
+    "ALTER TABLE core_event_unpartitioned RENAME CONSTRAINT core_event_pkey TO core_event_unpartitioned_pkey",
+    "ALTER INDEX core_event_name_6925d2_idx RENAME TO core_event_unpartitioned_name_idx",
+    "ALTER INDEX core_event_at_bc6e5f_idx RENAME TO core_event_unpartitioned_at_idx",
+    "CREATE SEQUENCE core_event_part_id_seq",
+    """
+    CREATE TABLE core_event (
+        id bigint NOT NULL DEFAULT nextval('core_event_part_id_seq'),
+        created_at timestamp with time zone NOT NULL,
+        updated_at timestamp with time zone NOT NULL,
+        name varchar(100) NOT NULL,
+        meta jsonb NULL,
+        at timestamp with time zone NOT NULL,
+        customer_id bigint NULL,
+        order_id bigint NULL,
+        CONSTRAINT core_event_pkey PRIMARY KEY (id, at)
+    ) PARTITION BY RANGE (at)
+    """,
+    "CREATE INDEX core_event_name_6925d2_idx ON core_event (name)",
+    "CREATE INDEX core_event_at_bc6e5f_idx ON core_event (at)",
+    "CREATE INDEX core_event_customer_id_part_idx ON core_event (customer_id)",
+    "CREATE INDEX core_event_order_id_part_idx ON core_event (order_id)",
+    """
+    ALTER TABLE core_event ADD CONSTRAINT core_event_customer_id_part_fk
+    FOREIGN KEY (customer_id) REFERENCES core_customer (id) DEFERRABLE INITIALLY DEFERRED
+    """,
+    """
+    ALTER TABLE core_event ADD CONSTRAINT core_event_order_id_part_fk
+    FOREIGN KEY (order_id) REFERENCES core_order (id) DEFERRABLE INITIALLY DEFERRED
+    """,
+    "CREATE TABLE core_event_default PARTITION OF core_event DEFAULT",
+]
+
+COPY_AND_SWAP = [
+    """
+    INSERT INTO core_event (id, created_at, updated_at, name, meta, at, customer_id, order_id)
+    SELECT id, created_at, updated_at, name, meta, at, customer_id, order_id
+    FROM core_event_unpartitioned
+    """,
+    "SELECT setval('core_event_part_id_seq', COALESCE((SELECT MAX(id) FROM core_event), 0) + 1, false)",
+    "DROP TABLE core_event_unpartitioned",
+    "ALTER SEQUENCE core_event_part_id_seq RENAME TO core_event_id_seq",
+    "ALTER SEQUENCE core_event_id_seq OWNED BY core_event.id",
+]
+
+
+def _add_months(month, count):
+    index = month.year * 12 + month.month - 1 + count
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def _bound(month):
+    start = timezone.make_aware(datetime.combine(month, time.min), timezone.get_default_timezone())
+    return f"'{start.isoformat()}'"
+
+
+def partition_events(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute("SELECT MIN(at) FROM core_event")
+        oldest = cursor.fetchone()[0]
+
+        for statement in CREATE_PARTITIONED:
+            cursor.execute(statement)
+
+        today = timezone.localdate()
+        first = timezone.localtime(oldest).date() if oldest else today
+        month = date(first.year, first.month, 1)
+        last = _add_months(date(today.year, today.month, 1), MONTHS_AHEAD)
+        while month <= last:
+            cursor.execute(
+                f"CREATE TABLE core_event_p{month:%Y%m} PARTITION OF core_event "
+                f"FOR VALUES FROM ({_bound(month)}) TO ({_bound(_add_months(month, 1))})"
+            )
+            month = _add_months(month, 1)
+
+        for statement in COPY_AND_SWAP:
+            cursor.execute(statement)
+
+
+def unpartition_events(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+
+    statements = [
+        "ALTER SEQUENCE core_event_id_seq OWNED BY NONE",
+        "CREATE TABLE core_event_plain (LIKE core_event INCLUDING DEFAULTS)",
+        "INSERT INTO core_event_plain SELECT * FROM core_event",
+        "DROP TABLE core_event CASCADE",
+        "ALTER TABLE core_event_plain RENAME TO core_event",
+        "ALTER TABLE core_event ADD CONSTRAINT core_event_pkey PRIMARY KEY (id)",
+        "ALTER SEQUENCE core_event_id_seq OWNED BY core_event.id",
+        "CREATE INDEX core_event_name_6925d2_idx ON core_event (name)",
+        "CREATE INDEX core_event_at_bc6e5f_idx ON core_event (at)",
+        "CREATE INDEX core_event_customer_id_part_idx ON core_event (customer_id)",
+        "CREATE INDEX core_event_order_id_part_idx ON core_event (order_id)",
+        """
+        ALTER TABLE core_event ADD CONSTRAINT core_event_customer_id_part_fk
+        FOREIGN KEY (customer_id) REFERENCES core_customer (id) DEFERRABLE INITIALLY DEFERRED
+        """,
+        """
+        ALTER TABLE core_event ADD CONSTRAINT core_event_order_id_part_fk
+        FOREIGN KEY (order_id) REFERENCES core_order (id) DEFERRABLE INITIALLY DEFERRED
+        """,
+    ]
+    with schema_editor.connection.cursor() as cursor:
+        for statement in statements:
+            cursor.execute(statement)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0004_menuitemsalescounter"),
+    ]
+
+    operations = [
+        migrations.RunPython(partition_events, unpartition_events),
+    ]
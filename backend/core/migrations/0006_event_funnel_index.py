@@ -0,0 +1,17 @@
+# Generated by Django 6.0 on 2026-03-01 00:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0005_partition_event"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="event",
+            index=models.Index(fields=["name", "at", "customer"], name="core_event_name_1984f8_idx"),
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 6.0 on 2026-03-01 00:00
+
+import django.core.serializers.json
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0006_event_funnel_index"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ArchivedOrder",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("order_id", models.BigIntegerField(help_text="id original en core_order.", unique=True)),
+                ("order_number", models.CharField(max_length=20, unique=True)),
+                ("customer_id", models.BigIntegerField(blank=True, db_index=True, null=True)),
+                ("status", models.CharField(choices=[("PENDING", "Pendiente"), ("IN_PROGRESS", "En preparación"), ("READY", "Listo"), ("COMPLETED", "Completado"), ("CANCELLED", "Cancelado")], max_length=20)),
+                ("total_cop", models.PositiveIntegerField(default=0)),
+                ("created_at", models.DateTimeField(help_text="Fecha de creación del pedido original.")),
+                ("archived_at", models.DateTimeField(default=django.utils.timezone.now)),
+                ("payload", models.JSONField(encoder=django.core.serializers.json.DjangoJSONEncoder)),
+                ("restaurant", models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name="archived_orders", to="core.restaurant")),
+            ],
+            options={
+                "ordering": ["-created_at"],
+                "indexes": [models.Index(fields=["restaurant", "status"], name="core_archiv_restaur_1067a9_idx"), models.Index(fields=["created_at"], name="core_archiv_created_f6f9c3_idx")],
+            },
+        ),
+    ]
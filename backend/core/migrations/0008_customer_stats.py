@@ -0,0 +1,85 @@
+# Generated by Django 6.0 on 2026-03-01 00:00
+
+from django.db import migrations, models
+from django.db.models import Count, Max, Q, Sum
+
+
+def backfill_customer_stats(apps, schema_editor):
+    Customer = apps.get_model("core", "Customer")
+    Order = apps.get_model("core", "Order")
+    ArchivedOrder = apps.get_model("core", "ArchivedOrder")
+
+    totals = {}
+    for model in (Order, ArchivedOrder):
+        completed = Q(status="COMPLETED")
+        rows = (
+            model.objects.filter(customer_id__isnull=False)
+            .values("customer_id")
+            .annotate(
+                orders_count=Count("id", filter=completed),
+                lifetime_value_cop=Sum("total_cop", filter=completed),
+                last_order_at=Max("created_at"),
+            )
+            .order_by()
+        )
+        for row in rows.iterator():
+            count, value, last = totals.get(row["customer_id"], (0, 0, None))
+            if last is None or row["last_order_at"] > last:
+                last = row["last_order_at"]
+            totals[row["customer_id"]] = (
+                count + row["orders_count"],
+                value + (row["lifetime_value_cop"] or 0),
+                last,
+            )
+
+    Customer.objects.bulk_update(
+        [
+            Customer(pk=pk, orders_count=count, lifetime_value_cop=value, last_order_at=last)
+            for pk, (count, value, last) in totals.items()
+        ],
+        ["orders_count", "lifetime_value_cop", "last_order_at"],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0007_archivedorder"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="customer",
+            name="orders_count",
+            field=models.IntegerField(default=0, help_text="Pedidos COMPLETED."),
+        ),
+        migrations.AddField(
+            model_name="customer",
+            name="lifetime_value_cop",
+            field=models.BigIntegerField(default=0, help_text="Total de pedidos COMPLETED."),
+        ),
+        migrations.AddField(
+            model_name="customer",
+            name="last_order_at",
+            field=models.DateTimeField(blank=True, help_text="Fecha del último pedido.", null=True),
+        ),
+        migrations.AddIndex(
+            model_name="customer",
+            index=models.Index(fields=["lifetime_value_cop"], name="core_custom_lifetim_8e30c0_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="customer",
+            index=models.Index(fields=["last_order_at"], name="core_custom_last_or_ef4188_idx"),
+        ),
+        # El índice compuesto cubre también las búsquedas por cliente del índice simple.
+        migrations.AddIndex(
+            model_name="order",
+            index=models.Index(fields=["customer", "-created_at", "-id"], name="order_customer_recent_idx"),
+        ),
+        migrations.RemoveIndex(
+            model_name="order",
+            name="core_order_custome_bed536_idx",
+        ),
+        migrations.RunPython(backfill_customer_stats, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 6.0 on 2026-03-01 00:00
+
+from django.db import migrations, models
+
+from core.phones import normalize
+
+BATCH_SIZE = 2000
+
+
+def backfill_phone_e164(apps, schema_editor):
+    # Antes de crear el índice: los UPDATE en lote no lo mantienen.
+    Customer = apps.get_model("core", "Customer")
+    last_pk = 0
+    while True:
+        batch = list(Customer.objects.filter(pk__gt=last_pk).order_by("pk").only("pk", "phone")[:BATCH_SIZE])
+        if not batch:
+            return
+        last_pk = batch[-1].pk
+        for customer in batch:
+            customer.phone_e164 = normalize(customer.phone)
+        Customer.objects.bulk_update(batch, ["phone_e164"], batch_size=BATCH_SIZE)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0008_customer_stats"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="customer",
+            name="phone_e164",
+            field=models.CharField(blank=True, editable=False, help_text="Teléfono normalizado a E.164 (core/phones.py); vacío si no es válido.", max_length=16),
+        ),
+        migrations.RunPython(backfill_phone_e164, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name="customer",
+            index=models.Index(fields=["phone_e164"], name="customer_phone_e164_idx", opclasses=["varchar_pattern_ops"]),
+        ),
+    ]
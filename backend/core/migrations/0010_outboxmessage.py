@@ -0,0 +1,32 @@
+# Generated by Django 6.0 on 2026-03-01 00:00
+
+import django.core.serializers.json
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0009_customer_phone_e164"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="OutboxMessage",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("topic", models.CharField(max_length=100)),
+                ("payload", models.JSONField(encoder=django.core.serializers.json.DjangoJSONEncoder)),
+                ("status", models.CharField(choices=[("PENDING", "Pendiente"), ("SENT", "Enviado"), ("DEAD", "Descartado")], default="PENDING", max_length=10)),
+                ("attempts", models.PositiveIntegerField(default=0)),
+                ("last_error", models.TextField(blank=True)),
+                ("created_at", models.DateTimeField(default=django.utils.timezone.now)),
+                ("available_at", models.DateTimeField(default=django.utils.timezone.now, help_text="No se entrega antes (backoff).")),
+                ("sent_at", models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                "indexes": [models.Index(condition=models.Q(("status", "PENDING")), fields=["available_at", "id"], name="outbox_pending_idx"), models.Index(fields=["status", "created_at"], name="core_outbox_status_8adaba_idx")],
+            },
+        ),
+    ]
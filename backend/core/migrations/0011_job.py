@@ -0,0 +1,39 @@
+# Generated by Django 6.0 on 2026-03-01 00:00
+
+import django.core.serializers.json
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0010_outboxmessage"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="Job",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("name", models.CharField(max_length=100)),
+                ("kwargs", models.JSONField(blank=True, default=dict, encoder=django.core.serializers.json.DjangoJSONEncoder)),
+                ("key", models.CharField(blank=True, max_length=200)),
+                ("status", models.CharField(choices=[("QUEUED", "En cola"), ("RUNNING", "En ejecución"), ("DONE", "Terminado"), ("FAILED", "Fallido")], default="QUEUED", max_length=10)),
+                ("attempts", models.PositiveIntegerField(default=0)),
+                ("max_attempts", models.PositiveIntegerField(default=3)),
+                ("created_at", models.DateTimeField(default=django.utils.timezone.now)),
+                ("run_at", models.DateTimeField(default=django.utils.timezone.now)),
+                ("started_at", models.DateTimeField(blank=True, null=True)),
+                ("expires_at", models.DateTimeField(blank=True, null=True)),
+                ("finished_at", models.DateTimeField(blank=True, null=True)),
+                ("worker", models.CharField(blank=True, max_length=100)),
+                ("last_error", models.TextField(blank=True)),
+                ("result", models.JSONField(blank=True, encoder=django.core.serializers.json.DjangoJSONEncoder, null=True)),
+            ],
+            options={
+                "indexes": [models.Index(condition=models.Q(("status", "QUEUED")), fields=["run_at", "id"], name="job_queued_idx"), models.Index(condition=models.Q(("status", "RUNNING")), fields=["expires_at"], name="job_running_idx"), models.Index(fields=["status", "finished_at"], name="core_job_status_06586a_idx")],
+                "constraints": [models.UniqueConstraint(condition=models.Q(("key", ""), _negated=True), fields=("key",), name="job_unique_key")],
+            },
+        ),
+    ]
@@ -1,10 +1,14 @@
 # core/models.py
 import uuid
 import secrets
-from django.db import models
+import datetime
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import models, transaction
 from django.utils import timezone
 from django.conf import settings
 
+from .phones import normalize as normalize_phone
+
 
 # ----------------------------------------------------------------------
 # 1. Base de tiempo (created_at / updated_at)
@@ -94,15 +98,39 @@ class Customer(TimeStampedModel):
     )
     name = models.CharField(max_length=150, blank=True)
     phone = models.CharField(max_length=30, unique=True)
+    phone_e164 = models.CharField(
+        max_length=16,
+        blank=True,
+        editable=False,
+        help_text="Teléfono normalizado a E.164 (core/phones.py); vacío si no es válido.",
+    )
     email = models.EmailField(blank=True)
     is_active = models.BooleanField(default=True)
+    # Desnormalizados, los mantiene core/customer_stats.py.
+    orders_count = models.IntegerField(default=0, help_text="Pedidos COMPLETED.")
+    lifetime_value_cop = models.BigIntegerField(default=0, help_text="Total de pedidos COMPLETED.")
+    last_order_at = models.DateTimeField(null=True, blank=True, help_text="Fecha del último pedido.")
 
     class Meta:
-        indexes = [models.Index(fields=["phone"])]
+        indexes = [
+            models.Index(fields=["phone"]),
+            # Igualdad y prefijo (LIKE 'x%') en Postgres; opclasses se ignora en SQLite.
+            models.Index(fields=["phone_e164"], name="customer_phone_e164_idx", opclasses=["varchar_pattern_ops"]),
+            # Orden del CRM (CustomerViewSet, ?ordering=).
+            models.Index(fields=["lifetime_value_cop"]),
+            models.Index(fields=["last_order_at"]),
+        ]
 
     def __str__(self):
         return self.name or self.phone
 
+    def save(self, *args, **kwargs):
+        self.phone_e164 = normalize_phone(self.phone)
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and "phone" in update_fields:
+            kwargs["update_fields"] = {*update_fields, "phone_e164"}
+        super().save(*args, **kwargs)
+
 
 # ----------------------------------------------------------------------
 # 4b. Session token per device
@@ -506,7 +534,8 @@ class Order(TimeStampedModel):
             models.Index(fields=["status"]),
             models.Index(fields=["created_at"]),
             models.Index(fields=["restaurant"]),
-            models.Index(fields=["customer"]),
+            # Historial del cliente (/api/me/orders/): rango keyset por cliente.
+            models.Index(fields=["customer", "-created_at", "-id"], name="order_customer_recent_idx"),
             models.Index(fields=["delivery_address"]),
         ]
 
@@ -544,7 +573,11 @@ class Order(TimeStampedModel):
         if self.status == self.STATUS_PENDING and not self.pending_at:
             self.pending_at = timezone.now()
 
-        super().save(*args, **kwargs)
+        # save_base no es atómico: los receivers de post_save (outbox,
+        # rollups, stats del cliente) deben confirmar junto con el UPDATE.
+        # Sin savepoint: dentro de otra transacción no añade consultas.
+        with transaction.atomic(savepoint=False):
+            super().save(*args, **kwargs)
 
 # ----------------------------------------------------------------------
 # 14. Línea de pedido
@@ -580,22 +613,41 @@ class OrderItem(TimeStampedModel):
         # 2) Calcular total de la línea
         self.line_total_cop = self.unit_price_cop * self.quantity
 
-        # 3) Guardar la línea
-        super().save(*args, **kwargs)
+        # 3) Guardar la línea y 4) recalcular subtotal y total de la orden,
+        # en una sola transacción.
+        with transaction.atomic(savepoint=False):
+            super().save(*args, **kwargs)
 
-        # 4) Recalcular subtotal y total de la orden
-        agg = self.order.items.aggregate(
-            total=models.Sum("line_total_cop")
-        )
-        self.order.subtotal_cop = agg["total"] or 0
-        # al guardar la orden, se recalcula discount/total en Order.save
-        self.order.save(update_fields=["subtotal_cop", "discount_cop", "delivery_fee_cop", "total_cop"])
+            agg = self.order.items.aggregate(
+                total=models.Sum("line_total_cop")
+            )
+            self.order.subtotal_cop = agg["total"] or 0
+            # al guardar la orden, se recalcula discount/total en Order.save
+            self.order.save(update_fields=["subtotal_cop", "discount_cop", "delivery_fee_cop", "total_cop"])
+
+    def delete(self, *args, **kwargs):
+        # Solo el borrado de una línea suelta: la cascada al archivar o borrar
+        # el pedido no pasa por aquí (los archivados siguen en el top-k).
+        from . import bestsellers, kpi_cache
+
+        order = self.order
+        with transaction.atomic(savepoint=False):
+            result = super().delete(*args, **kwargs)
+            if order.status == Order.STATUS_COMPLETED:
+                bestsellers.apply_line(order, self.menu_item_id, self.quantity, self.line_total_cop, sign=-1)
+                transaction.on_commit(lambda: kpi_cache.invalidate(order.restaurant_id))
+        return result
 
 
 # ----------------------------------------------------------------------
 # 15. Eventos (funnel y analítica)
 # ----------------------------------------------------------------------
 class Event(TimeStampedModel):
+    """
+    En PostgreSQL la tabla está particionada por mes sobre `at` (PK real
+    (id, at), ver migración 0005 y core/partitions.py). Filtra siempre por
+    `at` para que el planner descarte particiones.
+    """
     name = models.CharField(max_length=100)
     order = models.ForeignKey(
         Order,
@@ -615,7 +667,224 @@ class Event(TimeStampedModel):
     at = models.DateTimeField(default=timezone.now)
 
     class Meta:
-        indexes = [models.Index(fields=["name"]), models.Index(fields=["at"])]
+        indexes = [
+            models.Index(fields=["name"]),
+            models.Index(fields=["at"]),
+            # Lecturas del funnel: (name, rango de at) devolviendo customer_id.
+            models.Index(fields=["name", "at", "customer"]),
+        ]
 
     def __str__(self):
         return f"{self.name} @ {self.at}"
+
+
+# ----------------------------------------------------------------------
+# 16. Rollup horario de ventas (KPI)
+# ----------------------------------------------------------------------
+class SalesRollup(models.Model):
+    """
+    Ventas pre-agregadas por restaurante y hora local (America/Bogota).
+    Se mantiene incrementalmente desde las señales de Order; solo cuentan
+    los pedidos COMPLETED, agrupados por la hora de creación del pedido.
+    """
+    restaurant = models.ForeignKey(
+        Restaurant,
+        on_delete=models.CASCADE,
+        related_name="sales_rollups",
+    )
+    bucket = models.DateTimeField(help_text="Inicio de la hora local del bucket.")
+    orders_count = models.IntegerField(default=0)
+    revenue_cop = models.BigIntegerField(default=0)
+
+    class Meta:
+        unique_together = ("restaurant", "bucket")
+        indexes = [models.Index(fields=["bucket"])]
+
+    def __str__(self):
+        return f"{self.restaurant_id} @ {self.bucket:%Y-%m-%d %H}h"
+
+
+# ----------------------------------------------------------------------
+# 17. Contadores de platos más vendidos (top-k)
+# ----------------------------------------------------------------------
+class MenuItemSalesCounter(models.Model):
+    """
+    Cantidad y ventas por plato, por día, semana (lunes) y acumulado total.
+    Solo cuentan pedidos COMPLETED; se mantiene con upserts desde las señales
+    de Order. Los índices por (periodo, cantidad) permiten leer el top-k sin
+    agrupar líneas de pedido.
+    """
+    PERIOD_DAY = "day"
+    PERIOD_WEEK = "week"
+    PERIOD_ALL = "all"
+
+    PERIOD_CHOICES = [
+        (PERIOD_DAY, "Día"),
+        (PERIOD_WEEK, "Semana"),
+        (PERIOD_ALL, "Total"),
+    ]
+
+    # period_start fijo para el acumulado total
+    ALL_TIME_START = datetime.date(1970, 1, 1)
+
+    restaurant = models.ForeignKey(
+        Restaurant,
+        on_delete=models.CASCADE,
+        related_name="sales_counters",
+    )
+    menu_item = models.ForeignKey(
+        MenuItem,
+        on_delete=models.CASCADE,
+        related_name="sales_counters",
+    )
+    category = models.ForeignKey(
+        MenuCategory,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="sales_counters",
+        help_text="Copia de menu_item.category para el desglose por categoría.",
+    )
+    period = models.CharField(max_length=5, choices=PERIOD_CHOICES)
+    period_start = models.DateField()
+    quantity = models.IntegerField(default=0)
+    revenue_cop = models.BigIntegerField(default=0)
+
+    class Meta:
+        unique_together = ("menu_item", "period", "period_start")
+        indexes = [
+            models.Index(fields=["period", "period_start", "-quantity"]),
+            models.Index(fields=["restaurant", "period", "period_start", "-quantity"]),
+            models.Index(fields=["restaurant", "category", "period", "period_start", "-quantity"]),
+        ]
+
+    def __str__(self):
+        return f"{self.menu_item_id} {self.period}:{self.period_start} ({self.quantity})"
+
+
+# ----------------------------------------------------------------------
+# 18. Pedidos archivados (almacenamiento frío)
+# ----------------------------------------------------------------------
+class ArchivedOrder(models.Model):
+    """
+    Pedido COMPLETED/CANCELLED antiguo sacado de core_order por
+    `manage.py archive_orders`. `payload` guarda la fila del pedido con sus
+    líneas, entrega y eventos; las columnas sueltas son las que se consultan.
+    SalesRollup y los contadores top-k no se tocan al archivar.
+    """
+    order_id = models.BigIntegerField(unique=True, help_text="id original en core_order.")
+    order_number = models.CharField(max_length=20, unique=True)
+    restaurant = models.ForeignKey(
+        Restaurant,
+        on_delete=models.CASCADE,
+        related_name="archived_orders",
+    )
+    customer_id = models.BigIntegerField(null=True, blank=True, db_index=True)
+    status = models.CharField(max_length=20, choices=Order.STATUS_CHOICES)
+    total_cop = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(help_text="Fecha de creación del pedido original.")
+    archived_at = models.DateTimeField(default=timezone.now)
+    payload = models.JSONField(encoder=DjangoJSONEncoder)
+
+    class Meta:
+        ordering = ["-created_at"]
+        indexes = [
+            models.Index(fields=["restaurant", "status"]),
+            models.Index(fields=["created_at"]),
+        ]
+
+    def __str__(self):
+        return f"Archived {self.order_number}"
+
+
+# ----------------------------------------------------------------------
+# 19. Outbox transaccional (efectos secundarios de pedidos)
+# ----------------------------------------------------------------------
+class OutboxMessage(models.Model):
+    """
+    Mensaje pendiente de entregar (notificaciones, pushes, analítica),
+    escrito en la misma transacción que el cambio que lo origina. Lo
+    entrega `manage.py dispatch_outbox` (core/outbox.py), al menos una vez.
+    """
+    STATUS_PENDING = "PENDING"
+    STATUS_SENT = "SENT"
+    STATUS_DEAD = "DEAD"
+
+    STATUS_CHOICES = [
+        (STATUS_PENDING, "Pendiente"),
+        (STATUS_SENT, "Enviado"),
+        (STATUS_DEAD, "Descartado"),
+    ]
+
+    topic = models.CharField(max_length=100)
+    payload = models.JSONField(encoder=DjangoJSONEncoder)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=STATUS_PENDING)
+    attempts = models.PositiveIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(default=timezone.now)
+    available_at = models.DateTimeField(default=timezone.now, help_text="No se entrega antes (backoff).")
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            # El dispatcher solo lee pendientes por available_at.
+            models.Index(
+                fields=["available_at", "id"],
+                name="outbox_pending_idx",
+                condition=models.Q(status="PENDING"),
+            ),
+            models.Index(fields=["status", "created_at"]),
+        ]
+
+    def __str__(self):
+        return f"{self.topic} #{self.pk} ({self.status})"
+
+
+# ----------------------------------------------------------------------
+# 20. Trabajos en segundo plano (core/jobs.py)
+# ----------------------------------------------------------------------
+class Job(models.Model):
+    """
+    Trabajo encolado para `manage.py run_jobs`. `key` (opcional) es la
+    clave de idempotencia: encolar dos veces la misma clave no duplica.
+    Un RUNNING cuyo `expires_at` ya pasó se considera de un worker caído.
+    """
+    STATUS_QUEUED = "QUEUED"
+    STATUS_RUNNING = "RUNNING"
+    STATUS_DONE = "DONE"
+    STATUS_FAILED = "FAILED"
+
+    STATUS_CHOICES = [
+        (STATUS_QUEUED, "En cola"),
+        (STATUS_RUNNING, "En ejecución"),
+        (STATUS_DONE, "Terminado"),
+        (STATUS_FAILED, "Fallido"),
+    ]
+
+    name = models.CharField(max_length=100)
+    kwargs = models.JSONField(encoder=DjangoJSONEncoder, default=dict, blank=True)
+    key = models.CharField(max_length=200, blank=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=STATUS_QUEUED)
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=3)
+    created_at = models.DateTimeField(default=timezone.now)
+    run_at = models.DateTimeField(default=timezone.now)
+    started_at = models.DateTimeField(null=True, blank=True)
+    expires_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    worker = models.CharField(max_length=100, blank=True)
+    last_error = models.TextField(blank=True)
+    result = models.JSONField(encoder=DjangoJSONEncoder, null=True, blank=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["key"], condition=~models.Q(key=""), name="job_unique_key"),
+        ]
+        indexes = [
+            models.Index(fields=["run_at", "id"], name="job_queued_idx", condition=models.Q(status="QUEUED")),
+            models.Index(fields=["expires_at"], name="job_running_idx", condition=models.Q(status="RUNNING")),
+            models.Index(fields=["status", "finished_at"]),
+        ]
+
+    def __str__(self):
+        return f"{self.name} #{self.pk} ({self.status})"
@@ -0,0 +1,103 @@
+# core/order_history.py
+"""
+Historial de pedidos del cliente autenticado (/api/me/orders/).
+
+Paginación keyset sobre (created_at, id) descendente: cada página es un
+rango del índice order_customer_recent_idx filtrado por customer_id, sin
+OFFSET, sin COUNT y sin join con core_customer. El cursor es opaco
+(base64 de la clave del último pedido). Los pedidos archivados
+(ArchivedOrder, mismo id original) se mezclan por la misma clave.
+"""
+import base64
+import binascii
+
+from django.db.models import IntegerField, OuterRef, Q, Subquery, Sum
+from django.db.models.functions import Coalesce
+from django.utils.dateparse import parse_datetime
+
+from .models import ArchivedOrder, Order, OrderItem
+
+DEFAULT_LIMIT = 20
+MAX_LIMIT = 50
+
+SUMMARY_FIELDS = ("id", "order_number", "status", "restaurant_id", "total_cop", "created_at")
+
+
+def encode_cursor(row):
+    raw = f"{row['created_at'].isoformat()}|{row['id']}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor):
+    """(created_at, id) del cursor; ValueError si no es válido."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        created_at, order_id = raw.rsplit("|", 1)
+        created_at = parse_datetime(created_at)
+        order_id = int(order_id)
+    except (binascii.Error, UnicodeDecodeError, ValueError) as exc:
+        raise ValueError("Cursor inválido.") from exc
+    if created_at is None or created_at.tzinfo is None:
+        raise ValueError("Cursor inválido.")
+    return created_at, order_id
+
+
+def _before(queryset, key, id_field):
+    """Filas estrictamente anteriores a `key` en orden (created_at, id) desc."""
+    created_at, order_id = key
+    # created_at__lte acota el rango del índice; el OR desempata por id.
+    return queryset.filter(created_at__lte=created_at).filter(
+        Q(created_at__lt=created_at) | Q(**{f"{id_field}__lt": order_id})
+    )
+
+
+def _hot(customer_id, key, limit):
+    items_count = (
+        OrderItem.objects.filter(order_id=OuterRef("pk"))
+        .values("order_id")
+        .annotate(total=Sum("quantity"))
+        .values("total")
+    )
+    queryset = Order.objects.filter(customer_id=customer_id)
+    if key is not None:
+        queryset = _before(queryset, key, "id")
+    rows = (
+        queryset.annotate(items_count=Coalesce(Subquery(items_count, output_field=IntegerField()), 0))
+        .order_by("-created_at", "-id")
+        .values(*SUMMARY_FIELDS, "items_count")[:limit]
+    )
+    return [{**row, "archived": False} for row in rows]
+
+
+def _archived(customer_id, key, limit):
+    queryset = ArchivedOrder.objects.filter(customer_id=customer_id)
+    if key is not None:
+        queryset = _before(queryset, key, "order_id")
+    rows = queryset.order_by("-created_at", "-order_id").values(
+        "order_id", "order_number", "status", "restaurant_id", "total_cop", "created_at", "payload"
+    )[:limit]
+    return [
+        {
+            "id": row["order_id"],
+            **{field: row[field] for field in SUMMARY_FIELDS[1:]},
+            "items_count": sum(item["quantity"] for item in row["payload"].get("items", [])),
+            "archived": True,
+        }
+        for row in rows
+    ]
+
+
+def page(customer_id, cursor=None, limit=DEFAULT_LIMIT):
+    """
+    {"results": [...], "next_cursor": str | None} con hasta `limit`
+    resúmenes. Lanza ValueError si el cursor no es válido.
+    """
+    key = decode_cursor(cursor) if cursor else None
+    rows = _hot(customer_id, key, limit + 1) + _archived(customer_id, key, limit + 1)
+    rows.sort(key=lambda row: (row["created_at"], row["id"]), reverse=True)
+    results = rows[:limit]
+    has_more = len(rows) > limit
+    return {
+        "results": results,
+        "next_cursor": encode_cursor(results[-1]) if has_more else None,
+    }
@@ -0,0 +1,211 @@
+# core/outbox.py
+"""
+Outbox transaccional para los efectos secundarios de los pedidos.
+
+Los signals de Order escriben un OutboxMessage en la misma transacción
+que el cambio (`enqueue`): si el pedido se revierte, el mensaje también,
+y la petición no espera a WhatsApp/SMS ni a los pushes.
+
+`manage.py dispatch_outbox` reclama lotes con SELECT ... FOR UPDATE
+SKIP LOCKED (varios dispatchers no se pisan) y entrega cada mensaje a los
+sinks de OUTBOX_SINKS cuyo patrón de topic coincide. Si un sink falla se
+reintenta con backoff exponencial; tras OUTBOX_MAX_ATTEMPTS queda DEAD.
+La entrega es al menos una vez: los sinks deben tolerar duplicados.
+"""
+import logging
+import time
+from datetime import timedelta
+from fnmatch import fnmatchcase
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from . import metrics
+from .models import Event, Order, OutboxMessage
+
+logger = logging.getLogger(__name__)
+
+ORDER_CREATED = "order.created"
+ORDER_STATUS_CHANGED = "order.status_changed"
+
+MAX_ERROR_LENGTH = 1000
+
+dispatched = metrics.counter(
+    "outbox_dispatched_total",
+    "Mensajes del outbox procesados por el dispatcher, por topic y resultado.",
+    ("topic", "result"),
+)
+dispatch_lag = metrics.histogram(
+    "outbox_dispatch_lag_seconds",
+    "Segundos entre el enqueue y la entrega de cada mensaje.",
+    ("topic",),
+    buckets=(0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0, 900.0),
+)
+batch_seconds = metrics.histogram(
+    "outbox_batch_seconds",
+    "Duración de cada lote del dispatcher (reclamar, entregar y marcar).",
+)
+oldest_pending = metrics.gauge(
+    "outbox_oldest_pending_seconds",
+    "Antigüedad del mensaje pendiente más viejo ya entregable.",
+)
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+# --------- SINKS --------- #
+
+class Sink:
+    """Destino de entrega. `topics` son patrones fnmatch ("order.*")."""
+
+    topics = ("*",)
+
+    def accepts(self, topic):
+        return any(fnmatchcase(topic, pattern) for pattern in self.topics)
+
+    def deliver(self, message):
+        raise NotImplementedError
+
+
+class LogSink(Sink):
+    """Stub local de notificaciones (WhatsApp/SMS, cocina, domiciliario): solo registra."""
+
+    def deliver(self, message):
+        logger.info("outbox %s #%s: %s", message.topic, message.pk, message.payload)
+
+
+class EventSink(Sink):
+    """Analítica: cada cambio de estado queda como Event `order_status_changed`."""
+
+    topics = (ORDER_STATUS_CHANGED,)
+
+    def deliver(self, message):
+        payload = message.payload
+        # El pedido pudo archivarse o borrarse entre el enqueue y la entrega.
+        row = Order.objects.filter(pk=payload["order_id"]).values_list("customer_id").first()
+        Event.objects.create(
+            name="order_status_changed",
+            order_id=payload["order_id"] if row else None,
+            customer_id=row[0] if row else None,
+            meta={"from": payload["previous_status"], "to": payload["status"], "outbox_id": message.pk},
+            at=payload["changed_at"],
+        )
+
+
+_sinks = {}
+
+
+def get_sinks():
+    paths = tuple(_setting("OUTBOX_SINKS", ("core.outbox.LogSink", "core.outbox.EventSink")))
+    if paths not in _sinks:
+        _sinks[paths] = [import_string(path)() for path in paths]
+    return _sinks[paths]
+
+
+# --------- ENQUEUE --------- #
+
+def enqueue(topic, payload):
+    """Escribe el mensaje en la transacción actual; lo entrega el dispatcher."""
+    return OutboxMessage.objects.create(topic=topic, payload=payload)
+
+
+def order_payload(order, previous_status=None):
+    return {
+        "order_id": order.pk,
+        "order_number": order.order_number,
+        "restaurant_id": order.restaurant_id,
+        "customer_id": order.customer_id,
+        "channel": order.channel,
+        "status": order.status,
+        "previous_status": previous_status,
+        "total_cop": order.total_cop,
+        "changed_at": timezone.now(),
+    }
+
+
+# --------- DISPATCH --------- #
+
+def backoff(attempts):
+    """Espera antes del siguiente intento: base * 2^(intentos-1), con tope."""
+    base = _setting("OUTBOX_BACKOFF_BASE", 5)
+    return min(base * 2 ** (attempts - 1), _setting("OUTBOX_BACKOFF_MAX", 900))
+
+
+def _deliver(message, sinks):
+    # Savepoint por mensaje: si un sink falla, lo que otro ya escribió en
+    # la base de datos se deshace y el reintento no lo duplica.
+    with transaction.atomic():
+        for sink in sinks:
+            if sink.accepts(message.topic):
+                sink.deliver(message)
+
+
+def dispatch(batch_size=None):
+    """Reclama y entrega un lote de mensajes pendientes; devuelve cuántos procesó."""
+    batch_size = batch_size or _setting("OUTBOX_BATCH_SIZE", 100)
+    max_attempts = _setting("OUTBOX_MAX_ATTEMPTS", 10)
+    sinks = get_sinks()
+    started = time.monotonic()
+    with transaction.atomic():
+        batch = list(
+            OutboxMessage.objects.select_for_update(skip_locked=True)
+            .filter(status=OutboxMessage.STATUS_PENDING, available_at__lte=timezone.now())
+            .order_by("available_at", "id")[:batch_size]
+        )
+        if not batch:
+            return 0
+        for message in batch:
+            message.attempts += 1
+            try:
+                _deliver(message, sinks)
+            except Exception as exc:
+                message.last_error = f"{type(exc).__name__}: {exc}"[:MAX_ERROR_LENGTH]
+                if message.attempts >= max_attempts:
+                    message.status = OutboxMessage.STATUS_DEAD
+                    logger.error("outbox #%s descartado tras %s intentos", message.pk, message.attempts)
+                else:
+                    message.available_at = timezone.now() + timedelta(seconds=backoff(message.attempts))
+                    logger.warning("outbox #%s falló, reintento en %ss", message.pk, backoff(message.attempts))
+                dispatched.inc(topic=message.topic, result="dead" if message.status == OutboxMessage.STATUS_DEAD else "retry")
+                continue
+            message.status = OutboxMessage.STATUS_SENT
+            message.sent_at = timezone.now()
+            message.last_error = ""
+            dispatched.inc(topic=message.topic, result="sent")
+            dispatch_lag.observe((message.sent_at - message.created_at).total_seconds(), topic=message.topic)
+        OutboxMessage.objects.bulk_update(
+            batch, ["status", "attempts", "last_error", "available_at", "sent_at"], batch_size=batch_size
+        )
+    batch_seconds.observe(time.monotonic() - started)
+    return len(batch)
+
+
+def update_lag_gauge():
+    """Actualiza outbox_oldest_pending_seconds (0 si no hay nada entregable)."""
+    now = timezone.now()
+    first = (
+        OutboxMessage.objects.filter(status=OutboxMessage.STATUS_PENDING, available_at__lte=now)
+        .order_by("available_at", "id")
+        .values_list("created_at", flat=True)
+        .first()
+    )
+    oldest_pending.set((now - first).total_seconds() if first else 0)
+
+
+def purge(days=None, batch_size=5000):
+    """Borra en lotes los mensajes enviados hace más de OUTBOX_RETENTION_DAYS días."""
+    days = _setting("OUTBOX_RETENTION_DAYS", 7) if days is None else days
+    cutoff = timezone.now() - timedelta(days=days)
+    deleted = 0
+    while True:
+        ids = list(
+            OutboxMessage.objects.filter(status=OutboxMessage.STATUS_SENT, sent_at__lt=cutoff)
+            .values_list("id", flat=True)[:batch_size]
+        )
+        if not ids:
+            return deleted
+        deleted += OutboxMessage.objects.filter(id__in=ids).delete()[0]
@@ -0,0 +1,118 @@
+# core/pagination.py
+"""
+Paginación con conteo aproximado para tablas grandes (admin y API).
+
+COUNT(*) exacto recorre toda la tabla (o todo el resultado filtrado).
+En Postgres, ApproximateCountPaginator estima primero:
+- sin filtros: `reltuples` de pg_class (suma de particiones si la tabla
+  está particionada, como core_event), que actualizan VACUUM/ANALYZE;
+- con filtros: las filas estimadas por el planner (EXPLAIN).
+Si la estimación no llega a APPROX_COUNT_THRESHOLD se hace el COUNT
+exacto, que en ese tamaño es barato; en otros motores siempre es exacto.
+Con filtros selectivos el planner puede fallar por órdenes de magnitud,
+así que antes de usar su estimación se cuenta exacto con tope
+(COUNT sobre LIMIT APPROX_COUNT_THRESHOLD): si no llega al tope, ese es
+el total.
+"""
+import json
+
+from django.conf import settings
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import QuerySet
+from django.utils.functional import cached_property
+from rest_framework.pagination import PageNumberPagination
+
+
+def threshold():
+    return getattr(settings, "APPROX_COUNT_THRESHOLD", 100_000)
+
+
+def _reltuples(connection, table):
+    with connection.cursor() as cursor:
+        # reltuples = -1 si la tabla nunca se analizó (Postgres 14+).
+        cursor.execute(
+            "SELECT COUNT(*) FILTER (WHERE c.reltuples >= 0), COALESCE(SUM(GREATEST(c.reltuples, 0)), 0) "
+            "FROM pg_class c WHERE c.oid = %s::regclass "
+            "OR c.oid IN (SELECT inhrelid FROM pg_inherits WHERE inhparent = %s::regclass)",
+            [table, table],
+        )
+        analyzed, rows = cursor.fetchone()
+    return int(rows) if analyzed else None
+
+
+def _is_whole_table(queryset):
+    query = queryset.query
+    return not query.has_filters() and not query.distinct and not query.is_sliced and query.combinator is None
+
+
+def estimate_count(queryset):
+    """Filas estimadas por Postgres para el queryset, o None si no hay estimación."""
+    connection = connections[queryset.db]
+    if connection.vendor != "postgresql":
+        return None
+    if _is_whole_table(queryset):
+        return _reltuples(connection, connection.ops.quote_name(queryset.model._meta.db_table))
+    plan = json.loads(queryset.explain(format="json"))
+    if isinstance(plan, list):  # Según el driver llega como lista o ya desempaquetado.
+        plan = plan[0]
+    return int(plan["Plan"]["Plan Rows"])
+
+
+class ApproximateCountPaginator(Paginator):
+    """Paginator cuyo `count` es una estimación en tablas grandes (ver is_approximate)."""
+
+    is_approximate = False
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        if isinstance(queryset, QuerySet):
+            limit = threshold()
+            estimate = estimate_count(queryset)
+            if estimate is not None and estimate >= limit:
+                if not _is_whole_table(queryset):
+                    capped = queryset[:limit].count()
+                    if capped < limit:
+                        return capped
+                    estimate = max(estimate, limit)
+                self.is_approximate = True
+                return estimate
+        return super().count
+
+
+class ApproximatePageNumberPagination(PageNumberPagination):
+    """
+    Paginación por páginas de la API con el mismo conteo aproximado.
+    Es opcional: sin ?page ni ?page_size el listado sigue siendo la lista
+    completa de siempre, para no romper a los clientes actuales.
+    """
+
+    django_paginator_class = ApproximateCountPaginator
+    page_size = 50
+    page_size_query_param = "page_size"
+    max_page_size = 200
+
+    def get_page_size(self, request):
+        if (
+            self.page_query_param not in request.query_params
+            and self.page_size_query_param not in request.query_params
+        ):
+            return None
+        return super().get_page_size(request)
+
+    def get_paginated_response(self, data):
+        response = super().get_paginated_response(data)
+        response.data = {
+            "count": response.data["count"],
+            "count_is_approximate": self.page.paginator.is_approximate,
+            "next": response.data["next"],
+            "previous": response.data["previous"],
+            "results": response.data["results"],
+        }
+        return response
+
+    def get_paginated_response_schema(self, schema):
+        schema = super().get_paginated_response_schema(schema)
+        schema["properties"]["count_is_approximate"] = {"type": "boolean"}
+        return schema
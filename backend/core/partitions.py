@@ -0,0 +1,141 @@
+# core/partitions.py
+"""
+Particiones mensuales de core_event (solo PostgreSQL).
+
+La migración 0005 convierte core_event en una tabla particionada por rango
+sobre `at`, con PK (id, at) y una partición DEFAULT de respaldo. Aquí se
+crean las particiones de los próximos meses antes de que lleguen eventos y
+se aplica la retención separando y borrando particiones completas (DROP
+TABLE) en vez de DELETE fila a fila.
+
+En otros motores (SQLite en tests) no hay particiones: la retención cae a
+un DELETE por rango de fechas.
+"""
+import re
+from datetime import date, datetime, time
+
+from django.db import connection as default_connection, transaction
+from django.utils import timezone
+
+from .models import Event
+
+PARENT_TABLE = "core_event"
+DEFAULT_PARTITION = "core_event_default"
+PARTITION_RE = re.compile(r"^core_event_p(\d{4})(\d{2})$")
+
+
+def is_partitioned(connection=default_connection):
+    return connection.vendor == "postgresql"
+
+
+def month_start(day):
+    return date(day.year, day.month, 1)
+
+
+def add_months(month, count):
+    index = month.year * 12 + month.month - 1 + count
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month):
+    return f"core_event_p{month:%Y%m}"
+
+
+def month_bound(month):
+    """Literal SQL del inicio de mes en la zona local (America/Bogota)."""
+    start = timezone.make_aware(datetime.combine(month, time.min), timezone.get_default_timezone())
+    return f"'{start.isoformat()}'"
+
+
+def list_partitions(connection=default_connection):
+    """Meses (primer día) que ya tienen partición, ordenados."""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            """
+            SELECT child.relname
+            FROM pg_inherits
+            JOIN pg_class parent ON parent.oid = pg_inherits.inhparent
+            JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+            WHERE parent.relname = %s
+            """,
+            [PARENT_TABLE],
+        )
+        names = [row[0] for row in cursor.fetchall()]
+
+    months = []
+    for name in names:
+        match = PARTITION_RE.match(name)
+        if match:
+            months.append(date(int(match.group(1)), int(match.group(2)), 1))
+    return sorted(months)
+
+
+def create_partition(month, connection=default_connection):
+    """
+    Crea la partición del mes. Si la partición DEFAULT ya recibió filas de
+    ese rango, se mueven a la nueva tabla antes de adjuntarla (ATTACH falla
+    si DEFAULT contiene filas del rango).
+    """
+    name = partition_name(month)
+    lower, upper = month_bound(month), month_bound(add_months(month, 1))
+    with transaction.atomic(using=connection.alias), connection.cursor() as cursor:
+        cursor.execute(f"CREATE TABLE {name} (LIKE {PARENT_TABLE} INCLUDING DEFAULTS)")
+        cursor.execute(
+            f"""
+            WITH moved AS (
+                DELETE FROM {DEFAULT_PARTITION}
+                WHERE at >= {lower} AND at < {upper}
+                RETURNING *
+            )
+            INSERT INTO {name} SELECT * FROM moved
+            """
+        )
+        cursor.execute(
+            f"ALTER TABLE {PARENT_TABLE} ATTACH PARTITION {name} "
+            f"FOR VALUES FROM ({lower}) TO ({upper})"
+        )
+    return name
+
+
+def ensure_partitions(months_ahead=3, today=None, connection=default_connection):
+    """Garantiza particiones desde el mes actual hasta `months_ahead` meses adelante."""
+    if not is_partitioned(connection):
+        return []
+
+    current = month_start(today or timezone.localdate())
+    existing = set(list_partitions(connection))
+    created = []
+    for offset in range(months_ahead + 1):
+        month = add_months(current, offset)
+        if month not in existing:
+            created.append(create_partition(month, connection))
+    return created
+
+
+def drop_old_partitions(retention_months, today=None, connection=default_connection, dry_run=False):
+    """
+    Elimina los meses completos anteriores a la ventana de retención. En
+    PostgreSQL separa y borra particiones; en otros motores borra filas.
+    Devuelve los nombres de partición (o el número de filas) eliminados.
+    """
+    cutoff = add_months(month_start(today or timezone.localdate()), -retention_months)
+
+    if not is_partitioned(connection):
+        cutoff_dt = timezone.make_aware(datetime.combine(cutoff, time.min))
+        qs = Event.objects.using(connection.alias).filter(at__lt=cutoff_dt)
+        if dry_run:
+            return qs.count()
+        return qs.delete()[0]
+
+    dropped = []
+    for month in list_partitions(connection):
+        if month >= cutoff:
+            break
+        name = partition_name(month)
+        dropped.append(name)
+        if dry_run:
+            continue
+        with transaction.atomic(using=connection.alias), connection.cursor() as cursor:
+            cursor.execute(f"ALTER TABLE {PARENT_TABLE} DETACH PARTITION {name}")
+            cursor.execute(f"DROP TABLE {name}")
+    return dropped
@@ -0,0 +1,93 @@
+# core/payload_benchmark.py
+"""
+Benchmark de tamaño y coste de las respuestas JSON más pesadas: listado
+de pedidos, detalle de pedido, listado de platos y snapshot de menú.
+
+Para cada payload mide el tiempo de render con cada backend JSON
+(stdlib y orjson si está instalado) y con MessagePack, el de parseo de
+ambos formatos y los bytes en la red sin comprimir, con gzip y con
+brotli (si está instalado), con el coste de comprimir. Los datos salen de `benchmark.seed` sobre la base de datos de
+pruebas (comando `benchmark_payloads`).
+"""
+import io
+import statistics
+import time
+
+from asgiref.sync import async_to_sync
+from rest_framework.renderers import JSONRenderer
+
+from . import compression, menu_snapshot, renderers
+from .models import MenuItem
+from .serializers import MenuItemSerializer, OrderSerializer
+from .views import OrderViewSet
+
+ROUNDS = 5
+
+
+def payloads(fixtures, orders=100):
+    """{nombre: datos ya serializados} con el mismo queryset que las vistas."""
+    queryset = OrderViewSet.queryset.filter(restaurant_id=fixtures.restaurant_id).order_by("-id")
+    order_list = OrderSerializer(queryset[:orders], many=True).data
+    return {
+        f"orders_list_{orders}": order_list,
+        "order_detail": order_list[0] if order_list else {},
+        "menu_items": MenuItemSerializer(
+            MenuItem.objects.select_related("category").filter(restaurant_id=fixtures.restaurant_id),
+            many=True,
+        ).data,
+        "menu_snapshot": async_to_sync(menu_snapshot.abuild)(fixtures.restaurant_id),
+    }
+
+
+def _time_us(func, iterations):
+    """Mejor mediana de ROUNDS rondas, en microsegundos por llamada."""
+    medians = []
+    for _ in range(ROUNDS):
+        samples = []
+        for _ in range(iterations):
+            started = time.perf_counter_ns()
+            func()
+            samples.append(time.perf_counter_ns() - started)
+        medians.append(statistics.median(samples))
+    return round(min(medians) / 1000, 1)
+
+
+def render_backends():
+    backends = {"stdlib": JSONRenderer()}
+    if renderers.orjson is not None:
+        backends["orjson"] = renderers.FastJSONRenderer()
+    return backends
+
+
+def _sizes(body):
+    sizes = {"identity": len(body)}
+    for encoding in compression.available_encodings():
+        sizes[encoding] = len(compression.compress(body, encoding))
+    return sizes
+
+
+def measure(data, iterations=50):
+    """Métricas de un payload: render/parseo por formato y bytes por codificación."""
+    result = {"render_us": {}, "parse_us": {}, "bytes": {}, "compress_us": {}}
+    body = None
+    for name, renderer in render_backends().items():
+        result["render_us"][name] = _time_us(lambda: renderer.render(data), iterations)
+        body = renderer.render(data)
+
+    result["bytes"] = _sizes(body)
+    for encoding in compression.available_encodings():
+        result["compress_us"][encoding] = _time_us(lambda: compression.compress(body, encoding), iterations)
+
+    msgpack_renderer = renderers.MsgPackRenderer()
+    msgpack_body = msgpack_renderer.render(data)
+    result["render_us"]["msgpack"] = _time_us(lambda: msgpack_renderer.render(data), iterations)
+    result["msgpack_bytes"] = _sizes(msgpack_body)
+
+    json_parser, msgpack_parser = renderers.FastJSONParser(), renderers.MsgPackParser()
+    result["parse_us"]["json"] = _time_us(lambda: json_parser.parse(io.BytesIO(body)), iterations)
+    result["parse_us"]["msgpack"] = _time_us(lambda: msgpack_parser.parse(io.BytesIO(msgpack_body)), iterations)
+    return result
+
+
+def run(fixtures, orders=100, iterations=50):
+    return {name: measure(data, iterations) for name, data in payloads(fixtures, orders).items()}
@@ -0,0 +1,70 @@
+# core/phones.py
+"""
+Normalización de teléfonos a E.164 (Customer.phone_e164).
+
+Customer.phone es texto libre ("+57 315…", "315-…", "0057…"); la
+columna normalizada permite encontrar al cliente escriba como escriba el
+número. Sin `+` ni prefijo internacional se asume un número nacional de
+PHONE_COUNTRY_CODE (57, Colombia: 10 dígitos, móviles 3xx y fijos 60x).
+"""
+import re
+
+from django.conf import settings
+
+MAX_DIGITS = 15  # E.164
+MIN_PREFIX_DIGITS = 3
+
+_NON_DIGITS = re.compile(r"\D")
+
+
+def country_code():
+    return str(getattr(settings, "PHONE_COUNTRY_CODE", "57"))
+
+
+def national_prefixes():
+    """Inicios válidos de un número nacional (Colombia: móviles 3xx, fijos 60x)."""
+    return tuple(getattr(settings, "PHONE_NATIONAL_PREFIXES", ("3", "60")))
+
+
+def _is_national_start(digits):
+    # "6" todavía puede ser el comienzo de "60".
+    return bool(digits) and any(
+        digits.startswith(prefix) or prefix.startswith(digits) for prefix in national_prefixes()
+    )
+
+
+def _international_digits(raw):
+    """(dígitos, es_internacional) de un texto: "+" o "00" marcan internacional."""
+    text = (raw or "").strip()
+    international = text.startswith("+")
+    digits = _NON_DIGITS.sub("", text)
+    if not international and digits.startswith("00"):
+        digits, international = digits[2:], True
+    return digits, international
+
+
+def normalize(raw):
+    """Número en E.164 ("+573151234567") o "" si no parece un teléfono."""
+    digits, international = _international_digits(raw)
+    code = country_code()
+    if not international:
+        if len(digits) == 10:
+            digits = code + digits
+        elif not (digits.startswith(code) and len(digits) == len(code) + 10):
+            return ""
+    if not 8 <= len(digits) <= MAX_DIGITS:
+        return ""
+    return "+" + digits
+
+
+def normalize_prefix(raw):
+    """Prefijo E.164 para el typeahead, o "" si tiene menos de MIN_PREFIX_DIGITS dígitos."""
+    digits, international = _international_digits(raw)
+    if len(digits) < MIN_PREFIX_DIGITS:
+        return ""
+    code = country_code()
+    # Ningún número nacional empieza por el código de país: "57 315…" ya lo trae.
+    has_code = digits.startswith(code) and (len(digits) > 10 or _is_national_start(digits[len(code):]))
+    if not international and not has_code:
+        digits = code + digits
+    return "+" + digits[:MAX_DIGITS]
@@ -0,0 +1,26 @@
+# core/redis_client.py
+"""
+Cliente Redis compartido por proceso para estructuras propias de la app
+(buffers, contadores). La caché de Django y Channels usan sus propios clientes.
+"""
+import threading
+
+import redis
+from django.conf import settings
+
+_lock = threading.Lock()
+_client = None
+
+
+def get_redis():
+    global _client
+    if _client is None:
+        with _lock:
+            if _client is None:
+                _client = redis.Redis.from_url(
+                    settings.REDIS_URL,
+                    socket_timeout=getattr(settings, "REDIS_SOCKET_TIMEOUT", 0.5),
+                    socket_connect_timeout=getattr(settings, "REDIS_SOCKET_TIMEOUT", 0.5),
+                    health_check_interval=30,
+                )
+    return _client
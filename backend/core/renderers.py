@@ -0,0 +1,103 @@
+# core/renderers.py
+"""
+Renderers y parsers de la API: JSON y MessagePack.
+
+Con JSON_BACKEND = "orjson" (por defecto) y orjson instalado, se
+serializa y se parsea con orjson; si no está instalado, o con
+JSON_BACKEND = "stdlib", se usa el `json` de la stdlib a través de las
+clases de DRF. La salida es la misma: los tipos que orjson no conoce
+(fechas, Decimal, textos traducibles) pasan por el encoder de DRF.
+
+MessagePack (`application/msgpack`) se negocia por petición con Accept /
+Content-Type o `?format=msgpack`, para tablets de cocina y apps de
+repartidores. Los valores son los mismos que en JSON: fechas en ISO 8601
+y los DecimalField (lat, lng, distance_km) como texto, sin perder
+precisión. Al parsear se aceptan también timestamps nativos de msgpack.
+"""
+import msgpack
+from django.conf import settings
+from rest_framework import renderers
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import BaseParser, JSONParser
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:  # Dependencia opcional: stdlib.
+    orjson = None
+
+if orjson is not None:
+    # Fechas al encoder de DRF (milisegundos y "Z"), claves no str como json.dumps.
+    ORJSON_OPTIONS = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+
+_default = JSONEncoder().default
+
+
+def backend():
+    """Backend JSON en uso: "orjson" o "stdlib"."""
+    if orjson is not None and getattr(settings, "JSON_BACKEND", "orjson") == "orjson":
+        return "orjson"
+    return "stdlib"
+
+
+def dumps(data):
+    """Bytes JSON con el backend en uso (fuera de DRF: vistas async, cachés)."""
+    return FastJSONRenderer().render(data)
+
+
+class FastJSONRenderer(renderers.JSONRenderer):
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if (
+            data is None
+            or backend() != "orjson"
+            or self.get_indent(accepted_media_type, renderer_context or {})
+        ):
+            return super().render(data, accepted_media_type, renderer_context)
+
+        ret = orjson.dumps(data, default=_default, option=ORJSON_OPTIONS)
+        # Igual que DRF: U+2028/U+2029 escapados (JSON válido dentro de <script>).
+        if b"\xe2\x80\xa8" in ret or b"\xe2\x80\xa9" in ret:
+            ret = ret.replace(b"\xe2\x80\xa8", b"\\u2028").replace(b"\xe2\x80\xa9", b"\\u2029")
+        return ret
+
+
+class FastJSONParser(JSONParser):
+    renderer_class = FastJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        if backend() != "orjson":
+            return super().parse(stream, media_type, parser_context)
+
+        encoding = (parser_context or {}).get("encoding", settings.DEFAULT_CHARSET)
+        try:
+            data = stream.read()
+            if encoding.lower().replace("-", "") != "utf8":
+                data = data.decode(encoding)
+            # orjson rechaza NaN/Infinity, como DRF con STRICT_JSON.
+            return orjson.loads(data)
+        except ValueError as exc:
+            raise ParseError(f"JSON parse error - {exc}") from exc
+
+
+class MsgPackRenderer(renderers.BaseRenderer):
+    media_type = "application/msgpack"
+    format = "msgpack"
+    charset = None
+    render_style = "binary"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        return msgpack.packb(data, default=_default, use_bin_type=True)
+
+
+class MsgPackParser(BaseParser):
+    media_type = "application/msgpack"
+    renderer_class = MsgPackRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        try:
+            # Timestamps msgpack -> datetime con zona UTC (válido en DateTimeField).
+            return msgpack.unpackb(stream.read(), raw=False, timestamp=3)
+        except ValueError as exc:
+            raise ParseError(f"MessagePack parse error - {exc}") from exc
@@ -0,0 +1,153 @@
+# core/request_metrics.py
+"""
+Métricas por endpoint: latencia, consultas SQL (número y tiempo), tamaño
+de respuesta y estado, etiquetadas por la ruta resuelta (view_name de
+Django/DRF, p. ej. "order-list") y el método. Se exponen en /metrics.
+"""
+import contextvars
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+from django.http import HttpResponse
+
+from . import metrics
+
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100, 200)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+requests_total = metrics.counter(
+    "http_requests_total",
+    "Peticiones HTTP por ruta, método y código de estado.",
+    ("route", "method", "status"),
+)
+request_seconds = metrics.histogram(
+    "http_request_duration_seconds",
+    "Latencia de la petición hasta devolver la respuesta.",
+    ("route", "method"),
+)
+db_queries = metrics.histogram(
+    "http_request_db_queries",
+    "Consultas SQL ejecutadas por petición.",
+    ("route", "method"),
+    buckets=QUERY_BUCKETS,
+)
+db_seconds = metrics.histogram(
+    "http_request_db_seconds",
+    "Tiempo total en la base de datos por petición.",
+    ("route", "method"),
+)
+response_bytes = metrics.histogram(
+    "http_response_size_bytes",
+    "Tamaño del cuerpo de la respuesta (sin respuestas en streaming).",
+    ("route", "method"),
+    buckets=SIZE_BUCKETS,
+)
+in_flight = metrics.gauge(
+    "http_requests_in_flight",
+    "Peticiones en curso.",
+)
+
+
+class QueryTimer:
+    """Cuenta las consultas de la petición en curso y acumula su duración."""
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+
+
+# Timer de la petición en curso. Es una ContextVar (no un execute_wrapper
+# por petición) para que cuente también las consultas del ORM async, que
+# corren en otro hilo con su propia conexión y una copia del contexto.
+_current_timer = contextvars.ContextVar("request_query_timer", default=None)
+
+
+def _timed_execute(execute, sql, params, many, context):
+    timer = _current_timer.get()
+    if timer is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        timer.count += 1
+        timer.seconds += time.perf_counter() - started
+
+
+@receiver(connection_created)
+def instrument_connection(sender, connection, **kwargs):
+    # Al principio de la lista: execute_wrapper() quita siempre el último.
+    if _timed_execute not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, _timed_execute)
+
+
+def route_name(request):
+    match = getattr(request, "resolver_match", None)
+    if match is None:
+        return "unmatched"
+    return match.view_name or match.route or "unnamed"
+
+
+class RequestMetricsMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        started, timer, token = self._start()
+        response = None
+        try:
+            response = self.get_response(request)
+            return response
+        finally:
+            self._finish(request, response, started, timer, token)
+
+    async def __acall__(self, request):
+        started, timer, token = self._start()
+        response = None
+        try:
+            response = await self.get_response(request)
+            return response
+        finally:
+            self._finish(request, response, started, timer, token)
+
+    def _start(self):
+        metrics.ensure_writer()
+        timer = QueryTimer()
+        token = _current_timer.set(timer)
+        in_flight.inc()
+        return time.perf_counter(), timer, token
+
+    def _finish(self, request, response, started, timer, token):
+        elapsed = time.perf_counter() - started
+        _current_timer.reset(token)
+        in_flight.dec()
+        route, method = route_name(request), request.method
+        status = response.status_code if response is not None else 500
+        requests_total.inc(route=route, method=method, status=status)
+        request_seconds.observe(elapsed, route=route, method=method)
+        db_queries.observe(timer.count, route=route, method=method)
+        db_seconds.observe(timer.seconds, route=route, method=method)
+        if response is not None and not response.streaming:
+            response_bytes.observe(len(response.content), route=route, method=method)
+
+
+def metrics_view(request):
+    """
+    Métricas de todos los workers del pod en formato Prometheus. Si
+    METRICS_TOKEN está definido se exige `Authorization: Bearer <token>`.
+    """
+    token = getattr(settings, "METRICS_TOKEN", "")
+    if token and request.META.get("HTTP_AUTHORIZATION") != f"Bearer {token}":
+        return HttpResponse(status=401)
+    return HttpResponse(metrics.render_prometheus(), content_type=metrics.CONTENT_TYPE)
@@ -0,0 +1,135 @@
+# core/rollups.py
+"""
+Mantenimiento incremental de los rollups de ventas (SalesRollup).
+
+Cada pedido aporta (1 pedido, total_cop) a la hora local en que se creó,
+solo mientras está COMPLETED. Las señales de Order calculan la diferencia
+entre el estado anterior y el nuevo y aplican únicamente ese delta.
+"""
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Sum
+from django.db.models.functions import TruncHour
+from django.utils import timezone
+
+from .models import ArchivedOrder, Order, SalesRollup
+
+
+def bucket_start(dt):
+    """Inicio de la hora local (America/Bogota) que contiene a `dt`."""
+    local = timezone.localtime(dt)
+    return local.replace(minute=0, second=0, microsecond=0)
+
+
+def sales_contribution(status, total_cop):
+    """(pedidos, ingresos) que aporta un pedido a los rollups."""
+    if status == Order.STATUS_COMPLETED:
+        return 1, total_cop or 0
+    return 0, 0
+
+
+def apply_rollup_delta(restaurant_id, created_at, orders_delta, revenue_delta):
+    if not orders_delta and not revenue_delta:
+        return
+
+    bucket = bucket_start(created_at)
+    lookup = {"restaurant_id": restaurant_id, "bucket": bucket}
+    changes = {
+        "orders_count": F("orders_count") + orders_delta,
+        "revenue_cop": F("revenue_cop") + revenue_delta,
+    }
+
+    if SalesRollup.objects.filter(**lookup).update(**changes):
+        return
+
+    try:
+        with transaction.atomic():
+            SalesRollup.objects.create(
+                **lookup,
+                orders_count=orders_delta,
+                revenue_cop=revenue_delta,
+            )
+    except IntegrityError:
+        # Otro proceso creó el bucket entre el UPDATE y el INSERT.
+        SalesRollup.objects.filter(**lookup).update(**changes)
+
+
+def saved_value(order, previous, field, update_fields):
+    # Con update_fields, los campos no listados conservan el valor de la DB.
+    if previous is not None and update_fields is not None and field not in update_fields:
+        return getattr(previous, field)
+    return getattr(order, field)
+
+
+def apply_order_change(previous, order, update_fields=None):
+    """
+    Aplica a los rollups el cambio entre `previous` (estado en DB antes del
+    save, o None si el pedido es nuevo) y `order` (estado ya guardado).
+    Devuelve True si algún rollup cambió.
+    """
+    new_orders, new_revenue = sales_contribution(
+        saved_value(order, previous, "status", update_fields),
+        saved_value(order, previous, "total_cop", update_fields),
+    )
+    if previous is None:
+        apply_rollup_delta(order.restaurant_id, order.created_at, new_orders, new_revenue)
+        return bool(new_orders or new_revenue)
+
+    old_orders, old_revenue = sales_contribution(previous.status, previous.total_cop)
+    if (old_orders, old_revenue) == (new_orders, new_revenue) and (
+        previous.restaurant_id == order.restaurant_id
+        and bucket_start(previous.created_at) == bucket_start(order.created_at)
+    ):
+        return False
+
+    apply_rollup_delta(previous.restaurant_id, previous.created_at, -old_orders, -old_revenue)
+    apply_rollup_delta(order.restaurant_id, order.created_at, new_orders, new_revenue)
+    return True
+
+
+def rebuild_sales_rollups(restaurant_id=None, since=None):
+    """
+    Reconstruye los rollups desde los pedidos crudos (incluidos los
+    archivados). `since` (datetime) limita la reconstrucción a los buckets
+    desde esa hora en adelante. Devuelve el número de buckets escritos.
+    """
+    sources = [
+        Order.objects.filter(status=Order.STATUS_COMPLETED),
+        ArchivedOrder.objects.filter(status=Order.STATUS_COMPLETED),
+    ]
+    rollups = SalesRollup.objects.all()
+    if restaurant_id is not None:
+        sources = [qs.filter(restaurant_id=restaurant_id) for qs in sources]
+        rollups = rollups.filter(restaurant_id=restaurant_id)
+    if since is not None:
+        since = bucket_start(since)
+        sources = [qs.filter(created_at__gte=since) for qs in sources]
+        rollups = rollups.filter(bucket__gte=since)
+
+    totals = {}
+    for orders in sources:
+        rows = (
+            orders.annotate(hour=TruncHour("created_at", tzinfo=timezone.get_default_timezone()))
+            .values("restaurant_id", "hour")
+            .annotate(orders_count=Count("id"), revenue_cop=Sum("total_cop"))
+            .order_by()
+        )
+        for row in rows.iterator():
+            key = (row["restaurant_id"], row["hour"])
+            count, revenue = totals.get(key, (0, 0))
+            totals[key] = (count + row["orders_count"], revenue + (row["revenue_cop"] or 0))
+
+    with transaction.atomic():
+        rollups.delete()
+        created = SalesRollup.objects.bulk_create(
+            [
+                SalesRollup(
+                    restaurant_id=restaurant,
+                    bucket=hour,
+                    orders_count=count,
+                    revenue_cop=revenue,
+                )
+                for (restaurant, hour), (count, revenue) in totals.items()
+            ],
+            batch_size=1000,
+        )
+    return len(created)
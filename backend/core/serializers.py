@@ -3,6 +3,7 @@ from django.utils import timezone
 from django.contrib.auth import get_user_model
 from django.contrib.auth.password_validation import validate_password
 from django.db import transaction
+from django.db.models import Q
 from rest_framework import serializers
 
 from .models import (
@@ -20,6 +21,7 @@ from .models import (
     OrderItem,
     Event,
 )
+from .phones import normalize as normalize_phone
 
 
 class RestaurantSerializer(serializers.ModelSerializer):
@@ -38,6 +40,7 @@ class CustomerSerializer(serializers.ModelSerializer):
     class Meta:
         model = Customer
         fields = "__all__"
+        read_only_fields = ("orders_count", "lifetime_value_cop", "last_order_at")
 
 
 class DeliveryAddressSerializer(serializers.ModelSerializer):
@@ -230,51 +233,53 @@ class OrderCreateSerializer(serializers.ModelSerializer):
         menu_items_by_id = validated_data.pop("_menu_items_by_id", {})
         restaurant = validated_data["restaurant"]
 
-        with transaction.atomic():
-            subtotal = 0
-            max_prep_minutes = 0
-
-            order = Order.objects.create(
-                **validated_data,
-                subtotal_cop=0,
-                delivery_fee_cop=restaurant.delivery_fee_base_cop,
-            )
-
-            for item_data in items_data:
-                menu_item_id = item_data["menu_item_id"]
-                quantity = item_data["quantity"]
-                notes = item_data.get("notes", "")
-
-                menu_item = menu_items_by_id.get(menu_item_id)
-                if menu_item is None:
-                    raise serializers.ValidationError(
-                        {"items": f"menu_item_id invalido para este restaurante: {menu_item_id}."}
-                    )
+        # Totales calculados antes de insertar: un solo INSERT del pedido y
+        # un bulk_create de las líneas (sin OrderItem.save() por línea).
+        subtotal = 0
+        max_prep_minutes = 0
+        lines = []
+        for item_data in items_data:
+            menu_item_id = item_data["menu_item_id"]
+            quantity = item_data["quantity"]
+            notes = item_data.get("notes", "")
+
+            menu_item = menu_items_by_id.get(menu_item_id)
+            if menu_item is None:
+                raise serializers.ValidationError(
+                    {"items": f"menu_item_id invalido para este restaurante: {menu_item_id}."}
+                )
 
-                unit_price = menu_item.price_cop
-                line_total = unit_price * quantity
-                subtotal += line_total
+            unit_price = menu_item.price_cop
+            line_total = unit_price * quantity
+            subtotal += line_total
 
-                prep_minutes = menu_item.average_prep_minutes or restaurant.default_prep_minutes
-                max_prep_minutes = max(max_prep_minutes, prep_minutes)
+            prep_minutes = menu_item.average_prep_minutes or restaurant.default_prep_minutes
+            max_prep_minutes = max(max_prep_minutes, prep_minutes)
 
-                OrderItem.objects.create(
-                    order=order,
+            lines.append(
+                OrderItem(
                     menu_item=menu_item,
                     quantity=quantity,
                     unit_price_cop=unit_price,
                     line_total_cop=line_total,
                     notes=notes,
                 )
-
-            order.subtotal_cop = subtotal
-            order.estimated_prep_minutes = max_prep_minutes or restaurant.default_prep_minutes
-            order.eta_ready_at = timezone.now() + timedelta(
-                minutes=order.estimated_prep_minutes
             )
 
-            # Se recalcula total / descuento en save()
-            order.save()
+        estimated_prep_minutes = max_prep_minutes or restaurant.default_prep_minutes
+
+        with transaction.atomic():
+            # Order.save() calcula descuento y total a partir del subtotal.
+            order = Order.objects.create(
+                **validated_data,
+                subtotal_cop=subtotal,
+                delivery_fee_cop=restaurant.delivery_fee_base_cop,
+                estimated_prep_minutes=estimated_prep_minutes,
+                eta_ready_at=timezone.now() + timedelta(minutes=estimated_prep_minutes),
+            )
+            for line in lines:
+                line.order = order
+            OrderItem.objects.bulk_create(lines)
 
         return order
 
@@ -304,7 +309,10 @@ class AuthRegisterSerializer(serializers.Serializer):
         return value
 
     def validate_phone(self, value):
-        if Customer.objects.filter(phone=value).exists():
+        # "+57 315…" y "315…" son el mismo número.
+        normalized = normalize_phone(value)
+        same = Q(phone=value) | Q(phone_e164=normalized) if normalized else Q(phone=value)
+        if Customer.objects.filter(same).exists():
             raise serializers.ValidationError("El teléfono ya está registrado.")
         return value
 
@@ -350,6 +358,7 @@ class AuthUserSerializer(serializers.Serializer):
     is_superuser = serializers.BooleanField(read_only=True)
     customer_id = serializers.SerializerMethodField()
     customer_name = serializers.SerializerMethodField()
+    customer_stats = serializers.SerializerMethodField()
 
     def get_customer_id(self, obj):
         customer = getattr(obj, "customer_profile", None)
@@ -359,3 +368,15 @@ class AuthUserSerializer(serializers.Serializer):
         customer = getattr(obj, "customer_profile", None)
         return customer.name if customer else ""
 
+    def get_customer_stats(self, obj):
+        """Columnas desnormalizadas del perfil (core/customer_stats.py)."""
+        customer = getattr(obj, "customer_profile", None)
+        if customer is None:
+            return None
+        return {
+            "orders_count": customer.orders_count,
+            "lifetime_value_cop": customer.lifetime_value_cop,
+            "last_order_at": serializers.DateTimeField().to_representation(customer.last_order_at)
+            if customer.last_order_at else None,
+        }
+
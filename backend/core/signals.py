@@ -1,10 +1,12 @@
 # core/signals.py
 from django.db.models import F, Q
-from django.db.models.signals import post_save, pre_save
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.db import transaction
 from django.dispatch import receiver
 from django.utils import timezone
 
-from .models import Order, Coupon
+from .models import Order, OrderItem, Coupon, Event, MenuCategory, MenuItem, MenuItemSalesCounter, Restaurant
+from . import bestsellers, customer_stats, kpi_cache, menu_snapshot, outbox, rollups
 
 
 @receiver(post_save, sender=Order)
@@ -50,10 +52,17 @@ def set_order_timestamps(sender, instance, **kwargs):
     Actualiza timestamps al cambiar de estado.
     Solo aplica si la orden ya existe.
     """
+    instance._previous_state = None
     if not instance.pk:
         return
 
-    previous = sender.objects.filter(pk=instance.pk).only("status").first()
+    previous = (
+        sender.objects.filter(pk=instance.pk)
+        .only("status", "total_cop", "restaurant_id", "customer_id", "created_at")
+        .first()
+    )
+    # Lo usan los receivers de post_save para aplicar solo deltas.
+    instance._previous_state = previous
     if previous is None or previous.status == instance.status:
         return
 
@@ -67,3 +76,115 @@ def set_order_timestamps(sender, instance, **kwargs):
         instance.completed_at = now
     elif instance.status == instance.STATUS_CANCELLED:
         instance.cancelled_at = now
+
+
+@receiver(post_save, sender=Order)
+def update_sales_rollups(sender, instance, created, update_fields=None, **kwargs):
+    """
+    Mantiene SalesRollup con el delta entre el estado anterior y el nuevo.
+    Debe registrarse después de update_coupon_usage (que puede corregir total_cop).
+    Si las ventas cambiaron, invalida la caché KPI al confirmar la transacción.
+    """
+    previous = getattr(instance, "_previous_state", None)
+    changed = rollups.apply_order_change(previous, instance, update_fields=update_fields)
+
+    # Top-k: las líneas solo se suman/restan al entrar o salir de COMPLETED.
+    was_completed = previous is not None and previous.status == Order.STATUS_COMPLETED
+    is_completed = (
+        rollups.saved_value(instance, previous, "status", update_fields) == Order.STATUS_COMPLETED
+    )
+    if was_completed != is_completed:
+        bestsellers.apply_order(instance, 1 if is_completed else -1)
+        changed = True
+
+    if not changed:
+        return
+
+    restaurant_ids = {instance.restaurant_id}
+    if previous is not None:
+        restaurant_ids.add(previous.restaurant_id)
+    for restaurant_id in restaurant_ids:
+        transaction.on_commit(lambda rid=restaurant_id: kpi_cache.invalidate(rid))
+
+
+@receiver(pre_save, sender=OrderItem)
+def remember_completed_line(sender, instance, **kwargs):
+    """Línea anterior, solo si el pedido ya está COMPLETED (para el delta del top-k)."""
+    instance._previous_line = None
+    if instance.pk and instance.order.status == Order.STATUS_COMPLETED:
+        instance._previous_line = (
+            sender.objects.filter(pk=instance.pk)
+            .values_list("menu_item_id", "quantity", "line_total_cop")
+            .first()
+        )
+
+
+@receiver(post_save, sender=OrderItem)
+def update_bestsellers_for_line(sender, instance, created, **kwargs):
+    """Líneas creadas o editadas en un pedido COMPLETED; el borrado está en OrderItem.delete."""
+    order = instance.order
+    if order.status != Order.STATUS_COMPLETED:
+        return
+    previous = getattr(instance, "_previous_line", None)
+    if previous:
+        bestsellers.apply_line(order, *previous, sign=-1)
+    elif not created:
+        return  # el pedido pasó a COMPLETED después de leer la línea: apply_order ya la cuenta
+    bestsellers.apply_line(order, instance.menu_item_id, instance.quantity, instance.line_total_cop)
+    transaction.on_commit(lambda: kpi_cache.invalidate(order.restaurant_id))
+
+
+@receiver(post_save, sender=Order)
+def update_customer_stats(sender, instance, created, update_fields=None, **kwargs):
+    """Delta de orders_count / lifetime_value_cop / last_order_at del cliente."""
+    previous = getattr(instance, "_previous_state", None)
+    customer_stats.apply_order_change(previous, instance, update_fields=update_fields)
+
+
+@receiver(post_save, sender=Order)
+def enqueue_order_side_effects(sender, instance, created, update_fields=None, **kwargs):
+    """
+    Notificaciones y analítica van al outbox en esta misma transacción;
+    las entrega `manage.py dispatch_outbox` (core/outbox.py).
+    """
+    if created:
+        outbox.enqueue(outbox.ORDER_CREATED, outbox.order_payload(instance))
+        return
+    previous = getattr(instance, "_previous_state", None)
+    if previous is None:
+        return
+    status = rollups.saved_value(instance, previous, "status", update_fields)
+    if status != previous.status:
+        outbox.enqueue(outbox.ORDER_STATUS_CHANGED, outbox.order_payload(instance, previous.status))
+
+
+@receiver(post_save, sender=Order)
+def record_order_created_event(sender, instance, created, **kwargs):
+    """Último paso del funnel: se registra en el servidor, no depende del tracker del navegador."""
+    if not created:
+        return
+    Event.objects.create(
+        name="order_created",
+        order=instance,
+        customer_id=instance.customer_id,
+        at=instance.created_at,
+    )
+
+
+@receiver(post_save, sender=MenuItem)
+def sync_sales_counter_category(sender, instance, created, **kwargs):
+    """Mantiene la categoría desnormalizada de los contadores top-k."""
+    if created:
+        return
+    MenuItemSalesCounter.objects.filter(menu_item=instance).exclude(
+        category_id=instance.category_id
+    ).update(category_id=instance.category_id)
+
+
+@receiver([post_save, post_delete], sender=MenuItem)
+@receiver([post_save, post_delete], sender=MenuCategory)
+@receiver([post_save, post_delete], sender=Restaurant)
+def invalidate_menu_snapshot(sender, instance, **kwargs):
+    """El snapshot del menú (core/menu_snapshot.py) se invalida al confirmar el cambio."""
+    restaurant_id = instance.pk if sender is Restaurant else instance.restaurant_id
+    transaction.on_commit(lambda: menu_snapshot.invalidate(restaurant_id))
@@ -0,0 +1,37 @@
+# core/static_files.py
+"""
+WhiteNoise como middleware capaz de funcionar en modo async.
+
+WhiteNoiseMiddleware es solo síncrono: bajo ASGI obliga a Django a
+pasar toda la cadena de middleware (y las vistas async) por un hilo.
+Esta subclase atiende en el event loop las peticiones que no son de
+estáticos y solo usa un hilo para servir el fichero.
+"""
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from whitenoise.middleware import WhiteNoiseMiddleware
+
+
+class AsyncWhiteNoiseMiddleware(WhiteNoiseMiddleware):
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response=None, *args, **kwargs):
+        super().__init__(get_response, *args, **kwargs)
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        return super().__call__(request)
+
+    async def __acall__(self, request):
+        if self.autorefresh:
+            # find_file recorre el disco (solo en dev).
+            static_file = await sync_to_async(self.find_file)(request.path_info)
+        else:
+            static_file = self.files.get(request.path_info)
+        if static_file is not None:
+            return await sync_to_async(self.serve)(static_file, request)
+        return await self.get_response(request)
@@ -0,0 +1,103 @@
+# core/tasks.py
+"""
+Trabajos registrados para `manage.py run_jobs` (core/jobs.py).
+
+Periódicos: purgas de sesiones, OTPs, outbox y trabajos viejos, archivado
+de pedidos y particiones de core_event. Los rebuilds e informes son bajo
+demanda (`manage.py enqueue_job <nombre>` o `jobs.enqueue`).
+"""
+import os
+import secrets
+from datetime import date, timedelta
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+
+from . import archive, bestsellers, customer_stats, exports, jobs, outbox, partitions, rollups
+from .db_router import replica_reads
+from .models import OTP, UserSessionToken
+
+
+# --------- PERIÓDICOS --------- #
+
+@jobs.job(every=timedelta(hours=1))
+def purge_session_tokens():
+    """Tokens revocados o sin uso en SESSION_TOKEN_IDLE_DAYS días (0 = sin caducidad)."""
+    stale = Q(is_active=False)
+    idle_days = getattr(settings, "SESSION_TOKEN_IDLE_DAYS", 90)
+    if idle_days:
+        stale |= Q(last_used_at__lt=timezone.now() - timedelta(days=idle_days))
+    return {"deleted": UserSessionToken.objects.filter(stale).delete()[0]}
+
+
+@jobs.job(every=timedelta(hours=1))
+def purge_otps():
+    """OTPs usados o vencidos."""
+    stale = OTP.objects.filter(Q(is_used=True) | Q(expires_at__lt=timezone.now()))
+    return {"deleted": stale.delete()[0]}
+
+
+@jobs.job(every=timedelta(days=1), timeout=4 * 3600)
+def archive_old_orders(older_than_days=None):
+    days = older_than_days or settings.ORDER_ARCHIVE_AFTER_DAYS
+    return {"archived": archive.archive_orders(days)}
+
+
+@jobs.job(every=timedelta(days=1))
+def ensure_event_partitions(months_ahead=3):
+    return {"created": partitions.ensure_partitions(months_ahead)}
+
+
+@jobs.job(every=timedelta(days=1))
+def purge_outbox():
+    return {"deleted": outbox.purge()}
+
+
+@jobs.job(every=timedelta(days=1))
+def purge_jobs():
+    return {"deleted": jobs.purge()}
+
+
+# --------- BAJO DEMANDA --------- #
+
+@jobs.job(timeout=4 * 3600)
+def rebuild_sales_rollups(restaurant_id=None):
+    return {"buckets": rollups.rebuild_sales_rollups(restaurant_id=restaurant_id)}
+
+
+@jobs.job(timeout=4 * 3600)
+def rebuild_bestsellers(restaurant_id=None):
+    return {"counters": bestsellers.rebuild_counters(restaurant_id=restaurant_id)}
+
+
+@jobs.job(timeout=4 * 3600)
+def rebuild_customer_stats(customer_id=None):
+    return {"customers": customer_stats.rebuild(customer_id=customer_id)}
+
+
+@jobs.job(timeout=4 * 3600, max_attempts=1)
+def export_report(kind="orders", output=exports.OUTPUT_CSV, gzip=True, restaurant_id=None, start=None, end=None):
+    """
+    Exportación de core/exports.py escrita en REPORTS_DIR; devuelve la ruta y
+    el tamaño. La ruta es local al worker (en k8s, su volumen de informes).
+    """
+    start = date.fromisoformat(start) if start else None
+    end = date.fromisoformat(end) if end else None
+    if kind == "orders":
+        queryset = exports.orders_queryset(restaurant_id, start, end)
+    else:
+        queryset = exports.events_queryset(restaurant_id, start, end)
+
+    os.makedirs(settings.REPORTS_DIR, exist_ok=True)
+    # filename() tiene precisión de minutos: el prefijo evita pisar otro informe.
+    name = f"{secrets.token_hex(4)}-{exports.filename(kind, output, gzip)}"
+    path = os.path.join(settings.REPORTS_DIR, name)
+    written = 0
+    with replica_reads():
+        blocks = exports.stream(queryset, output=output, gzip=gzip)
+    with open(path, "wb") as fh:
+        for block in blocks:
+            fh.write(block)
+            written += len(block)
+    return {"path": path, "bytes": written}
@@ -0,0 +1,168 @@
+# core/testing.py
+"""
+Utilidades de test para vigilar el coste en SQL de los endpoints.
+
+- capture_queries(): registra cada consulta (alias, SQL, parámetros y la
+  pila del proyecto que la lanzó) en todas las conexiones.
+- query_budget(n): decorador o context manager; falla si se ejecutan más
+  de n consultas o si la misma consulta (mismo SQL y parámetros) se repite.
+- assert_constant_queries(): ejecuta una llamada con 1 y con N filas y
+  falla si el número de consultas crece con N (el típico N+1).
+
+Los mensajes de error listan las consultas repetidas con su pila.
+"""
+import re
+import traceback
+from collections import Counter
+from contextlib import ContextDecorator, ExitStack, contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+
+from django.conf import settings
+from django.db import connections
+
+_PROJECT_DIR = str(Path(settings.BASE_DIR).resolve())
+_THIS_FILE = str(Path(__file__).resolve())
+_SKIP_FILES = {_THIS_FILE, str(Path(settings.BASE_DIR, "manage.py").resolve())}
+_IN_LIST = re.compile(r"IN \((?:%s, )*%s\)")
+
+
+@dataclass(frozen=True)
+class CapturedQuery:
+    alias: str
+    sql: str
+    params: str
+    stack: tuple
+
+    @property
+    def key(self):
+        return (self.alias, self.sql, self.params)
+
+
+def _project_stack():
+    """Frames del proyecto (sin Django, DRF ni este módulo), del más externo al más interno."""
+    frames = []
+    for frame in traceback.extract_stack()[:-2]:
+        filename = str(Path(frame.filename).resolve())
+        if (
+            filename.startswith(_PROJECT_DIR)
+            and filename not in _SKIP_FILES
+            and "site-packages" not in filename
+        ):
+            frames.append(frame)
+    return tuple(traceback.format_list(frames))
+
+
+class QueryLog:
+    """execute_wrapper que guarda cada consulta con la pila que la lanzó."""
+
+    def __init__(self):
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        self.queries.append(
+            CapturedQuery(
+                alias=context["connection"].alias,
+                sql=sql,
+                params=repr(params),
+                stack=_project_stack(),
+            )
+        )
+        return execute(sql, params, many, context)
+
+    def __len__(self):
+        return len(self.queries)
+
+    def repeated(self):
+        """[(consulta, veces)] para las consultas idénticas ejecutadas más de una vez."""
+        counts = Counter(query.key for query in self.queries)
+        first = {}
+        for query in self.queries:
+            first.setdefault(query.key, query)
+        return [(first[key], count) for key, count in counts.most_common() if count > 1]
+
+    def by_sql(self):
+        """
+        Veces que se ejecutó cada SQL sin tener en cuenta los parámetros
+        (`IN (%s, %s, ...)` cuenta como una sola forma).
+        """
+        return Counter(_IN_LIST.sub("IN (...)", query.sql) for query in self.queries)
+
+    def report(self, limit=5):
+        lines = [f"{len(self)} consultas:"]
+        lines += [f"  {i}. {query.sql}" for i, query in enumerate(self.queries, 1)]
+        for query, count in self.repeated()[:limit]:
+            lines.append(f"\nRepetida {count} veces: {query.sql} {query.params}")
+            lines.append("".join(query.stack).rstrip() or "  (sin frames del proyecto)")
+        return "\n".join(lines)
+
+
+@contextmanager
+def capture_queries():
+    log = QueryLog()
+    with ExitStack() as stack:
+        for alias in connections:
+            stack.enter_context(connections[alias].execute_wrapper(log))
+        yield log
+
+
+class query_budget(ContextDecorator):
+    """
+    Falla si el bloque (o el test decorado) ejecuta más de `max_queries`
+    consultas o repite una consulta idéntica (salvo allow_repeats=True).
+    """
+
+    def __init__(self, max_queries, allow_repeats=False):
+        self.max_queries = max_queries
+        self.allow_repeats = allow_repeats
+        self.log = None
+
+    def __enter__(self):
+        self._stack = ExitStack()
+        self.log = self._stack.enter_context(capture_queries())
+        return self.log
+
+    def __exit__(self, exc_type, exc, tb):
+        self._stack.close()
+        if exc_type is not None:
+            return False
+        if len(self.log) > self.max_queries:
+            raise AssertionError(
+                f"Presupuesto de {self.max_queries} consultas superado.\n{self.log.report()}"
+            )
+        if not self.allow_repeats and self.log.repeated():
+            raise AssertionError(f"Consultas idénticas repetidas.\n{self.log.report()}")
+        return False
+
+
+def assert_constant_queries(call, add_rows, n=5):
+    """
+    Detecta N+1: `add_rows(k)` añade k filas al escenario (registros en la
+    tabla, líneas en el payload...) y `call()` ejecuta el endpoint. Se mide
+    con 1 fila y con `n`; si hay más consultas con `n`, falla indicando qué
+    SQL creció y desde dónde se lanzó. Devuelve el log de la medición con n.
+    """
+    add_rows(1)
+    call()  # Calentamiento: cachés de proceso (ContentType, permisos...).
+    with capture_queries() as one:
+        call()
+    add_rows(n - 1)
+    with capture_queries() as many:
+        call()
+
+    if len(many) > len(one):
+        before, after = one.by_sql(), many.by_sql()
+        details = []
+        for query in many.queries:
+            sql = _IN_LIST.sub("IN (...)", query.sql)
+            count = after.pop(sql, 0)
+            if count > before.get(sql, 0):
+                details.append(
+                    f"\n{before.get(sql, 0)} -> {count}: {sql}\n"
+                    + ("".join(query.stack).rstrip() or "  (sin frames del proyecto)")
+                )
+        raise AssertionError(
+            f"El número de consultas crece con las filas: {len(one)} con 1, "
+            f"{len(many)} con {n}." + "".join(details)
+        )
+    return many
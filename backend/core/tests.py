@@ -1,10 +1,81 @@
+import gzip
+import io
+import json
+import os
+import tempfile
+from datetime import date, timedelta
+from decimal import Decimal
+from unittest import mock, skipUnless
+
+import msgpack
+from asgiref.sync import async_to_sync
+
 from django.contrib.auth import get_user_model
-from django.test import TestCase
+from django.core.cache import cache
+from django.db import OperationalError, router, transaction
+from django.db.models import F, Sum
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+from django.utils.translation import gettext_lazy
 from django.urls import reverse
+from rest_framework.exceptions import ParseError
+from rest_framework.renderers import JSONRenderer
 from rest_framework.test import APIClient
 
-from .models import Customer, DeliveryAddress, MenuItem, Order, Restaurant, Coupon, UserSessionToken
-from .serializers import OrderCreateSerializer
+from .models import (
+    ArchivedOrder,
+    Customer,
+    DailyLimit,
+    Delivery,
+    DeliveryAddress,
+    DeliveryZone,
+    Driver,
+    Event,
+    MenuCategory,
+    MenuItem,
+    MenuItemSalesCounter,
+    Order,
+    Job,
+    OTP,
+    OrderItem,
+    OutboxMessage,
+    Restaurant,
+    Coupon,
+    UserSessionToken,
+    SalesRollup,
+)
+from . import (
+    archive,
+    async_cache,
+    benchmark,
+    bestsellers,
+    compression,
+    customer_lookup,
+    customer_stats,
+    datagen,
+    db_router,
+    event_ingest,
+    funnel,
+    health,
+    jobs,
+    kpi,
+    kpi_cache,
+    menu_snapshot,
+    metrics,
+    microbench,
+    outbox,
+    pagination,
+    partitions,
+    phones,
+    renderers,
+    testing,
+    throttling,
+    warmup,
+)
+from .rollups import rebuild_sales_rollups
+from .serializers import AuthRegisterSerializer, OrderCreateSerializer
+from .urls import router as api_router
 
 
 User = get_user_model()
@@ -314,3 +385,1561 @@ class OrderSignalTests(TestCase):
         order.refresh_from_db()
 
         self.assertIsNotNone(order.in_progress_at)
+
+
+class SalesRollupTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.staff = User.objects.create_user(username="kpi_staff", password="pass1234", is_staff=True)
+        self.restaurant = Restaurant.objects.create(name="Rest KPI", slug="rest-kpi")
+        self.other = Restaurant.objects.create(name="Rest Otro", slug="rest-otro")
+
+    def _completed_order(self, restaurant, total):
+        order = Order.objects.create(restaurant=restaurant, subtotal_cop=total)
+        order.status = Order.STATUS_COMPLETED
+        order.save()
+        return order
+
+    def test_rollup_follows_status_transitions(self):
+        order = self._completed_order(self.restaurant, 20000)
+        rollup = SalesRollup.objects.get(restaurant=self.restaurant)
+        self.assertEqual((rollup.orders_count, rollup.revenue_cop), (1, 20000))
+
+        order.status = Order.STATUS_CANCELLED
+        order.save()
+        rollup.refresh_from_db()
+        self.assertEqual((rollup.orders_count, rollup.revenue_cop), (0, 0))
+
+    def test_rebuild_matches_incremental_rollups(self):
+        self._completed_order(self.restaurant, 10000)
+        self._completed_order(self.restaurant, 5000)
+        Order.objects.create(restaurant=self.restaurant, subtotal_cop=7000)
+        incremental = list(SalesRollup.objects.values_list("bucket", "orders_count", "revenue_cop"))
+
+        rebuild_sales_rollups()
+
+        rebuilt = list(SalesRollup.objects.values_list("bucket", "orders_count", "revenue_cop"))
+        self.assertEqual(rebuilt, incremental)
+        self.assertEqual(rebuilt[0][1:], (2, 15000))
+
+    def test_timeseries_fills_gaps_and_compares_previous_period(self):
+        self._completed_order(self.restaurant, 12000)
+        self._completed_order(self.other, 99000)
+        today = timezone.localdate()
+
+        self.client.force_authenticate(user=self.staff)
+        response = self.client.get(
+            reverse("sales-timeseries"),
+            {
+                "restaurant_id": self.restaurant.id,
+                "start": (today - timedelta(days=2)).isoformat(),
+                "end": today.isoformat(),
+            },
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data["series"]), 3)
+        self.assertEqual(response.data["series"][0]["orders"], 0)
+        self.assertEqual(response.data["series"][-1]["revenue"], 12000)
+        self.assertEqual(response.data["totals"], {"orders": 1, "revenue": 12000, "avg_ticket": 12000})
+        self.assertEqual(response.data["previous"]["totals"]["orders"], 0)
+        self.assertIsNone(response.data["change_pct"]["revenue"])
+
+    def test_timeseries_hourly_range_is_limited(self):
+        self.client.force_authenticate(user=self.staff)
+        response = self.client.get(
+            reverse("sales-timeseries"),
+            {"granularity": "hour", "start": "2026-01-01", "end": "2026-12-31"},
+        )
+        self.assertEqual(response.status_code, 400)
+
+
+class KpiCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.staff = User.objects.create_user(username="cache_staff", password="pass1234", is_staff=True)
+        self.restaurant = Restaurant.objects.create(name="Rest Cache", slug="rest-cache")
+        self.calls = 0
+
+    def _compute(self):
+        self.calls += 1
+        return {"calls": self.calls}
+
+    def test_second_read_is_served_from_cache(self):
+        first = kpi_cache.get_or_compute("test", self.restaurant.id, {"a": 1}, self._compute)
+        second = kpi_cache.get_or_compute("test", self.restaurant.id, {"a": 1}, self._compute)
+        other_params = kpi_cache.get_or_compute("test", self.restaurant.id, {"a": 2}, self._compute)
+
+        self.assertEqual(first, second)
+        self.assertEqual(other_params, {"calls": 2})
+
+    def test_stale_value_is_served_while_another_worker_recomputes(self):
+        kpi_cache.get_or_compute("test", self.restaurant.id, {}, self._compute)
+        kpi_cache.invalidate(self.restaurant.id)
+
+        entry_key = kpi_cache._entry_key("test", str(self.restaurant.id), {})
+        cache.add(f"{entry_key}:lock", "otro-worker")
+        value = kpi_cache.get_or_compute("test", self.restaurant.id, {}, self._compute)
+
+        self.assertEqual(value, {"calls": 1})
+        self.assertEqual(self.calls, 1)
+
+    def test_lock_is_released_only_by_its_owner_after_publishing(self):
+        entry_key = kpi_cache._entry_key("test", str(self.restaurant.id), {})
+        lock_key = f"{entry_key}:lock"
+
+        def slow_compute():
+            # El lock expiró durante el cálculo y ahora es de otro worker.
+            cache.set(lock_key, 12345)
+            return {"slow": True}
+
+        self.assertEqual(kpi_cache.get_or_compute("test", self.restaurant.id, {}, slow_compute), {"slow": True})
+        self.assertEqual(cache.get(lock_key), 12345)
+        self.assertEqual(cache.get(entry_key)["value"], {"slow": True})
+
+        cache.clear()
+        kpi_cache.get_or_compute("test", self.restaurant.id, {}, self._compute)
+        self.assertIsNone(cache.get(lock_key))
+
+    def test_cache_errors_fall_back_to_compute(self):
+        kpi_cache.invalidate(self.restaurant.id)
+        for method in ("add", "set"):
+            with mock.patch.object(cache, method, side_effect=ConnectionError("redis caído")), \
+                    self.assertLogs("core.kpi_cache", "WARNING"):
+                kpi_cache.get_or_compute("test", self.restaurant.id, {"m": method}, self._compute)
+        self.assertEqual(self.calls, 2)
+
+        # Sin entrada y con el lock ajeno se espera; si la caché cae, se calcula.
+        entry_key = kpi_cache._entry_key("test", str(self.restaurant.id), {})
+        cache.add(f"{entry_key}:lock", "otro-worker")
+        with mock.patch.object(cache, "get_many", return_value={}), \
+                mock.patch.object(cache, "get", side_effect=ConnectionError("redis caído")), \
+                self.assertLogs("core.kpi_cache", "WARNING") as logs:
+            self.assertEqual(kpi_cache.get_or_compute("test", self.restaurant.id, {}, self._compute), {"calls": 3})
+        self.assertIn("(get)", logs.output[0])
+
+    def test_completed_order_invalidates_sales_summary(self):
+        self.client.force_authenticate(user=self.staff)
+        url = reverse("sales-summary")
+        params = {"restaurant_id": self.restaurant.id}
+        self.assertEqual(self.client.get(url, params).data["total_revenue"], 0)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            order = Order.objects.create(restaurant=self.restaurant, subtotal_cop=8000)
+            order.status = Order.STATUS_COMPLETED
+            order.save()
+
+        self.assertEqual(self.client.get(url, params).data["total_revenue"], 8000)
+        stats = self.client.get(reverse("kpi-cache-stats")).data
+        self.assertIn("kpi_cache_requests_total", stats)
+        self.assertIn("kpi_cache_recompute_seconds", stats)
+
+
+class BestsellerCounterTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.staff = User.objects.create_user(username="top_staff", password="pass1234", is_staff=True)
+        self.restaurant = Restaurant.objects.create(name="Rest Top", slug="rest-top")
+        self.drinks = MenuCategory.objects.create(restaurant=self.restaurant, name="Bebidas")
+        self.mains = MenuCategory.objects.create(restaurant=self.restaurant, name="Platos")
+        self.soda = MenuItem.objects.create(
+            restaurant=self.restaurant, category=self.drinks, name="Gaseosa", price_cop=3000
+        )
+        self.burger = MenuItem.objects.create(
+            restaurant=self.restaurant, category=self.mains, name="Hamburguesa", price_cop=15000
+        )
+        self.soup = MenuItem.objects.create(
+            restaurant=self.restaurant, category=self.mains, name="Sopa", price_cop=9000
+        )
+
+    def _order(self, lines, status=Order.STATUS_COMPLETED):
+        serializer = OrderCreateSerializer(data={
+            "restaurant": self.restaurant.id,
+            "items": [{"menu_item_id": item.id, "quantity": qty} for item, qty in lines],
+        })
+        serializer.is_valid(raise_exception=True)
+        order = serializer.save()
+        order.status = status
+        order.save()
+        return order
+
+    def test_counters_follow_completed_orders(self):
+        order = self._order([(self.burger, 2), (self.soda, 3)])
+        self._order([(self.soup, 9)], status=Order.STATUS_READY)
+
+        top = bestsellers.top_items(restaurant_id=self.restaurant.id)
+        self.assertEqual([row["name"] for row in top], ["Gaseosa", "Hamburguesa"])
+        self.assertEqual(top[1]["total_revenue"], 30000)
+
+        order.status = Order.STATUS_CANCELLED
+        order.save()
+        self.assertEqual(bestsellers.top_items(restaurant_id=self.restaurant.id), [])
+
+    def test_counters_cover_day_week_and_all_time(self):
+        self._order([(self.burger, 1)])
+        periods = set(MenuItemSalesCounter.objects.values_list("period", flat=True))
+        self.assertEqual(periods, {"day", "week", "all"})
+        self.assertEqual(len(bestsellers.top_items(period="day", restaurant_id=self.restaurant.id)), 1)
+
+    def test_top_items_endpoint_limits_and_breaks_down_by_category(self):
+        self._order([(self.burger, 2), (self.soda, 3), (self.soup, 1)])
+        self.client.force_authenticate(user=self.staff)
+
+        response = self.client.get(
+            reverse("top-items"), {"restaurant_id": self.restaurant.id, "top": 2, "period": "week"}
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([row["name"] for row in response.data["top_items"]], ["Gaseosa", "Hamburguesa"])
+
+        response = self.client.get(
+            reverse("top-items"), {"restaurant_id": self.restaurant.id, "by_category": "1", "top": 1}
+        )
+        by_category = {row["category_name"]: row["top_items"] for row in response.data["categories"]}
+        self.assertEqual(by_category["Platos"][0]["name"], "Hamburguesa")
+        self.assertEqual(by_category["Bebidas"][0]["name"], "Gaseosa")
+
+    def test_rebuild_matches_incremental_counters(self):
+        order = self._order([(self.burger, 2), (self.soda, 3)])
+        # Líneas tocadas con el pedido ya COMPLETED (admin, correcciones).
+        OrderItem.objects.create(order=order, menu_item=self.soup, quantity=1)
+        soda = order.items.get(menu_item=self.soda)
+        soda.quantity = 5
+        soda.save()
+        order.items.get(menu_item=self.burger).delete()
+        fields = ("menu_item_id", "period", "period_start", "quantity", "revenue_cop")
+        # El incremental deja filas en cero que el rebuild no crea.
+        incremental = sorted(MenuItemSalesCounter.objects.exclude(quantity=0).values_list(*fields))
+        all_time = dict(
+            MenuItemSalesCounter.objects.filter(period="all").values_list("menu_item_id", "quantity")
+        )
+        self.assertEqual(all_time, {self.burger.id: 0, self.soda.id: 5, self.soup.id: 1})
+
+        bestsellers.rebuild_counters()
+
+        self.assertEqual(sorted(MenuItemSalesCounter.objects.values_list(*fields)), incremental)
+
+
+class EventIngestTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(username="ingest_user", password="pass1234")
+        self.customer = Customer.objects.create(user=self.user, phone="3005550000", name="Ingest")
+        self.restaurant = Restaurant.objects.create(name="Rest Ingest", slug="rest-ingest")
+        event_ingest._buffer = event_ingest.InMemoryEventBuffer(max_size=3)
+        self.addCleanup(setattr, event_ingest, "_buffer", None)
+
+    def test_anonymous_batch_is_buffered_then_bulk_written(self):
+        response = self.client.post(
+            reverse("event-ingest"),
+            {"events": [
+                {"name": "menu_view", "session_id": "abc", "customer": 999},
+                {"name": "add_to_cart", "meta": {"menu_item_id": 7}},
+                {"name": "NOT VALID"},
+            ]},
+            format="json",
+        )
+
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.data["accepted"], 2)
+        self.assertEqual(response.data["rejected"][0]["index"], 2)
+        self.assertFalse(Event.objects.exists())
+
+        self.assertEqual(event_ingest.flush(), 2)
+        menu_view = Event.objects.get(name="menu_view")
+        self.assertIsNone(menu_view.customer_id)
+        self.assertEqual(menu_view.meta, {"sid": "abc"})
+
+    def test_authenticated_events_take_customer_from_user(self):
+        order = Order.objects.create(restaurant=self.restaurant, customer=self.customer)
+        self.client.force_authenticate(user=self.user)
+        self.client.post(
+            reverse("event-ingest"),
+            [{"name": "checkout", "order_id": order.id}, {"name": "checkout", "order_id": 987654}],
+            format="json",
+        )
+        event_ingest.flush()
+
+        events = Event.objects.filter(name="checkout").order_by("id")
+        self.assertEqual([e.customer_id for e in events], [self.customer.id, self.customer.id])
+        self.assertEqual([e.order_id for e in events], [order.id, None])
+
+        # Un pedido ajeno se descarta salvo para staff.
+        other = Order.objects.create(restaurant=self.restaurant, customer=Customer.objects.create(phone="3005550001"))
+        self.client.post(reverse("event-ingest"), [{"name": "ajeno", "order_id": other.id}], format="json")
+        self.client.force_authenticate(User.objects.create_user(username="ingest_staff", password="x", is_staff=True))
+        self.client.post(reverse("event-ingest"), [{"name": "ajeno", "order_id": other.id}], format="json")
+        event_ingest.flush()
+        self.assertEqual(list(Event.objects.filter(name="ajeno").order_by("id").values_list("order_id", flat=True)), [None, other.id])
+
+    def test_bad_event_is_dead_lettered_without_blocking_the_good_ones(self):
+        self.assertEqual(event_ingest.clean_event({"name": "x", "meta": {"a\x00": 1}})[1], "meta no puede contener caracteres NUL.")
+        self.assertIsNotNone(event_ingest.clean_event({"name": "x", "meta": {"a": "b\x00"}})[1])
+
+        event_ingest._buffer = buffer = event_ingest.InMemoryEventBuffer(max_size=100)
+        good, _ = event_ingest.clean_event({"name": "menu_view"})
+        bad = {**good, "t": 1e20}  # insert imposible: fecha fuera de rango
+        buffer.push([good, good, bad, good, good])
+        dead_before = metrics.snapshot("event_ingest_dead_total")
+        with self.assertLogs("core.event_ingest", "WARNING"):
+            self.assertEqual(event_ingest.flush(), 4)
+        self.assertEqual(Event.objects.filter(name="menu_view").count(), 4)
+        self.assertEqual(len(buffer), 0)
+        self.assertNotEqual(metrics.snapshot("event_ingest_dead_total"), dead_before)
+
+        # Un error de conexión no descarta nada: el lote vuelve al buffer.
+        buffer.push([good, good])
+        with mock.patch.object(event_ingest, "write_events", side_effect=OperationalError("conexión caída")):
+            with self.assertRaises(OperationalError):
+                event_ingest.flush()
+        self.assertEqual(len(buffer), 2)
+
+    def test_full_buffer_drops_and_returns_429(self):
+        events = [{"name": "menu_view"}] * 3
+        self.client.post(reverse("event-ingest"), events, format="json")
+
+        response = self.client.post(reverse("event-ingest"), events, format="json")
+
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response.data["dropped"], 3)
+        self.assertEqual(response["Retry-After"], "1")
+
+
+class EventPartitioningTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.staff = User.objects.create_user(username="events_staff", password="pass1234", is_staff=True)
+        now = timezone.now()
+        self.recent = Event.objects.create(name="menu_view", at=now - timedelta(days=1))
+        self.old = Event.objects.create(name="menu_view", at=now - timedelta(days=400))
+
+    def test_event_list_is_time_bounded_by_default(self):
+        self.client.force_authenticate(user=self.staff)
+
+        response = self.client.get(reverse("event-list"))
+        self.assertEqual([row["id"] for row in response.data], [self.recent.id])
+
+        since = (timezone.localdate() - timedelta(days=500)).isoformat()
+        response = self.client.get(reverse("event-list"), {"since": since})
+        self.assertEqual(len(response.data), 2)
+
+    def test_retention_without_partitions_deletes_old_rows(self):
+        self.assertFalse(partitions.is_partitioned())
+        self.assertEqual(partitions.drop_old_partitions(12, dry_run=True), 1)
+
+        partitions.drop_old_partitions(12)
+
+        self.assertEqual(list(Event.objects.values_list("id", flat=True)), [self.recent.id])
+
+    def test_month_helpers(self):
+        self.assertEqual(partitions.add_months(date(2026, 11, 1), 3), date(2027, 2, 1))
+        self.assertEqual(partitions.partition_name(date(2027, 2, 1)), "core_event_p202702")
+        self.assertIn("-05:00", partitions.month_bound(date(2027, 2, 1)))
+
+
+class FunnelTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.restaurant = Restaurant.objects.create(name="Rest Funnel", slug="rest-funnel")
+        self.customers = [
+            Customer.objects.create(phone=f"30066600{i:02d}", name=f"Funnel {i}") for i in range(3)
+        ]
+        self.start = timezone.now() - timedelta(days=2)
+
+    def _event(self, customer, name, minutes):
+        Event.objects.create(name=name, customer=customer, at=self.start + timedelta(minutes=minutes))
+
+    def test_ordered_funnel_respects_sequence_and_window(self):
+        first, second, third = self.customers
+        for name, minutes in (("menu_view", 0), ("add_to_cart", 1), ("checkout", 2)):
+            self._event(first, name, minutes)
+        Order.objects.create(restaurant=self.restaurant, customer=first, subtotal_cop=10000)
+        Event.objects.filter(name="order_created").update(at=self.start + timedelta(minutes=5))
+        # add_to_cart antes del primer menu_view: no cuenta.
+        self._event(second, "add_to_cart", -10)
+        self._event(second, "menu_view", 0)
+        # add_to_cart fuera de la ventana de 24 h.
+        self._event(third, "menu_view", 0)
+        self._event(third, "add_to_cart", 25 * 60)
+
+        today = timezone.localdate()
+        result = funnel.compute_funnel(
+            funnel.DEFAULT_STEPS, today - timedelta(days=7), today, window_hours=24, chunk_size=2
+        )
+
+        self.assertEqual([row["count"] for row in result["steps"]], [3, 1, 1, 1])
+        self.assertEqual(result["steps"][1]["conversion_from_previous"], round(1 / 3, 4))
+        self.assertEqual(result["steps"][1]["time_from_previous"]["p50"], 60.0)
+        self.assertEqual(result["time_to_convert"]["count"], 1)
+        self.assertEqual(result["time_to_convert"]["p50"], 300.0)
+        self.assertEqual(sum(row["entered"] for row in result["cohorts"]), 3)
+        self.assertEqual(sum(row["steps"][-1] for row in result["cohorts"]), 1)
+
+    def test_funnel_endpoint_validates_and_caches(self):
+        client = APIClient()
+        client.force_authenticate(User.objects.create_user(username="funnel_admin", password="x", is_staff=True))
+        self._event(self.customers[0], "menu_view", 0)
+
+        response = client.get(reverse("funnel"), {"steps": "menu_view"})
+        self.assertEqual(response.status_code, 400)
+
+        response = client.get(reverse("funnel"), {"steps": "menu_view,add_to_cart"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["steps"][0]["count"], 1)
+
+        self._event(self.customers[1], "menu_view", 0)
+        response = client.get(reverse("funnel"), {"steps": "menu_view,add_to_cart"})
+        self.assertEqual(response.data["steps"][0]["count"], 1)
+
+
+class ExportTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(
+            User.objects.create_user(username="export_admin", password="pass1234", is_staff=True)
+        )
+        self.restaurant = Restaurant.objects.create(name="Rest Export", slug="rest-export")
+        self.other = Restaurant.objects.create(name="Rest Otro", slug="rest-otro")
+        self.orders = [
+            Order.objects.create(restaurant=self.restaurant, subtotal_cop=1000 * (i + 1))
+            for i in range(3)
+        ]
+        Order.objects.create(restaurant=self.other, subtotal_cop=5000)
+
+    def test_orders_csv_streams_filtered_rows(self):
+        response = self.client.get(
+            reverse("export-orders"), {"restaurant_id": self.restaurant.id, "status": "PENDING"}
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        lines = b"".join(response.streaming_content).decode().splitlines()
+        self.assertEqual(lines[0].split(",")[:2], ["id", "order_number"])
+        self.assertEqual(
+            [line.split(",")[1] for line in lines[1:]],
+            [o.order_number for o in self.orders],
+        )
+
+    def test_events_ndjson_gzip(self):
+        Event.objects.create(name="menu_view", meta={"a": 1})
+
+        response = self.client.get(
+            reverse("export-events"), {"output": "ndjson", "gzip": "1", "name": "menu_view"}
+        )
+
+        self.assertEqual(response["Content-Type"], "application/gzip")
+        self.assertIn(".ndjson.gz", response["Content-Disposition"])
+        rows = [
+            json.loads(line)
+            for line in gzip.decompress(b"".join(response.streaming_content)).splitlines()
+        ]
+        self.assertEqual([(r["name"], r["meta"]) for r in rows], [("menu_view", {"a": 1})])
+
+    def test_invalid_output_is_rejected(self):
+        response = self.client.get(reverse("export-orders"), {"output": "xml"})
+        self.assertEqual(response.status_code, 400)
+
+
+class OrderArchiveTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="archive_user", password="pass1234")
+        self.customer = Customer.objects.create(user=self.user, phone="3007770000", name="Archivo")
+        self.restaurant = Restaurant.objects.create(name="Rest Archivo", slug="rest-archivo")
+        self.soup = MenuItem.objects.create(restaurant=self.restaurant, name="Sopa", price_cop=9000)
+        self.completed = self._order(Order.STATUS_COMPLETED)
+        self.cancelled = self._order(Order.STATUS_CANCELLED)
+        self.pending = self._order(Order.STATUS_PENDING)
+        self.later = timezone.now() + timedelta(days=2)
+
+    def _order(self, status):
+        serializer = OrderCreateSerializer(data={
+            "restaurant": self.restaurant.id,
+            "customer": self.customer.id,
+            "items": [{"menu_item_id": self.soup.id, "quantity": 2}],
+        })
+        serializer.is_valid(raise_exception=True)
+        order = serializer.save()
+        order.status = status
+        order.save()
+        return order
+
+    def test_archive_moves_finished_orders_and_keeps_kpis(self):
+        today = timezone.localdate()
+        summary = kpi.sales_summary(today, restaurant_id=self.restaurant.id)
+        rollups = list(SalesRollup.objects.values_list("bucket", "orders_count", "revenue_cop"))
+
+        self.assertEqual(archive.archive_orders(1, now=self.later), 2)
+
+        self.assertEqual(list(Order.objects.values_list("id", flat=True)), [self.pending.id])
+        self.assertEqual(Event.objects.filter(name="order_created").count(), 1)
+        archived = ArchivedOrder.objects.get(order_number=self.completed.order_number)
+        self.assertEqual(archived.payload["items"][0]["quantity"], 2)
+        self.assertEqual(archived.payload["events"][0]["name"], "order_created")
+
+        after = kpi.sales_summary(today, restaurant_id=self.restaurant.id)
+        for key in ("total_orders", "total_revenue", "orders_by_status", "top_items"):
+            self.assertEqual(after[key], summary[key])
+
+        rebuild_sales_rollups()
+        bestsellers.rebuild_counters()
+        self.assertEqual(
+            list(SalesRollup.objects.values_list("bucket", "orders_count", "revenue_cop")), rollups
+        )
+        self.assertEqual(bestsellers.top_items(restaurant_id=self.restaurant.id), summary["top_items"])
+
+    def test_lookup_by_number_falls_back_to_archive(self):
+        archive.archive_orders(1, now=self.later)
+        client = APIClient()
+        url = reverse("order-by-number", args=[self.completed.order_number])
+
+        client.force_authenticate(user=self.user)
+        response = client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.data["archived"])
+        self.assertEqual(response.data["total_cop"], self.completed.total_cop)
+
+        response = client.get(reverse("order-by-number", args=[self.pending.order_number]))
+        self.assertFalse(response.data["archived"])
+
+        client.force_authenticate(user=User.objects.create_user(username="archive_other", password="x"))
+        self.assertEqual(client.get(url).status_code, 404)
+
+
+class CustomerHistoryTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="history_user", password="pass1234")
+        self.customer = Customer.objects.create(user=self.user, phone="3006660000", name="Historial")
+        self.restaurant = Restaurant.objects.create(name="Rest Historial", slug="rest-historial")
+        self.soup = MenuItem.objects.create(restaurant=self.restaurant, name="Sopa", price_cop=9000)
+
+    def _order(self, status, customer=None, quantity=1):
+        serializer = OrderCreateSerializer(data={
+            "restaurant": self.restaurant.id,
+            "customer": (customer or self.customer).id,
+            "items": [{"menu_item_id": self.soup.id, "quantity": quantity}],
+        })
+        serializer.is_valid(raise_exception=True)
+        order = serializer.save()
+        order.status = status
+        order.save()
+        return order
+
+    def _stats(self, customer=None):
+        customer = customer or self.customer
+        return Customer.objects.values_list(*customer_stats.STATS_FIELDS).get(pk=customer.pk)
+
+    def test_stats_follow_transitions_and_match_rebuild(self):
+        pending = self._order(Order.STATUS_PENDING)
+        self.assertEqual(self._stats(), (0, 0, pending.created_at))
+
+        done = self._order(Order.STATUS_COMPLETED, quantity=2)
+        pending.status = Order.STATUS_COMPLETED
+        pending.save(update_fields=["status"])
+        self.assertEqual(self._stats(), (2, done.total_cop + pending.total_cop, done.created_at))
+
+        done.status = Order.STATUS_CANCELLED
+        done.save()
+        other = Customer.objects.create(phone="3006660001", name="Otro")
+        pending.customer = other
+        pending.save(update_fields=["customer"])
+        self.assertEqual(self._stats()[:2], (0, 0))
+        self.assertEqual(self._stats(other), (1, pending.total_cop, pending.created_at))
+
+        # Archivar no cambia las estadísticas y rebuild las deja iguales.
+        incremental = [self._stats(), self._stats(other)]
+        archive.archive_orders(1, now=timezone.now() + timedelta(days=2))
+        customer_stats.rebuild()
+        self.assertEqual([self._stats()[:2], self._stats(other)], [incremental[0][:2], incremental[1]])
+
+        client = APIClient()
+        client.force_authenticate(user=User.objects.get(pk=self.user.pk))
+        stats = client.get(reverse("auth-me")).json()["user"]["customer_stats"]
+        self.assertEqual((stats["orders_count"], stats["lifetime_value_cop"]), (0, 0))
+        self.assertIsNotNone(stats["last_order_at"])
+
+    def test_me_orders_pages_by_keyset_across_archived_orders(self):
+        orders = [self._order(Order.STATUS_COMPLETED, quantity=i + 1) for i in range(5)]
+        Order.objects.filter(pk__in=[o.pk for o in orders[:2]]).update(created_at=orders[0].created_at)
+        self._order(Order.STATUS_PENDING, customer=Customer.objects.create(phone="3006660002"))
+        archive.archive_orders(1, now=timezone.now() + timedelta(days=2))
+        self.assertEqual(ArchivedOrder.objects.count(), 5)
+        latest = self._order(Order.STATUS_PENDING, quantity=3)
+
+        client = APIClient()
+        client.force_authenticate(user=self.user)
+        url = reverse("me-orders")
+        seen, cursor = [], None
+        while True:
+            with self.assertNumQueries(2):
+                response = client.get(url, {"limit": 2, **({"cursor": cursor} if cursor else {})})
+            self.assertEqual(response.status_code, 200)
+            seen.extend(response.data["results"])
+            cursor = response.data["next_cursor"]
+            if cursor is None:
+                break
+
+        expected = [latest.id] + [o.id for o in reversed(orders[2:])] + [orders[1].id, orders[0].id]
+        self.assertEqual([row["id"] for row in seen], expected)
+        self.assertEqual([row["archived"] for row in seen], [False] + [True] * 5)
+        self.assertEqual([row["items_count"] for row in seen], [3, 5, 4, 3, 2, 1])
+        self.assertEqual(client.get(url, {"cursor": "no-es-un-cursor"}).status_code, 400)
+        self.assertEqual(client.get(url, {"limit": 0}).status_code, 400)
+
+class PhoneLookupTests(TestCase):
+    def setUp(self):
+        self.restaurant = Restaurant.objects.create(name="Rest Tel", slug="rest-tel")
+        self.ana = Customer.objects.create(phone="+57 315 123-4567", name="Ana")
+        self.beto = Customer.objects.create(phone="3151299999", name="Beto")
+        DeliveryAddress.objects.create(customer=self.ana, label="Trabajo", address_line="Calle 9")
+        self.home = DeliveryAddress.objects.create(
+            customer=self.ana, label="Casa", address_line="Calle 1", lat="3.900123", lng="-76.3", is_default=True
+        )
+        Order.objects.create(restaurant=self.restaurant, customer=self.ana)
+        self.last = Order.objects.create(restaurant=self.restaurant, customer=self.ana, channel=Order.CHANNEL_PHONE)
+
+    def test_normalization_backfill_and_duplicate_registration(self):
+        for raw in ("3151234567", "+57 315 123 4567", "0057-315-123-4567", "57 3151234567", " 315.123.4567 "):
+            self.assertEqual(phones.normalize(raw), "+573151234567", raw)
+        self.assertEqual(phones.normalize("+1 (415) 555-0100"), "+14155550100")
+        for raw in ("", "12345", "m123", "+12"):
+            self.assertEqual(phones.normalize(raw), "", raw)
+        self.assertEqual(phones.normalize_prefix("315 12"), "+5731512")
+        self.assertEqual(phones.normalize_prefix("+1 415"), "+1415")
+        self.assertEqual(phones.normalize_prefix("31"), "")
+        # Un número nacional nunca empieza por 57: ahí es el código de país.
+        self.assertEqual(phones.normalize_prefix("57 315 123"), "+57315123")
+        self.assertEqual(phones.normalize_prefix("57315"), "+57315")
+        self.assertEqual(phones.normalize_prefix("573"), "+573")
+        self.assertEqual(phones.normalize_prefix("57 601"), "+57601")
+        self.assertEqual(phones.normalize_prefix("5712"), "+575712")  # 12… no es nacional: "57" es parte del número
+
+        self.assertEqual(self.ana.phone_e164, "+573151234567")
+        Customer.objects.filter(pk=self.beto.pk).update(phone_e164="")
+        self.assertEqual(customer_lookup.backfill(batch_size=1), 1)
+        self.assertEqual(Customer.objects.get(pk=self.beto.pk).phone_e164, "+573151299999")
+
+        serializer = AuthRegisterSerializer(data={
+            "username": "ana2", "phone": "315 123 4567", "password": "x-Segura-123", "password_confirm": "x-Segura-123"
+        })
+        self.assertFalse(serializer.is_valid())
+        self.assertIn("phone", serializer.errors)
+
+    def test_lookup_and_typeahead_return_context_in_one_query(self):
+        client = APIClient()
+        client.force_authenticate(User.objects.create_user(username="tel_staff", password="x", is_staff=True))
+        customer_lookup.typeahead("315")  # SQLite comprueba JSON1 en la primera consulta.
+
+        with self.assertNumQueries(1):
+            rows = customer_lookup.typeahead("315 12")
+        self.assertEqual([row["name"] for row in rows], ["Ana", "Beto"])
+        self.assertEqual(rows[0]["default_address"]["id"], self.home.id)
+        self.assertEqual((rows[0]["default_address"]["lat"], rows[0]["default_address"]["lng"]), ("3.900123", "-76.300000"))
+        self.assertEqual(rows[0]["last_order"]["id"], self.last.id)
+        self.assertIsNone(rows[1]["default_address"])
+        self.assertIsNone(rows[1]["last_order"])
+
+        response = client.get(reverse("customer-lookup"), {"phone": "0057 315 123 4567"})
+        self.assertEqual([row["id"] for row in response.json()], [self.ana.id])
+        self.assertEqual(response.json()[0]["last_order"]["channel"], Order.CHANNEL_PHONE)
+        response = client.get(reverse("customer-typeahead"), {"q": "+57 3151299", "limit": 5})
+        self.assertEqual([row["id"] for row in response.json()], [self.beto.id])
+        self.assertEqual(client.get(reverse("customer-typeahead"), {"q": "31"}).status_code, 400)
+        self.assertEqual(client.get(reverse("customer-lookup"), {"phone": "abc"}).status_code, 400)
+
+        self.assertEqual([row["name"] for row in customer_lookup.typeahead("57 315 12")], ["Ana", "Beto"])
+
+        # El inactivo no sale en el typeahead, pero lookup sí lo encuentra.
+        Customer.objects.filter(pk=self.beto.pk).update(is_active=False)
+        self.assertEqual([row["name"] for row in customer_lookup.typeahead("57315")], ["Ana"])
+        [row] = customer_lookup.lookup("315 129 9999")
+        self.assertEqual((row["id"], row["is_active"]), (self.beto.id, False))
+
+        client.force_authenticate(User.objects.create_user(username="tel_user", password="x"))
+        self.assertEqual(client.get(reverse("customer-typeahead"), {"q": "315"}).status_code, 403)
+
+class ApproximateCountTests(TestCase):
+    def setUp(self):
+        self.restaurant = Restaurant.objects.create(name="Rest Conteo", slug="rest-conteo")
+        self.customer = Customer.objects.create(phone="3005550000", name="Conteo")
+        for _ in range(5):
+            Order.objects.create(restaurant=self.restaurant, customer=self.customer)
+
+    @override_settings(APPROX_COUNT_THRESHOLD=1000)
+    def test_paginator_estimates_only_above_threshold(self):
+        orders = Order.objects.order_by("-id")
+        self.assertIsNone(pagination.estimate_count(orders))  # SQLite: sin estimación.
+        paginator = pagination.ApproximateCountPaginator(orders, 2)
+        self.assertEqual((paginator.count, paginator.is_approximate), (5, False))
+
+        with mock.patch("core.pagination.estimate_count", return_value=250_000):
+            paginator = pagination.ApproximateCountPaginator(orders, 2)
+            with self.assertNumQueries(0):
+                self.assertEqual((paginator.count, paginator.is_approximate), (250_000, True))
+            self.assertEqual(len(paginator.page(2).object_list), 2)
+        with mock.patch("core.pagination.estimate_count", return_value=900):
+            paginator = pagination.ApproximateCountPaginator(orders, 2)
+            self.assertEqual((paginator.count, paginator.is_approximate), (5, False))
+
+        # Con filtros la estimación del planner no basta: COUNT exacto con tope.
+        filtered = orders.filter(customer=self.customer)
+        with mock.patch("core.pagination.estimate_count", return_value=250_000):
+            paginator = pagination.ApproximateCountPaginator(filtered, 2)
+            with self.assertNumQueries(1):
+                self.assertEqual((paginator.count, paginator.is_approximate), (5, False))
+            with override_settings(APPROX_COUNT_THRESHOLD=3):
+                paginator = pagination.ApproximateCountPaginator(filtered, 2)
+                self.assertEqual((paginator.count, paginator.is_approximate), (250_000, True))
+
+    @override_settings(APPROX_COUNT_THRESHOLD=1000)
+    def test_api_pagination_is_opt_in_and_admin_uses_estimates(self):
+        staff = User.objects.create_superuser(username="conteo_admin", password="x", email="a@b.co")
+        client = APIClient()
+        client.force_authenticate(staff)
+        url = reverse("order-list")
+        self.assertEqual(len(client.get(url).json()), 5)
+
+        page = client.get(url, {"page_size": 2}).json()
+        self.assertEqual(
+            (page["count"], page["count_is_approximate"], len(page["results"])), (5, False, 2)
+        )
+        with mock.patch("core.pagination.estimate_count", return_value=250_000):
+            page = client.get(url, {"page": 2}).json()
+            self.assertEqual((page["count"], page["count_is_approximate"]), (250_000, True))
+
+            self.client.force_login(staff)
+            with testing.capture_queries() as log:
+                response = self.client.get(reverse("admin:core_order_changelist"))
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.context["cl"].result_count, 250_000)
+            self.assertFalse([q.sql for q in log.queries if "COUNT(" in q.sql.upper()])
+
+@override_settings(REPLICA_DATABASES=["replica"])
+class ReplicaRoutingTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        db_router._replica_status.clear()
+        self.factory = RequestFactory()
+        self.seen = []
+
+        def view(request):
+            if request.method == "POST":
+                router.db_for_write(Order)
+            self.seen.append((router.db_for_read(Order), router.db_for_read(UserSessionToken)))
+            return HttpResponse()
+
+        self.middleware = db_router.ReplicaRoutingMiddleware(view)
+
+    def _call(self, method, token="a"):
+        request = getattr(self.factory, method)("/api/orders/", HTTP_AUTHORIZATION=f"Token {token}")
+        self.middleware(request)
+        return self.seen[-1]
+
+    def test_reads_go_to_replica_until_the_client_writes(self):
+        self.assertEqual(self._call("get"), ("replica", "default"))
+        self.assertEqual(self._call("post"), ("default", "default"))
+        # Read-after-write: el mismo cliente lee del primario unos segundos.
+        self.assertEqual(self._call("get")[0], "default")
+        self.assertEqual(self._call("get", token="b")[0], "replica")
+        # Fuera de una petición (y sin replica_reads) todo va al primario.
+        self.assertEqual(router.db_for_read(Order), "default")
+
+    def test_lagging_replica_falls_back_to_primary(self):
+        with mock.patch.object(db_router, "replica_lag", return_value=30.0):
+            with db_router.replica_reads():
+                self.assertEqual(router.db_for_read(Order), "default")
+
+        db_router._replica_status.clear()
+        with db_router.replica_reads():
+            self.assertEqual(router.db_for_read(Order), "replica")
+
+
+class ReadinessTests(TestCase):
+    def setUp(self):
+        health._state = None
+        self.addCleanup(setattr, health, "_state", None)
+        self.calls = 0
+
+    def _redis_down(self):
+        self.calls += 1
+        raise ConnectionError("Connection refused")
+
+    def test_readyz_serves_cached_state_and_degrades_without_redis(self):
+        checks = (("db", health.check_database, True), ("redis", self._redis_down, False))
+        with mock.patch.object(health, "CHECKS", checks):
+            response = self.client.get(reverse("readyz"))
+            self.client.get(reverse("readyz"))
+
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual(data["status"], "degraded")
+        self.assertEqual(data["checks"]["db"]["status"], "ok")
+        self.assertEqual(data["checks"]["redis"]["status"], "down")
+        self.assertIn("latency_ms", data["checks"]["redis"])
+        # El segundo probe sale del estado en memoria, sin volver a comprobar.
+        self.assertEqual(self.calls, 1)
+
+    def test_readyz_fails_when_database_is_down(self):
+        def db_down():
+            raise OperationalError("could not connect")
+
+        with mock.patch.object(health, "CHECKS", (("db", db_down, True),)):
+            response = self.client.get(reverse("readyz"))
+
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response.json()["status"], "not-ready")
+
+    @override_settings(HEALTH_MONITOR_THREAD=True)
+    def test_stale_state_returns_503_without_checking_inline(self):
+        checks = (("db", self._redis_down, True),)
+        with mock.patch.object(health, "CHECKS", checks), mock.patch.object(health, "ensure_monitor"):
+            response = self.client.get(reverse("readyz"))
+            self.assertEqual((response.status_code, response.json()["status"]), (503, "stale"))
+
+            health.run_checks((("db", health.check_database, True),))
+            self.assertEqual(self.client.get(reverse("readyz")).status_code, 200)
+            health._state["monotonic"] -= 3600  # monitor atascado
+            response = self.client.get(reverse("readyz"))
+        self.assertEqual((response.status_code, response.json()["status"]), (503, "stale"))
+        self.assertEqual(response.json()["checks"]["db"]["status"], "ok")
+        self.assertEqual(self.calls, 0)
+
+
+class WarmupTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        health._state = None
+        self.addCleanup(setattr, health, "_state", None)
+        self.addCleanup(warmup._state.update, state=warmup.STATE_IDLE)
+
+    def test_readyz_waits_for_warmup_and_steps_fill_caches(self):
+        restaurant = Restaurant.objects.create(name="Rest Warm", slug="rest-warm")
+        MenuItem.objects.create(restaurant=restaurant, name="Sancocho", price_cop=15000)
+        warmup._state["state"] = warmup.STATE_RUNNING
+        checks = (("db", health.check_database, True),)
+
+        with mock.patch.object(health, "CHECKS", checks):
+            response = self.client.get(reverse("readyz"))
+            self.assertEqual((response.status_code, response.json()["status"]), (503, "warming-up"))
+
+            steps = warmup.run()
+            warmup._state["state"] = warmup.STATE_DONE
+            self.assertEqual(self.client.get(reverse("readyz")).status_code, 200)
+
+        self.assertEqual([name for name, result in steps.items() if "error" in result], [])
+        self.assertIsNotNone(cache.get(menu_snapshot.cache_key(restaurant.id)))
+
+    def test_failed_step_is_recorded_and_parse_importtime(self):
+        def broken():
+            raise RuntimeError("sin redis")
+
+        steps = warmup.run((("broken", broken), ("urls", warmup.warm_urls)))
+        self.assertEqual(steps["broken"]["error"], "RuntimeError: sin redis")
+        self.assertNotIn("error", steps["urls"])
+
+        stderr = (
+            "import time: self [us] | cumulative | imported package\n"
+            "import time:       120 |        500 | django\n"
+            "import time:        80 |         80 |   django.utils\n"
+        )
+        self.assertEqual(
+            warmup.parse_importtime(stderr), [("django", 120, 500, 0), ("django.utils", 80, 80, 1)]
+        )
+
+
+class RequestMetricsTests(TestCase):
+    def test_requests_are_recorded_per_route_with_query_counts(self):
+        staff = User.objects.create_user(username="metrics_staff", password="pass1234", is_staff=True)
+        Restaurant.objects.create(name="Rest Metrics", slug="rest-metrics")
+        self.client.force_login(staff)
+
+        self.client.get(reverse("restaurant-list"))
+        body = self.client.get(reverse("metrics")).content.decode()
+
+        self.assertIn(
+            'http_requests_total{route="restaurant-list",method="GET",status="200"}', body
+        )
+        self.assertIn(
+            'http_request_duration_seconds_bucket{route="restaurant-list",method="GET",le="+Inf"}', body
+        )
+        self.assertRegex(body, r'http_request_db_queries_sum\{route="restaurant-list",method="GET"\} [1-9]')
+        self.assertIn("# TYPE http_requests_in_flight gauge", body)
+
+    def test_collect_sums_worker_files_and_drops_dead_gauges(self):
+        with tempfile.TemporaryDirectory() as directory, override_settings(METRICS_DIR=directory):
+            worker = {
+                "t_total": {"type": "counter", "help": "t", "labelnames": ["route"], "samples": [[["a"], 5]]},
+                "t_inflight": {"type": "gauge", "help": "g", "labelnames": [], "samples": [[[], 3]]},
+            }
+            for pid in (os.getppid(), 2 ** 22 + 1):  # un proceso vivo y uno terminado
+                with open(os.path.join(directory, f"{pid}.json"), "w") as fh:
+                    json.dump(worker, fh)
+
+            merged = metrics.collect()
+
+        self.assertEqual(merged["t_total"]["samples"][("a",)], 10)
+        self.assertEqual(merged["t_inflight"]["samples"][()], 3)
+
+
+class AsyncReadViewTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.restaurant = Restaurant.objects.create(name="Rest Async", slug="rest-async")
+        self.user = User.objects.create_user(username="async_user", password="pass1234")
+        self.customer = Customer.objects.create(user=self.user, name="Async", phone="3007000000")
+        self.token = UserSessionToken.objects.create(user=self.user).key
+
+    def test_menu_snapshot_is_cached_and_invalidated_on_change(self):
+        mains = MenuCategory.objects.create(restaurant=self.restaurant, name="Corrientes")
+        hidden = MenuCategory.objects.create(restaurant=self.restaurant, name="Oculta", is_active=False)
+        dish = MenuItem.objects.create(restaurant=self.restaurant, category=mains, name="Bandeja", price_cop=18000)
+        MenuItem.objects.create(restaurant=self.restaurant, category=hidden, name="No sale", price_cop=1)
+        MenuItem.objects.create(restaurant=self.restaurant, name="Limonada", price_cop=4000)
+        url = reverse("async-menu", args=[self.restaurant.id])
+
+        data = self.client.get(url).json()
+        self.assertEqual([c["name"] for c in data["categories"]], ["Corrientes"])
+        self.assertEqual(data["categories"][0]["items"][0]["price_cop"], 18000)
+        self.assertEqual([i["name"] for i in data["uncategorized"]], ["Limonada"])
+
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get(url).json()["generated_at"], data["generated_at"])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            dish.price_cop = 19000
+            dish.save()
+        self.assertEqual(self.client.get(url).json()["categories"][0]["items"][0]["price_cop"], 19000)
+        self.assertEqual(self.client.get(reverse("async-menu", args=[self.restaurant.id + 99])).status_code, 404)
+
+    def test_order_status_and_me_match_the_drf_endpoints(self):
+        order = Order.objects.create(restaurant=self.restaurant, customer=self.customer, subtotal_cop=10000)
+        other = Order.objects.create(
+            restaurant=self.restaurant,
+            customer=Customer.objects.create(name="Otro", phone="3007000001"),
+        )
+        auth = {"HTTP_AUTHORIZATION": f"Token {self.token}"}
+
+        response = self.client.get(reverse("async-order-status", args=[order.id]), **auth)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["order_number"], order.order_number)
+        self.assertEqual(response.json()["status"], Order.STATUS_PENDING)
+        self.assertIsNone(response.json()["delivery_status"])
+        self.assertEqual(self.client.get(reverse("async-order-status", args=[other.id]), **auth).status_code, 404)
+        self.assertEqual(self.client.get(reverse("async-order-status", args=[order.id])).status_code, 403)
+
+        me = self.client.get(reverse("auth-me"), **auth).json()
+        self.assertEqual(self.client.get(reverse("async-auth-me"), **auth).json(), me)
+        bad = self.client.get(reverse("async-auth-me"), HTTP_AUTHORIZATION="Token nope")
+        self.assertEqual(bad.status_code, 403)
+
+    def test_async_cache_falls_back_to_the_django_cache(self):
+        async_to_sync(async_cache.aset)("async:test", b"valor", 30)
+        self.assertEqual(cache.get("async:test"), b"valor")
+        self.assertEqual(async_to_sync(async_cache.aget)("async:test"), b"valor")
+
+
+class FlakyEventSink(outbox.EventSink):
+    """Escribe el Event y luego falla: el savepoint debe deshacer la escritura."""
+
+    def deliver(self, message):
+        super().deliver(message)
+        raise ConnectionError("proveedor caído")
+
+
+class OutboxTests(TestCase):
+    def setUp(self):
+        self.restaurant = Restaurant.objects.create(name="Rest Outbox", slug="rest-outbox")
+        self.customer = Customer.objects.create(phone="3007770000", name="Outbox")
+        self.soup = MenuItem.objects.create(restaurant=self.restaurant, name="Sopa", price_cop=9000)
+
+    def _order(self):
+        serializer = OrderCreateSerializer(data={
+            "restaurant": self.restaurant.id,
+            "customer": self.customer.id,
+            "items": [{"menu_item_id": self.soup.id, "quantity": 1}],
+        })
+        serializer.is_valid(raise_exception=True)
+        return serializer.save()
+
+    def test_order_changes_are_enqueued_atomically_and_dispatched(self):
+        order = self._order()
+        order.status = Order.STATUS_IN_PROGRESS
+        order.save(update_fields=["status"])
+        order.internal_notes = "sin cambio de estado"
+        order.save()
+        with self.assertRaises(RuntimeError), transaction.atomic():
+            self._order()
+            raise RuntimeError("rollback")
+
+        messages = list(OutboxMessage.objects.order_by("id").values_list("topic", "payload__previous_status"))
+        self.assertEqual(messages, [(outbox.ORDER_CREATED, None), (outbox.ORDER_STATUS_CHANGED, Order.STATUS_PENDING)])
+
+        sent_before = metrics.snapshot("outbox_dispatched_total")
+        self.assertEqual(outbox.dispatch(), 2)
+        self.assertEqual(outbox.dispatch(), 0)
+        self.assertFalse(OutboxMessage.objects.exclude(status=OutboxMessage.STATUS_SENT).exists())
+        event = Event.objects.get(name="order_status_changed")
+        self.assertEqual((event.order_id, event.customer_id), (order.pk, self.customer.pk))
+        self.assertEqual((event.meta["from"], event.meta["to"]), (Order.STATUS_PENDING, Order.STATUS_IN_PROGRESS))
+        self.assertNotEqual(metrics.snapshot("outbox_dispatched_total"), sent_before)
+
+    @override_settings(OUTBOX_SINKS=["core.tests.FlakyEventSink"], OUTBOX_MAX_ATTEMPTS=2, OUTBOX_BACKOFF_BASE=30)
+    def test_failed_delivery_backs_off_then_goes_dead(self):
+        order = self._order()
+        order.status = Order.STATUS_CANCELLED
+        order.save()
+        OutboxMessage.objects.filter(topic=outbox.ORDER_CREATED).delete()
+
+        self.assertEqual(outbox.dispatch(), 1)
+        message = OutboxMessage.objects.get()
+        self.assertEqual((message.status, message.attempts), (OutboxMessage.STATUS_PENDING, 1))
+        self.assertIn("proveedor caído", message.last_error)
+        self.assertGreater(message.available_at, timezone.now() + timedelta(seconds=25))
+        self.assertFalse(Event.objects.filter(name="order_status_changed").exists())
+        self.assertEqual(outbox.dispatch(), 0)
+
+        OutboxMessage.objects.update(available_at=timezone.now())
+        self.assertEqual(outbox.dispatch(), 1)
+        message.refresh_from_db()
+        self.assertEqual((message.status, message.attempts), (OutboxMessage.STATUS_DEAD, 2))
+
+
+class OutboxAtomicityTests(TransactionTestCase):
+    """Sin la transacción envolvente de TestCase: cada save confirma por su cuenta."""
+
+    def test_status_change_is_not_saved_if_the_outbox_write_fails(self):
+        restaurant = Restaurant.objects.create(name="Rest Atomic", slug="rest-atomic")
+        customer = Customer.objects.create(phone="3007770001", name="Atomic")
+        soup = MenuItem.objects.create(restaurant=restaurant, name="Sopa", price_cop=9000)
+        order = Order.objects.create(restaurant=restaurant, customer=customer, subtotal_cop=9000)
+
+        order.status = Order.STATUS_COMPLETED
+        with mock.patch.object(outbox, "enqueue", side_effect=OperationalError("outbox caído")):
+            with self.assertRaises(OperationalError):
+                order.save()
+        order.refresh_from_db()
+        self.assertEqual(order.status, Order.STATUS_PENDING)
+        self.assertFalse(OutboxMessage.objects.filter(topic=outbox.ORDER_STATUS_CHANGED).exists())
+        # El delta de update_customer_stats (anterior a enqueue) también se deshizo.
+        customer.refresh_from_db()
+        self.assertEqual((customer.orders_count, customer.lifetime_value_cop), (0, 0))
+
+        # OrderItem.save: si falla el recálculo del pedido, la línea tampoco queda.
+        with mock.patch.object(customer_stats, "apply_order_change", side_effect=OperationalError("caído")):
+            with self.assertRaises(OperationalError):
+                OrderItem.objects.create(order=order, menu_item=soup, quantity=2)
+        self.assertFalse(OrderItem.objects.exists())
+        self.assertEqual(Order.objects.get(pk=order.pk).subtotal_cop, 9000)
+
+@jobs.job(name="tests_flaky")
+def flaky_job(fail=True):
+    if fail:
+        raise ConnectionError("servicio caído")
+    return {"ok": True}
+
+
+class JobTests(TestCase):
+    def test_keys_are_idempotent_and_periodic_jobs_run_once_per_window(self):
+        first = jobs.enqueue("rebuild_customer_stats", key="stats-1")
+        self.assertEqual(jobs.enqueue("rebuild_customer_stats", key="stats-1").pk, first.pk)
+        jobs.enqueue("rebuild_customer_stats")
+        self.assertEqual(Job.objects.filter(name="rebuild_customer_stats").count(), 2)
+        with self.assertRaises(LookupError):
+            jobs.enqueue("no_existe")
+
+        OTP.objects.create(phone="3008880000", code="123456", expires_at=timezone.now() - timedelta(minutes=1))
+        OTP.objects.create(phone="3008880000", code="654321", expires_at=timezone.now() + timedelta(minutes=5))
+        jobs.schedule_periodic()
+        jobs.schedule_periodic()
+        periodic = [spec.name for spec in jobs.registry.values() if spec.every]
+        self.assertIn("purge_otps", periodic)
+        self.assertEqual(Job.objects.filter(key__startswith="periodic:").count(), len(periodic))
+
+        Job.objects.exclude(name="purge_otps").update(status=Job.STATUS_DONE)
+        self.assertEqual(jobs.run_pending(), 1)
+        done = Job.objects.get(name="purge_otps")
+        self.assertEqual((done.status, done.result), (Job.STATUS_DONE, {"deleted": 1}))
+        self.assertEqual(OTP.objects.count(), 1)
+        jobs.schedule_periodic()
+        self.assertEqual(jobs.run_pending(), 0)
+
+    @override_settings(JOBS_BACKOFF_BASE=60)
+    def test_failures_back_off_and_stale_running_jobs_are_recovered(self):
+        job = jobs.enqueue("tests_flaky", max_attempts=2)
+        self.assertEqual(jobs.run_pending(), 1)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), (Job.STATUS_QUEUED, 1))
+        self.assertIn("servicio caído", job.last_error)
+        self.assertGreater(job.run_at, timezone.now() + timedelta(seconds=50))
+        self.assertEqual(jobs.run_pending(), 0)
+
+        Job.objects.filter(pk=job.pk).update(run_at=timezone.now())
+        jobs.run_pending()
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), (Job.STATUS_FAILED, 2))
+
+        # Un worker "caído": su plazo vence, otro lo reclama y el resultado tardío no pisa.
+        stale = jobs.enqueue("tests_flaky", {"fail": False})
+        [claimed] = jobs.claim(1, worker="caido:1")
+        Job.objects.filter(pk=stale.pk).update(expires_at=timezone.now() - timedelta(seconds=1))
+        self.assertEqual(jobs.requeue_stale(), 1)
+        [reclaimed] = jobs.claim(1, worker="vivo:2")
+        self.assertEqual(reclaimed.attempts, 2)
+        jobs.execute(claimed)
+        self.assertEqual(Job.objects.get(pk=stale.pk).status, Job.STATUS_RUNNING)
+        self.assertEqual(jobs.execute(reclaimed), "done")
+        stale.refresh_from_db()
+        self.assertEqual((stale.status, stale.result, stale.worker), (Job.STATUS_DONE, {"ok": True}, "vivo:2"))
+
+
+@override_settings(THROTTLE_ENABLED=True)
+class ThrottlingTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        throttling._denied.clear()
+        throttling._redis_down_until = 0.0
+        self.addCleanup(throttling._denied.clear)
+
+    def test_denied_login_returns_retry_after_and_repeats_are_answered_locally(self):
+        self.assertEqual(throttling.parse_rate("10/min"), (10, 60.0))
+        self.assertEqual(throttling.parse_rate("5/10s"), (5, 10.0))
+        with self.assertRaises(ValueError):
+            throttling.parse_rate("0/min")
+
+        script = mock.Mock(return_value=[0, 0])
+        payload = {"username": "Ana", "password": "mala"}
+        with mock.patch.object(throttling, "_bucket_script", return_value=script):
+            self.assertEqual(self.client.post(reverse("auth-login"), payload, format="json").status_code, 400)
+            keys = script.call_args.kwargs["keys"]
+            self.assertEqual([key.split(":")[2] for key in keys], ["ip", "username"])
+
+            script.return_value = [1500, 2]
+            response = self.client.post(reverse("auth-login"), {**payload, "username": "ANA"}, format="json")
+            self.assertEqual(response.status_code, 429)
+            self.assertEqual(response["Retry-After"], "2")
+            self.assertEqual(script.call_args.kwargs["keys"], keys)  # mismo bucket sin importar mayúsculas
+
+            # El bucket del username sigue vacío: se responde sin ir a Redis.
+            response = self.client.post(reverse("auth-login"), payload, format="json")
+            self.assertEqual(response.status_code, 429)
+            self.assertEqual(script.call_count, 2)
+
+    def test_order_create_is_limited_per_user_and_redis_errors_fail_open(self):
+        user = User.objects.create_user(username="cliente", password="pass1234")
+        restaurant = Restaurant.objects.create(name="Rest T", slug="rest-t")
+        customer = Customer.objects.create(user=user, phone="3000000099", name="C")
+        self.client.force_authenticate(user=user)
+        payload = {"restaurant": restaurant.id, "customer": customer.id, "items": []}
+
+        script = mock.Mock(return_value=[3000, 1])
+        with mock.patch.object(throttling, "_bucket_script", return_value=script):
+            self.assertEqual(self.client.get(reverse("order-list")).status_code, 200)
+            self.assertFalse(script.called)
+            self.assertEqual(self.client.post(reverse("order-list"), payload, format="json").status_code, 429)
+            self.assertEqual([key.split(":")[2] for key in script.call_args.kwargs["keys"]], ["user", "ip"])
+
+        throttling._denied.clear()
+        script = mock.Mock(side_effect=ConnectionError("redis caído"))
+        with mock.patch.object(throttling, "_bucket_script", return_value=script), self.assertLogs("core.throttling", "WARNING"):
+            self.assertNotEqual(self.client.post(reverse("order-list"), payload, format="json").status_code, 429)
+        with mock.patch.object(throttling, "_bucket_script", return_value=script):
+            # Circuito abierto: durante THROTTLE_ERROR_BACKOFF ni se intenta.
+            self.assertNotEqual(self.client.post(reverse("order-list"), payload, format="json").status_code, 429)
+        self.assertEqual(script.call_count, 1)
+
+
+class PayloadEncodingTests(TestCase):
+    @skipUnless(renderers.orjson, "orjson no instalado")
+    def test_fast_json_matches_drf_output_and_parser_errors(self):
+        data = {
+            "at": timezone.now(),
+            "price": Decimal("12.50"),
+            "label": gettext_lazy("Pendiente"),
+            1: ["línea\u2028", None, 3.5],
+        }
+        self.assertEqual(renderers.FastJSONRenderer().render(data), JSONRenderer().render(data))
+
+        parser = renderers.FastJSONParser()
+        self.assertEqual(parser.parse(io.BytesIO('{"a": "ñ"}'.encode())), {"a": "ñ"})
+        with self.assertRaises(ParseError):
+            parser.parse(io.BytesIO(b'{"a": NaN}'))
+        with override_settings(JSON_BACKEND="stdlib"):
+            self.assertEqual(renderers.backend(), "stdlib")
+            self.assertEqual(parser.parse(io.BytesIO(b"[1]")), [1])
+
+    def test_responses_are_compressed_by_negotiation_above_threshold(self):
+        restaurant = Restaurant.objects.create(name="Rest Gzip", slug="rest-gzip")
+        MenuItem.objects.bulk_create(
+            MenuItem(restaurant=restaurant, name=f"Plato {i}", price_cop=9000) for i in range(30)
+        )
+        url = reverse("menuitem-list")
+        plain = self.client.get(url)
+
+        response = self.client.get(url, HTTP_ACCEPT_ENCODING="br;q=0.5, gzip")
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertIn("Accept-Encoding", response["Vary"])
+        self.assertEqual(json.loads(gzip.decompress(response.content)), plain.json())
+        self.assertLess(len(response.content), len(plain.content) / 3)
+
+        small = self.client.get(reverse("healthz"), HTTP_ACCEPT_ENCODING="gzip")
+        self.assertFalse(small.has_header("Content-Encoding"))
+        self.assertIsNone(compression.choose_encoding("identity, gzip;q=0"))
+        expected = "br" if compression.brotli is not None else "gzip"
+        self.assertEqual(compression.choose_encoding("gzip, br"), expected)
+        self.assertEqual(compression.choose_encoding("*"), expected)
+
+    def test_msgpack_round_trip_keeps_decimals_and_datetimes(self):
+        at = timezone.now()
+        data = {"at": at, "lat": Decimal("3.900123"), "label": gettext_lazy("Pendiente"), "items": [1, None]}
+        body = renderers.MsgPackRenderer().render(data)
+        self.assertEqual(
+            renderers.MsgPackParser().parse(io.BytesIO(body)),
+            json.loads(JSONRenderer().render(data)),
+        )
+        with self.assertRaises(ParseError):
+            renderers.MsgPackParser().parse(io.BytesIO(b"\xc1"))
+
+        client = APIClient()
+        client.force_authenticate(User.objects.create_user(username="pos", password="x", is_staff=True))
+        restaurant = Restaurant.objects.create(name="Rest Pack", slug="rest-pack")
+        customer = Customer.objects.create(phone="3001112233", name="Pack")
+        driver = Driver.objects.create(restaurant=restaurant, name="Moto", phone="3001")
+        order = Order.objects.create(restaurant=restaurant, customer=customer)
+
+        response = client.post(
+            reverse("address-list"),
+            {"customer": customer.id, "label": "Casa", "address_line": "Calle 3", "lat": 3.900123, "lng": "-76.3"},
+            format="msgpack",
+            HTTP_ACCEPT="application/msgpack",
+        )
+        self.assertEqual(response.status_code, 201, response.content)
+        self.assertEqual(response["Content-Type"], "application/msgpack")
+        created = msgpack.unpackb(response.content)
+        self.assertEqual((created["lat"], created["lng"]), ("3.900123", "-76.300000"))
+
+        response = client.post(
+            reverse("delivery-list"),
+            {"order": order.id, "driver": driver.id, "distance_km": "4.25", "started_at": at},
+            format="msgpack",
+        )
+        self.assertEqual(response.status_code, 201, response.content)
+        delivery = Delivery.objects.get(order=order)
+        self.assertEqual(delivery.distance_km, Decimal("4.25"))
+        self.assertEqual(delivery.started_at, at)
+        listed = client.get(reverse("delivery-list"), HTTP_ACCEPT="application/msgpack")
+        self.assertEqual(msgpack.unpackb(listed.content), client.get(reverse("delivery-list")).json())
+
+
+class QueryBudgetTests(TestCase):
+    """
+    Coste en SQL de cada list/create del router: el número de consultas no
+    puede crecer con las filas y cada endpoint tiene su presupuesto.
+    Un endpoint nuevo en core/urls.py debe añadirse a ambas tablas.
+    """
+
+    LIST_BUDGETS = {
+        "restaurant": 1,
+        "deliveryzone": 1,
+        "customer": 1,
+        "address": 1,
+        "category": 1,
+        "menuitem": 1,
+        "coupon": 1,
+        "dailylimit": 1,
+        "driver": 1,
+        "order": 3,
+        "orderitem": 1,
+        "delivery": 1,
+        "event": 1,
+    }
+    CREATE_BUDGETS = {
+        "restaurant": 2,
+        "deliveryzone": 3,
+        "customer": 2,
+        "address": 3,
+        "category": 3,
+        "menuitem": 4,
+        "coupon": 3,
+        "dailylimit": 3,
+        "driver": 3,
+        "order": 13,
+        "orderitem": 7,
+        "delivery": 4,
+        "event": 2,
+    }
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(
+            User.objects.create_user(username="budget_staff", password="pass1234", is_staff=True)
+        )
+        self.restaurant = Restaurant.objects.create(name="Rest Budget", slug="rest-budget")
+        self.category = MenuCategory.objects.create(restaurant=self.restaurant, name="Platos")
+        self.customer = Customer.objects.create(phone="3009990000", name="Budget")
+        self.driver = Driver.objects.create(restaurant=self.restaurant, name="Driver", phone="3009990001")
+        self.order = self._make_order(0)
+        self.seq = 0
+
+    def _next(self):
+        self.seq += 1
+        return self.seq
+
+    def _make_menu_item(self, i):
+        return MenuItem.objects.create(
+            restaurant=self.restaurant, category=self.category, name=f"Plato {i}", price_cop=1000
+        )
+
+    def _make_order(self, i):
+        order = Order.objects.create(restaurant=self.restaurant, customer=self.customer)
+        for j in range(2):
+            OrderItem.objects.create(order=order, menu_item=self._make_menu_item(f"{i}-{j}"), quantity=1)
+        Delivery.objects.create(order=order, driver=self.driver)
+        return order
+
+    def _add_rows(self, basename, count):
+        restaurant = self.restaurant
+        for _ in range(count):
+            i = self._next()
+            {
+                "restaurant": lambda: Restaurant.objects.create(name=f"R{i}", slug=f"r-{i}"),
+                "deliveryzone": lambda: DeliveryZone.objects.create(restaurant=restaurant, name=f"Z{i}"),
+                "customer": lambda: Customer.objects.create(phone=f"31{i:08d}", name=f"C{i}"),
+                "address": lambda: DeliveryAddress.objects.create(
+                    customer=self.customer, label=f"Casa {i}", address_line="Calle 1"
+                ),
+                "category": lambda: MenuCategory.objects.create(restaurant=restaurant, name=f"Cat {i}"),
+                "menuitem": lambda: self._make_menu_item(i),
+                "coupon": lambda: Coupon.objects.create(restaurant=restaurant, code=f"BUDGET{i}"),
+                "dailylimit": lambda: DailyLimit.objects.create(
+                    restaurant=restaurant, date=date(2030, 1, 1) + timedelta(days=i), max_orders=10
+                ),
+                "driver": lambda: Driver.objects.create(restaurant=restaurant, name=f"D{i}", phone=str(i)),
+                "order": lambda: self._make_order(i),
+                "orderitem": lambda: OrderItem.objects.create(
+                    order=self.order, menu_item=self._make_menu_item(i), quantity=1
+                ),
+                "delivery": lambda: Delivery.objects.create(
+                    order=Order.objects.create(restaurant=restaurant, customer=self.customer),
+                    driver=self.driver,
+                ),
+                "event": lambda: Event.objects.create(name="checkout", customer=self.customer, order=self.order),
+            }[basename]()
+
+    def _create_payload(self, basename):
+        i = self._next()
+        restaurant = self.restaurant.id
+        return {
+            "restaurant": lambda: {"name": f"R{i}", "slug": f"r-{i}"},
+            "deliveryzone": lambda: {"restaurant": restaurant, "name": f"Z{i}"},
+            "customer": lambda: {"phone": f"32{i:08d}", "name": f"C{i}"},
+            "address": lambda: {"customer": self.customer.id, "label": "Casa", "address_line": "Calle 2"},
+            "category": lambda: {"restaurant": restaurant, "name": f"Cat {i}"},
+            "menuitem": lambda: {
+                "restaurant": restaurant, "category": self.category.id, "name": f"P{i}", "price_cop": 5000
+            },
+            "coupon": lambda: {
+                "restaurant": restaurant, "code": f"NEW{i}", "discount_type": "percent", "percent_off": 10
+            },
+            "dailylimit": lambda: {"restaurant": restaurant, "date": f"2031-01-{i % 28 + 1:02d}", "max_orders": 5},
+            "driver": lambda: {"restaurant": restaurant, "name": f"D{i}", "phone": "3001"},
+            "order": lambda: {
+                "restaurant": restaurant,
+                "customer": self.customer.id,
+                "items": [{"menu_item_id": self._make_menu_item(i).id, "quantity": 2}],
+            },
+            "orderitem": lambda: {
+                "order": self.order.id, "menu_item": self._make_menu_item(i).id, "quantity": 1
+            },
+            "delivery": lambda: {
+                "order": Order.objects.create(restaurant=self.restaurant, customer=self.customer).id,
+                "driver": self.driver.id,
+            },
+            "event": lambda: {"name": "checkout", "customer": self.customer.id},
+        }[basename]()
+
+    def test_every_router_endpoint_has_a_budget(self):
+        basenames = {basename for _, _, basename in api_router.registry}
+        self.assertEqual(set(self.LIST_BUDGETS), basenames)
+        self.assertEqual(set(self.CREATE_BUDGETS), basenames)
+
+    def test_list_endpoints_do_not_scale_with_rows(self):
+        for basename, budget in self.LIST_BUDGETS.items():
+            with self.subTest(endpoint=f"{basename}-list"):
+                url = reverse(f"{basename}-list")
+                testing.assert_constant_queries(
+                    lambda: self.client.get(url),
+                    lambda count: self._add_rows(basename, count),
+                    n=4,
+                )
+                with testing.query_budget(budget):
+                    response = self.client.get(url)
+                self.assertEqual(response.status_code, 200)
+
+    def test_create_endpoints_stay_within_budget(self):
+        for basename, budget in self.CREATE_BUDGETS.items():
+            with self.subTest(endpoint=f"{basename}-create"):
+                payload = self._create_payload(basename)
+                with testing.query_budget(budget):
+                    response = self.client.post(reverse(f"{basename}-list"), payload, format="json")
+                self.assertEqual(response.status_code, 201, response.content)
+
+    def test_every_router_endpoint_speaks_msgpack(self):
+        for basename in self.LIST_BUDGETS:
+            with self.subTest(endpoint=basename):
+                response = self.client.post(
+                    reverse(f"{basename}-list"),
+                    self._create_payload(basename),
+                    format="msgpack",
+                    HTTP_ACCEPT="application/msgpack",
+                )
+                self.assertEqual(response.status_code, 201, response.content)
+                self.assertEqual(response["Content-Type"], "application/msgpack")
+
+                url = reverse(f"{basename}-list")
+                packed = self.client.get(url, HTTP_ACCEPT="application/msgpack")
+                self.assertEqual(msgpack.unpackb(packed.content), self.client.get(url).json())
+
+    def test_order_create_does_not_scale_with_lines(self):
+        payload = {"restaurant": self.restaurant.id, "customer": self.customer.id, "items": []}
+
+        def add_lines(count):
+            for _ in range(count):
+                payload["items"].append({"menu_item_id": self._make_menu_item(self._next()).id, "quantity": 1})
+
+        def create():
+            response = self.client.post(reverse("order-list"), payload, format="json")
+            self.assertEqual(response.status_code, 201, response.content)
+
+        log = testing.assert_constant_queries(create, add_lines, n=5)
+        self.assertLessEqual(len(log), self.CREATE_BUDGETS["order"])
+
+    def test_helpers_report_n_plus_one_and_repeats_with_stack(self):
+        def names():
+            return [item.category.name for item in MenuItem.objects.all()]
+
+        with self.assertRaisesRegex(AssertionError, r"crece con las filas(.|\n)*core/tests.py"):
+            testing.assert_constant_queries(names, lambda count: self._add_rows("menuitem", count))
+
+        with self.assertRaisesRegex(AssertionError, "Repetida 2 veces"):
+            with testing.query_budget(10):
+                Restaurant.objects.filter(pk=self.restaurant.pk).first()
+                Restaurant.objects.filter(pk=self.restaurant.pk).first()
+
+        with self.assertRaisesRegex(AssertionError, "Presupuesto de 1 consultas"):
+            with testing.query_budget(1):
+                list(Restaurant.objects.all())
+                list(MenuItem.objects.all())
+
+
+class BenchmarkTests(TestCase):
+    def test_inprocess_run_covers_scenarios_without_errors(self):
+        from noah_food.asgi import application
+
+        fixtures = benchmark.seed(customers=2, orders=4, kitchen_orders=benchmark.kitchen_orders_needed(6, 1))
+        result = benchmark.run(
+            benchmark.ASGITransport(application),
+            fixtures,
+            [
+                "login", "menu", "order_create_5", "kitchen", "orders_customer", "me_orders", "sales_summary",
+                "menu_async", "order_status_async", "me_async", "readyz",
+            ],
+            requests=6,
+            concurrency=[2],
+            warmup=1,
+        )
+
+        self.assertEqual(
+            list(result["scenarios"]),
+            [
+                "menu", "menu_async", "orders_customer", "me_orders", "order_status_async", "me_async", "readyz",
+                "sales_summary", "login", "order_create_5", "kitchen",
+            ],
+        )
+        for name, levels in result["scenarios"].items():
+            data = levels["2"]
+            self.assertEqual((data["requests"], data["errors"]), (6, 0), name)
+            self.assertLessEqual(data["latency_ms"]["p50"], data["latency_ms"]["p99"])
+        self.assertEqual(Order.objects.filter(items__isnull=False).distinct().count(), 4 + 3 + 7)
+        self.assertEqual(json.loads(json.dumps(result))["meta"]["concurrency"], [2])
+
+    def test_percentiles_and_comparison(self):
+        values = sorted(range(1, 101))
+        self.assertEqual(
+            [benchmark.percentile(values, q) for q in (50, 95, 99)], [50, 95, 99]
+        )
+        self.assertIsNone(benchmark.percentile([], 50))
+
+        def result(rps, p50):
+            latency = {"p50": p50, "p95": p50 * 2, "p99": p50 * 3}
+            return {"scenarios": {"menu": {"10": {"throughput_rps": rps, "latency_ms": latency}}}}
+
+        rows = benchmark.compare(result(100, 10), result(150, 5))
+        self.assertIn(("menu", "10", "throughput_rps", 100, 150, 50.0), rows)
+        self.assertIn(("menu", "10", "p50", 10, 5, -50.0), rows)
+
+
+class DataGeneratorTests(TestCase):
+    SCALE = datagen.Scale(restaurants=2, menu_items=12, customers=40, orders=300, days=14, abandoned_ratio=1)
+
+    def _generate(self):
+        before = set(Restaurant.objects.values_list("id", flat=True))
+        datagen.generate(self.SCALE, seed=3, end_date=date(2026, 3, 2), chunk_size=120)
+        return Order.objects.exclude(restaurant_id__in=before).order_by("id")
+
+    def test_same_seed_produces_the_same_dataset(self):
+        fields = ("created_at", "status", "channel", "subtotal_cop", "total_cop", "completed_at")
+        first = list(self._generate().values_list(*fields))
+        second = list(self._generate().values_list(*fields))
+
+        self.assertEqual(len(first), 300)
+        self.assertEqual(first, second)
+
+    def test_orders_are_consistent_and_follow_the_daily_curve(self):
+        orders = self._generate()
+
+        mismatched = orders.annotate(lines=Sum("items__line_total_cop")).exclude(subtotal_cop=F("lines"))
+        self.assertFalse(mismatched.exists())
+        self.assertFalse(
+            orders.exclude(total_cop=F("subtotal_cop") + F("delivery_fee_cop") - F("discount_cop")).exists()
+        )
+        completed = orders.filter(status=Order.STATUS_COMPLETED)
+        self.assertEqual(
+            SalesRollup.objects.filter(restaurant__in=orders.values("restaurant")).aggregate(
+                total=Sum("revenue_cop")
+            )["total"],
+            completed.aggregate(total=Sum("total_cop"))["total"],
+        )
+        self.assertFalse(completed.filter(completed_at__isnull=True).exists())
+        self.assertEqual(
+            Event.objects.filter(name="order_created", order__in=orders).count(), orders.count()
+        )
+
+        hours = [timezone.localtime(at).hour for at in orders.values_list("created_at", flat=True)]
+        self.assertGreater(sum(12 <= h < 14 for h in hours), 5 * sum(h < 6 for h in hours))
+
+
+class MicrobenchTests(TestCase):
+    def test_query_counts_match_the_committed_baseline(self):
+        baseline = microbench.load_baseline().get("sqlite")
+        self.assertIsNotNone(baseline, "Falta la línea base de sqlite (manage.py microbench --update-baseline).")
+
+        _, results = microbench.run(scale=0.05)
+
+        self.assertEqual({r.name for r in results}, set(baseline["results"]))
+        # Solo consultas: el tiempo depende de la máquina que ejecuta los tests.
+        inf = float("inf")
+        self.assertEqual(microbench.compare(results, baseline, time_threshold=inf, alloc_threshold=inf), [])
+        self.assertFalse(Order.objects.exists())  # cada benchmark se revierte
+
+    def test_compare_applies_thresholds(self):
+        baseline = {"results": {"op": {"units": 1.0, "queries": 3, "alloc_kib": 10.0}}}
+
+        def result(units, queries, alloc):
+            return [microbench.Result("op", 10, 0, units, queries, alloc)]
+
+        self.assertEqual(microbench.compare(result(1.3, 3, 12), baseline), [])
+        self.assertEqual(
+            microbench.compare(result(1.5, 4, 16), baseline),
+            [("op", "queries", 3, 4), ("op", "units", 1.0, 1.5), ("op", "alloc_kib", 10.0, 16)],
+        )
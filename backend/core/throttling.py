@@ -0,0 +1,223 @@
+# core/throttling.py
+"""
+Throttling compartido por todos los pods: token bucket en Redis.
+
+Cada vista declara `throttle_scope` y THROTTLE_POLICIES[scope] limita por
+una o varias dimensiones: ip, username, phone, user, token
+({"ip": "30/min", "username": "10/min"}). Un script Lua revisa todos los
+buckets de la petición en un solo viaje, con el reloj de Redis (el mismo
+para todos los pods): si alguno no tiene ficha no descuenta ninguno y
+devuelve la espera, que DRF envía como `Retry-After` con un 429.
+
+Camino rápido:
+- sin política para el scope (o THROTTLE_ENABLED=False) no se toca Redis;
+- un bucket denegado se recuerda en el proceso hasta que vuelva a tener
+  ficha (los demás pods solo pueden gastar más), así que una ráfaga
+  abusiva no llega a Redis;
+- si Redis falla se deja pasar (fail-open) y se deja de consultar durante
+  THROTTLE_ERROR_BACKOFF segundos.
+"""
+import hashlib
+import logging
+import re
+import threading
+import time
+
+from django.conf import settings
+from rest_framework.throttling import BaseThrottle
+
+from . import metrics, phones
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = "throttle"
+MAX_LOCAL_DENIALS = 10_000
+
+_RATE_RE = re.compile(r"^\s*(\d+)\s*/\s*(\d*)\s*(s|sec|second|m|min|minute|h|hour|d|day)\s*$")
+_PERIODS = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+
+decisions = metrics.counter(
+    "throttle_decisions_total",
+    "Decisiones del throttle por scope y resultado (allowed, throttled, throttled_local, error).",
+    ("scope", "result"),
+)
+check_seconds = metrics.histogram(
+    "throttle_check_seconds",
+    "Latencia de la consulta del token bucket en Redis.",
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.5),
+)
+
+# KEYS: un bucket por dimensión. ARGV: capacidad, fichas por ms y coste de
+# cada bucket, en el orden de KEYS. Devuelve {0, 0} o {espera_ms, índice}.
+_BUCKET_SCRIPT = """
+local t = redis.call('TIME')
+local now = tonumber(t[1]) * 1000 + math.floor(tonumber(t[2]) / 1000)
+local wait, worst = 0, 0
+local levels = {}
+for i, key in ipairs(KEYS) do
+  local capacity = tonumber(ARGV[i * 3 - 2])
+  local rate = tonumber(ARGV[i * 3 - 1])
+  local cost = tonumber(ARGV[i * 3])
+  local state = redis.call('HMGET', key, 'tokens', 'ts')
+  local tokens = tonumber(state[1]) or capacity
+  local ts = tonumber(state[2]) or now
+  tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+  levels[i] = tokens
+  if tokens < cost then
+    local need = math.ceil((cost - tokens) / rate)
+    if need > wait then wait, worst = need, i end
+  end
+end
+if wait > 0 then return {wait, worst} end
+for i, key in ipairs(KEYS) do
+  local capacity = tonumber(ARGV[i * 3 - 2])
+  local rate = tonumber(ARGV[i * 3 - 1])
+  local tokens = levels[i] - tonumber(ARGV[i * 3])
+  redis.call('HSET', key, 'tokens', string.format('%.6f', tokens), 'ts', now)
+  redis.call('PEXPIRE', key, math.ceil((capacity - tokens) / rate) + 1000)
+end
+return {0, 0}
+"""
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+def parse_rate(rate):
+    """"10/min" -> (10, 60.0); "5/10s" -> (5, 10.0)."""
+    match = _RATE_RE.match(rate or "")
+    if not match:
+        raise ValueError(f"Tasa de throttling inválida: {rate!r}")
+    count, multiplier, unit = match.groups()
+    if int(count) < 1:
+        raise ValueError(f"Tasa de throttling inválida: {rate!r}")
+    return int(count), float(int(multiplier or 1) * _PERIODS[unit[0]])
+
+
+_policies = {}
+
+
+def policy(scope):
+    """[(dimensión, capacidad, fichas por ms)] del scope, o [] si no se limita."""
+    rules = tuple((_setting("THROTTLE_POLICIES", {}).get(scope) or {}).items())
+    if rules not in _policies:
+        parsed = []
+        for dimension, rate in rules:
+            count, period = parse_rate(rate)
+            parsed.append((dimension, count, count / (period * 1000)))
+        _policies[rules] = parsed
+    return _policies[rules]
+
+
+# --------- REDIS --------- #
+
+_lock = threading.Lock()
+_script = None
+_redis_down_until = 0.0
+_denied = {}  # clave del bucket -> time.monotonic() hasta el que sigue vacío
+
+
+def _bucket_script():
+    global _script
+    if _script is None:
+        with _lock:
+            if _script is None:
+                from .redis_client import get_redis
+
+                _script = get_redis().register_script(_BUCKET_SCRIPT)
+    return _script
+
+
+def consume(scope, buckets):
+    """
+    Gasta una ficha de cada bucket [(clave, capacidad, fichas por ms)] si
+    todos tienen; devuelve 0 o los segundos hasta que la petición pase.
+    """
+    global _redis_down_until
+    now = time.monotonic()
+    local_wait = max(_denied.get(key, 0.0) - now for key, _, _ in buckets)
+    if local_wait > 0:
+        decisions.inc(scope=scope, result="throttled_local")
+        return local_wait
+    if now < _redis_down_until:
+        decisions.inc(scope=scope, result="error")
+        return 0
+
+    args = []
+    for _, capacity, rate in buckets:
+        args += [capacity, repr(rate), 1]
+    started = time.monotonic()
+    try:
+        wait_ms, worst = _bucket_script()(keys=[key for key, _, _ in buckets], args=args)
+    except Exception:
+        # Sin Redis no se bloquea el login ni los pedidos.
+        _redis_down_until = time.monotonic() + _setting("THROTTLE_ERROR_BACKOFF", 5)
+        decisions.inc(scope=scope, result="error")
+        logger.warning("Throttling sin Redis: se deja pasar (scope %s)", scope, exc_info=True)
+        return 0
+    check_seconds.observe(time.monotonic() - started)
+
+    if not wait_ms:
+        decisions.inc(scope=scope, result="allowed")
+        return 0
+    wait = int(wait_ms) / 1000
+    if len(_denied) >= MAX_LOCAL_DENIALS:
+        _denied.clear()
+    _denied[buckets[int(worst) - 1][0]] = now + wait
+    decisions.inc(scope=scope, result="throttled")
+    return wait
+
+
+# --------- DRF --------- #
+
+def _digest(value):
+    # Claves de largo fijo y sin usuarios/teléfonos/tokens en claro en Redis.
+    return hashlib.blake2b(str(value).encode(), digest_size=12).hexdigest()
+
+
+class TokenBucketThrottle(BaseThrottle):
+    """Throttle de DRF para vistas con `throttle_scope` (ver THROTTLE_POLICIES)."""
+
+    def __init__(self):
+        self._wait = None
+
+    def _body_value(self, request, field):
+        # Un cuerpo inválido lanza ParseError aquí: el mismo 400 que daría la vista.
+        data = request.data
+        value = data.get(field) if hasattr(data, "get") else None
+        return value.strip() if isinstance(value, str) and value.strip() else None
+
+    def identity(self, request, dimension):
+        if dimension == "ip":
+            return self.get_ident(request)
+        if dimension == "username":
+            username = self._body_value(request, "username")
+            return username.lower() if username else None
+        if dimension == "phone":
+            raw = self._body_value(request, "phone")
+            return (phones.normalize(raw) or raw) if raw else None
+        if dimension == "user":
+            user = getattr(request, "user", None)
+            return user.pk if user is not None and user.is_authenticated else None
+        if dimension == "token":
+            return getattr(request.auth, "key", None)
+        raise ValueError(f"Dimensión de throttling desconocida: {dimension}")
+
+    def allow_request(self, request, view):
+        if not _setting("THROTTLE_ENABLED", True):
+            return True
+        scope = getattr(view, "throttle_scope", None)
+        rules = policy(scope) if scope else []
+        buckets = []
+        for dimension, capacity, rate in rules:
+            value = self.identity(request, dimension)
+            if value is not None:
+                buckets.append((f"{KEY_PREFIX}:{scope}:{dimension}:{_digest(value)}", capacity, rate))
+        if not buckets:
+            return True
+        self._wait = consume(scope, buckets)
+        return not self._wait
+
+    def wait(self):
+        return self._wait
@@ -1,13 +1,14 @@
 # core/urls.py
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from . import views
+from . import async_views, views
 
 from .views import (
     AuthLoginView,
     AuthLogoutView,
     AuthMeView,
     AuthRegisterView,
+    MeOrdersView,
     RestaurantViewSet,
     DeliveryZoneViewSet,
     CustomerViewSet,
@@ -22,6 +23,12 @@ from .views import (
     DeliveryViewSet,
     EventViewSet,
     SalesSummaryView,
+    SalesTimeseriesView,
+    TopItemsView,
+    FunnelView,
+    KpiCacheStatsView,
+    OrderExportView,
+    EventExportView,
 )
 
 router = DefaultRouter()
@@ -44,6 +51,17 @@ urlpatterns = [
     path("auth/register/", AuthRegisterView.as_view(), name="auth-register"),
     path("auth/logout/", AuthLogoutView.as_view(), name="auth-logout"),
     path("auth/me/", AuthMeView.as_view(), name="auth-me"),
+    path("me/orders/", MeOrdersView.as_view(), name="me-orders"),
     path("", include(router.urls)),
-    path("kpi/sales-summary/", SalesSummaryView.as_view(), name="sales-summary"),    
+    path("kpi/sales-summary/", SalesSummaryView.as_view(), name="sales-summary"),
+    path("kpi/timeseries/", SalesTimeseriesView.as_view(), name="sales-timeseries"),
+    path("kpi/top-items/", TopItemsView.as_view(), name="top-items"),
+    path("kpi/funnel/", FunnelView.as_view(), name="funnel"),
+    path("kpi/cache-stats/", KpiCacheStatsView.as_view(), name="kpi-cache-stats"),
+    path("exports/orders/", OrderExportView.as_view(), name="export-orders"),
+    path("exports/events/", EventExportView.as_view(), name="export-events"),
+    # Lecturas calientes en vistas async (core/async_views.py)
+    path("async/restaurants/<int:restaurant_id>/menu/", async_views.menu_view, name="async-menu"),
+    path("async/orders/<int:order_id>/status/", async_views.order_status_view, name="async-order-status"),
+    path("async/auth/me/", async_views.auth_me_view, name="async-auth-me"),
 ]
@@ -1,12 +1,15 @@
 # core/views.py
-from django.db.models import Sum, Count
+from datetime import date, datetime, time, timedelta
+
+from django.conf import settings
 from django.utils import timezone
-from django.http import JsonResponse
-from django.db import connections
-from django.db.utils import OperationalError
+from django.utils.dateparse import parse_date, parse_datetime
+from django.core.handlers.asgi import ASGIRequest
+from django.http import JsonResponse, StreamingHttpResponse
 from django.contrib.auth import authenticate, logout as django_logout
 
 from rest_framework import viewsets, permissions, status
+from rest_framework.decorators import action
 from rest_framework.exceptions import PermissionDenied, ValidationError
 from rest_framework.views import APIView
 from rest_framework.response import Response
@@ -25,7 +28,23 @@ from .models import (
     Order,
     OrderItem,
     Event,
+    MenuItemSalesCounter,
     UserSessionToken,
+    ArchivedOrder,
+)
+from . import (
+    archive,
+    bestsellers,
+    customer_lookup,
+    event_ingest,
+    exports,
+    funnel,
+    health,
+    kpi,
+    kpi_cache,
+    metrics,
+    order_history,
+    phones,
 )
 from .serializers import (
     RestaurantSerializer,
@@ -46,6 +65,7 @@ from .serializers import (
     AuthRegisterSerializer,
     AuthUserSerializer,
 )
+from .throttling import TokenBucketThrottle
 
 
 # --------- PERMISOS BÁSICOS --------- #
@@ -74,6 +94,8 @@ def _create_user_session(user, request):
 class AuthLoginView(APIView):
     permission_classes = [permissions.AllowAny]
     authentication_classes = []
+    throttle_classes = [TokenBucketThrottle]
+    throttle_scope = "login"
 
     def post(self, request, *args, **kwargs):
         serializer = AuthLoginSerializer(data=request.data)
@@ -105,6 +127,8 @@ class AuthLoginView(APIView):
 class AuthRegisterView(APIView):
     permission_classes = [permissions.AllowAny]
     authentication_classes = []
+    throttle_classes = [TokenBucketThrottle]
+    throttle_scope = "register"
 
     def post(self, request, *args, **kwargs):
         serializer = AuthRegisterSerializer(data=request.data)
@@ -124,6 +148,31 @@ class AuthMeView(APIView):
         return Response({"user": AuthUserSerializer(request.user).data}, status=status.HTTP_200_OK)
 
 
+class MeOrdersView(APIView):
+    """
+    Historial del cliente autenticado con resúmenes ligeros y paginación
+    keyset (?cursor=, ?limit=); ver core/order_history.py.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request, *args, **kwargs):
+        try:
+            limit = int(request.query_params.get("limit", order_history.DEFAULT_LIMIT))
+        except ValueError:
+            raise ValidationError({"limit": "Debe ser un entero."})
+        if not 1 <= limit <= order_history.MAX_LIMIT:
+            raise ValidationError({"limit": f"Debe estar entre 1 y {order_history.MAX_LIMIT}."})
+
+        customer = getattr(request.user, "customer_profile", None)
+        if customer is None:
+            return Response({"results": [], "next_cursor": None})
+        try:
+            data = order_history.page(customer.id, request.query_params.get("cursor"), limit)
+        except ValueError as exc:
+            raise ValidationError({"cursor": str(exc)})
+        return Response(data)
+
+
 class AuthLogoutView(APIView):
     permission_classes = [permissions.IsAuthenticated]
 
@@ -156,12 +205,47 @@ class CustomerViewSet(viewsets.ModelViewSet):
     queryset = Customer.objects.select_related("user").all().order_by("-id")
     serializer_class = CustomerSerializer
     permission_classes = [permissions.IsAuthenticated]
+    # ?ordering= del CRM: columnas desnormalizadas con índice, sin agregar pedidos.
+    # Por recencia solo salen clientes con pedidos (NULL no tiene orden común).
+    orderings = {
+        "-lifetime_value_cop": {},
+        "-last_order_at": {"last_order_at__isnull": False},
+    }
 
     def get_queryset(self):
         qs = super().get_queryset()
-        if self.request.user.is_staff:
-            return qs
-        return qs.filter(user=self.request.user)
+        if not self.request.user.is_staff:
+            return qs.filter(user=self.request.user)
+        ordering = self.request.query_params.get("ordering", "")
+        if ordering in self.orderings:
+            qs = qs.filter(**self.orderings[ordering]).order_by(ordering, "-id")
+        return qs
+
+    @action(detail=False, methods=["get"], permission_classes=[permissions.IsAdminUser])
+    def lookup(self, request, *args, **kwargs):
+        """
+        Pedidos por teléfono/WhatsApp: cliente(s) con ese número, escrito
+        como sea (?phone=+57 315..., 315...), con dirección por defecto y
+        último pedido.
+        """
+        phone = request.query_params.get("phone", "")
+        if not phones.normalize(phone):
+            raise ValidationError({"phone": "Número de teléfono no válido."})
+        return Response(customer_lookup.lookup(phone))
+
+    @action(detail=False, methods=["get"], permission_classes=[permissions.IsAdminUser])
+    def typeahead(self, request, *args, **kwargs):
+        """Búsqueda por prefijo del número (?q=, al menos 3 dígitos; ?limit=)."""
+        query = request.query_params.get("q", "")
+        if not phones.normalize_prefix(query):
+            raise ValidationError({"q": f"Escribe al menos {phones.MIN_PREFIX_DIGITS} dígitos."})
+        try:
+            limit = int(request.query_params.get("limit", customer_lookup.DEFAULT_LIMIT))
+        except ValueError:
+            raise ValidationError({"limit": "Debe ser un entero."})
+        if not 1 <= limit <= customer_lookup.MAX_LIMIT:
+            raise ValidationError({"limit": f"Debe estar entre 1 y {customer_lookup.MAX_LIMIT}."})
+        return Response(customer_lookup.typeahead(query, limit))
 
     def perform_create(self, serializer):
         if self.request.user.is_staff:
@@ -232,7 +316,7 @@ class MenuItemViewSet(viewsets.ModelViewSet):
     """
     Platos individuales con su precio en COP.
     """
-    queryset = MenuItem.objects.all().order_by("id")
+    queryset = MenuItem.objects.select_related("category").order_by("id")
     serializer_class = MenuItemSerializer
     permission_classes = [IsAdminOrReadOnly]
 
@@ -260,10 +344,23 @@ class OrderViewSet(viewsets.ModelViewSet):
     Pedidos (lo usa cocina, conductores y admin).
     """
     queryset = Order.objects.select_related(
-        "restaurant", "customer", "customer__user", "delivery_address", "coupon"
+        "restaurant",
+        "customer",
+        "customer__user",
+        "delivery_address",
+        "coupon",
+        "delivery",
+        "delivery__driver",
     ).prefetch_related("items__menu_item")
     serializer_class = OrderSerializer
     permission_classes = [permissions.IsAuthenticated]
+    throttle_scope = "order_create"
+
+    def get_throttles(self):
+        # Solo la creación pasa por el token bucket compartido.
+        if self.action == "create":
+            return [TokenBucketThrottle()]
+        return super().get_throttles()
 
     def get_queryset(self):
         qs = super().get_queryset()
@@ -306,9 +403,30 @@ class OrderViewSet(viewsets.ModelViewSet):
         serializer = OrderCreateSerializer(data=payload)
         serializer.is_valid(raise_exception=True)
         order = serializer.save()
+        # Releemos con el queryset del listado (líneas, entrega) en consultas fijas.
+        order = super().get_queryset().get(pk=order.pk)
         output_serializer = OrderSerializer(order)
         return Response(output_serializer.data, status=status.HTTP_201_CREATED)
 
+    @action(detail=False, methods=["get"], url_path=r"by-number/(?P<order_number>[^/.]+)")
+    def by_number(self, request, order_number=None):
+        """
+        Busca un pedido por número en la tabla caliente y, si ya se archivó,
+        en ArchivedOrder (la respuesta lleva `archived`).
+        """
+        order = self.get_queryset().filter(order_number=order_number).first()
+        if order is not None:
+            return Response({**self.get_serializer(order).data, "archived": False})
+
+        archived = ArchivedOrder.objects.filter(order_number=order_number).first()
+        if archived is not None and not request.user.is_staff:
+            customer = getattr(request.user, "customer_profile", None)
+            if customer is None or archived.customer_id != customer.id:
+                archived = None
+        if archived is None:
+            return Response({"detail": "Pedido no encontrado."}, status=status.HTTP_404_NOT_FOUND)
+        return Response(archive.archived_representation(archived))
+
     def _ensure_staff_for_write(self):
         if not self.request.user.is_staff:
             raise PermissionDenied("Solo staff puede modificar o eliminar pedidos.")
@@ -327,7 +445,9 @@ class OrderViewSet(viewsets.ModelViewSet):
 
 
 class OrderItemViewSet(viewsets.ModelViewSet):
-    queryset = OrderItem.objects.select_related("order", "order__customer", "order__customer__user").all().order_by("-id")
+    queryset = OrderItem.objects.select_related(
+        "order", "order__customer", "order__customer__user", "menu_item"
+    ).order_by("-id")
     serializer_class = OrderItemSerializer
     permission_classes = [permissions.IsAuthenticated]
 
@@ -394,13 +514,125 @@ class DeliveryViewSet(viewsets.ModelViewSet):
 
 
 class EventViewSet(viewsets.ModelViewSet):
+    """
+    Eventos de funnel. core_event está particionada por mes sobre `at`, así
+    que el listado siempre va acotado en el tiempo (since/until, por defecto
+    los últimos EVENT_LIST_DEFAULT_DAYS días) para que Postgres solo recorra
+    las particiones necesarias.
+    """
     queryset = Event.objects.all().order_by("-at")
     serializer_class = EventSerializer
     permission_classes = [permissions.IsAdminUser]
 
+    def get_queryset(self):
+        qs = super().get_queryset()
+        if self.action != "list":
+            return qs
+
+        params = self.request.query_params
+        until = _parse_datetime_param(self.request, "until")
+        since = _parse_datetime_param(self.request, "since")
+        if since is None:
+            since = (until or timezone.now()) - timedelta(days=settings.EVENT_LIST_DEFAULT_DAYS)
+        qs = qs.filter(at__gte=since)
+        if until is not None:
+            qs = qs.filter(at__lt=until)
+
+        name = params.get("name")
+        if name:
+            qs = qs.filter(name=name)
+        return qs
+
+    @action(detail=False, methods=["post"], permission_classes=[permissions.AllowAny])
+    def ingest(self, request, *args, **kwargs):
+        """
+        Ingesta en lote para el frontend (anónimo o autenticado).
+
+        Body: lista de eventos o {"events": [...]}, cada uno con name y
+        opcionalmente at (ISO 8601), meta, session_id y order_id (solo
+        usuarios autenticados y, salvo staff, pedidos propios). El customer
+        se toma del usuario, nunca del body.
+        Responde 202 con aceptados/descartados; 429 si el buffer está lleno.
+        """
+        raw_events = request.data
+        if isinstance(raw_events, dict):
+            raw_events = raw_events.get("events")
+        if not isinstance(raw_events, list) or not raw_events:
+            raise ValidationError({"events": "Envía una lista de eventos no vacía."})
+
+        max_batch = settings.EVENT_INGEST_MAX_BATCH
+        if len(raw_events) > max_batch:
+            raise ValidationError({"events": f"Máximo {max_batch} eventos por solicitud."})
+
+        customer_id = None
+        authenticated = bool(request.user and request.user.is_authenticated)
+        if authenticated:
+            customer = getattr(request.user, "customer_profile", None)
+            customer_id = customer.id if customer else None
+
+        accepted, dropped, rejected = event_ingest.ingest(
+            raw_events,
+            customer_id=customer_id,
+            allow_order=authenticated,
+            staff=authenticated and request.user.is_staff,
+        )
+        data = {
+            "accepted": accepted,
+            "dropped": dropped,
+            "rejected": [{"index": index, "detail": detail} for index, detail in rejected[:20]],
+        }
+
+        if dropped and not accepted:
+            return Response(data, status=status.HTTP_429_TOO_MANY_REQUESTS, headers={"Retry-After": "1"})
+        return Response(data, status=status.HTTP_202_ACCEPTED)
+
 
 # --------- MÉTRICAS DE VENTAS (COP) --------- #
 
+def _parse_datetime_param(request, name):
+    raw = request.query_params.get(name)
+    if not raw:
+        return None
+    value = parse_datetime(raw)
+    if value is None:
+        parsed_date = parse_date(raw)
+        if parsed_date is None:
+            raise ValidationError({name: "Fecha inválida, usa ISO 8601 (YYYY-MM-DD o YYYY-MM-DDTHH:MM)."})
+        value = datetime.combine(parsed_date, time.min)
+    if timezone.is_naive(value):
+        value = timezone.make_aware(value)
+    return value
+
+
+def _parse_date_param(request, name, default):
+    raw = request.query_params.get(name)
+    if not raw:
+        return default
+    try:
+        return date.fromisoformat(raw)
+    except ValueError:
+        raise ValidationError({name: "Fecha inválida, usa el formato YYYY-MM-DD."})
+
+
+def _parse_int_param(request, name):
+    raw = request.query_params.get(name)
+    if not raw:
+        return None
+    try:
+        return int(raw)
+    except ValueError:
+        raise ValidationError({name: "Debe ser un número entero."})
+
+
+def _parse_top_param(request):
+    top = _parse_int_param(request, "top")
+    if top is None:
+        return bestsellers.DEFAULT_TOP
+    if not 1 <= top <= bestsellers.MAX_TOP:
+        raise ValidationError({"top": f"Debe estar entre 1 y {bestsellers.MAX_TOP}."})
+    return top
+
+
 class SalesSummaryView(APIView):
     """
     Endpoint para el panel administrativo de Noah Food.
@@ -411,85 +643,272 @@ class SalesSummaryView(APIView):
     - total_orders: número total de pedidos
     - orders_by_status: conteo por estado
     - top_items: platos más vendidos (cantidad y ventas en COP)
+
+    Acepta restaurant_id y top (tamaño del top_items) opcionales. La
+    respuesta pasa por la caché KPI (ver core/kpi_cache.py).
     """
 
     permission_classes = [permissions.IsAdminUser]
 
     def get(self, request, format=None):
+        restaurant_id = _parse_int_param(request, "restaurant_id")
+        top = _parse_top_param(request)
         today = timezone.localdate()
-
-        base_qs = Order.objects.all()
-
-        # Solo COMPLETED cuentan como venta efectiva
-        delivered_qs = base_qs.filter(status=Order.STATUS_COMPLETED)
-
-        total_orders = base_qs.count()
-        total_revenue = delivered_qs.aggregate(
-            total=Sum("total_cop")
-        )["total"] or 0
-        today_revenue = delivered_qs.filter(
-            created_at__date=today
-        ).aggregate(
-            total=Sum("total_cop")
-        )["total"] or 0
-
-        orders_by_status = (
-            base_qs.values("status")
-            .annotate(count=Count("id"))
-            .order_by("status")
+        data = kpi_cache.get_or_compute(
+            "sales-summary",
+            restaurant_id,
+            {"today": today, "top": top},
+            lambda: kpi.sales_summary(today, restaurant_id=restaurant_id, top=top),
         )
+        return Response(data)
+
+
+class TopItemsView(APIView):
+    """
+    Platos más vendidos desde los contadores incrementales.
+
+    Query params:
+    - period: day | week | all (por defecto all)
+    - date: día local YYYY-MM-DD que define el día/semana (por defecto hoy)
+    - restaurant_id, category_id: filtros opcionales
+    - top: tamaño del ranking (1-50, por defecto 5)
+    - by_category=1: un ranking por categoría (requiere restaurant_id)
+    """
+
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request, format=None):
+        period = request.query_params.get("period", MenuItemSalesCounter.PERIOD_ALL)
+        if period not in dict(MenuItemSalesCounter.PERIOD_CHOICES):
+            raise ValidationError({"period": "Valores permitidos: day, week, all."})
+
+        day = _parse_date_param(request, "date", timezone.localdate())
+        restaurant_id = _parse_int_param(request, "restaurant_id")
+        category_id = _parse_int_param(request, "category_id")
+        top = _parse_top_param(request)
+        by_category = request.query_params.get("by_category") == "1"
+        if by_category and restaurant_id is None:
+            raise ValidationError({"restaurant_id": "by_category requiere restaurant_id."})
+
+        params = {"period": period, "day": day, "category_id": category_id, "top": top, "by_category": by_category}
+
+        def compute():
+            data = {"period": period, "date": day.isoformat(), "restaurant_id": restaurant_id}
+            if by_category:
+                data["categories"] = bestsellers.top_items_by_category(
+                    restaurant_id, period=period, day=day, top=top
+                )
+            else:
+                data["top_items"] = bestsellers.top_items(
+                    period=period, day=day, restaurant_id=restaurant_id,
+                    category_id=category_id, top=top,
+                )
+            return data
+
+        return Response(kpi_cache.get_or_compute("top-items", restaurant_id, params, compute))
 
-        top_items_qs = (
-            OrderItem.objects.filter(order__status=Order.STATUS_COMPLETED)
-            .values("menu_item_id", "menu_item__name")
-            .annotate(
-                total_qty=Sum("quantity"),
-                total_revenue=Sum("line_total_cop"),
+
+class SalesTimeseriesView(APIView):
+    """
+    Serie temporal de ventas (COP) para el panel administrativo.
+
+    Query params:
+    - restaurant_id: opcional, filtra por restaurante
+    - start / end: fechas locales YYYY-MM-DD (por defecto últimos 7 días)
+    - granularity: hour | day (por defecto day)
+    - compare: 0 para omitir la comparación con el periodo anterior
+
+    Se sirve desde SalesRollup (buckets horarios pre-agregados), nunca
+    agrupando pedidos crudos.
+    """
+
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request, format=None):
+        granularity = request.query_params.get("granularity", kpi.GRANULARITY_DAY)
+        if granularity not in kpi.MAX_RANGE_DAYS:
+            raise ValidationError({"granularity": "Valores permitidos: hour, day."})
+
+        today = timezone.localdate()
+        end = _parse_date_param(request, "end", today)
+        start = _parse_date_param(request, "start", end - timedelta(days=6))
+        if start > end:
+            raise ValidationError({"start": "start debe ser anterior o igual a end."})
+        if (end - start).days + 1 > kpi.MAX_RANGE_DAYS[granularity]:
+            raise ValidationError(
+                {"start": f"El rango máximo para granularity={granularity} es de "
+                          f"{kpi.MAX_RANGE_DAYS[granularity]} días."}
             )
-            .order_by("-total_qty")[:5]
+
+        restaurant_id = _parse_int_param(request, "restaurant_id")
+        compare = request.query_params.get("compare", "1") != "0"
+        data = kpi_cache.get_or_compute(
+            "timeseries",
+            restaurant_id,
+            {"start": start, "end": end, "granularity": granularity, "compare": compare},
+            lambda: kpi.sales_timeseries(
+                start,
+                end,
+                granularity=granularity,
+                restaurant_id=restaurant_id,
+                compare=compare,
+            ),
         )
+        return Response(data)
 
-        top_items = [
-            {
-                "menu_item_id": row["menu_item_id"],
-                "name": row["menu_item__name"],
-                "total_qty": row["total_qty"],
-                "total_revenue": row["total_revenue"] or 0,
-            }
-            for row in top_items_qs
-        ]
 
-        data = {
-            "currency": "COP",
-            "total_orders": total_orders,
-            "total_revenue": total_revenue,
-            "today_revenue": today_revenue,
-            "orders_by_status": list(orders_by_status),
-            "top_items": top_items,
-        }
+class FunnelView(APIView):
+    """
+    Funnel de conversión y cohortes semanales sobre Event.
 
+    Query params:
+    - steps: nombres de evento separados por coma, en orden
+      (por defecto menu_view,add_to_cart,checkout,order_created)
+    - start / end: fechas locales del primer paso (por defecto últimos 28 días)
+    - window_hours: ventana de conversión desde el primer paso (por defecto 24)
+
+    El cálculo está en core/funnel.py y la respuesta pasa por la caché KPI.
+    """
+
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request, format=None):
+        raw_steps = request.query_params.get("steps")
+        steps = (
+            [s.strip() for s in raw_steps.split(",") if s.strip()]
+            if raw_steps else list(funnel.DEFAULT_STEPS)
+        )
+        if not 2 <= len(steps) <= funnel.MAX_STEPS:
+            raise ValidationError({"steps": f"Indica entre 2 y {funnel.MAX_STEPS} pasos."})
+
+        today = timezone.localdate()
+        end = _parse_date_param(request, "end", today)
+        start = _parse_date_param(request, "start", end - timedelta(days=27))
+        if start > end:
+            raise ValidationError({"start": "start debe ser anterior o igual a end."})
+        if (end - start).days + 1 > funnel.MAX_RANGE_DAYS:
+            raise ValidationError({"start": f"El rango máximo es de {funnel.MAX_RANGE_DAYS} días."})
+
+        window_hours = _parse_int_param(request, "window_hours") or funnel.DEFAULT_WINDOW_HOURS
+        if not 1 <= window_hours <= funnel.MAX_WINDOW_HOURS:
+            raise ValidationError(
+                {"window_hours": f"Debe estar entre 1 y {funnel.MAX_WINDOW_HOURS}."}
+            )
+
+        data = kpi_cache.get_or_compute(
+            "funnel",
+            None,
+            {"steps": steps, "start": start, "end": end, "window_hours": window_hours},
+            lambda: {
+                "start": start.isoformat(),
+                "end": end.isoformat(),
+                **funnel.compute_funnel(steps, start, end, window_hours=window_hours),
+            },
+        )
         return Response(data)
-    
 
 
-def healthz(request):
+class KpiCacheStatsView(APIView):
+    """
+    Métricas de la caché KPI de este proceso: hits/misses y duración de recálculos.
+    """
+
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request, format=None):
+        return Response(metrics.snapshot(prefix="kpi_cache"))
+
+
+# --------- EXPORTACIONES (CSV / NDJSON) --------- #
+
+class BaseExportView(APIView):
+    """
+    Descarga en streaming (ver core/exports.py).
+
+    Query params comunes:
+    - output: csv | ndjson (por defecto csv; `format` lo reserva DRF)
+    - gzip: 1 para comprimir al vuelo (.gz)
+    - restaurant_id, start / end (fechas locales YYYY-MM-DD, inclusivas)
+    """
+
+    permission_classes = [permissions.IsAdminUser]
+    kind = None
+
+    def get_export_queryset(self, request, restaurant_id, start, end):
+        raise NotImplementedError
+
+    def get(self, request, format=None):
+        output = request.query_params.get("output", exports.OUTPUT_CSV)
+        if output not in exports.OUTPUTS:
+            raise ValidationError({"output": "Valores permitidos: csv, ndjson."})
+        use_gzip = request.query_params.get("gzip") == "1"
+
+        start = _parse_date_param(request, "start", None)
+        end = _parse_date_param(request, "end", None)
+        if start and end and start > end:
+            raise ValidationError({"start": "start debe ser anterior o igual a end."})
+
+        queryset = self.get_export_queryset(
+            request, _parse_int_param(request, "restaurant_id"), start, end
+        )
+        blocks = exports.stream(queryset, output=output, gzip=use_gzip)
+        if isinstance(request._request, ASGIRequest):
+            blocks = exports.aiter_blocks(blocks)
+
+        response = StreamingHttpResponse(
+            blocks,
+            content_type="application/gzip" if use_gzip else exports.CONTENT_TYPES[output],
+        )
+        response["Content-Disposition"] = (
+            f'attachment; filename="{exports.filename(self.kind, output, use_gzip)}"'
+        )
+        return response
+
+
+class OrderExportView(BaseExportView):
+    """Pedidos ordenados por fecha de creación. Filtro extra: status."""
+
+    kind = "orders"
+
+    def get_export_queryset(self, request, restaurant_id, start, end):
+        status_param = request.query_params.get("status")
+        if status_param and status_param not in dict(Order.STATUS_CHOICES):
+            raise ValidationError({"status": "Estado inválido."})
+        return exports.orders_queryset(restaurant_id, start, end, status=status_param)
+
+
+class EventExportView(BaseExportView):
+    """
+    Eventos ordenados por `at`. Filtro extra: name. Sin start se exportan los
+    últimos EVENT_LIST_DEFAULT_DAYS días (core_event está particionada por mes).
+    """
+
+    kind = "events"
+
+    def get_export_queryset(self, request, restaurant_id, start, end):
+        if start is None:
+            start = (end or timezone.localdate()) - timedelta(days=settings.EVENT_LIST_DEFAULT_DAYS)
+        return exports.events_queryset(
+            restaurant_id, start, end, name=request.query_params.get("name")
+        )
+
+
+async def healthz(request):
     """
     Liveness probe:
     - Si el proceso responde, está 'vivo'.
     - No valida DB para evitar reinicios innecesarios por fallas temporales de DB.
+    - Vista async: bajo ASGI no ocupa un hilo del pool.
     """
     return JsonResponse({"status": "ok"}, status=200)
 
-def readyz(request):
+async def readyz(request):
     """
     Readiness probe:
-    - Debe confirmar que la app está lista para recibir tráfico.
-    - Aquí validamos conectividad a la DB.
+    - Devuelve el último estado de DB, Redis y Channels que mantiene el
+      monitor en segundo plano (core/health.py); no abre conexiones.
+    - 503 solo si cae una dependencia crítica (DB). Redis o Channels
+      caídos dejan el pod listo en estado "degraded".
     """
-    try:
-        conn = connections["default"]
-        with conn.cursor() as cursor:
-            cursor.execute("SELECT 1;")
-        return JsonResponse({"status": "ready", "db": "ok"}, status=200)
-    except OperationalError:
-        return JsonResponse({"status": "not-ready", "db": "down"}, status=503)
+    payload, status_code = await health.areadiness()
+    return JsonResponse(payload, status=status_code)
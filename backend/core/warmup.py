@@ -0,0 +1,253 @@
+# core/warmup.py
+"""
+Calentamiento del proceso antes de declararse listo.
+
+Al arrancar un worker (noah_food/asgi.py y wsgi.py llaman a `start()`),
+un hilo ejecuta STEPS: importa los módulos que las vistas cargan de forma
+perezosa, puebla el resolver de URLs, construye los campos de los
+serializers (y con ello las cachés de _meta y los catálogos de
+traducción), abre las conexiones a la base de datos y a Redis, llena el
+snapshot de menú de los restaurantes activos y deja publicado el estado
+de salud. Mientras tanto /readyz/ responde 503 "warming-up"; /healthz/
+no espera.
+
+Un paso que falla se registra y no bloquea: las dependencias caídas ya
+las refleja el readiness. `profile_startup()` mide en un intérprete
+nuevo el tiempo de importación por módulo y el de cada fase de arranque
+(comando `warmup --profile-startup`).
+"""
+import importlib
+import json
+import logging
+import os
+import subprocess
+import sys
+import threading
+import time
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+logger = logging.getLogger(__name__)
+
+STATE_IDLE = "idle"
+STATE_RUNNING = "running"
+STATE_DONE = "done"
+
+# Módulos que Django/DRF importan en la primera petición que los usa.
+MODULES = (
+    "core.views",
+    "core.async_views",
+    "core.admin",
+    "core.exports",
+    "core.funnel",
+    "core.kpi",
+    "rest_framework.renderers",
+    "rest_framework.parsers",
+    "rest_framework.negotiation",
+    "rest_framework.metadata",
+    "rest_framework.pagination",
+    "django.contrib.admin.views.main",
+    "django.contrib.auth.hashers",
+)
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+# --------- PASOS --------- #
+
+def warm_modules():
+    for name in MODULES:
+        importlib.import_module(name)
+    # Carga el catálogo del idioma por defecto (mensajes de validación de DRF).
+    from django.utils import translation
+
+    with translation.override(settings.LANGUAGE_CODE):
+        translation.gettext("This field is required.")
+
+
+def warm_urls():
+    from django.urls import get_resolver
+
+    resolver = get_resolver()
+    resolver.reverse_dict  # noqa: B018  puebla las tablas de reverse
+    resolver.resolve("/api/")
+
+
+def warm_serializers():
+    from rest_framework.renderers import JSONRenderer
+
+    from . import serializers
+    from .urls import router
+
+    classes = {viewset.serializer_class for _, viewset, _ in router.registry}
+    classes |= {
+        serializers.OrderCreateSerializer,
+        serializers.AuthLoginSerializer,
+        serializers.AuthRegisterSerializer,
+        serializers.AuthUserSerializer,
+    }
+    for serializer_class in classes:
+        serializer = serializer_class()
+        for field in serializer.fields.values():
+            field.validators  # noqa: B018
+    JSONRenderer().render({"warmup": True})
+
+
+def warm_database():
+    # Con ASGI cada petición síncrona tiene su hilo (y su conexión): esto
+    # valida el acceso y calienta DNS, TLS y la autenticación del servidor.
+    from .db_router import replica_aliases
+
+    for alias in [DEFAULT_DB_ALIAS, *replica_aliases()]:
+        with connections[alias].cursor() as cursor:
+            cursor.execute("SELECT 1")
+
+
+def warm_caches():
+    from asgiref.sync import async_to_sync
+    from django.core.cache import cache
+
+    from . import menu_snapshot
+    from .models import Restaurant
+    from .redis_client import get_redis
+
+    cache.get("warmup:ping")
+    if _setting("EVENT_INGEST_BACKEND", "memory") == "redis":
+        get_redis().ping()
+
+    limit = _setting("WARMUP_MENU_RESTAURANTS", 50)
+    restaurant_ids = list(
+        Restaurant.objects.filter(is_active=True).order_by("id").values_list("id", flat=True)[:limit]
+    )
+    for restaurant_id in restaurant_ids:
+        async_to_sync(menu_snapshot.aget_json)(restaurant_id)
+
+
+def warm_health():
+    from . import health
+
+    health.run_checks()
+
+
+STEPS = (
+    ("modules", warm_modules),
+    ("urls", warm_urls),
+    ("serializers", warm_serializers),
+    ("database", warm_database),
+    ("caches", warm_caches),
+    ("health", warm_health),
+)
+
+
+# --------- EJECUCIÓN --------- #
+
+_state = {"state": STATE_IDLE, "steps": {}}
+_lock = threading.Lock()
+
+
+def run(steps=STEPS):
+    """Ejecuta los pasos en orden; devuelve {paso: {"seconds", "error"?}}."""
+    results = {}
+    for name, step in steps:
+        started = time.perf_counter()
+        result = {}
+        try:
+            step()
+        except Exception as exc:
+            logger.warning("Warm-up: falló el paso %s", name, exc_info=True)
+            result["error"] = f"{type(exc).__name__}: {exc}"[:200]
+        result["seconds"] = round(time.perf_counter() - started, 4)
+        results[name] = result
+    return results
+
+
+def _run_in_background():
+    started = time.perf_counter()
+    try:
+        steps = run()
+    finally:
+        connections.close_all()  # las del hilo de warm-up no las reutiliza nadie
+    elapsed = round(time.perf_counter() - started, 3)
+    with _lock:
+        _state.update(state=STATE_DONE, steps=steps, seconds=elapsed)
+    logger.info("Warm-up terminado en %.2fs", elapsed)
+
+
+def start():
+    """Lanza el warm-up en un hilo (una vez por proceso) si WARMUP_ENABLED."""
+    if not _setting("WARMUP_ENABLED", True):
+        return
+    with _lock:
+        if _state["state"] != STATE_IDLE:
+            return
+        _state["state"] = STATE_RUNNING
+    threading.Thread(target=_run_in_background, name="warmup", daemon=True).start()
+
+
+def status():
+    with _lock:
+        return dict(_state)
+
+
+def is_warming():
+    return status()["state"] == STATE_RUNNING
+
+
+# --------- PERFIL DE ARRANQUE --------- #
+
+_PROFILE_SCRIPT = """
+import json, sys, time
+phases = []
+started = time.perf_counter()
+import django
+django.setup()
+phases.append(["django.setup", time.perf_counter() - started])
+mark = time.perf_counter()
+import noah_food.asgi
+phases.append(["asgi application", time.perf_counter() - mark])
+from core import warmup
+for name, result in warmup.run().items():
+    phases.append(["warmup." + name, result["seconds"]])
+sys.stdout.write(json.dumps(phases))
+"""
+
+
+def parse_importtime(stderr):
+    """Filas (módulo, self_us, cumulative_us, profundidad) de la salida de `-X importtime`."""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "imported package" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        rows.append((name.strip(), int(self_us), int(cumulative_us), depth))
+    return rows
+
+
+def profile_startup(settings_module=None):
+    """
+    Arranca un intérprete nuevo con `-X importtime`, carga la app ASGI y
+    ejecuta el warm-up. Devuelve {"imports": [...], "phases": [...]}.
+    """
+    env = {
+        **os.environ,
+        "DJANGO_SETTINGS_MODULE": settings_module or settings.SETTINGS_MODULE,
+        "WARMUP_ENABLED": "0",  # el script ejecuta los pasos en primer plano
+    }
+    process = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", _PROFILE_SCRIPT],
+        cwd=settings.BASE_DIR,
+        env=env,
+        capture_output=True,
+        text=True,
+        timeout=300,
+    )
+    if process.returncode != 0:
+        raise RuntimeError(process.stderr.strip().splitlines()[-1] if process.stderr.strip() else "sin salida")
+    return {
+        "imports": parse_importtime(process.stderr),
+        "phases": [(name, round(seconds, 4)) for name, seconds in json.loads(process.stdout)],
+    }
@@ -10,6 +10,10 @@ os.environ.setdefault(
 
 django_asgi_app = get_asgi_application()
 
+from core import warmup  # noqa: E402  (necesita Django configurado)
+
+warmup.start()
+
 # Placeholder: cuando implementes websockets, aquí conectas tus rutas reales.
 websocket_urlpatterns = [
     # path("ws/...", Consumer.as_asgi()),
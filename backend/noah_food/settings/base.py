@@ -1,4 +1,5 @@
 from pathlib import Path
+import json
 import os
 from dotenv import load_dotenv
 
@@ -61,8 +62,10 @@ INSTALLED_APPS = [
 # Middleware
 # =========================
 MIDDLEWARE = [
+    "core.request_metrics.RequestMetricsMiddleware",
     "django.middleware.security.SecurityMiddleware",
-    "whitenoise.middleware.WhiteNoiseMiddleware",
+    "core.compression.CompressionMiddleware",
+    "core.static_files.AsyncWhiteNoiseMiddleware",
 
     "corsheaders.middleware.CorsMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
@@ -71,6 +74,7 @@ MIDDLEWARE = [
     "django.contrib.auth.middleware.AuthenticationMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
+    "core.db_router.ReplicaRoutingMiddleware",
 ]
 
 # =========================
@@ -109,6 +113,109 @@ CHANNEL_LAYERS = {
     }
 }
 
+# =========================
+# Cache (Redis, DB 1 para no mezclar con Channels)
+# =========================
+REDIS_CACHE_URL = os.getenv("REDIS_CACHE_URL", f"redis://{REDIS_HOST}:{REDIS_PORT}/1")
+
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.redis.RedisCache",
+        "LOCATION": REDIS_CACHE_URL,
+        "TIMEOUT": 300,
+        "KEY_PREFIX": "noah",
+    }
+}
+
+# Cliente Redis propio de la app (buffers, contadores); DB 2
+REDIS_URL = os.getenv("REDIS_URL", f"redis://{REDIS_HOST}:{REDIS_PORT}/2")
+REDIS_SOCKET_TIMEOUT = float(os.getenv("REDIS_SOCKET_TIMEOUT", "0.5"))
+
+# Caché de KPIs (core/kpi_cache.py), en segundos
+KPI_CACHE_TTL = int(os.getenv("KPI_CACHE_TTL", "30"))
+KPI_CACHE_STALE_SECONDS = int(os.getenv("KPI_CACHE_STALE_SECONDS", "300"))
+KPI_CACHE_LOCK_SECONDS = int(os.getenv("KPI_CACHE_LOCK_SECONDS", "30"))
+KPI_CACHE_WAIT_SECONDS = float(os.getenv("KPI_CACHE_WAIT_SECONDS", "2"))
+
+# =========================
+# Ingesta de eventos (core/event_ingest.py)
+# =========================
+# "memory": buffer por proceso + hilo flusher; "redis": buffer compartido que
+# vacía `manage.py flush_events`.
+EVENT_INGEST_BACKEND = os.getenv("EVENT_INGEST_BACKEND", "memory")
+EVENT_INGEST_INPROCESS_FLUSH = env_bool(
+    "EVENT_INGEST_INPROCESS_FLUSH", EVENT_INGEST_BACKEND == "memory"
+)
+EVENT_INGEST_MAX_BUFFER = int(os.getenv("EVENT_INGEST_MAX_BUFFER", "100000"))
+EVENT_INGEST_MAX_BATCH = int(os.getenv("EVENT_INGEST_MAX_BATCH", "200"))
+EVENT_INGEST_FLUSH_SIZE = int(os.getenv("EVENT_INGEST_FLUSH_SIZE", "2000"))
+EVENT_INGEST_FLUSH_INTERVAL = float(os.getenv("EVENT_INGEST_FLUSH_INTERVAL", "1.0"))
+
+# =========================
+# Outbox transaccional (core/outbox.py, `manage.py dispatch_outbox`)
+# =========================
+# Sinks separados por comas; LogSink es el stub local de WhatsApp/SMS y pushes.
+OUTBOX_SINKS = [
+    path.strip()
+    for path in os.getenv("OUTBOX_SINKS", "core.outbox.LogSink,core.outbox.EventSink").split(",")
+    if path.strip()
+]
+OUTBOX_BATCH_SIZE = int(os.getenv("OUTBOX_BATCH_SIZE", "100"))
+OUTBOX_POLL_INTERVAL = float(os.getenv("OUTBOX_POLL_INTERVAL", "1.0"))
+OUTBOX_MAX_ATTEMPTS = int(os.getenv("OUTBOX_MAX_ATTEMPTS", "10"))
+OUTBOX_BACKOFF_BASE = float(os.getenv("OUTBOX_BACKOFF_BASE", "5"))
+OUTBOX_BACKOFF_MAX = float(os.getenv("OUTBOX_BACKOFF_MAX", "900"))
+OUTBOX_RETENTION_DAYS = int(os.getenv("OUTBOX_RETENTION_DAYS", "7"))
+
+# =========================
+# Trabajos en segundo plano (core/jobs.py, `manage.py run_jobs`)
+# =========================
+JOBS_PROCESSES = int(os.getenv("JOBS_PROCESSES", "1"))
+JOBS_THREADS = int(os.getenv("JOBS_THREADS", "4"))
+JOBS_POLL_INTERVAL = float(os.getenv("JOBS_POLL_INTERVAL", "1.0"))
+# Cada cuánto cada proceso programa los periódicos y recupera trabajos vencidos
+JOBS_SCHEDULE_INTERVAL = float(os.getenv("JOBS_SCHEDULE_INTERVAL", "30"))
+# Plazo por defecto de un trabajo RUNNING antes de darlo por caído (segundos)
+JOBS_DEFAULT_TIMEOUT = int(os.getenv("JOBS_DEFAULT_TIMEOUT", "3600"))
+JOBS_BACKOFF_BASE = float(os.getenv("JOBS_BACKOFF_BASE", "30"))
+JOBS_BACKOFF_MAX = float(os.getenv("JOBS_BACKOFF_MAX", "3600"))
+JOBS_RETENTION_DAYS = int(os.getenv("JOBS_RETENTION_DAYS", "14"))
+# /metrics del propio worker (0 = no se sirve)
+JOBS_METRICS_PORT = int(os.getenv("JOBS_METRICS_PORT", "0"))
+# Informes generados por el trabajo export_report
+REPORTS_DIR = os.getenv("REPORTS_DIR", str(BASE_DIR / "reports"))
+# Tokens de sesión sin uso en estos días se purgan (0 = no caducan)
+SESSION_TOKEN_IDLE_DAYS = int(os.getenv("SESSION_TOKEN_IDLE_DAYS", "90"))
+
+# Métricas Prometheus (/metrics): un fichero por worker en METRICS_DIR
+METRICS_DIR = os.getenv("METRICS_DIR", "/tmp/noah-metrics")
+METRICS_FLUSH_INTERVAL = float(os.getenv("METRICS_FLUSH_INTERVAL", "5"))
+METRICS_TOKEN = os.getenv("METRICS_TOKEN", "")
+
+# Readiness: monitor en segundo plano de DB/Redis/Channels (core/health.py)
+HEALTH_CHECK_INTERVAL = float(os.getenv("HEALTH_CHECK_INTERVAL", "5"))
+HEALTH_CHECK_TIMEOUT = float(os.getenv("HEALTH_CHECK_TIMEOUT", "2"))
+HEALTH_STALE_AFTER = float(os.getenv("HEALTH_STALE_AFTER", "15"))
+
+# Warm-up del proceso antes de que /readyz/ responda listo (core/warmup.py)
+WARMUP_ENABLED = env_bool("WARMUP_ENABLED", True)
+WARMUP_MENU_RESTAURANTS = int(os.getenv("WARMUP_MENU_RESTAURANTS", "50"))
+
+# Snapshot del menú de las vistas async (core/menu_snapshot.py), en segundos
+MENU_SNAPSHOT_TTL = int(os.getenv("MENU_SNAPSHOT_TTL", "60"))
+
+# Ventana por defecto del listado /api/events/ (core_event se particiona por mes)
+EVENT_LIST_DEFAULT_DAYS = int(os.getenv("EVENT_LIST_DEFAULT_DAYS", "30"))
+
+# Tamaño de lote al leer eventos para el motor de funnels (core/funnel.py)
+FUNNEL_CHUNK_SIZE = int(os.getenv("FUNNEL_CHUNK_SIZE", "50000"))
+
+# Filas por lote del cursor de servidor en las exportaciones (core/exports.py)
+EXPORT_CHUNK_SIZE = int(os.getenv("EXPORT_CHUNK_SIZE", "2000"))
+
+# Días tras los que un pedido COMPLETED/CANCELLED pasa al archivo (archive_orders)
+ORDER_ARCHIVE_AFTER_DAYS = int(os.getenv("ORDER_ARCHIVE_AFTER_DAYS", "180"))
+
 # =========================
 # Database (Postgres)
 # Nota: en tu cluster el Service se llama "postgres"
@@ -122,9 +229,26 @@ DATABASES = {
         "HOST": os.getenv("POSTGRES_HOST", "postgres"),
         "PORT": os.getenv("POSTGRES_PORT", "5432"),
         "CONN_MAX_AGE": int(os.getenv("DB_CONN_MAX_AGE", "60")),
+        "OPTIONS": {"connect_timeout": int(os.getenv("DB_CONNECT_TIMEOUT", "5"))},
     }
 }
 
+# Réplica de lectura opcional (ver core/db_router.py)
+if os.getenv("POSTGRES_REPLICA_HOST", "").strip():
+    DATABASES["replica"] = {
+        **DATABASES["default"],
+        "HOST": os.getenv("POSTGRES_REPLICA_HOST"),
+        "PORT": os.getenv("POSTGRES_REPLICA_PORT", DATABASES["default"]["PORT"]),
+        "TEST": {"MIRROR": "default"},
+    }
+
+REPLICA_DATABASES = [alias for alias in DATABASES if alias != "default"]
+DATABASE_ROUTERS = ["core.db_router.PrimaryReplicaRouter"]
+# Segundos que un cliente lee del primario tras escribir
+REPLICA_STICKY_SECONDS = int(os.getenv("REPLICA_STICKY_SECONDS", "5"))
+REPLICA_MAX_LAG_SECONDS = float(os.getenv("REPLICA_MAX_LAG_SECONDS", "2"))
+REPLICA_LAG_CHECK_INTERVAL = float(os.getenv("REPLICA_LAG_CHECK_INTERVAL", "5"))
+
 # =========================
 # Auth validators
 # =========================
@@ -175,7 +299,59 @@ REST_FRAMEWORK = {
         "rest_framework.authentication.SessionAuthentication",
         "rest_framework.authentication.BasicAuthentication",
     ],
+    # JSON con orjson si está instalado; MessagePack negociado (core/renderers.py)
+    "DEFAULT_RENDERER_CLASSES": [
+        "core.renderers.FastJSONRenderer",
+        "core.renderers.MsgPackRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ],
+    "DEFAULT_PARSER_CLASSES": [
+        "core.renderers.FastJSONParser",
+        "core.renderers.MsgPackParser",
+        "rest_framework.parsers.FormParser",
+        "rest_framework.parsers.MultiPartParser",
+    ],
+    # Opcional por petición (?page / ?page_size), con conteo aproximado en tablas grandes.
+    "DEFAULT_PAGINATION_CLASS": "core.pagination.ApproximatePageNumberPagination",
+    # Proxies delante de Django (ingress = 1): la IP del cliente para el
+    # throttling sale de X-Forwarded-For; con 0 se usa REMOTE_ADDR.
+    "NUM_PROXIES": int(os.getenv("DJANGO_NUM_PROXIES", "0")),
+    "TEST_REQUEST_RENDERER_CLASSES": [
+        "rest_framework.renderers.MultiPartRenderer",
+        "rest_framework.renderers.JSONRenderer",
+        "core.renderers.MsgPackRenderer",
+    ],
+}
+
+# =========================
+# Throttling token bucket en Redis (core/throttling.py)
+# =========================
+THROTTLE_ENABLED = env_bool("THROTTLE_ENABLED", True)
+# Por scope, tasa "N/periodo" por dimensión (ip, username, phone, user, token).
+# THROTTLE_POLICIES (JSON) reemplaza scopes completos.
+THROTTLE_POLICIES = {
+    "login": {"ip": "30/min", "username": "10/min"},
+    "register": {"ip": "20/min", "phone": "5/h"},
+    "order_create": {"user": "20/min", "token": "20/min", "ip": "120/min"},
+    **json.loads(os.getenv("THROTTLE_POLICIES", "{}")),
 }
+# Segundos sin consultar Redis tras un error (se deja pasar mientras tanto)
+THROTTLE_ERROR_BACKOFF = float(os.getenv("THROTTLE_ERROR_BACKOFF", "5"))
+
+# Filas estimadas a partir de las cuales los listados usan conteo aproximado (core/pagination.py)
+APPROX_COUNT_THRESHOLD = int(os.getenv("APPROX_COUNT_THRESHOLD", "100000"))
+
+# "orjson" (si está instalado) o "stdlib"
+JSON_BACKEND = os.getenv("JSON_BACKEND", "orjson")
+
+# Prefijo de país para normalizar teléfonos sin "+" a E.164 (core/phones.py)
+PHONE_COUNTRY_CODE = os.getenv("PHONE_COUNTRY_CODE", "57")
+# Con qué empiezan los números nacionales de ese país (typeahead "57 315…" vs "315…")
+PHONE_NATIONAL_PREFIXES = tuple(os.getenv("PHONE_NATIONAL_PREFIXES", "3,60").split(","))
+
+# Compresión de respuestas (core/compression.py)
+COMPRESSION_MIN_BYTES = int(os.getenv("COMPRESSION_MIN_BYTES", "1024"))
+BROTLI_QUALITY = int(os.getenv("BROTLI_QUALITY", "5"))
 
 # Útil detrás de Ingress / reverse proxy (habilítalo en prod con env)
 if env_bool("DJANGO_USE_PROXY_HEADERS", False):
@@ -13,3 +13,4 @@ if ALLOWED_HOSTS == ["*"]:
 # DJANGO_SECURE_SSL_REDIRECT=1
 # DJANGO_SESSION_COOKIE_SECURE=1
 # DJANGO_CSRF_COOKIE_SECURE=1
+# DJANGO_NUM_PROXIES=1  (IP real del cliente para el throttling)
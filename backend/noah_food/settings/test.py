@@ -10,15 +10,46 @@ DATABASES = {
     "default": {
         "ENGINE": "django.db.backends.sqlite3",
         "NAME": ":memory:",
-    }
+    },
+    "replica": {
+        "ENGINE": "django.db.backends.sqlite3",
+        "NAME": ":memory:",
+        "TEST": {"MIRROR": "default"},
+    },
 }
 
+# El espejo SQLite no ve las transacciones de TestCase: el enrutado a réplica
+# solo se activa en los tests del router (override_settings).
+REPLICA_DATABASES = []
+
 CHANNEL_LAYERS = {
     "default": {
         "BACKEND": "channels.layers.InMemoryChannelLayer",
     }
 }
 
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    }
+}
+
+# Los tests vacían el buffer de eventos explícitamente.
+EVENT_INGEST_BACKEND = "memory"
+EVENT_INGEST_INPROCESS_FLUSH = False
+
+# Métricas solo del proceso de tests (sin ficheros por worker).
+METRICS_DIR = ""
+
+# readyz comprueba en línea en vez de arrancar el hilo monitor.
+HEALTH_MONITOR_THREAD = False
+
+# Sin Redis en los tests: ThrottlingTests lo activa con Redis simulado.
+THROTTLE_ENABLED = False
+
+# Sin hilo de warm-up al importar noah_food.asgi (BenchmarkTests).
+WARMUP_ENABLED = False
+
 PASSWORD_HASHERS = [
     "django.contrib.auth.hashers.MD5PasswordHasher",
 ]
@@ -1,6 +1,7 @@
 # backend/urls.py o noah_food/urls.py
 from django.contrib import admin
 from django.urls import path, include
+from core.request_metrics import metrics_view
 from core.views import healthz, readyz
 
 urlpatterns = [
@@ -9,4 +10,6 @@ urlpatterns = [
      # Probes para Kubernetes
     path("healthz/", healthz, name="healthz"),
     path("readyz/", readyz, name="readyz"),
+    # Prometheus (no se publica en el Ingress; se scrapea por pod)
+    path("metrics", metrics_view, name="metrics"),
 ]
@@ -14,3 +14,7 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'noah_food.settings.dev')
 
 application = get_wsgi_application()
+
+from core import warmup  # noqa: E402
+
+warmup.start()
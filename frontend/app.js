@@ -148,6 +148,11 @@
     getMenuItem: async (id) => req(`/menu-items/${id}/`),
     createOrder: async (payload) => req("/orders/", { method: "POST", body: payload }),
     listOrders: async () => arr(await req("/orders/")),
+    listMyOrders: async ({ cursor = "", limit = 20 } = {}) => {
+      const params = new URLSearchParams({ limit: String(limit) });
+      if (cursor) params.set("cursor", cursor);
+      return req(`/me/orders/?${params}`);
+    },
     getOrder: async (id) => req(`/orders/${id}/`),
     login: async (username, password) => req("/auth/login/", { method: "POST", body: { username, password } }),
     register: async (payload) => req("/auth/register/", { method: "POST", body: payload }),
@@ -155,6 +160,39 @@
     logout: async () => req("/auth/logout/", { method: "POST", body: {} })
   };
 
+  // Eventos de funnel: se acumulan en memoria y se envian en lote a /events/ingest/.
+  const tracker = { queue: [], timer: null };
+
+  function sessionId() {
+    let sid = sessionStorage.getItem("noah_sid");
+    if (!sid) {
+      sid = `${Date.now().toString(36)}-${Math.random().toString(36).slice(2, 10)}`;
+      sessionStorage.setItem("noah_sid", sid);
+    }
+    return sid;
+  }
+
+  function flushTrack(useBeacon) {
+    clearTimeout(tracker.timer);
+    tracker.timer = null;
+    if (!tracker.queue.length) return;
+    const events = tracker.queue.splice(0, 200);
+    if (useBeacon && navigator.sendBeacon) {
+      const blob = new Blob([JSON.stringify({ events })], { type: "application/json" });
+      navigator.sendBeacon(`${apiBase()}/events/ingest/`, blob);
+      return;
+    }
+    req("/events/ingest/", { method: "POST", body: { events } }).catch(() => {});
+  }
+
+  function track(name, meta) {
+    tracker.queue.push({ name, at: new Date().toISOString(), session_id: sessionId(), meta: meta || undefined });
+    if (tracker.queue.length >= 20) flushTrack(false);
+    else if (!tracker.timer) tracker.timer = setTimeout(() => flushTrack(false), 5000);
+  }
+
+  window.addEventListener("pagehide", () => flushTrack(true));
+
   function readCart() {
     try {
       const c = JSON.parse(localStorage.getItem(KEY.cart) || "{}");
@@ -200,6 +238,7 @@
       localStorage.setItem(KEY.restaurant, String(restaurant));
     }
 
+    track("add_to_cart", { menu_item_id: item.id, quantity: q });
     const found = cart.items.find((x) => x.id === item.id);
     if (found) found.quantity += q;
     else {
@@ -381,6 +420,7 @@
   }
   async function initMenu() {
     if (PAGE !== "menu.html") return;
+    track("menu_view");
     const navCats = document.querySelector("nav.px-4.py-4");
     const grid = document.querySelector("main .grid.grid-cols-2");
     const search = document.querySelector("input[placeholder*='Buscar']");
@@ -653,6 +693,7 @@
   }
   function initCheckout() {
     if (PAGE !== "checkout.html") return;
+    if (readCart().items.length) track("checkout");
 
     const backIcon = Array.from(document.querySelectorAll("div.sticky.top-0 span.material-symbols-outlined"))
       .find((el) => (el.textContent || "").trim() === "arrow_back");
@@ -776,8 +817,9 @@
     try {
       if (id) order = await api.getOrder(id);
       else {
-        const list = await api.listOrders();
-        order = list[0] || null;
+        // Resumen del último pedido (keyset, una fila) y luego su detalle.
+        const latest = (await api.listMyOrders({ limit: 1 }))?.results?.[0];
+        order = latest && !latest.archived ? await api.getOrder(latest.id) : null;
       }
     } catch (e) {
       message(timeline, (e.status === 401 || e.status === 403)
@@ -942,8 +984,8 @@
         CANCELLED: "CANCELADO"
       };
 
-      ordersWrap.innerHTML = orders.slice(0, 10).map((order) => {
-        const qty = (order.items || []).reduce((a, i) => a + Number(i.quantity || 0), 0);
+      ordersWrap.innerHTML = orders.map((order) => {
+        const qty = Number(order.items_count || 0);
         const status = statusMap[order.status] || (order.status || "SIN ESTADO");
         const statusColor = order.status === "COMPLETED"
           ? "text-emerald-500"
@@ -971,11 +1013,15 @@
         const user = me?.user || {};
 
         if (nameEl) nameEl.textContent = user.customer_name || user.username || "Usuario";
-        if (subtitleEl) subtitleEl.textContent = user.email || user.username || "";
+        const stats = user.customer_stats;
+        const summary = stats && stats.orders_count
+          ? `${stats.orders_count} pedidos - ${cop(stats.lifetime_value_cop || 0)}`
+          : "";
+        if (subtitleEl) subtitleEl.textContent = summary || user.email || user.username || "";
         setHeaderMode(true);
 
-        const orders = await api.listOrders();
-        renderOrders(orders);
+        const page = await api.listMyOrders();
+        renderOrders(page?.results || []);
       } catch (e) {
         if (e.status === 401 || e.status === 403) {
           saveAuthToken("");
@@ -9,6 +9,7 @@ param(
   [string]$Namespace = "noah-dev",
   [string]$Deployment = "noah-backend",
   [string]$Container = "backend",
+  [string]$WorkerDeployment = "noah-worker",
   [string]$ImageRepo = "noah-backend",
   [string]$Tag = "",
   [string]$MigrateJobName = "noah-backend-migrate",
@@ -59,4 +60,12 @@ if ($currentImage -ne $image) {
   throw "Imagen activa inesperada. Esperada: $image / Actual: $currentImage"
 }
 
+# Worker de segundo plano (k8s/45-worker.yaml): misma imagen en sus dos contenedores.
+kubectl -n $Namespace get deployment $WorkerDeployment 2>$null | Out-Null
+if ($LASTEXITCODE -eq 0) {
+  Write-Host "==> Updating worker image ($Namespace/$WorkerDeployment)..."
+  kubectl -n $Namespace set image "deployment/$WorkerDeployment" "jobs=$image" "outbox=$image" | Out-Null
+  kubectl -n $Namespace rollout status "deployment/$WorkerDeployment" --timeout=240s | Out-Null
+}
+
 Write-Host "==> Release backend OK con imagen inmutable: $currentImage"